@@ -109,8 +109,11 @@ def load_user_config(filename: str):
 
 def save_user_config(filename: str, data: dict):
     path = get_user_file_path(filename)
+    # Пишем на месте, а не через tmp + rename: файл примонтирован в контейнер бота отдельным
+    # bind mount, и новый inode бот бы не увидел. Недописанный JSON бот отвергает и ждет следующей записи
+    payload = json.dumps(data, indent=4)
     with open(path, 'w') as f:
-        json.dump(data, f, indent=4)
+        f.write(payload)
 
 async def get_container_data(name: str):
     if not docker_client: return None, None
@@ -248,14 +251,14 @@ async def process_new_value(message: types.Message, state: FSMContext, user_cont
             
         config[key] = val
         save_user_config(user_context["config_file"], config)
+        # Бот следит за файлом (hot-reload) и применяет значения без рестарта
         await message.answer(
-            f"✅ Saved: {key} = {val}\n⚠️ <b>Restart bot to apply!</b>", 
-            parse_mode="HTML"
+            f"✅ Saved: {key} = {val}\n🔁 Bot applies it live (check logs if rejected)", 
+            parse_mode="HTML",
             reply_markup=main_menu()
         )
     except ValueError:
-        await message.answer("❌ Invalid number format.")
-        reply_markup=main_menu()
+        await message.answer("❌ Invalid number format.", reply_markup=main_menu())
 
     await state.clear()
 
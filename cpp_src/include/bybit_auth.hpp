@@ -0,0 +1,8 @@
+#pragma once
+#include <string>
+
+// Общие хелперы авторизации Bybit V5 WebSocket (используются OrderGateway и приватным стримом)
+std::string hmac_sha256(const std::string& key, const std::string& data);
+
+// Готовый JSON {"op":"auth","args":[key, expires, signature]}
+std::string make_ws_auth_message(const std::string& api_key, const std::string& api_secret, long long ttl_ms = 5000);
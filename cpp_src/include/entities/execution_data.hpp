@@ -5,7 +5,9 @@ struct ExecutionData {
     std::string symbol;
     std::string side;
     std::string order_id;
-    std::string exec_type;
+    std::string order_link_id; // Наш clientOid (сопоставление до прихода order push)
+    std::string exec_id;       // Уникален на fill: дедупликация повторной доставки
+    std::string exec_type;     // Парсер пропускает только "Trade" (без Funding / AdlTrade / BustTrade)
     
     // Поля, которые заполняет парсер
     double exec_price; 
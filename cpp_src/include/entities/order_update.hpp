@@ -0,0 +1,19 @@
+#pragma once
+#include <string>
+
+// Приватный поток "order": состояние нашего ордера после каждого изменения
+struct OrderUpdateData {
+    std::string symbol;
+    std::string order_id;
+    std::string order_link_id;
+    std::string side;
+    std::string order_status;  // New / PartiallyFilled / Filled / Cancelled / Rejected ...
+    std::string order_type;
+
+    double price = 0.0;
+    double qty = 0.0;
+    double cum_exec_qty = 0.0; // Кумулятивный fill (идемпотентен, в отличие от execution)
+    double avg_price = 0.0;
+    bool reduce_only = false;
+    long long timestamp = 0;
+};
@@ -0,0 +1,14 @@
+#pragma once
+#include <string>
+
+// Приватный поток "position": авторитетный размер позиции от биржи
+struct PositionData {
+    std::string symbol;
+    std::string side;          // "Buy" / "Sell" / "" (нет позиции)
+
+    double size = 0.0;         // Всегда >= 0, направление в side
+    double entry_price = 0.0;
+    double mark_price = 0.0;
+    double unrealised_pnl = 0.0;
+    long long timestamp = 0;
+};
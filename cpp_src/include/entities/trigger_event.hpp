@@ -0,0 +1,15 @@
+#pragma once
+#include <string>
+
+// Уведомление в Python: триггер сработал, reduce-only ордер отправлен в OrderGateway (или отклонен им)
+struct TriggerEvent {
+    std::string trigger_id;
+    std::string symbol;
+    std::string exit_side;
+    double qty;
+    double trigger_price; // Порог
+    double book_price;    // Лучшая цена стакана в момент срабатывания
+    std::string order_link_id;
+    long long timestamp;  // Локальное время отправки (ms)
+    std::string reject_reason; // Пусто -> ордер ушел; иначе отказ gateway (риск, лимит частоты, нет соединения)
+};
@@ -3,15 +3,21 @@
 #include <vector>
 #include <functional>
 #include <memory>
+#include <mutex>
+#include <unordered_set>
 #include <ixwebsocket/IXWebSocket.h>
 #include "entities/tick_data.hpp"
 #include "entities/market_depth.hpp"
 #include "entities/execution_data.hpp"
+#include "entities/order_update.hpp"
+#include "entities/position_data.hpp"
 #include "parsers/imessage_parser.hpp"
+#include "trigger_engine.hpp"
 
 class ExchangeStreamer {
 public:
-    ExchangeStreamer(std::shared_ptr<IMessageParser> parser);
+    ExchangeStreamer(std::shared_ptr<IMessageParser> parser,
+                     const std::string& url = "wss://stream.bybit.com/v5/public/linear");
     ~ExchangeStreamer();
 
     void start();
@@ -19,6 +25,13 @@ public:
     
     // Добавляем этот метод, чтобы main.cpp не ругался
     void add_symbol(const std::string& symbol); 
+    // Пачка символов -> одно subscribe-сообщение (ротация, холодный старт)
+    void add_symbols(const std::vector<std::string>& symbols);
+    // Отписка (orderbook + trades), символ убирается из списка переподписки, стакан TriggerEngine освобождается
+    void remove_symbol(const std::string& symbol);
+
+    // Приватный режим: после Open шлем auth и подписываемся на order / execution / position
+    void set_credentials(const std::string& api_key, const std::string& api_secret);
 
     void set_tick_callback(std::function<void(const TickData&)> cb);
     
@@ -27,16 +40,41 @@ public:
     void set_orderbook_callback(std::function<void(const OrderBookSnapshot&)> cb);
     
     void set_execution_callback(std::function<void(const ExecutionData&)> cb);
+    void set_order_callback(std::function<void(const OrderUpdateData&)> cb);
+    void set_position_callback(std::function<void(const PositionData&)> cb);
+
+    // Нативные стопы: проверяются на каждом апдейте стакана ДО передачи в Python
+    void set_trigger_engine(std::shared_ptr<TriggerEngine> engine);
 
 private:
     void on_message(const ix::WebSocketMessagePtr& msg);
+    void handle_auth_response(const std::string& payload);
+    bool is_active(const std::string& symbol) const;
+    void send_topics(const std::string& op, const std::vector<std::string>& symbols);
     
     ix::WebSocket webSocket;
     std::shared_ptr<IMessageParser> parser_;
+    // Пишет Python (add/remove), читает поток ixwebsocket (Open, фильтр сообщений)
+    mutable std::mutex symbols_mutex_;
     std::vector<std::string> symbols_;
+    std::unordered_set<std::string> active_symbols_;
     bool running_ = false;
 
+    std::string api_key_;
+    std::string api_secret_;
+    bool authenticated_ = false;
+
+    // Буферы пачек (переиспользуем, чтобы не аллоцировать на каждое сообщение)
+    std::vector<TickData> ticks_buf_;
+    std::vector<ExecutionData> execs_buf_;
+    std::vector<OrderUpdateData> orders_buf_;
+    std::vector<PositionData> positions_buf_;
+
+    std::shared_ptr<TriggerEngine> trigger_engine_;
+
     std::function<void(const TickData&)> tick_cb_;
     std::function<void(const OrderBookSnapshot&)> depth_cb_;
     std::function<void(const ExecutionData&)> exec_cb_;
-};
\ No newline at end of file
+    std::function<void(const OrderUpdateData&)> order_cb_;
+    std::function<void(const PositionData&)> position_cb_;
+};
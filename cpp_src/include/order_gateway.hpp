@@ -2,7 +2,14 @@
 #include <string>
 #include <functional>
 #include <memory>
+#include <atomic>
+#include <mutex>
+#include <unordered_map>
+#include <cstdint>
 #include <ixwebsocket/IXWebSocket.h>
+#include "risk_gate.hpp"
+
+class TriggerEngine;
 
 class OrderGateway {
 public:
@@ -12,8 +19,9 @@ public:
     void connect();
     void stop();
     
-    // Обновленная сигнатура с SL и TP
-    void send_order(
+    // Обновленная сигнатура с SL и TP.
+    // Возвращает "" если ордер отправлен, иначе причину отказа (риск-гейт / нет авторизации)
+    std::string send_order(
         const std::string& symbol, 
         const std::string& side, 
         double qty, 
@@ -26,19 +34,73 @@ public:
         double take_profit = 0.0
     );
     
+    // Спекулятивный вход: ордер сериализуется заранее, fire_staged = только запись в сокет.
+    // Возвращает handle (0 -> ошибка)
+    uint64_t stage_order(
+        const std::string& symbol,
+        const std::string& side,
+        double qty,
+        double price,
+        const std::string& order_link_id,
+        const std::string& order_type = "Limit",
+        const std::string& time_in_force = "PostOnly",
+        bool reduce_only = false,
+        double stop_loss = 0.0,
+        double take_profit = 0.0
+    );
+    std::string fire_staged(uint64_t handle);
+    bool discard_staged(uint64_t handle);
+    size_t staged_count() const;
+
     void cancel_order(const std::string& symbol, const std::string& order_id);
+
+    // --- Риск-гейт ---
+    void set_risk_limits(const RiskLimits& limits);
+    RiskLimits get_risk_limits() const;
+    void update_position(const std::string& symbol, double signed_qty, double price);
+    void record_realized_pnl(double pnl);
+    void set_daily_pnl(double pnl);
+    // Резерв входа по orderLinkId: остаток из ledger, 0 -> снять
+    void update_reservation(const std::string& order_link_id, double leaves_qty);
+    void release_reservation(const std::string& order_link_id);
+    RiskStats risk_stats() const;
+    // Стакан TriggerEngine как референс для price band (weak_ptr: без циклической ссылки)
+    void set_reference_book(std::shared_ptr<TriggerEngine> engine);
     void set_on_order_update(std::function<void(const std::string&)> cb);
+    bool is_authenticated() const { return authenticated_; }
 
 private:
     void authenticate();
-    std::string generate_signature(long long expires);
     void on_message(const ix::WebSocketMessagePtr& msg);
+    std::string build_order_message(
+        const std::string& symbol, const std::string& side, double qty, double price,
+        const std::string& order_link_id, const std::string& order_type,
+        const std::string& time_in_force, bool reduce_only,
+        double stop_loss, double take_profit
+    ) const;
 
     ix::WebSocket webSocket;
     std::string api_key_;
     std::string api_secret_;
     std::string url_;
-    bool authenticated_ = false;
+    // Читается из потока стримера (TriggerEngine)
+    std::atomic<bool> authenticated_{false};
     
     std::function<void(const std::string&)> on_order_update_cb_;
+
+    RiskGate risk_;
+
+    // handle -> готовый JSON "order.create" + параметры для риск-проверки при fire
+    struct StagedOrder {
+        std::string payload;
+        std::string symbol;
+        std::string side;
+        double qty;
+        double price;
+        bool reduce_only;
+        std::string order_link_id;
+    };
+    mutable std::mutex staged_mutex_;
+    std::unordered_map<uint64_t, StagedOrder> staged_;
+    uint64_t next_handle_ = 1;
 };
\ No newline at end of file
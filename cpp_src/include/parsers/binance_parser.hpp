@@ -7,10 +7,12 @@ public:
     // Обновляем сигнатуру метода, чтобы она соответствовала интерфейсу IMessageParser
     ParseResultType parse(
         const std::string& payload, 
-        TickData& out_tick, 
+        std::vector<TickData>& out_ticks, 
         OrderBookSnapshot& out_depth,
         TickerData& out_ticker,
-        ExecutionData& out_exec // <--- Добавили обязательный аргумент
+        std::vector<ExecutionData>& out_execs,
+        std::vector<OrderUpdateData>& out_orders,
+        std::vector<PositionData>& out_positions
     ) override;
 
 private:
@@ -1,16 +1,21 @@
 #pragma once
 #include <string>
+#include <vector>
 #include "../entities/tick_data.hpp"
 #include "../entities/market_depth.hpp"
 #include "../entities/ticker_data.hpp"
 #include "../entities/execution_data.hpp" 
+#include "../entities/order_update.hpp"
+#include "../entities/position_data.hpp"
 
 enum class ParseResultType {
     None,
     Trade,
     Depth,
     Ticker,
-    Execution 
+    Execution,
+    Order,
+    Position
 };
 
 class IMessageParser {
@@ -19,9 +24,12 @@ public:
     
     virtual ParseResultType parse(
         const std::string& payload, 
-        TickData& out_tick, 
+        // Сделки и приватные потоки приходят пачками -> вектора (парсер очищает их сам)
+        std::vector<TickData>& out_ticks, 
         OrderBookSnapshot& out_depth,
         TickerData& out_ticker,
-        ExecutionData& out_exec 
+        std::vector<ExecutionData>& out_execs,
+        std::vector<OrderUpdateData>& out_orders,
+        std::vector<PositionData>& out_positions
     ) = 0;
 };
\ No newline at end of file
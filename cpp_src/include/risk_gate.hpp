@@ -0,0 +1,111 @@
+#pragma once
+#include <string>
+#include <unordered_map>
+#include <mutex>
+#include <functional>
+#include <chrono>
+
+// Лимиты пре-трейд контроля. 0 -> лимит отключен
+struct RiskLimits {
+    bool enabled = true;
+    double max_order_notional = 0.0;   // USDT на один ордер
+    double max_symbol_notional = 0.0;  // USDT позиции по одному символу (с учетом ордера)
+    double max_total_notional = 0.0;   // USDT по всем символам
+    int max_open_positions = 0;        // Символов с позицией или входом в полете (< 0 -> новые позиции запрещены)
+    double price_band_pct = 0.0;       // Лимитная цена не дальше N% от mid стакана
+    double max_orders_per_sec = 0.0;   // Глобально
+    double max_symbol_orders_per_sec = 0.0;
+    double max_daily_loss = 0.0;       // USDT (положительное число), сброс в 00:00 UTC
+};
+
+// Срез состояния для мониторинга из Python
+struct RiskStats {
+    double total_notional;
+    double pending_notional;
+    int open_positions;
+    double daily_pnl;
+    long long rejects;
+    std::string last_reject;
+};
+
+/*
+ * Проверки O(1) на каждый исходящий ордер (хэш-таблица + token bucket).
+ * Reduce-only ордера не ограничиваются: выход из позиции блокировать нельзя.
+ * Вход, прошедший проверку, резервирует свой объем до fill/отмены/отказа:
+ * иначе несколько ордеров в полете проходят лимиты позиций по одному.
+ */
+class RiskGate {
+public:
+    // Источник (bid, ask) для price band и оценки notional рыночных ордеров
+    using ReferenceFn = std::function<bool(const std::string&, double&, double&)>;
+
+    void set_limits(const RiskLimits& limits);
+    RiskLimits get_limits() const;
+    void set_reference_fn(ReferenceFn fn);
+
+    // signed_qty: > 0 лонг, < 0 шорт
+    void update_position(const std::string& symbol, double signed_qty, double price);
+    void record_realized_pnl(double pnl);
+    // Реализованный PnL с 00:00 UTC (после рестарта), заменяет накопленное значение
+    void set_daily_pnl(double pnl);
+
+    // "" -> ордер разрешен, иначе код причины. consume=false — проверка без расхода rate-лимита.
+    // reserve_id (orderLinkId) непустой -> разрешенный ордер резервирует экспозицию
+    std::string check(const std::string& symbol, const std::string& side, double qty,
+                      double price, bool reduce_only, bool consume = true,
+                      const std::string& reserve_id = "");
+
+    // Неисполненный остаток ордера (leaves_qty); 0 -> резерв снят (fill, отмена, отказ)
+    void update_reservation(const std::string& order_link_id, double leaves_qty);
+    void release(const std::string& order_link_id);
+
+    RiskStats stats() const;
+
+private:
+    struct TokenBucket {
+        double tokens = -1.0; // < 0 -> еще не инициализирован
+        std::chrono::steady_clock::time_point last;
+
+        bool take(double rate, std::chrono::steady_clock::time_point now, bool consume);
+    };
+
+    struct SymbolState {
+        double qty = 0.0;
+        double price = 0.0;
+        double pending_qty = 0.0;      // Знаковый остаток входов в полете
+        double pending_notional = 0.0;
+        int pending_orders = 0;
+        TokenBucket bucket;
+    };
+
+    struct Reservation {
+        std::string symbol;
+        double signed_qty;
+        double price;
+    };
+
+    std::string reject(const char* reason);
+    void roll_day();
+    void reserve(const std::string& order_link_id, const std::string& symbol, double signed_qty, double price);
+    // Изменение резерва с пересчетом агрегатов; signed_qty == 0 -> резерв удаляется
+    void resize(std::unordered_map<std::string, Reservation>::iterator it, double signed_qty);
+    // Символ занимает слот max_open_positions: позиция или вход в полете
+    static bool occupied(const SymbolState& st);
+
+    mutable std::mutex mutex_;
+    RiskLimits limits_;
+    ReferenceFn reference_fn_;
+
+    std::unordered_map<std::string, SymbolState> symbols_;
+    std::unordered_map<std::string, Reservation> reservations_;
+    double total_notional_ = 0.0;
+    double pending_notional_ = 0.0;
+    int open_positions_ = 0;
+    TokenBucket global_bucket_;
+
+    double daily_pnl_ = 0.0;
+    long long day_index_ = 0;
+
+    long long rejects_ = 0;
+    std::string last_reject_;
+};
@@ -0,0 +1,77 @@
+#pragma once
+#include <string>
+#include <map>
+#include <unordered_map>
+#include <vector>
+#include <mutex>
+#include <memory>
+#include <functional>
+#include "order_gateway.hpp"
+#include "entities/market_depth.hpp"
+#include "entities/trigger_event.hpp"
+
+// Условие относительно лучшей цены стакана (строгое сравнение)
+enum class TriggerCondition {
+    BidBelow, // best_bid < price  -> закрываем лонг
+    AskAbove  // best_ask > price  -> закрываем шорт
+};
+
+struct PriceTrigger {
+    std::string trigger_id;
+    std::string symbol;
+    TriggerCondition condition;
+    double trigger_price;
+    std::string exit_side; // Сторона reduce-only ордера
+    double qty;
+};
+
+/*
+ * Нативные стопы: проверяются в потоке стримера сразу после применения апдейта стакана
+ * и отправляются напрямую через OrderGateway (Market IOC, reduce-only).
+ * Python узнает о срабатывании уже постфактум через callback.
+ */
+class TriggerEngine {
+public:
+    explicit TriggerEngine(std::shared_ptr<OrderGateway> gateway);
+
+    // Повторный вызов с тем же trigger_id заменяет триггер (например, после добора fill'а)
+    void add_trigger(const std::string& trigger_id, const std::string& symbol,
+                     TriggerCondition condition, double trigger_price,
+                     const std::string& exit_side, double qty);
+
+    // false -> триггера нет: он уже сработал (выход отправлен из C++) или не регистрировался
+    bool remove_trigger(const std::string& trigger_id);
+    void clear_symbol(const std::string& symbol);
+    size_t trigger_count() const;
+
+    // Вызывается из ExchangeStreamer на каждый апдейт стакана
+    void on_depth(const OrderBookSnapshot& depth);
+    // То же из Python, когда стакан приходит не из ExchangeStreamer (общий демон market data)
+    void on_levels(const std::string& symbol, bool is_snapshot,
+                   const std::vector<std::pair<double, double>>& bids,
+                   const std::vector<std::pair<double, double>>& asks);
+
+    double best_bid(const std::string& symbol) const;
+    double best_ask(const std::string& symbol) const;
+    // Оба края под одним локом (референс для RiskGate)
+    bool top_of_book(const std::string& symbol, double& bid, double& ask) const;
+    // Копия текущего стакана (is_snapshot=true) — для ресинхронизации потребителей (воркеры, демон)
+    OrderBookSnapshot snapshot(const std::string& symbol, size_t max_levels = 50) const;
+
+    void set_trigger_callback(std::function<void(const TriggerEvent&)> cb);
+
+private:
+    struct BookState {
+        std::map<double, double, std::greater<double>> bids;
+        std::map<double, double> asks;
+    };
+
+    static void apply_levels(BookState& book, const OrderBookSnapshot& depth);
+
+    std::shared_ptr<OrderGateway> gateway_;
+    mutable std::mutex mutex_;
+    std::unordered_map<std::string, BookState> books_;
+    std::unordered_map<std::string, std::vector<PriceTrigger>> triggers_; // symbol -> триггеры
+
+    std::function<void(const TriggerEvent&)> trigger_cb_;
+};
@@ -0,0 +1,31 @@
+#include "../include/bybit_auth.hpp"
+#include <chrono>
+#include <sstream>
+#include <iomanip>
+#include <openssl/hmac.h>
+#include <nlohmann/json.hpp>
+
+std::string hmac_sha256(const std::string& key, const std::string& data) {
+    unsigned char* digest;
+    unsigned int len = 0;
+    digest = HMAC(EVP_sha256(), 
+                  (const void*)key.c_str(), key.length(), 
+                  (const unsigned char*)data.c_str(), data.length(), 
+                  NULL, &len);
+    std::stringstream ss;
+    for(unsigned int i = 0; i < len; i++) {
+        ss << std::hex << std::setw(2) << std::setfill('0') << (int)digest[i];
+    }
+    return ss.str();
+}
+
+std::string make_ws_auth_message(const std::string& api_key, const std::string& api_secret, long long ttl_ms) {
+    auto now = std::chrono::system_clock::now();
+    long long expires = std::chrono::duration_cast<std::chrono::milliseconds>(now.time_since_epoch()).count() + ttl_ms;
+    std::string signature = hmac_sha256(api_secret, "GET/realtime" + std::to_string(expires));
+
+    nlohmann::json auth_msg;
+    auth_msg["op"] = "auth";
+    auth_msg["args"] = {api_key, expires, signature};
+    return auth_msg.dump();
+}
@@ -1,14 +1,16 @@
 #include "../include/exchange_streamer.hpp"
+#include "../include/bybit_auth.hpp"
 #include <iostream>
+#include <algorithm>
 #include <ixwebsocket/IXNetSystem.h>
 #include <nlohmann/json.hpp> // <--- ОБЯЗАТЕЛЬНО
 
-ExchangeStreamer::ExchangeStreamer(std::shared_ptr<IMessageParser> parser) 
+ExchangeStreamer::ExchangeStreamer(std::shared_ptr<IMessageParser> parser, const std::string& url) 
     : parser_(parser) 
 {
     ix::initNetSystem();
-    // Bybit Linear Public URL
-    webSocket.setUrl("wss://stream.bybit.com/v5/public/linear");
+    // По умолчанию Bybit Linear Public URL, для приватного стрима передаем /v5/private
+    webSocket.setUrl(url);
     webSocket.setPingInterval(20);
     
     webSocket.setOnMessageCallback([this](const ix::WebSocketMessagePtr& msg) {
@@ -21,17 +23,59 @@ ExchangeStreamer::~ExchangeStreamer() {
 }
 
 void ExchangeStreamer::add_symbol(const std::string& symbol) {
-    symbols_.push_back(symbol);
+    add_symbols({symbol});
+}
+
+void ExchangeStreamer::add_symbols(const std::vector<std::string>& symbols) {
+    std::vector<std::string> added;
+    {
+        std::lock_guard<std::mutex> lock(symbols_mutex_);
+        for (const auto& symbol : symbols) {
+            if (!active_symbols_.insert(symbol).second) continue; // Уже в стриме
+            symbols_.push_back(symbol);
+            added.push_back(symbol);
+        }
+    }
+    if (added.empty()) return;
     
-    // ФИКС: Если сокет уже открыт — подписываемся мгновенно
+    // ФИКС: Если сокет уже открыт — подписываемся мгновенно, одним сообщением на всю пачку
+    if (webSocket.getReadyState() == ix::ReadyState::Open) {
+        send_topics("subscribe", added);
+        std::cout << "[C++] Dynamic Subscribe: " << added.size() << " symbol(s)" << std::endl;
+    }
+}
+
+void ExchangeStreamer::remove_symbol(const std::string& symbol) {
+    {
+        std::lock_guard<std::mutex> lock(symbols_mutex_);
+        if (active_symbols_.erase(symbol) == 0) return;
+        symbols_.erase(std::remove(symbols_.begin(), symbols_.end(), symbol), symbols_.end());
+    }
+
     if (webSocket.getReadyState() == ix::ReadyState::Open) {
-        nlohmann::json msg;
-        msg["op"] = "subscribe";
-        // Подписываемся на стакан (50 уровней) и сделки
-        msg["args"] = {"orderbook.50." + symbol, "publicTrade." + symbol};
-        webSocket.send(msg.dump());
-        std::cout << "[C++] Dynamic Subscribe: " << symbol << std::endl;
+        send_topics("unsubscribe", {symbol});
+        std::cout << "[C++] Unsubscribe: " << symbol << std::endl;
     }
+    // Сообщения, уже летящие по сокету, отсекаются в on_message и не воскресят стакан
+    if (trigger_engine_) trigger_engine_->clear_symbol(symbol);
+}
+
+bool ExchangeStreamer::is_active(const std::string& symbol) const {
+    std::lock_guard<std::mutex> lock(symbols_mutex_);
+    return active_symbols_.count(symbol) > 0;
+}
+
+void ExchangeStreamer::send_topics(const std::string& op, const std::vector<std::string>& symbols) {
+    nlohmann::json msg;
+    msg["op"] = op;
+    // Стакан (50 уровней) и сделки
+    std::vector<std::string> args;
+    for (const auto& s : symbols) {
+        args.push_back("orderbook.50." + s);
+        args.push_back("publicTrade." + s);
+    }
+    msg["args"] = args;
+    webSocket.send(msg.dump());
 }
 
 void ExchangeStreamer::start() {
@@ -55,45 +99,97 @@ void ExchangeStreamer::set_execution_callback(std::function<void(const Execution
     exec_cb_ = cb;
 }
 
+void ExchangeStreamer::set_order_callback(std::function<void(const OrderUpdateData&)> cb) {
+    order_cb_ = cb;
+}
+
+void ExchangeStreamer::set_position_callback(std::function<void(const PositionData&)> cb) {
+    position_cb_ = cb;
+}
+
+void ExchangeStreamer::set_trigger_engine(std::shared_ptr<TriggerEngine> engine) {
+    trigger_engine_ = engine;
+}
+
+void ExchangeStreamer::set_credentials(const std::string& api_key, const std::string& api_secret) {
+    api_key_ = api_key;
+    api_secret_ = api_secret;
+}
+
+void ExchangeStreamer::handle_auth_response(const std::string& payload) {
+    // Ответ на auth не имеет topic, парсер его пропускает -> проверяем строку напрямую
+    if (payload.find("\"success\":true") != std::string::npos) {
+        authenticated_ = true;
+        std::cout << "[C++] ✅ Private Stream AUTH SUCCESS!" << std::endl;
+
+        nlohmann::json sub_msg;
+        sub_msg["op"] = "subscribe";
+        sub_msg["args"] = {"order", "execution", "position"};
+        webSocket.send(sub_msg.dump());
+    } else {
+        std::cerr << "[C++] ❌ Private Stream AUTH FAILED: " << payload << std::endl;
+    }
+}
+
 void ExchangeStreamer::on_message(const ix::WebSocketMessagePtr& msg) {
     // 1. Обработка подключения
     if (msg->type == ix::WebSocketMessageType::Open) {
-        std::cout << "[C++] Connected to Bybit Public Stream!" << std::endl;
+        std::cout << "[C++] Connected to Bybit Stream!" << std::endl;
+
+        // Приватный режим: каждый реконнект требует новой авторизации
+        authenticated_ = false;
+        if (!api_key_.empty()) {
+            webSocket.send(make_ws_auth_message(api_key_, api_secret_));
+        }
         
-        // ФИКС: Подписываемся на все накопленные символы при старте
-        if (!symbols_.empty()) {
-            nlohmann::json sub_msg;
-            sub_msg["op"] = "subscribe";
-            std::vector<std::string> args;
-            for (const auto& s : symbols_) {
-                args.push_back("orderbook.50." + s);
-                args.push_back("publicTrade." + s);
-            }
-            sub_msg["args"] = args;
-            webSocket.send(sub_msg.dump());
-            std::cout << "[C++] Batch Subscribe for " << symbols_.size() << " symbols sent." << std::endl;
+        // ФИКС: Подписываемся на все накопленные символы при старте (и после реконнекта)
+        std::vector<std::string> symbols;
+        {
+            std::lock_guard<std::mutex> lock(symbols_mutex_);
+            symbols = symbols_;
+        }
+        if (!symbols.empty()) {
+            send_topics("subscribe", symbols);
+            std::cout << "[C++] Batch Subscribe for " << symbols.size() << " symbols sent." << std::endl;
         }
     }
     // 2. Обработка данных
     else if (msg->type == ix::WebSocketMessageType::Message) {
+        if (!api_key_.empty() && !authenticated_ && msg->str.find("\"op\":\"auth\"") != std::string::npos) {
+            handle_auth_response(msg->str);
+            return;
+        }
+
         if (parser_) {
-            TickData tick;
             OrderBookSnapshot depth;
             TickerData ticker;
-            ExecutionData exec;
             
             // Парсим сообщение
-            ParseResultType res = parser_->parse(msg->str, tick, depth, ticker, exec);
+            ParseResultType res = parser_->parse(msg->str, ticks_buf_, depth, ticker, execs_buf_, orders_buf_, positions_buf_);
             
             // Роутинг
             if (res == ParseResultType::Trade && tick_cb_) {
-                tick_cb_(tick);
+                for (const auto& tick : ticks_buf_) {
+                    if (is_active(tick.symbol)) tick_cb_(tick);
+                }
             } 
-            else if (res == ParseResultType::Depth && depth_cb_) {
-                depth_cb_(depth);
+            else if (res == ParseResultType::Depth) {
+                if (!is_active(depth.symbol)) return; // Хвост после отписки
+                // Сначала стопы (без GIL), потом Python
+                if (trigger_engine_) trigger_engine_->on_depth(depth);
+                if (depth_cb_) depth_cb_(depth);
+            }
+            // Приватные события (только при set_credentials)
+            else if (res == ParseResultType::Execution && exec_cb_) {
+                for (const auto& e : execs_buf_) exec_cb_(e);
+            }
+            else if (res == ParseResultType::Order && order_cb_) {
+                for (const auto& o : orders_buf_) order_cb_(o);
+            }
+            else if (res == ParseResultType::Position && position_cb_) {
+                for (const auto& p : positions_buf_) position_cb_(p);
             }
-            // Execution и Ticker здесь обычно не прилетают (они в других потоках/топиках), 
-            // но структуру сохраняем.
+            // Ticker здесь обычно не прилетает (другой поток/топик), но структуру сохраняем.
         }
     }
     // 3. Ошибки
@@ -3,9 +3,13 @@
 #include <pybind11/stl.h> 
 #include "exchange_streamer.hpp"
 #include "order_gateway.hpp"
+#include "trigger_engine.hpp"
 #include "parsers/bybit_parser.hpp"
 #include "entities/tick_data.hpp"
 #include "entities/execution_data.hpp"
+#include "entities/order_update.hpp"
+#include "entities/position_data.hpp"
+#include "entities/trigger_event.hpp"
 
 namespace py = pybind11;
 
@@ -53,6 +57,8 @@ PYBIND11_MODULE(hft_core, m) {
         .def_readwrite("symbol", &ExecutionData::symbol)
         .def_readwrite("side", &ExecutionData::side)
         .def_readwrite("order_id", &ExecutionData::order_id)
+        .def_readwrite("order_link_id", &ExecutionData::order_link_id)
+        .def_readwrite("exec_id", &ExecutionData::exec_id)
         .def_readwrite("exec_type", &ExecutionData::exec_type)
         // Важно: биндим те поля, которые заполняет парсер
         .def_readwrite("exec_price", &ExecutionData::exec_price) 
@@ -60,14 +66,75 @@ PYBIND11_MODULE(hft_core, m) {
         .def_readwrite("is_maker", &ExecutionData::is_maker)
         .def_readwrite("timestamp", &ExecutionData::timestamp);
 
+    // --- OrderUpdateData (приватный поток order) ---
+    py::class_<OrderUpdateData>(m, "OrderUpdateData")
+        .def(py::init<>())
+        .def_readwrite("symbol", &OrderUpdateData::symbol)
+        .def_readwrite("order_id", &OrderUpdateData::order_id)
+        .def_readwrite("order_link_id", &OrderUpdateData::order_link_id)
+        .def_readwrite("side", &OrderUpdateData::side)
+        .def_readwrite("order_status", &OrderUpdateData::order_status)
+        .def_readwrite("order_type", &OrderUpdateData::order_type)
+        .def_readwrite("price", &OrderUpdateData::price)
+        .def_readwrite("qty", &OrderUpdateData::qty)
+        .def_readwrite("cum_exec_qty", &OrderUpdateData::cum_exec_qty)
+        .def_readwrite("avg_price", &OrderUpdateData::avg_price)
+        .def_readwrite("reduce_only", &OrderUpdateData::reduce_only)
+        .def_readwrite("timestamp", &OrderUpdateData::timestamp);
+
+    // --- PositionData (приватный поток position) ---
+    py::class_<PositionData>(m, "PositionData")
+        .def(py::init<>())
+        .def_readwrite("symbol", &PositionData::symbol)
+        .def_readwrite("side", &PositionData::side)
+        .def_readwrite("size", &PositionData::size)
+        .def_readwrite("entry_price", &PositionData::entry_price)
+        .def_readwrite("mark_price", &PositionData::mark_price)
+        .def_readwrite("unrealised_pnl", &PositionData::unrealised_pnl)
+        .def_readwrite("timestamp", &PositionData::timestamp);
+
+    // --- TriggerEvent (нативный стоп сработал) ---
+    py::class_<TriggerEvent>(m, "TriggerEvent")
+        .def(py::init<>())
+        .def_readwrite("trigger_id", &TriggerEvent::trigger_id)
+        .def_readwrite("symbol", &TriggerEvent::symbol)
+        .def_readwrite("exit_side", &TriggerEvent::exit_side)
+        .def_readwrite("qty", &TriggerEvent::qty)
+        .def_readwrite("trigger_price", &TriggerEvent::trigger_price)
+        .def_readwrite("book_price", &TriggerEvent::book_price)
+        .def_readwrite("order_link_id", &TriggerEvent::order_link_id)
+        .def_readwrite("timestamp", &TriggerEvent::timestamp)
+        .def_readwrite("reject_reason", &TriggerEvent::reject_reason);
+
     // --- Парсеры ---
     py::class_<IMessageParser, std::shared_ptr<IMessageParser>>(m, "IMessageParser");
     
     py::class_<BybitParser, IMessageParser, std::shared_ptr<BybitParser>>(m, "BybitParser")
         .def(py::init<>());
 
+    // --- Риск-гейт ---
+    py::class_<RiskLimits>(m, "RiskLimits")
+        .def(py::init<>())
+        .def_readwrite("enabled", &RiskLimits::enabled)
+        .def_readwrite("max_order_notional", &RiskLimits::max_order_notional)
+        .def_readwrite("max_symbol_notional", &RiskLimits::max_symbol_notional)
+        .def_readwrite("max_total_notional", &RiskLimits::max_total_notional)
+        .def_readwrite("max_open_positions", &RiskLimits::max_open_positions)
+        .def_readwrite("price_band_pct", &RiskLimits::price_band_pct)
+        .def_readwrite("max_orders_per_sec", &RiskLimits::max_orders_per_sec)
+        .def_readwrite("max_symbol_orders_per_sec", &RiskLimits::max_symbol_orders_per_sec)
+        .def_readwrite("max_daily_loss", &RiskLimits::max_daily_loss);
+
+    py::class_<RiskStats>(m, "RiskStats")
+        .def_readonly("total_notional", &RiskStats::total_notional)
+        .def_readonly("pending_notional", &RiskStats::pending_notional)
+        .def_readonly("open_positions", &RiskStats::open_positions)
+        .def_readonly("daily_pnl", &RiskStats::daily_pnl)
+        .def_readonly("rejects", &RiskStats::rejects)
+        .def_readonly("last_reject", &RiskStats::last_reject);
+
     // --- OrderGateway (НОВОЕ) ---
-    py::class_<OrderGateway>(m, "OrderGateway")
+    py::class_<OrderGateway, std::shared_ptr<OrderGateway>>(m, "OrderGateway")
         .def(py::init<std::string, std::string, bool>(), 
              py::arg("api_key"), py::arg("api_secret"), py::arg("testnet") = false)
         .def("connect", &OrderGateway::connect, py::call_guard<py::gil_scoped_release>())
@@ -87,9 +154,39 @@ PYBIND11_MODULE(hft_core, m) {
              py::arg("stop_loss") = 0.0,   // <---
              py::arg("take_profit") = 0.0  // <---
         )     
+        .def("stage_order", &OrderGateway::stage_order,
+             py::call_guard<py::gil_scoped_release>(),
+             py::arg("symbol"),
+             py::arg("side"),
+             py::arg("qty"),
+             py::arg("price"),
+             py::arg("order_link_id"),
+             py::arg("order_type") = "Limit",
+             py::arg("time_in_force") = "PostOnly",
+             py::arg("reduce_only") = false,
+             py::arg("stop_loss") = 0.0,
+             py::arg("take_profit") = 0.0
+        )
+        .def("fire_staged", &OrderGateway::fire_staged,
+             py::call_guard<py::gil_scoped_release>(), py::arg("handle"))
+        .def("discard_staged", &OrderGateway::discard_staged,
+             py::call_guard<py::gil_scoped_release>(), py::arg("handle"))
+        .def("staged_count", &OrderGateway::staged_count)
         .def("cancel_order", &OrderGateway::cancel_order, 
              py::call_guard<py::gil_scoped_release>(),
              py::arg("symbol"), py::arg("order_id"))
+        .def("is_authenticated", &OrderGateway::is_authenticated)
+        .def("set_risk_limits", &OrderGateway::set_risk_limits, py::arg("limits"))
+        .def("get_risk_limits", &OrderGateway::get_risk_limits)
+        .def("update_position", &OrderGateway::update_position,
+             py::arg("symbol"), py::arg("signed_qty"), py::arg("price"))
+        .def("record_realized_pnl", &OrderGateway::record_realized_pnl, py::arg("pnl"))
+        .def("set_daily_pnl", &OrderGateway::set_daily_pnl, py::arg("pnl"))
+        .def("update_reservation", &OrderGateway::update_reservation,
+             py::arg("order_link_id"), py::arg("leaves_qty"))
+        .def("release_reservation", &OrderGateway::release_reservation, py::arg("order_link_id"))
+        .def("risk_stats", &OrderGateway::risk_stats)
+        .def("set_reference_book", &OrderGateway::set_reference_book, py::arg("engine"))
         .def("set_on_order_update", [](OrderGateway &self, std::function<void(const std::string&)> cb) {
             self.set_on_order_update([cb](const std::string& msg) {
                 py::gil_scoped_acquire acquire; 
@@ -97,10 +194,45 @@ PYBIND11_MODULE(hft_core, m) {
             });
         });
 
+    // --- TriggerEngine (нативные стопы) ---
+    py::enum_<TriggerCondition>(m, "TriggerCondition")
+        .value("BidBelow", TriggerCondition::BidBelow)
+        .value("AskAbove", TriggerCondition::AskAbove);
+
+    py::class_<TriggerEngine, std::shared_ptr<TriggerEngine>>(m, "TriggerEngine")
+        .def(py::init<std::shared_ptr<OrderGateway>>(), py::arg("gateway"))
+        .def("add_trigger", &TriggerEngine::add_trigger,
+             py::call_guard<py::gil_scoped_release>(),
+             py::arg("trigger_id"), py::arg("symbol"), py::arg("condition"),
+             py::arg("trigger_price"), py::arg("exit_side"), py::arg("qty"))
+        .def("remove_trigger", &TriggerEngine::remove_trigger,
+             py::call_guard<py::gil_scoped_release>(), py::arg("trigger_id"))
+        .def("clear_symbol", &TriggerEngine::clear_symbol,
+             py::call_guard<py::gil_scoped_release>(), py::arg("symbol"))
+        .def("trigger_count", &TriggerEngine::trigger_count)
+        .def("best_bid", &TriggerEngine::best_bid, py::arg("symbol"))
+        .def("best_ask", &TriggerEngine::best_ask, py::arg("symbol"))
+        .def("snapshot", &TriggerEngine::snapshot, py::arg("symbol"), py::arg("max_levels") = 50)
+        .def("on_levels", &TriggerEngine::on_levels,
+             py::call_guard<py::gil_scoped_release>(),
+             py::arg("symbol"), py::arg("is_snapshot"), py::arg("bids"), py::arg("asks"))
+        .def("set_trigger_callback", [](TriggerEngine &self, std::function<void(const TriggerEvent&)> cb) {
+            self.set_trigger_callback([cb](const TriggerEvent& ev) {
+                py::gil_scoped_acquire acquire;
+                cb(ev);
+            });
+        });
+
     // --- ExchangeStreamer (оставляем как было) ---
     py::class_<ExchangeStreamer>(m, "ExchangeStreamer")
-        .def(py::init<std::shared_ptr<IMessageParser>>())
+        .def(py::init<std::shared_ptr<IMessageParser>, const std::string&>(),
+             py::arg("parser"), py::arg("url") = "wss://stream.bybit.com/v5/public/linear")
         .def("add_symbol", &ExchangeStreamer::add_symbol)
+        .def("add_symbols", &ExchangeStreamer::add_symbols, py::arg("symbols"))
+        .def("remove_symbol", &ExchangeStreamer::remove_symbol, py::arg("symbol"))
+        .def("set_trigger_engine", &ExchangeStreamer::set_trigger_engine, py::arg("engine"))
+        .def("set_credentials", &ExchangeStreamer::set_credentials,
+             py::arg("api_key"), py::arg("api_secret"))
         .def("start", &ExchangeStreamer::start, py::call_guard<py::gil_scoped_release>())
         .def("stop", &ExchangeStreamer::stop, py::call_guard<py::gil_scoped_release>())
         .def("set_tick_callback", [](ExchangeStreamer &self, std::function<void(const TickData&)> cb) {
@@ -120,5 +252,17 @@ PYBIND11_MODULE(hft_core, m) {
                 py::gil_scoped_acquire acquire;
                 cb(e);
             });
+        })
+        .def("set_order_callback", [](ExchangeStreamer &self, std::function<void(const OrderUpdateData&)> cb) {
+            self.set_order_callback([cb](const OrderUpdateData& o) {
+                py::gil_scoped_acquire acquire;
+                cb(o);
+            });
+        })
+        .def("set_position_callback", [](ExchangeStreamer &self, std::function<void(const PositionData&)> cb) {
+            self.set_position_callback([cb](const PositionData& p) {
+                py::gil_scoped_acquire acquire;
+                cb(p);
+            });
         });
 }
\ No newline at end of file
@@ -1,9 +1,10 @@
 #include "../include/order_gateway.hpp"
+#include "../include/bybit_auth.hpp"
+#include "../include/trigger_engine.hpp"
 #include <iostream>
 #include <chrono>
 #include <sstream>
 #include <iomanip>
-#include <openssl/hmac.h>
 #include <nlohmann/json.hpp>
 #include <ixwebsocket/IXNetSystem.h>
 
@@ -17,20 +18,6 @@ std::string format_decimal(double value, int precision = 8) {
     return s;
 }
 
-std::string hmac_sha256(const std::string& key, const std::string& data) {
-    unsigned char* digest;
-    unsigned int len = 0;
-    digest = HMAC(EVP_sha256(), 
-                  (const void*)key.c_str(), key.length(), 
-                  (const unsigned char*)data.c_str(), data.length(), 
-                  NULL, &len);
-    std::stringstream ss;
-    for(unsigned int i = 0; i < len; i++) {
-        ss << std::hex << std::setw(2) << std::setfill('0') << (int)digest[i];
-    }
-    return ss.str();
-}
-
 OrderGateway::OrderGateway(std::string key, std::string secret, bool testnet) 
     : api_key_(key), api_secret_(secret) 
 {
@@ -61,34 +48,18 @@ void OrderGateway::set_on_order_update(std::function<void(const std::string&)> c
     on_order_update_cb_ = cb;
 }
 
-std::string OrderGateway::generate_signature(long long expires) {
-    std::string val = "GET/realtime" + std::to_string(expires);
-    return hmac_sha256(api_secret_, val);
-}
-
 void OrderGateway::authenticate() {
-    auto now = std::chrono::system_clock::now();
-    long long expires = std::chrono::duration_cast<std::chrono::milliseconds>(now.time_since_epoch()).count() + 5000;
-    std::string signature = generate_signature(expires);
-    
-    nlohmann::json auth_msg;
-    auth_msg["op"] = "auth";
-    auth_msg["args"] = {api_key_, expires, signature};
-    webSocket.send(auth_msg.dump());
+    // Тот же payload, что у приватного стрима: формат подписи и срок жизни — в одном месте
+    webSocket.send(make_ws_auth_message(api_key_, api_secret_));
 }
 
-void OrderGateway::send_order(
+std::string OrderGateway::build_order_message(
     const std::string& symbol, const std::string& side, double qty, double price,
     const std::string& order_link_id, const std::string& order_type,
     const std::string& time_in_force, bool reduce_only,
     double stop_loss,
     double take_profit
-) {
-    if (!authenticated_) {
-        std::cerr << "[C++] ERROR: Wait for Auth!" << std::endl;
-        return;
-    }
-
+) const {
     nlohmann::json order;
     order["category"] = "linear";
     order["symbol"] = symbol;
@@ -125,7 +96,94 @@ void OrderGateway::send_order(
     nlohmann::json msg;
     msg["op"] = "order.create"; 
     msg["args"] = {order};
-    webSocket.send(msg.dump());
+    return msg.dump();
+}
+
+std::string OrderGateway::send_order(
+    const std::string& symbol, const std::string& side, double qty, double price,
+    const std::string& order_link_id, const std::string& order_type,
+    const std::string& time_in_force, bool reduce_only,
+    double stop_loss,
+    double take_profit
+) {
+    // Риск раньше соединения: NOT_AUTHENTICATED означает "риск пройден", и только тогда
+    // Python вправе продублировать ордер через REST
+    // Прошедший вход резервирует экспозицию: снимается по order push / execution (update_reservation)
+    std::string reason = risk_.check(symbol, side, qty, order_type == "Limit" ? price : 0.0, reduce_only,
+                                     true, order_link_id);
+    if (!reason.empty()) {
+        std::cerr << "[C++] ⛔ Risk reject " << symbol << " " << side << " " << qty << ": " << reason << std::endl;
+        return reason;
+    }
+
+    if (!authenticated_) {
+        std::cerr << "[C++] ERROR: Wait for Auth!" << std::endl;
+        return "NOT_AUTHENTICATED";
+    }
+
+    webSocket.send(build_order_message(symbol, side, qty, price, order_link_id, order_type,
+                                       time_in_force, reduce_only, stop_loss, take_profit));
+    return "";
+}
+
+uint64_t OrderGateway::stage_order(
+    const std::string& symbol, const std::string& side, double qty, double price,
+    const std::string& order_link_id, const std::string& order_type,
+    const std::string& time_in_force, bool reduce_only,
+    double stop_loss,
+    double take_profit
+) {
+    // Валидация на этапе staging, чтобы fire не мог отправить заведомо битый ордер
+    if (symbol.empty() || (side != "Buy" && side != "Sell") || qty <= 0) return 0;
+    if (order_type == "Limit" && price <= 0) return 0;
+    // Заведомо запрещенный риском ордер не собираем (rate-лимит при этом не расходуется)
+    double check_price = order_type == "Limit" ? price : 0.0;
+    if (!risk_.check(symbol, side, qty, check_price, reduce_only, false).empty()) return 0;
+
+    std::string payload = build_order_message(symbol, side, qty, price, order_link_id, order_type,
+                                              time_in_force, reduce_only, stop_loss, take_profit);
+
+    std::lock_guard<std::mutex> lock(staged_mutex_);
+    uint64_t handle = next_handle_++;
+    staged_.emplace(handle, StagedOrder{std::move(payload), symbol, side, qty, check_price, reduce_only, order_link_id});
+    return handle;
+}
+
+std::string OrderGateway::fire_staged(uint64_t handle) {
+    StagedOrder order;
+    {
+        std::lock_guard<std::mutex> lock(staged_mutex_);
+        auto it = staged_.find(handle);
+        if (it == staged_.end()) return "UNKNOWN_HANDLE";
+        order = std::move(it->second);
+        staged_.erase(it);
+    }
+
+    // Лимиты/позиции могли измениться после stage: проверяем на момент отправки
+    std::string reason = risk_.check(order.symbol, order.side, order.qty, order.price, order.reduce_only,
+                                     true, order.order_link_id);
+    if (!reason.empty()) {
+        std::cerr << "[C++] ⛔ Risk reject (staged) " << order.symbol << ": " << reason << std::endl;
+        return reason;
+    }
+
+    if (!authenticated_) {
+        std::cerr << "[C++] ERROR: Wait for Auth!" << std::endl;
+        return "NOT_AUTHENTICATED";
+    }
+
+    webSocket.send(order.payload);
+    return "";
+}
+
+bool OrderGateway::discard_staged(uint64_t handle) {
+    std::lock_guard<std::mutex> lock(staged_mutex_);
+    return staged_.erase(handle) > 0;
+}
+
+size_t OrderGateway::staged_count() const {
+    std::lock_guard<std::mutex> lock(staged_mutex_);
+    return staged_.size();
 }
 
 void OrderGateway::cancel_order(const std::string& symbol, const std::string& order_id) {
@@ -140,11 +198,64 @@ void OrderGateway::cancel_order(const std::string& symbol, const std::string& or
     webSocket.send(msg.dump());
 }
 
+void OrderGateway::set_risk_limits(const RiskLimits& limits) {
+    risk_.set_limits(limits);
+}
+
+RiskLimits OrderGateway::get_risk_limits() const {
+    return risk_.get_limits();
+}
+
+void OrderGateway::update_position(const std::string& symbol, double signed_qty, double price) {
+    risk_.update_position(symbol, signed_qty, price);
+}
+
+void OrderGateway::record_realized_pnl(double pnl) {
+    risk_.record_realized_pnl(pnl);
+}
+
+void OrderGateway::set_daily_pnl(double pnl) {
+    risk_.set_daily_pnl(pnl);
+}
+
+void OrderGateway::update_reservation(const std::string& order_link_id, double leaves_qty) {
+    risk_.update_reservation(order_link_id, leaves_qty);
+}
+
+void OrderGateway::release_reservation(const std::string& order_link_id) {
+    risk_.release(order_link_id);
+}
+
+RiskStats OrderGateway::risk_stats() const {
+    return risk_.stats();
+}
+
+void OrderGateway::set_reference_book(std::shared_ptr<TriggerEngine> engine) {
+    std::weak_ptr<TriggerEngine> weak = engine;
+    risk_.set_reference_fn([weak](const std::string& symbol, double& bid, double& ask) {
+        auto book = weak.lock();
+        return book && book->top_of_book(symbol, bid, ask);
+    });
+}
+
 void OrderGateway::on_message(const ix::WebSocketMessagePtr& msg) {
     if (msg->type == ix::WebSocketMessageType::Open) {
         std::cout << "[C++] Trade Stream Connected. Authenticating..." << std::endl;
+        authenticated_ = false;
         authenticate();
     } 
+    else if (msg->type == ix::WebSocketMessageType::Close ||
+             msg->type == ix::WebSocketMessageType::Error) {
+        // До повторной авторизации ордера не уходят: send_order вернет NOT_AUTHENTICATED,
+        // и вход/выход продублирует REST (TriggerEngine отдает выход в Python)
+        authenticated_ = false;
+        if (msg->type == ix::WebSocketMessageType::Error) {
+            std::cerr << "[C++] ⚠️ Trade Stream error: " << msg->errorInfo.reason << std::endl;
+        } else {
+            std::cerr << "[C++] ⚠️ Trade Stream closed: " << msg->closeInfo.code << " "
+                      << msg->closeInfo.reason << std::endl;
+        }
+    }
     else if (msg->type == ix::WebSocketMessageType::Message) {
         try {
             auto j = nlohmann::json::parse(msg->str);
@@ -155,6 +266,7 @@ void OrderGateway::on_message(const ix::WebSocketMessagePtr& msg) {
                     authenticated_ = true;
                     std::cout << "[C++] ✅ AUTH SUCCESS!" << std::endl;
                 } else {
+                    authenticated_ = false;
                     std::cerr << "[C++] ❌ AUTH FAILED: " << msg->str << std::endl;
                 }
             }
@@ -29,10 +29,12 @@ static double extract_double(simdjson::ondemand::value val) {
 
 ParseResultType BinanceParser::parse(
     const std::string& payload, 
-    TickData& out_tick, 
+    std::vector<TickData>& out_ticks, 
     OrderBookSnapshot& out_depth,
     TickerData& out_ticker,
-    ExecutionData& out_exec 
+    std::vector<ExecutionData>& out_execs,
+    std::vector<OrderUpdateData>& out_orders,
+    std::vector<PositionData>& out_positions
 ) {
     simdjson::padded_string json_data(payload);
     
@@ -58,8 +60,16 @@ ParseResultType BinanceParser::parse(
              if (!f.value().get_int64().get(val)) ts = val;
         }
 
+        // m = покупатель мейкер -> агрессор продавец
+        std::string side;
+        if (auto f = obj["m"]; !f.error()) {
+            bool buyer_maker;
+            if (!f.value().get_bool().get(buyer_maker)) side = buyer_maker ? "Sell" : "Buy";
+        }
+
+        out_ticks.clear();
         if (price > 0) {
-            out_tick = {symbol_str, price, vol, ts};
+            out_ticks.push_back({symbol_str, price, vol, ts, side});
             return ParseResultType::Trade;
         }
 
@@ -37,10 +37,12 @@ static double extract_from_result(simdjson::simdjson_result<simdjson::ondemand::
 
 ParseResultType BybitParser::parse(
     const std::string& payload, 
-    TickData& out_tick, 
+    std::vector<TickData>& out_ticks, 
     OrderBookSnapshot& out_depth,
     TickerData& out_ticker,
-    ExecutionData& out_exec
+    std::vector<ExecutionData>& out_execs,
+    std::vector<OrderUpdateData>& out_orders,
+    std::vector<PositionData>& out_positions
 ) {
     simdjson::padded_string json_data(payload);
     
@@ -54,33 +56,104 @@ ParseResultType BybitParser::parse(
         }
         
         // --- 1. EXECUTIONS ---
+        // Одно сообщение может нести несколько fill'ов; в ledger идут только торговые (execType == "Trade")
         if (topic_sv.find("execution") != std::string_view::npos) {
+            out_execs.clear();
             simdjson::ondemand::array data_arr;
             if (!obj["data"].get(data_arr)) {
                 for (auto exec_val : data_arr) {
                     auto exec_obj = exec_val.get_object();
-                    
+                    ExecutionData exec{};
+
                     std::string_view sv;
-                    if (!exec_obj["symbol"].get_string().get(sv)) out_exec.symbol = std::string(sv);
-                    if (!exec_obj["orderId"].get_string().get(sv)) out_exec.order_id = std::string(sv);
-                    if (!exec_obj["side"].get_string().get(sv)) out_exec.side = std::string(sv);
-                    
-                    if (auto f = exec_obj["execPrice"]; !f.error()) out_exec.exec_price = extract_double(f.value());
-                    if (auto f = exec_obj["execQty"]; !f.error()) out_exec.exec_qty = extract_double(f.value());
+                    if (!exec_obj["symbol"].get_string().get(sv)) exec.symbol = std::string(sv);
+                    if (!exec_obj["orderId"].get_string().get(sv)) exec.order_id = std::string(sv);
+                    if (!exec_obj["orderLinkId"].get_string().get(sv)) exec.order_link_id = std::string(sv);
+                    if (!exec_obj["side"].get_string().get(sv)) exec.side = std::string(sv);
+                    if (!exec_obj["execId"].get_string().get(sv)) exec.exec_id = std::string(sv);
+                    if (!exec_obj["execType"].get_string().get(sv)) exec.exec_type = std::string(sv);
+
+                    if (auto f = exec_obj["execPrice"]; !f.error()) exec.exec_price = extract_double(f.value());
+                    if (auto f = exec_obj["execQty"]; !f.error()) exec.exec_qty = extract_double(f.value());
                     
                     if (auto f = exec_obj["isMaker"]; !f.error()) { 
                         bool val; 
-                        if (!f.value().get_bool().get(val)) out_exec.is_maker = val; 
+                        if (!f.value().get_bool().get(val)) exec.is_maker = val; 
                     }
 
                     if (auto f = exec_obj["execTime"]; !f.error()) {
-                         out_exec.timestamp = (long long)extract_double(f.value());
+                         exec.timestamp = (long long)extract_double(f.value());
                     }
 
-                    return ParseResultType::Execution; 
+                    if (exec.exec_type != "Trade") continue;
+                    out_execs.push_back(std::move(exec));
                 }
             }
-            return ParseResultType::None;
+            return out_execs.empty() ? ParseResultType::None : ParseResultType::Execution;
+        }
+
+        // --- 1.1 ORDERS (приватный поток) ---
+        // Точное сравнение: "orderbook.50.X" тоже содержит подстроку "order"
+        if (topic_sv == "order" || topic_sv.rfind("order.", 0) == 0) {
+            out_orders.clear();
+            simdjson::ondemand::array data_arr;
+            if (!obj["data"].get(data_arr)) {
+                for (auto order_val : data_arr) {
+                    auto order_obj = order_val.get_object();
+                    OrderUpdateData upd;
+
+                    std::string_view sv;
+                    if (!order_obj["symbol"].get_string().get(sv)) upd.symbol = std::string(sv);
+                    if (!order_obj["orderId"].get_string().get(sv)) upd.order_id = std::string(sv);
+                    if (!order_obj["orderLinkId"].get_string().get(sv)) upd.order_link_id = std::string(sv);
+                    if (!order_obj["side"].get_string().get(sv)) upd.side = std::string(sv);
+                    if (!order_obj["orderStatus"].get_string().get(sv)) upd.order_status = std::string(sv);
+                    if (!order_obj["orderType"].get_string().get(sv)) upd.order_type = std::string(sv);
+
+                    if (auto f = order_obj["price"]; !f.error()) upd.price = extract_double(f.value());
+                    if (auto f = order_obj["qty"]; !f.error()) upd.qty = extract_double(f.value());
+                    if (auto f = order_obj["cumExecQty"]; !f.error()) upd.cum_exec_qty = extract_double(f.value());
+                    if (auto f = order_obj["avgPrice"]; !f.error()) upd.avg_price = extract_double(f.value());
+
+                    if (auto f = order_obj["reduceOnly"]; !f.error()) {
+                        bool val;
+                        if (!f.value().get_bool().get(val)) upd.reduce_only = val;
+                    }
+                    if (auto f = order_obj["updatedTime"]; !f.error()) {
+                        upd.timestamp = (long long)extract_double(f.value());
+                    }
+
+                    out_orders.push_back(std::move(upd));
+                }
+            }
+            return out_orders.empty() ? ParseResultType::None : ParseResultType::Order;
+        }
+
+        // --- 1.2 POSITIONS (приватный поток) ---
+        if (topic_sv == "position" || topic_sv.rfind("position.", 0) == 0) {
+            out_positions.clear();
+            simdjson::ondemand::array data_arr;
+            if (!obj["data"].get(data_arr)) {
+                for (auto pos_val : data_arr) {
+                    auto pos_obj = pos_val.get_object();
+                    PositionData pos;
+
+                    std::string_view sv;
+                    if (!pos_obj["symbol"].get_string().get(sv)) pos.symbol = std::string(sv);
+                    if (!pos_obj["side"].get_string().get(sv)) pos.side = std::string(sv);
+
+                    if (auto f = pos_obj["size"]; !f.error()) pos.size = extract_double(f.value());
+                    if (auto f = pos_obj["entryPrice"]; !f.error()) pos.entry_price = extract_double(f.value());
+                    if (auto f = pos_obj["markPrice"]; !f.error()) pos.mark_price = extract_double(f.value());
+                    if (auto f = pos_obj["unrealisedPnl"]; !f.error()) pos.unrealised_pnl = extract_double(f.value());
+                    if (auto f = pos_obj["updatedTime"]; !f.error()) {
+                        pos.timestamp = (long long)extract_double(f.value());
+                    }
+
+                    out_positions.push_back(std::move(pos));
+                }
+            }
+            return out_positions.empty() ? ParseResultType::None : ParseResultType::Position;
         }
 
         // --- 2. TICKERS ---
@@ -110,34 +183,37 @@ ParseResultType BybitParser::parse(
         }
 
         // --- 3. PUBLIC TRADES ---
+        // Bybit пакует несколько принтов в одно сообщение: отдаем все, S — сторона агрессора
         else if (topic_sv.find("publicTrade") != std::string_view::npos) {
+            out_ticks.clear();
             simdjson::ondemand::array data_arr;
             if (!obj["data"].get(data_arr)) {
                 for (auto trade_val : data_arr) {
                     auto trade_obj = trade_val.get_object();
-                    double price = 0.0; double vol = 0.0; int64_t ts = 0; std::string symbol_str;
-                    
-                    if (auto f = trade_obj["p"]; !f.error()) price = extract_double(f.value());
-                    if (auto f = trade_obj["v"]; !f.error()) vol = extract_double(f.value());
+                    TickData tick{};
                     
+                    if (auto f = trade_obj["T"]; !f.error()) { 
+                        int64_t val; 
+                        if (!f.value().get_int64().get(val)) tick.timestamp = val; 
+                    }
                     // FIX: Явное подавление warning unused result
                     if (auto f = trade_obj["s"]; !f.error()) { 
                         std::string_view sv; 
                         auto _ = f.value().get_string().get(sv); 
                         (void)_;
-                        symbol_str = std::string(sv); 
+                        tick.symbol = std::string(sv); 
                     }
-                    if (auto f = trade_obj["T"]; !f.error()) { 
-                        int64_t val; 
-                        if (!f.value().get_int64().get(val)) ts = val; 
+                    if (auto f = trade_obj["S"]; !f.error()) {
+                        std::string_view sv;
+                        if (!f.value().get_string().get(sv)) tick.side = std::string(sv);
                     }
+                    if (auto f = trade_obj["v"]; !f.error()) tick.qty = extract_double(f.value());
+                    if (auto f = trade_obj["p"]; !f.error()) tick.price = extract_double(f.value());
 
-                    if (price > 0) {
-                        out_tick = {symbol_str, price, vol, ts};
-                        return ParseResultType::Trade; 
-                    }
+                    if (tick.price > 0) out_ticks.push_back(std::move(tick));
                 }
             }
+            return out_ticks.empty() ? ParseResultType::None : ParseResultType::Trade;
         }
         
         // --- 4. ORDERBOOK ---
@@ -0,0 +1,218 @@
+#include "../include/risk_gate.hpp"
+#include <cmath>
+#include <algorithm>
+
+namespace {
+constexpr double kQtyEps = 1e-9;
+
+long long current_utc_day() {
+    auto now = std::chrono::system_clock::now().time_since_epoch();
+    return std::chrono::duration_cast<std::chrono::hours>(now).count() / 24;
+}
+}
+
+bool RiskGate::TokenBucket::take(double rate, std::chrono::steady_clock::time_point now, bool consume) {
+    if (rate <= 0) return true;
+    if (tokens < 0) {
+        tokens = rate; // Полный бак: burst = лимит в секунду
+        last = now;
+    }
+    double dt = std::chrono::duration<double>(now - last).count();
+    tokens = std::min(rate, tokens + dt * rate);
+    last = now;
+
+    if (tokens < 1.0) return false;
+    if (consume) tokens -= 1.0;
+    return true;
+}
+
+void RiskGate::set_limits(const RiskLimits& limits) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    limits_ = limits;
+}
+
+RiskLimits RiskGate::get_limits() const {
+    std::lock_guard<std::mutex> lock(mutex_);
+    return limits_;
+}
+
+void RiskGate::set_reference_fn(ReferenceFn fn) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    reference_fn_ = std::move(fn);
+}
+
+bool RiskGate::occupied(const SymbolState& st) {
+    return std::abs(st.qty) > kQtyEps || st.pending_orders > 0;
+}
+
+void RiskGate::update_position(const std::string& symbol, double signed_qty, double price) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    SymbolState& st = symbols_[symbol];
+
+    bool was_open = occupied(st);
+    bool is_open = std::abs(signed_qty) > kQtyEps;
+
+    // Инкрементально, чтобы check оставался O(1)
+    total_notional_ -= std::abs(st.qty) * st.price;
+    st.qty = is_open ? signed_qty : 0.0;
+    st.price = is_open ? price : 0.0;
+    total_notional_ += std::abs(st.qty) * st.price;
+    if (total_notional_ < 0) total_notional_ = 0.0;
+
+    open_positions_ += (occupied(st) ? 1 : 0) - (was_open ? 1 : 0);
+}
+
+void RiskGate::reserve(const std::string& order_link_id, const std::string& symbol,
+                       double signed_qty, double price) {
+    // Повторная проверка того же orderLinkId (fire после stage) не удваивает резерв
+    auto it = reservations_.find(order_link_id);
+    if (it != reservations_.end()) resize(it, 0.0);
+
+    SymbolState& st = symbols_[symbol];
+    bool was_open = occupied(st);
+    reservations_.emplace(order_link_id, Reservation{symbol, signed_qty, price});
+    st.pending_qty += signed_qty;
+    st.pending_notional += std::abs(signed_qty) * price;
+    ++st.pending_orders;
+    pending_notional_ += std::abs(signed_qty) * price;
+    if (!was_open) ++open_positions_;
+}
+
+void RiskGate::resize(std::unordered_map<std::string, Reservation>::iterator it, double signed_qty) {
+    SymbolState& st = symbols_[it->second.symbol];
+    bool was_open = occupied(st);
+
+    double delta = signed_qty - it->second.signed_qty;
+    double delta_notional = (std::abs(signed_qty) - std::abs(it->second.signed_qty)) * it->second.price;
+    st.pending_qty += delta;
+    st.pending_notional += delta_notional;
+    pending_notional_ += delta_notional;
+
+    if (std::abs(signed_qty) > kQtyEps) {
+        it->second.signed_qty = signed_qty;
+    } else {
+        reservations_.erase(it);
+        // Накопленная ошибка округления не должна держать слот занятым
+        if (--st.pending_orders <= 0) {
+            st.pending_orders = 0;
+            st.pending_qty = 0.0;
+            st.pending_notional = 0.0;
+        }
+        if (reservations_.empty()) pending_notional_ = 0.0;
+    }
+    if (pending_notional_ < 0) pending_notional_ = 0.0;
+
+    open_positions_ += (occupied(st) ? 1 : 0) - (was_open ? 1 : 0);
+}
+
+void RiskGate::update_reservation(const std::string& order_link_id, double leaves_qty) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    auto it = reservations_.find(order_link_id);
+    if (it == reservations_.end()) return;
+    // Остаток только уменьшается: исполненная часть уже пришла в update_position
+    double leaves = std::min(std::max(leaves_qty, 0.0), std::abs(it->second.signed_qty));
+    resize(it, it->second.signed_qty > 0 ? leaves : -leaves);
+}
+
+void RiskGate::release(const std::string& order_link_id) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    auto it = reservations_.find(order_link_id);
+    if (it != reservations_.end()) resize(it, 0.0);
+}
+
+void RiskGate::record_realized_pnl(double pnl) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    roll_day();
+    daily_pnl_ += pnl;
+}
+
+void RiskGate::set_daily_pnl(double pnl) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    roll_day();
+    daily_pnl_ = pnl;
+}
+
+void RiskGate::roll_day() {
+    long long today = current_utc_day();
+    if (today != day_index_) {
+        day_index_ = today;
+        daily_pnl_ = 0.0;
+    }
+}
+
+std::string RiskGate::reject(const char* reason) {
+    ++rejects_;
+    last_reject_ = reason;
+    return last_reject_;
+}
+
+std::string RiskGate::check(const std::string& symbol, const std::string& side, double qty,
+                            double price, bool reduce_only, bool consume,
+                            const std::string& reserve_id) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    if (!limits_.enabled || reduce_only) return "";
+
+    if (qty <= 0 || (side != "Buy" && side != "Sell")) return reject("INVALID_ORDER");
+
+    roll_day();
+    if (limits_.max_daily_loss > 0 && daily_pnl_ <= -limits_.max_daily_loss) {
+        return reject("DAILY_LOSS");
+    }
+
+    // Референс: mid стакана (для Market-ордеров это и есть оценка цены исполнения)
+    double bid = 0.0, ask = 0.0;
+    bool has_ref = reference_fn_ && reference_fn_(symbol, bid, ask) && bid > 0 && ask > 0;
+    double mid = has_ref ? (bid + ask) / 2.0 : 0.0;
+    double ref_price = price > 0 ? price : mid;
+
+    if (price > 0 && has_ref && limits_.price_band_pct > 0) {
+        if (std::abs(price - mid) / mid * 100.0 > limits_.price_band_pct) return reject("PRICE_BAND");
+    }
+
+    // Входы в полете считаются так же, как уже набранная позиция
+    static const SymbolState kEmpty;
+    auto it = symbols_.find(symbol);
+    const SymbolState& cur = it != symbols_.end() ? it->second : kEmpty;
+    double cur_qty = cur.qty + cur.pending_qty;
+    double cur_notional = std::abs(cur.qty) * cur.price + cur.pending_notional;
+
+    if (ref_price > 0) {
+        double order_notional = qty * ref_price;
+        if (limits_.max_order_notional > 0 && order_notional > limits_.max_order_notional) {
+            return reject("MAX_ORDER_NOTIONAL");
+        }
+
+        double projected_qty = cur_qty + (side == "Buy" ? qty : -qty);
+        double projected_notional = std::abs(projected_qty) * ref_price;
+        if (limits_.max_symbol_notional > 0 && projected_notional > limits_.max_symbol_notional) {
+            return reject("MAX_SYMBOL_POSITION");
+        }
+        if (limits_.max_total_notional > 0 &&
+            total_notional_ + pending_notional_ - cur_notional + projected_notional > limits_.max_total_notional) {
+            return reject("MAX_TOTAL_POSITION");
+        }
+    }
+
+    if (limits_.max_open_positions != 0 && !occupied(cur) &&
+        open_positions_ >= std::max(limits_.max_open_positions, 0)) {
+        return reject("MAX_OPEN_POSITIONS");
+    }
+
+    // Rate-лимиты последними: токен расходуется только если ордер реально уйдет
+    auto now = std::chrono::steady_clock::now();
+    if (!global_bucket_.take(limits_.max_orders_per_sec, now, false)) return reject("RATE_LIMIT");
+
+    TokenBucket& sym_bucket = symbols_[symbol].bucket;
+    if (!sym_bucket.take(limits_.max_symbol_orders_per_sec, now, consume)) return reject("SYMBOL_RATE_LIMIT");
+    if (consume) global_bucket_.take(limits_.max_orders_per_sec, now, true);
+
+    if (consume && !reserve_id.empty()) {
+        reserve(reserve_id, symbol, side == "Buy" ? qty : -qty, ref_price > 0 ? ref_price : 0.0);
+    }
+    return "";
+}
+
+RiskStats RiskGate::stats() const {
+    std::lock_guard<std::mutex> lock(mutex_);
+    return RiskStats{total_notional_, pending_notional_, open_positions_, daily_pnl_, rejects_, last_reject_};
+}
@@ -0,0 +1,176 @@
+#include "../include/trigger_engine.hpp"
+#include <iostream>
+#include <chrono>
+#include <algorithm>
+
+TriggerEngine::TriggerEngine(std::shared_ptr<OrderGateway> gateway)
+    : gateway_(std::move(gateway)) {}
+
+void TriggerEngine::add_trigger(const std::string& trigger_id, const std::string& symbol,
+                                TriggerCondition condition, double trigger_price,
+                                const std::string& exit_side, double qty) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    auto& list = triggers_[symbol];
+    PriceTrigger trg{trigger_id, symbol, condition, trigger_price, exit_side, qty};
+
+    auto it = std::find_if(list.begin(), list.end(),
+                           [&](const PriceTrigger& t) { return t.trigger_id == trigger_id; });
+    if (it != list.end()) *it = trg;
+    else list.push_back(trg);
+}
+
+bool TriggerEngine::remove_trigger(const std::string& trigger_id) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    for (auto& [symbol, list] : triggers_) {
+        auto it = std::find_if(list.begin(), list.end(),
+                               [&](const PriceTrigger& t) { return t.trigger_id == trigger_id; });
+        if (it != list.end()) {
+            list.erase(it);
+            return true;
+        }
+    }
+    return false;
+}
+
+void TriggerEngine::clear_symbol(const std::string& symbol) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    triggers_.erase(symbol);
+    books_.erase(symbol);
+}
+
+size_t TriggerEngine::trigger_count() const {
+    std::lock_guard<std::mutex> lock(mutex_);
+    size_t n = 0;
+    for (const auto& [symbol, list] : triggers_) n += list.size();
+    return n;
+}
+
+double TriggerEngine::best_bid(const std::string& symbol) const {
+    std::lock_guard<std::mutex> lock(mutex_);
+    auto it = books_.find(symbol);
+    if (it == books_.end() || it->second.bids.empty()) return 0.0;
+    return it->second.bids.begin()->first;
+}
+
+double TriggerEngine::best_ask(const std::string& symbol) const {
+    std::lock_guard<std::mutex> lock(mutex_);
+    auto it = books_.find(symbol);
+    if (it == books_.end() || it->second.asks.empty()) return 0.0;
+    return it->second.asks.begin()->first;
+}
+
+bool TriggerEngine::top_of_book(const std::string& symbol, double& bid, double& ask) const {
+    std::lock_guard<std::mutex> lock(mutex_);
+    auto it = books_.find(symbol);
+    if (it == books_.end() || it->second.bids.empty() || it->second.asks.empty()) return false;
+    bid = it->second.bids.begin()->first;
+    ask = it->second.asks.begin()->first;
+    return true;
+}
+
+OrderBookSnapshot TriggerEngine::snapshot(const std::string& symbol, size_t max_levels) const {
+    OrderBookSnapshot snap{};
+    snap.symbol = symbol;
+    snap.is_snapshot = true;
+    snap.local_timestamp = std::chrono::duration_cast<std::chrono::milliseconds>(
+        std::chrono::system_clock::now().time_since_epoch()).count();
+
+    std::lock_guard<std::mutex> lock(mutex_);
+    auto it = books_.find(symbol);
+    if (it == books_.end()) return snap;
+
+    for (const auto& [price, qty] : it->second.bids) {
+        if (snap.bids.size() >= max_levels) break;
+        snap.bids.push_back(PriceLevel{price, qty});
+    }
+    for (const auto& [price, qty] : it->second.asks) {
+        if (snap.asks.size() >= max_levels) break;
+        snap.asks.push_back(PriceLevel{price, qty});
+    }
+    return snap;
+}
+
+void TriggerEngine::set_trigger_callback(std::function<void(const TriggerEvent&)> cb) {
+    trigger_cb_ = cb;
+}
+
+void TriggerEngine::apply_levels(BookState& book, const OrderBookSnapshot& depth) {
+    if (depth.is_snapshot) {
+        book.bids.clear();
+        book.asks.clear();
+    }
+    // qty == 0 в дельте -> уровень удален
+    for (const auto& lvl : depth.bids) {
+        if (lvl.qty <= 0) book.bids.erase(lvl.price);
+        else book.bids[lvl.price] = lvl.qty;
+    }
+    for (const auto& lvl : depth.asks) {
+        if (lvl.qty <= 0) book.asks.erase(lvl.price);
+        else book.asks[lvl.price] = lvl.qty;
+    }
+}
+
+void TriggerEngine::on_levels(const std::string& symbol, bool is_snapshot,
+                              const std::vector<std::pair<double, double>>& bids,
+                              const std::vector<std::pair<double, double>>& asks) {
+    OrderBookSnapshot depth{};
+    depth.symbol = symbol;
+    depth.is_snapshot = is_snapshot;
+    depth.bids.reserve(bids.size());
+    depth.asks.reserve(asks.size());
+    for (const auto& [price, qty] : bids) depth.bids.push_back(PriceLevel{price, qty});
+    for (const auto& [price, qty] : asks) depth.asks.push_back(PriceLevel{price, qty});
+    on_depth(depth);
+}
+
+void TriggerEngine::on_depth(const OrderBookSnapshot& depth) {
+    std::vector<std::pair<PriceTrigger, double>> fired;
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        BookState& book = books_[depth.symbol];
+        apply_levels(book, depth);
+
+        auto it = triggers_.find(depth.symbol);
+        if (it == triggers_.end() || it->second.empty()) return;
+        if (book.bids.empty() || book.asks.empty() || !gateway_) return;
+
+        double bid = book.bids.begin()->first;
+        double ask = book.asks.begin()->first;
+
+        for (const auto& t : it->second) {
+            if (t.condition == TriggerCondition::BidBelow && bid < t.trigger_price) {
+                fired.emplace_back(t, bid);
+            } else if (t.condition == TriggerCondition::AskAbove && ask > t.trigger_price) {
+                fired.emplace_back(t, ask);
+            }
+        }
+        if (fired.empty()) return;
+
+        // Одна позиция на символ: первый сработавший триггер снимает остальные (OCO)
+        triggers_.erase(it);
+        fired.resize(1);
+    }
+
+    // Отправка и уведомление вне лока: callback берет GIL
+    const auto& [t, book_price] = fired.front();
+    std::string link_id = "trg_" + t.trigger_id;
+    std::string reason = gateway_->send_order(t.symbol, t.exit_side, t.qty, 0.0, link_id, "Market", "IOC", true);
+    if (!reason.empty()) {
+        std::cerr << "[C++] ❌ Trigger " << t.trigger_id << " send failed: " << reason << std::endl;
+    }
+
+    long long now_ms = std::chrono::duration_cast<std::chrono::milliseconds>(
+        std::chrono::system_clock::now().time_since_epoch()).count();
+    if (reason.empty()) {
+        std::cout << "[C++] 🎯 Trigger " << t.trigger_id << " fired on " << t.symbol
+                  << " @ " << book_price << " -> " << t.exit_side << " " << t.qty << std::endl;
+    }
+
+    // Отказ тоже сообщаем (в т.ч. NOT_AUTHENTICATED после обрыва сокета):
+    // триггер уже снят, выход делает Python через REST
+    if (trigger_cb_) {
+        TriggerEvent ev{t.trigger_id, t.symbol, t.exit_side, t.qty, t.trigger_price,
+                        book_price, link_id, now_ms, reason};
+        trigger_cb_(ev);
+    }
+}
@@ -0,0 +1,51 @@
+// Разбор publicTrade: все принты пачки и сторона агрессора.
+// Сборка: cmake -DHFT_BUILD_TESTS=ON && ./test_bybit_parser
+#include "../include/parsers/bybit_parser.hpp"
+#include <cassert>
+#include <cmath>
+#include <iostream>
+
+static bool near(double a, double b) { return std::fabs(a - b) < 1e-9; }
+
+int main() {
+    BybitParser parser;
+    std::vector<TickData> ticks;
+    OrderBookSnapshot depth;
+    TickerData ticker;
+    std::vector<ExecutionData> execs;
+    std::vector<OrderUpdateData> orders;
+    std::vector<PositionData> positions;
+
+    const std::string msg = R"({"topic":"publicTrade.BTCUSDT","type":"snapshot","ts":1672304486868,"data":[
+        {"T":1672304486865,"s":"BTCUSDT","S":"Buy","v":"0.001","p":"16578.50","L":"PlusTick","i":"a1","BT":false},
+        {"T":1672304486866,"s":"BTCUSDT","S":"Sell","v":"0.250","p":"16578.00","L":"MinusTick","i":"a2","BT":false},
+        {"T":1672304486867,"s":"BTCUSDT","S":"Buy","v":"1.5","p":"16579.00","L":"PlusTick","i":"a3","BT":false}
+    ]})";
+
+    auto res = parser.parse(msg, ticks, depth, ticker, execs, orders, positions);
+    assert(res == ParseResultType::Trade);
+    assert(ticks.size() == 3);
+
+    assert(ticks[0].symbol == "BTCUSDT" && ticks[0].side == "Buy");
+    assert(near(ticks[0].price, 16578.5) && near(ticks[0].qty, 0.001));
+    assert(ticks[0].timestamp == 1672304486865LL);
+
+    assert(ticks[1].side == "Sell" && near(ticks[1].price, 16578.0) && near(ticks[1].qty, 0.25));
+    assert(ticks[2].side == "Buy" && near(ticks[2].price, 16579.0) && near(ticks[2].qty, 1.5));
+    assert(ticks[2].timestamp == 1672304486867LL);
+
+    // Следующее сообщение не тянет хвост предыдущего
+    const std::string single = R"({"topic":"publicTrade.ETHUSDT","type":"snapshot","ts":1,"data":[
+        {"T":2,"s":"ETHUSDT","S":"Sell","v":"3","p":"1200.5","L":"ZeroMinusTick","i":"b1","BT":false}
+    ]})";
+    res = parser.parse(single, ticks, depth, ticker, execs, orders, positions);
+    assert(res == ParseResultType::Trade);
+    assert(ticks.size() == 1 && ticks[0].symbol == "ETHUSDT" && ticks[0].side == "Sell");
+
+    const std::string empty = R"({"topic":"publicTrade.ETHUSDT","type":"snapshot","ts":1,"data":[]})";
+    res = parser.parse(empty, ticks, depth, ticker, execs, orders, positions);
+    assert(res == ParseResultType::None && ticks.empty());
+
+    std::cout << "✅ publicTrade parser OK" << std::endl;
+    return 0;
+}
@@ -0,0 +1,57 @@
+// Резерв входов в полете и сид дневного PnL.
+// Сборка: cmake -DHFT_BUILD_TESTS=ON && ./test_risk_gate
+#include "../include/risk_gate.hpp"
+#include <cassert>
+#include <cmath>
+#include <iostream>
+
+static bool near(double a, double b) { return std::fabs(a - b) < 1e-9; }
+
+int main() {
+    RiskGate gate;
+    RiskLimits limits;
+    limits.max_open_positions = 1;
+    limits.max_total_notional = 1000.0;
+    gate.set_limits(limits);
+
+    // Первый вход занимает единственный слот еще до fill
+    assert(gate.check("BTCUSDT", "Buy", 1.0, 600.0, false, true, "a").empty());
+    assert(gate.stats().open_positions == 1 && near(gate.stats().pending_notional, 600.0));
+    assert(gate.check("ETHUSDT", "Buy", 0.1, 100.0, false, true, "b") == "MAX_OPEN_POSITIONS");
+    // Второй вход по тому же символу упирается в общий notional с учетом резерва
+    assert(gate.check("BTCUSDT", "Buy", 1.0, 600.0, false, true, "c") == "MAX_TOTAL_POSITION");
+
+    // Частичный fill: позиция растет, резерв уменьшается до остатка
+    gate.update_position("BTCUSDT", 0.4, 600.0);
+    gate.update_reservation("a", 0.6);
+    assert(gate.stats().open_positions == 1);
+    assert(near(gate.stats().total_notional, 240.0) && near(gate.stats().pending_notional, 360.0));
+
+    // Остаток отменен: резерв снят, слот держит позиция
+    gate.update_reservation("a", 0.0);
+    assert(near(gate.stats().pending_notional, 0.0) && gate.stats().open_positions == 1);
+    gate.update_position("BTCUSDT", 0.0, 0.0);
+    assert(gate.stats().open_positions == 0);
+
+    // Отказ биржи без fill'ов освобождает слот
+    assert(gate.check("ETHUSDT", "Sell", 0.1, 100.0, false, true, "d").empty());
+    assert(gate.check("SOLUSDT", "Buy", 1.0, 10.0, false, true, "e") == "MAX_OPEN_POSITIONS");
+    gate.release("d");
+    assert(gate.check("SOLUSDT", "Buy", 1.0, 10.0, false, true, "e").empty());
+
+    // Проверка без consume (stage) и reduce-only ничего не резервируют
+    gate.release("e");
+    assert(gate.check("SOLUSDT", "Buy", 1.0, 10.0, false, false, "f").empty());
+    assert(gate.check("SOLUSDT", "Sell", 1.0, 10.0, true, true, "g").empty());
+    assert(gate.stats().open_positions == 0 && near(gate.stats().pending_notional, 0.0));
+
+    // Рестарт: убыток за день приходит сидом, а не с нуля
+    limits.max_daily_loss = 50.0;
+    gate.set_limits(limits);
+    gate.set_daily_pnl(-60.0);
+    assert(gate.check("SOLUSDT", "Buy", 1.0, 10.0, false, true, "h") == "DAILY_LOSS");
+    assert(near(gate.stats().daily_pnl, -60.0));
+
+    std::cout << "✅ risk gate reservations OK" << std::endl;
+    return 0;
+}
@@ -91,7 +91,8 @@ def run(symbol, params):
             vol_ema_alpha=float(params['alpha']),
             min_tp_percent=float(params.get('tp_pct', 0.2)),
             stop_loss_ticks=int(params.get('sl_ticks', 30)),
-            order_amount_usdt=amount_usdt 
+            order_amount_usdt=amount_usdt,
+            wall_scan_levels=int(params.get('scan_levels', StrategyParameters.wall_scan_levels))
         )
         logger.info(f"🏁 Backtest Finished.")
         
@@ -115,6 +116,7 @@ if __name__ == "__main__":
     parser.add_argument("--ratio", type=float, default=defaults.wall_ratio_threshold)
     parser.add_argument("--min_val", type=float, default=defaults.min_wall_value_usdt)
     parser.add_argument("--alpha", type=float, default=defaults.vol_ema_alpha)
+    parser.add_argument("--scan_levels", type=int, default=defaults.wall_scan_levels)
     
     # Risk Params
     parser.add_argument("--tp_pct", type=float, default=defaults.min_tp_percent)
@@ -127,6 +129,7 @@ if __name__ == "__main__":
         "ratio": args.ratio,
         "min_val": args.min_val,
         "alpha": args.alpha,
+        "scan_levels": args.scan_levels,
         "tp_pct": args.tp_pct,
         "sl_ticks": args.sl_ticks
     }
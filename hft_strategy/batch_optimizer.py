@@ -13,6 +13,7 @@ sys.path.append(os.getcwd())
 from hft_strategy.config import TARGET_COINS
 from hft_strategy.pipelines.export_data import export_data
 from hft_strategy.optimization import StrategyOptimizer
+from hft_strategy.infrastructure.event_loop import run as run_event_loop
 
 logging.basicConfig(
     level=logging.INFO,
@@ -61,8 +62,11 @@ def save_results(new_result: dict):
         "score": new_result['score']
     }
 
-    with open(RESULTS_FILE, 'w') as f:
+    # tmp + rename: живой бот перечитывает файл при изменении
+    tmp_file = RESULTS_FILE + ".tmp"
+    with open(tmp_file, 'w') as f:
         json.dump(data, f, indent=4)
+    os.replace(tmp_file, RESULTS_FILE)
     logger.info(f"💾 Results saved to {RESULTS_FILE}")
 
 async def process_coin(symbol: str):
@@ -117,8 +121,5 @@ async def main():
     logger.info("✅ Batch Optimization Complete.")
 
 if __name__ == "__main__":
-    # Windows Patch for asyncio
-    if sys.platform == 'win32':
-        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-        
-    asyncio.run(main())
\ No newline at end of file
+    # uvloop если установлен (HFT_EVENT_LOOP=asyncio чтобы отключить), Windows-патч внутри
+    run_event_loop(main())
\ No newline at end of file
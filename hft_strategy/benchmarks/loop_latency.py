@@ -0,0 +1,175 @@
+# hft_strategy/benchmarks/loop_latency.py
+"""
+Бенчмарк event loop'а: фиксированный (seed) поток стакана прогоняется через
+BotOrchestrator._dispatch_depth из отдельного потока (как это делает C++ стример),
+и для каждого цикла (asyncio / uvloop) считаются перцентили:
+  - loop lag: насколько опаздывает sleep(1ms) в цикле;
+  - dispatch latency: от вызова колбэка в потоке стримера до on_depth стратегии.
+
+Запуск (нужен собранный hft_core):
+    python -m hft_strategy.benchmarks.loop_latency --messages 20000 --rate 5000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.append(os.getcwd())
+
+from hft_strategy.infrastructure import event_loop
+from hft_strategy.infrastructure.local_order_book import LocalOrderBook
+
+PERCENTILES = (50, 90, 99, 99.9)
+LAG_PROBE_SEC = 0.001
+
+def generate_stream(symbols: List[str], messages: int, levels: int, seed: int) -> List[SimpleNamespace]:
+    """Детерминированный поток: snapshot на символ, далее дельты вокруг mid."""
+    rng = random.Random(seed)
+    mids = {sym: 100.0 + 10 * i for i, sym in enumerate(symbols)}
+    tick = 0.01
+    stream = []
+
+    def level(p, q):
+        return SimpleNamespace(price=round(p, 2), qty=q)
+
+    for sym in symbols:
+        mid = mids[sym]
+        stream.append(SimpleNamespace(
+            symbol=sym, is_snapshot=True, timestamp=0, local_timestamp=0,
+            bids=[level(mid - (i + 1) * tick, rng.uniform(1, 50)) for i in range(levels)],
+            asks=[level(mid + (i + 1) * tick, rng.uniform(1, 50)) for i in range(levels)],
+        ))
+
+    for n in range(messages - len(symbols)):
+        sym = symbols[n % len(symbols)]
+        mid = mids[sym]
+        bids = [level(mid - rng.randint(1, levels) * tick, rng.choice([0.0, rng.uniform(1, 50)]))
+                for _ in range(rng.randint(1, 4))]
+        asks = [level(mid + rng.randint(1, levels) * tick, rng.choice([0.0, rng.uniform(1, 50)]))
+                for _ in range(rng.randint(1, 4))]
+        stream.append(SimpleNamespace(symbol=sym, is_snapshot=False, timestamp=n,
+                                      local_timestamp=0, bids=bids, asks=asks))
+    return stream
+
+class BenchStrategy:
+    """Минимальная стратегия: применяет апдейт к LocalOrderBook и меряет задержку доставки."""
+    def __init__(self):
+        self.lob = LocalOrderBook()
+        self.latencies_us: List[float] = []
+
+    async def on_depth(self, update):
+        self.latencies_us.append((time.perf_counter_ns() - update.local_timestamp) / 1000)
+        self.lob.apply_update(update)
+
+    async def on_execution(self, event):
+        pass
+
+    async def on_trigger_fired(self, event):
+        pass
+
+    @property
+    def can_be_deleted(self) -> bool:
+        return False
+
+def _replay(bot, stream: List[SimpleNamespace], rate: float, done: threading.Event):
+    """Поток-«стример»: темп задается rate (сообщений в секунду)."""
+    interval = 1.0 / rate if rate > 0 else 0.0
+    next_ts = time.perf_counter()
+    for msg in stream:
+        if interval:
+            while time.perf_counter() < next_ts:
+                pass
+            next_ts += interval
+        msg.local_timestamp = time.perf_counter_ns()
+        bot._dispatch_depth(msg)
+    done.set()
+
+async def _measure_lag(lags_us: List[float], stop: asyncio.Event):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(LAG_PROBE_SEC)
+        lags_us.append((time.perf_counter() - t0 - LAG_PROBE_SEC) * 1e6)
+
+async def run_once(args) -> Dict:
+    # Импорт здесь: live_bot требует hft_core и настраивает логирование
+    from hft_strategy.live_bot import BotOrchestrator
+
+    bot = BotOrchestrator("benchmark")
+    bot.loop = asyncio.get_running_loop()
+
+    symbols = [f"BENCH{i}USDT" for i in range(args.symbols)]
+    strategies = {}
+    for sym in symbols:
+        strategies[sym] = BenchStrategy()
+        bot.strategies[sym] = strategies[sym]
+        bot.dispatcher.register(sym, strategies[sym])
+
+    stream = generate_stream(symbols, args.messages, args.levels, args.seed)
+
+    lags: List[float] = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(_measure_lag(lags, stop))
+
+    done = threading.Event()
+    started = time.perf_counter()
+    producer = threading.Thread(target=_replay, args=(bot, stream, args.rate, done), daemon=True)
+    producer.start()
+
+    while not done.is_set():
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.2)  # Дать consumer'ам разобрать хвост
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await lag_task
+    stats = bot.dispatcher.stats()
+    await bot.dispatcher.close()
+
+    latencies = [x for s in strategies.values() for x in s.latencies_us]
+    return {
+        "elapsed": elapsed,
+        "lag": lags,
+        "latency": latencies,
+        "received": sum(s["depth_received"] for s in stats.values()),
+        "processed": sum(s["depth_processed"] for s in stats.values()),
+        "max_queue": max((s["max_queue_depth"] for s in stats.values()), default=0),
+    }
+
+def _fmt(values: List[float]) -> str:
+    if not values:
+        return "n/a"
+    pct = np.percentile(np.asarray(values), PERCENTILES)
+    return " | ".join(f"p{p}={v:8.1f}" for p, v in zip(PERCENTILES, pct))
+
+def main():
+    parser = argparse.ArgumentParser(description="Event loop latency benchmark (BotOrchestrator dispatch)")
+    parser.add_argument("--loops", nargs="+", default=["asyncio", "uvloop"], choices=["asyncio", "uvloop"])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--rate", type=float, default=5000.0, help="msg/sec, 0 = as fast as possible")
+    parser.add_argument("--symbols", type=int, default=3)
+    parser.add_argument("--levels", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"📊 Replaying {args.messages} depth msgs @ {args.rate:.0f}/s over {args.symbols} symbols")
+    for name in args.loops:
+        actual, _ = event_loop.resolve_loop(name)
+        if actual != name:
+            print(f"⚠️ {name}: not available, skipped")
+            continue
+
+        res = event_loop.run(run_once(args), loop=name)
+        print(f"\n=== {name} === ({res['elapsed']:.2f}s, depth {res['processed']}/{res['received']} "
+              f"after coalescing, max queue {res['max_queue']})")
+        print(f"  loop lag, us:          {_fmt(res['lag'])}")
+        print(f"  dispatch latency, us:  {_fmt(res['latency'])}")
+
+if __name__ == "__main__":
+    main()
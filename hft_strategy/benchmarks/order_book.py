@@ -0,0 +1,127 @@
+# hft_strategy/benchmarks/order_book.py
+"""
+Бенчмарк стаканов: LocalOrderBook (dict) против ArrayOrderBook (NumPy, индекс по тику).
+Поток depth восстанавливается из записанного .npz (формат export_data: события
+DEPTH / DEPTH_SNAPSHOT, сгруппированные по local_ts) или генерируется детерминированно.
+На каждое сообщение меряется горячий путь стратегии:
+apply_update + get_best x2 + get_volume x2 + get_background_volume.
+Заодно сверяется, что обе реализации дают одинаковые лучшие цены и фон.
+
+Запуск:
+    python -m hft_strategy.benchmarks.order_book --input data/SOLUSDT_v2.npz --tick 0.01
+    python -m hft_strategy.benchmarks.order_book --synthetic --messages 50000
+"""
+import argparse
+import math
+import os
+import sys
+import time
+from types import SimpleNamespace
+from typing import List
+
+import numpy as np
+
+sys.path.append(os.getcwd())
+
+from hft_strategy.domain.events import (
+    DEPTH_EVENT, DEPTH_SNAPSHOT_EVENT, DEPTH_CLEAR_EVENT, BUY_EVENT, SELL_EVENT
+)
+from hft_strategy.infrastructure.local_order_book import LocalOrderBook
+from hft_strategy.infrastructure.array_order_book import ArrayOrderBook
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+def load_recorded(path: str, limit: int) -> List[SimpleNamespace]:
+    """События стакана из .npz -> сообщения (snapshot / delta), как их видит стратегия."""
+    data = np.load(path)['data']
+    kind = data['ev'] & 0xFF
+    depth = data[np.isin(kind, (DEPTH_EVENT, DEPTH_SNAPSHOT_EVENT, DEPTH_CLEAR_EVENT))]
+
+    messages: List[SimpleNamespace] = []
+    current = None
+    for ev, ts, px, qty in zip(depth['ev'], depth['local_ts'], depth['px'], depth['qty']):
+        ev, ts = int(ev), int(ts)
+        if (ev & 0xFF) == DEPTH_CLEAR_EVENT or current is None or ts != current.timestamp:
+            if current is not None:
+                messages.append(current)
+                if len(messages) >= limit: break
+            current = SimpleNamespace(timestamp=ts, is_snapshot=(ev & 0xFF) == DEPTH_CLEAR_EVENT,
+                                      bids=[], asks=[])
+            if current.is_snapshot: continue
+        if ev & BUY_EVENT:
+            current.bids.append((float(px), abs(float(qty))))
+        elif ev & SELL_EVENT:
+            current.asks.append((float(px), abs(float(qty))))
+    if current is not None and len(messages) < limit:
+        messages.append(current)
+    return messages
+
+def load_synthetic(messages: int, levels: int, seed: int) -> List[SimpleNamespace]:
+    from hft_strategy.benchmarks.loop_latency import generate_stream
+    return generate_stream(["BENCHUSDT"], messages, levels, seed)
+
+def run_book(book, stream: List[SimpleNamespace]) -> np.ndarray:
+    timings = np.empty(len(stream), dtype=np.float64)
+    clock = time.perf_counter_ns
+    for n, msg in enumerate(stream):
+        t0 = clock()
+        book.apply_update(msg)
+        bid, ask = book.get_best("Buy"), book.get_best("Sell")
+        book.get_volume("Buy", bid)
+        book.get_volume("Sell", ask)
+        book.get_background_volume()
+        timings[n] = clock() - t0
+    return timings / 1000
+
+def verify(stream: List[SimpleNamespace], tick: float) -> int:
+    """Пошаговая сверка реализаций. Возвращает число расхождений."""
+    ref, arr = LocalOrderBook(), ArrayOrderBook(tick)
+    mismatches = 0
+    for msg in stream:
+        ref.apply_update(msg)
+        arr.apply_update(msg)
+        same = (ref.get_best("Buy") == arr.get_best("Buy")
+                and ref.get_best("Sell") == arr.get_best("Sell")
+                and math.isclose(ref.get_background_volume(), arr.get_background_volume(), rel_tol=1e-9))
+        mismatches += not same
+    return mismatches
+
+def _fmt(values: np.ndarray) -> str:
+    pct = np.percentile(values, PERCENTILES)
+    return " | ".join(f"p{p}={v:7.2f}" for p, v in zip(PERCENTILES, pct)) + f" | mean={values.mean():7.2f}"
+
+def main():
+    parser = argparse.ArgumentParser(description="LocalOrderBook vs ArrayOrderBook")
+    parser.add_argument("--input", help="Записанный .npz (export_data)")
+    parser.add_argument("--synthetic", action="store_true", help="Сгенерировать поток вместо записи")
+    parser.add_argument("--tick", type=float, default=0.01, help="Tick size инструмента")
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--levels", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.input and not args.synthetic:
+        if not os.path.exists(args.input):
+            print(f"❌ File not found: {args.input}")
+            sys.exit(1)
+        stream = load_recorded(args.input, args.messages)
+        source = args.input
+    else:
+        stream = load_synthetic(args.messages, args.levels, args.seed)
+        source = "synthetic"
+
+    print(f"📊 {len(stream)} depth msgs from {source}, tick={args.tick}")
+
+    mismatches = verify(stream, args.tick)
+    print(f"🔎 Consistency: {'OK' if mismatches == 0 else f'{mismatches} mismatching updates'}")
+
+    results = {}
+    for name, book in (("dict", LocalOrderBook()), ("array", ArrayOrderBook(args.tick))):
+        results[name] = run_book(book, stream)
+        print(f"  {name:6s} us/update: {_fmt(results[name])}")
+
+    speedup = results["dict"].mean() / results["array"].mean()
+    print(f"\n⚡ array vs dict: x{speedup:.2f} (mean)")
+
+if __name__ == "__main__":
+    main()
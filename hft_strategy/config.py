@@ -1,5 +1,6 @@
 # hft_strategy/config.py
 import os
+import copy
 import logging
 import json
 from dataclasses import dataclass, field
@@ -18,6 +19,22 @@ from hft_strategy.domain.strategy_config import StrategyParameters, get_config
 # Папка config должна быть примонтирована через Docker Volume
 CONFIG_DIR = "config"
 SETTINGS_FILE = os.path.join(CONFIG_DIR, "strategy_params.json")
+# Лучшие параметры по монетам (пишет batch_optimizer)
+OPTIMIZED_PARAMS_FILE = os.path.join("hft_strategy", "domain", "optimized_params.json")
+
+# Локальные кэши (спецификации инструментов и т.п.), переживают рестарт бота
+DATA_DIR = "data"
+INSTRUMENTS_CACHE_FILE = os.path.join(DATA_DIR, "instruments_cache.json")
+INSTRUMENTS_TTL_SEC = 6 * 3600  # Tick/Lot меняются редко, 6 часов достаточно
+# Снапшоты состояния стратегий для теплого рестарта (файл на символ)
+SNAPSHOT_DIR = os.path.join(DATA_DIR, "snapshots")
+SNAPSHOT_INTERVAL_SEC = 5.0
+SNAPSHOT_MAX_AGE_SEC = 15 * 60  # Старше — EMA и NATR уже не про текущий рынок
+
+# Общий демон market data (один стрим на все контейнеры ботов)
+# Пустой сокет -> бот держит собственный ExchangeStreamer
+MARKET_DATA_SOCKET = os.getenv("HFT_MARKET_DATA_SOCKET", "")
+MARKET_DATA_SHM_NAME = os.getenv("HFT_MARKET_DATA_SHM", "hft_market_data")
 
 # ==========================================
 # 🎛️ ПАНЕЛЬ УПРАВЛЕНИЯ (Hardcoded Defaults - Фолбек)
@@ -52,6 +69,56 @@ class TradingConfig:
     ws_url: str = "wss://stream.bybit.com/v5/public/linear"
     private_ws_url: str = "wss://stream.bybit.com/v5/private"
 
+def coerce_setting(default: Any, value: Any) -> Any:
+    """Значение из JSON к типу дефолта. bool("false") == True, поэтому строки bool разбираем явно."""
+    if isinstance(default, bool):
+        return value if isinstance(value, bool) else str(value).strip().lower() in ("1", "true", "yes")
+    return type(default)(value)
+
+def settings_from_dict(cls, data: Dict[str, Any]):
+    """Секция JSON -> dataclass с дефолтами; неизвестные ключи игнорируются."""
+    cfg = cls()
+    for name, default in vars(cls()).items():
+        if name in data:
+            setattr(cfg, name, coerce_setting(default, data[name]))
+    return cfg
+
+@dataclass
+class RiskConfig:
+    """
+    Лимиты пре-трейд риск-гейта (C++ OrderGateway). 0 -> лимит отключен.
+    Секция "risk" в strategy_params.json. С воркерами (HFT_WORKERS) лимиты аккаунта
+    делятся между их гейтами поровну (StrategyWorker._apply_risk_limits).
+    """
+    enabled: bool = True
+    max_order_notional: float = 100.0
+    max_symbol_notional: float = 150.0
+    max_total_notional: float = 400.0
+    max_open_positions: int = 3
+    price_band_pct: float = 1.0
+    max_orders_per_sec: float = 10.0
+    max_symbol_orders_per_sec: float = 3.0
+    max_daily_loss: float = 50.0
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RiskConfig":
+        return settings_from_dict(cls, data)
+
+@dataclass
+class RotationConfig:
+    """
+    Политика ротации монет (RotationPolicy). Секция "rotation" в strategy_params.json.
+    Оценка = NATR сканера в процентах.
+    """
+    hysteresis_pct: float = 20.0      # Бонус действующей монете, % от ее оценки
+    switch_penalty: float = 0.1       # Цена смены в единицах оценки (пункты NATR)
+    min_tenure_sec: float = 1800.0    # Раньше этого монету не снимаем
+    score_ema_alpha: float = 0.5      # Сглаживание оценок между сканами
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RotationConfig":
+        return settings_from_dict(cls, data)
+
 @dataclass
 class Config:
     """
@@ -64,6 +131,8 @@ class Config:
     log_level: str
     strategy: StrategyParameters
     
+    risk: RiskConfig = field(default_factory=RiskConfig)
+    rotation: RotationConfig = field(default_factory=RotationConfig)
     db: DatabaseConfig = field(default_factory=lambda: DB_CONFIG)
 
 # ==========================================
@@ -79,14 +148,21 @@ def _load_json_settings() -> Dict[str, Any]:
         return {}
     
     try:
-        with open(SETTINGS_FILE, 'r') as f:
-            data = json.load(f)
-            logging.info(f"📂 Config loaded from {SETTINGS_FILE}")
-            return data
+        data = read_settings_file()
+        logging.info(f"📂 Config loaded from {SETTINGS_FILE}")
+        return data
     except Exception as e:
         logging.error(f"❌ Error reading {SETTINGS_FILE}: {e}. Using defaults.")
         return {}
 
+def read_settings_file() -> Dict[str, Any]:
+    """Строгое чтение strategy_params.json: ошибки пробрасываются (hot-reload не должен откатывать к дефолтам)."""
+    with open(SETTINGS_FILE, 'r') as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("top-level JSON must be an object")
+    return data
+
 def _ensure_config_dir():
     """Создает папку config, если её нет"""
     if not os.path.exists(CONFIG_DIR):
@@ -95,6 +171,46 @@ def _ensure_config_dir():
         except OSError:
             pass # Может быть ошибка прав доступа в Docker, игнорируем
 
+def _apply_strategy_settings(strategy_params: StrategyParameters, json_settings: Dict[str, Any]):
+    """Переносит ключи strategy_params.json в параметры стратегии (общий код старта и hot-reload)."""
+    if "investment_usdt" in json_settings:
+        strategy_params.order_amount_usdt = float(json_settings["investment_usdt"])
+    else:
+        strategy_params.order_amount_usdt = DEFAULT_INVESTMENT_USDT
+
+    if "wall_ratio_threshold" in json_settings:
+        strategy_params.wall_ratio_threshold = float(json_settings["wall_ratio_threshold"])
+        
+    if "min_wall_value_usdt" in json_settings:
+        strategy_params.min_wall_value_usdt = float(json_settings["min_wall_value_usdt"])
+        
+    if "vol_ema_alpha" in json_settings:
+        strategy_params.vol_ema_alpha = float(json_settings["vol_ema_alpha"])
+
+    if "entry_timeout_sec" in json_settings:
+        strategy_params.entry_timeout_sec = float(json_settings["entry_timeout_sec"])
+
+    if "wall_scan_levels" in json_settings:
+        strategy_params.wall_scan_levels = int(json_settings["wall_scan_levels"])
+
+    if "min_wall_age_sec" in json_settings:
+        strategy_params.min_wall_age_sec = float(json_settings["min_wall_age_sec"])
+
+    if "max_wall_cancel_ratio" in json_settings:
+        strategy_params.max_wall_cancel_ratio = float(json_settings["max_wall_cancel_ratio"])
+
+    if "min_wall_depletion_sec" in json_settings:
+        strategy_params.min_wall_depletion_sec = float(json_settings["min_wall_depletion_sec"])
+
+    if "stop_loss_ticks" in json_settings:
+        strategy_params.stop_loss_ticks = int(json_settings["stop_loss_ticks"])
+
+    if "min_tp_percent" in json_settings:
+        strategy_params.min_tp_percent = float(json_settings["min_tp_percent"])
+
+    if "tp_natr_multiplier" in json_settings:
+        strategy_params.tp_natr_multiplier = float(json_settings["tp_natr_multiplier"])
+
 # ==========================================
 # 🔨 FACTORY FUNCTIONS
 # ==========================================
@@ -127,32 +243,75 @@ def load_config(path: str = None) -> Config:
     
     # Переопределяем значениями из JSON, если они там есть
     # Это позволяет менять их через файл без правки кода
-    if "investment_usdt" in json_settings:
-        strategy_params.order_amount_usdt = float(json_settings["investment_usdt"])
-    else:
-        strategy_params.order_amount_usdt = DEFAULT_INVESTMENT_USDT
-
-    if "wall_ratio_threshold" in json_settings:
-        strategy_params.wall_ratio_threshold = float(json_settings["wall_ratio_threshold"])
-        
-    if "min_wall_value_usdt" in json_settings:
-        strategy_params.min_wall_value_usdt = float(json_settings["min_wall_value_usdt"])
-        
-    if "vol_ema_alpha" in json_settings:
-        strategy_params.vol_ema_alpha = float(json_settings["vol_ema_alpha"])
+    _apply_strategy_settings(strategy_params, json_settings)
 
     logging.info(f"⚙️ Active Strategy Params: WallRatio={strategy_params.wall_ratio_threshold}, "
                  f"Inv=${strategy_params.order_amount_usdt}, MinWall=${strategy_params.min_wall_value_usdt}")
 
+    risk = RiskConfig.from_dict(json_settings.get("risk", {}))
+    rotation = RotationConfig.from_dict(json_settings.get("rotation", {}))
+
     return Config(
         api_key=api_key,
         api_secret=api_secret,
         testnet=False, 
         symbol=symbol,
         log_level="INFO",
-        strategy=strategy_params
+        strategy=strategy_params,
+        risk=risk,
+        rotation=rotation
     )
 
+# ==========================================
+# 🔁 HOT RELOAD
+# ==========================================
+
+# Поля StrategyParameters, которые можно менять у живых стратегий.
+# Спецификация инструмента (tick/lot/min_qty) и символ — только при активации.
+HOT_RELOAD_PARAMS = (
+    "order_amount_usdt", "wall_ratio_threshold", "min_wall_value_usdt", "vol_ema_alpha",
+    "entry_timeout_sec", "wall_scan_levels", "min_wall_age_sec", "max_wall_cancel_ratio",
+    "min_wall_depletion_sec", "stop_loss_ticks", "min_tp_percent", "tp_natr_multiplier",
+)
+
+def validate_strategy_params(params: StrategyParameters) -> List[str]:
+    """Список ошибок (пустой — параметры можно применять)."""
+    errors = []
+    if params.order_amount_usdt <= 0:
+        errors.append(f"investment_usdt must be > 0 (got {params.order_amount_usdt})")
+    if params.wall_ratio_threshold <= 0:
+        errors.append(f"wall_ratio_threshold must be > 0 (got {params.wall_ratio_threshold})")
+    if params.min_wall_value_usdt < 0:
+        errors.append(f"min_wall_value_usdt must be >= 0 (got {params.min_wall_value_usdt})")
+    if not 0 < params.vol_ema_alpha <= 1:
+        errors.append(f"vol_ema_alpha must be in (0, 1] (got {params.vol_ema_alpha})")
+    if params.wall_scan_levels < 1:
+        errors.append(f"wall_scan_levels must be >= 1 (got {params.wall_scan_levels})")
+    if params.stop_loss_ticks < 1:
+        errors.append(f"stop_loss_ticks must be >= 1 (got {params.stop_loss_ticks})")
+    if params.min_tp_percent <= 0:
+        errors.append(f"min_tp_percent must be > 0 (got {params.min_tp_percent})")
+    for name in ("entry_timeout_sec", "min_wall_age_sec", "max_wall_cancel_ratio", "min_wall_depletion_sec",
+                 "tp_natr_multiplier"):
+        if getattr(params, name) < 0:
+            errors.append(f"{name} must be >= 0 (got {getattr(params, name)})")
+    return errors
+
+def diff_strategy_params(current: StrategyParameters, json_settings: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Горячие поля, которые меняет json_settings относительно current: {name: new_value}.
+    ValueError / TypeError — файл не прошел разбор или валидацию, current не трогаем.
+    """
+    candidate = copy.copy(current)
+    _apply_strategy_settings(candidate, json_settings)
+    errors = validate_strategy_params(candidate)
+    if errors:
+        raise ValueError("; ".join(errors))
+    return {
+        name: getattr(candidate, name) for name in HOT_RELOAD_PARAMS
+        if getattr(candidate, name) != getattr(current, name)
+    }
+
 # ==========================================
 # 🔌 GLOBAL INSTANCES
 # ==========================================
@@ -0,0 +1,46 @@
+# hft_strategy/domain/account.py
+from dataclasses import dataclass
+
+# Статусы Bybit V5, после которых ордер уже не изменится.
+# "Gone" — наш внутренний: ордера нет среди открытых при сверке, итог неизвестен.
+FINAL_ORDER_STATUSES = {"Filled", "Cancelled", "Rejected", "Deactivated", "PartiallyFilledCanceled", "Gone"}
+
+@dataclass
+class OrderRecord:
+    """
+    Состояние нашего ордера по данным приватных потоков.
+    order_id / order_link_id могут быть пустыми, пока биржа не прислала первый push.
+    """
+    symbol: str
+    side: str
+    order_id: str = ""
+    order_link_id: str = ""
+    status: str = "New"
+    qty: float = 0.0
+    price: float = 0.0
+    cum_exec_qty: float = 0.0   # Кумулятивный fill: max(push, сумма execution'ов), не больше qty
+    pushed_cum_qty: float = 0.0 # cumExecQty из order push / REST — источник истины
+    exec_sum_qty: float = 0.0   # Сумма execution'ов: опережает push, пока тот не пришел
+    avg_price: float = 0.0
+    reduce_only: bool = False
+    updated_ts: float = 0.0     # Локальное время последнего изменения
+
+    @property
+    def is_final(self) -> bool:
+        return self.status in FINAL_ORDER_STATUSES
+
+    @property
+    def leaves_qty(self) -> float:
+        return 0.0 if self.is_final else max(self.qty - self.cum_exec_qty, 0.0)
+
+@dataclass
+class PositionRecord:
+    """Позиция по символу. size со знаком: > 0 лонг, < 0 шорт."""
+    symbol: str
+    size: float = 0.0
+    avg_entry_price: float = 0.0
+    updated_ts: float = 0.0
+
+    @property
+    def is_flat(self) -> bool:
+        return abs(self.size) <= 1e-9
@@ -0,0 +1,13 @@
+# hft_strategy/domain/instrument_spec.py
+from dataclasses import dataclass
+
+@dataclass(frozen=True)
+class InstrumentSpec:
+    """
+    Value Object: торговая спецификация инструмента (шаг цены, шаг лота, мин. объем).
+    Неизменяемый, поэтому его можно безопасно раздавать всем стратегиям.
+    """
+    symbol: str
+    tick_size: float
+    lot_size: float   # qtyStep
+    min_qty: float    # minOrderQty
@@ -31,4 +31,10 @@ class IExecutionHandler(Protocol):
 
     async def cancel_order(self, symbol: str, order_id: str) -> None: ...
 
-    async def get_position(self, symbol: str) -> float: ...
\ No newline at end of file
+    async def get_position(self, symbol: str) -> float: ...
+
+    async def fetch_positions(self) -> Dict[str, Dict]: ...
+
+    async def fetch_open_orders(self) -> List[Dict]: ...
+
+    async def fetch_closed_pnl(self, since_ms: int) -> Dict[str, float]: ...
\ No newline at end of file
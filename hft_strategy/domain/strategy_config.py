@@ -16,12 +16,23 @@ class StrategyParameters:
     wall_ratio_threshold: float = 25.0
     min_wall_value_usdt: float = 50000.0
     vol_ema_alpha: float = 0.018955904607758676 
+    wall_scan_levels: int = 5             # Стена ищется в первых N уровнях каждой стороны
+
+    # --- ФИЛЬТР СПУФА (LevelHistory; 0 -> фильтр выключен) ---
+    min_wall_age_sec: float = 0.0         # Стена должна простоять не меньше
+    max_wall_cancel_ratio: float = 0.0    # Доля снятого от пика объема, выше — спуф
+
+    # --- ПОТОК СДЕЛОК (TradeFlow; 0 -> фильтр выключен) ---
+    min_wall_depletion_sec: float = 0.0   # Стена, которую агрессоры съедят быстрее, — не стена
     
     # --- РИСК-МЕНЕДЖМЕНТ ---
     entry_delta_ticks: int = 1
     
     # [UPDATED] Стоп-лосс: 1 тик за стеной
     stop_loss_ticks: int = 1 
+
+    # Вход, не исполненный за это время, снимается (таймер TradeManager)
+    entry_timeout_sec: float = 30.0
     
     # [NEW] ДИНАМИЧЕСКИЙ ТЕЙК
     use_dynamic_tp: bool = True     
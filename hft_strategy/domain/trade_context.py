@@ -25,4 +25,32 @@ class TradeContext:
     filled_qty: float = 0.0 
     
     tp_order_id: Optional[str] = None # ID ордера Take Profit
-    placed_ts: float = 0.0 # Время выставления (для таймаута)
\ No newline at end of file
+    placed_ts: float = 0.0 # Время выставления (для таймаута)
+    # Таймер таймаута входа в TimerWheel (None -> таймаут проверяет ядро на апдейтах стакана)
+    timeout_timer: Optional[object] = None
+
+    # Нативный стоп в C++ TriggerEngine (None -> не взведен)
+    trigger_id: Optional[str] = None
+    # Время отправки выхода (C++ триггер или panic). 0 -> выход еще не отправлялся
+    exit_sent_ts: float = 0.0
+    # orderLinkId входа: по нему риск-гейт держит резерв, пока ордер в полете
+    order_link_id: str = ""
+
+@dataclass(frozen=True)
+class StagedOrder:
+    """
+    Вход, заранее сериализованный в OrderGateway (handle).
+    Хранит параметры, под которые собран: стрелять можно только при полном совпадении.
+    """
+    handle: int
+    order_link_id: str
+    side: str
+    entry_price: float
+    qty: float
+    stop_loss: float
+    take_profit: float
+    staged_ts: float
+
+    def matches(self, side: str, entry_price: float, qty: float, stop_loss: float, take_profit: float) -> bool:
+        return (self.side == side and self.entry_price == entry_price and self.qty == qty
+                and self.stop_loss == stop_loss and self.take_profit == take_profit)
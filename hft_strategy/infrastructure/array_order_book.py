@@ -0,0 +1,291 @@
+# hft_strategy/infrastructure/array_order_book.py
+import time
+import logging
+from typing import Any, Optional, Tuple
+
+import numpy as np
+
+from hft_strategy.infrastructure.local_order_book import LocalOrderBook
+
+logger = logging.getLogger("LOB")
+
+DEFAULT_CAPACITY = 4096   # Тиков в окне стакана (по ±2048 от центра)
+SCAN_WINDOW = 64          # Стартовое окно поиска следующих уровней (удваивается при нехватке)
+BACKGROUND_LEVELS = 10    # Уровни 2-11 (как в LocalOrderBook.get_background_volume)
+_EMPTY = np.empty(0)
+
+class _BookSide:
+    """
+    Одна сторона стакана: объемы по индексу тика + инкрементально поддерживаемый лучший индекс.
+    Сумма фоновых уровней кэшируется: пересчет только если апдейт попал между лучшим
+    уровнем и границей фона (bg_edge). Дельты глубже фона его не трогают.
+    len(side) — число непустых уровней (совместимо с проверкой `if not lob.bids`).
+    """
+    __slots__ = ("qty", "best", "count", "is_bid", "bg_edge", "bg_sum", "bg_count", "bg_dirty")
+
+    def __init__(self, capacity: int, is_bid: bool):
+        self.qty = np.zeros(capacity, dtype=np.float64)
+        self.best = -1
+        self.count = 0
+        self.is_bid = is_bid
+        self._reset_background()
+
+    def _reset_background(self):
+        # Граница «весь массив»: любой апдейт инвалидирует кэш, пока фон не наберет BACKGROUND_LEVELS
+        self.bg_edge = -1 if self.is_bid else len(self.qty)
+        self.bg_sum = 0.0
+        self.bg_count = 0
+        self.bg_dirty = True
+
+    def __len__(self) -> int:
+        return self.count
+
+    def clear(self):
+        self.qty.fill(0.0)
+        self.best = -1
+        self.count = 0
+        self._reset_background()
+
+    def set(self, i: int, q: float):
+        if i >= self.bg_edge if self.is_bid else i <= self.bg_edge:
+            self.bg_dirty = True
+        old = self.qty.item(i)
+        if q > 0:
+            if old == 0:
+                self.count += 1
+            self.qty[i] = q
+            if self.best < 0 or (i > self.best if self.is_bid else i < self.best):
+                self.best = i
+        elif old != 0:
+            self.qty[i] = 0.0
+            self.count -= 1
+            if i == self.best:
+                self._rescan_best()
+
+    def _rescan_best(self):
+        """Лучший уровень удален: ищем следующий вглубь стакана (векторно)."""
+        if self.count == 0:
+            self.best = -1
+            return
+        if self.is_bid:
+            self.best = int(np.flatnonzero(self.qty[:self.best])[-1])
+        else:
+            self.best = self.best + 1 + int(np.flatnonzero(self.qty[self.best + 1:])[0])
+
+    def background(self):
+        """(сумма, число) объемов BACKGROUND_LEVELS непустых уровней сразу за лучшим."""
+        if self.bg_dirty:
+            self._scan_background(BACKGROUND_LEVELS)
+        return self.bg_sum, self.bg_count
+
+    def levels_from(self, start: int, n: int) -> np.ndarray:
+        """Индексы до n непустых уровней от start (включительно) вглубь стакана, в порядке удаления."""
+        q = self.qty
+        if not 0 <= start < len(q):
+            return np.empty(0, dtype=np.int64)
+        window = SCAN_WINDOW
+        while True:
+            if self.is_bid:
+                lo = start + 1 - window if start + 1 > window else 0
+                idx = q[lo:start + 1].nonzero()[0][-n:][::-1] + lo
+                exhausted = lo == 0
+            else:
+                hi = start + window
+                idx = q[start:hi].nonzero()[0][:n] + start
+                exhausted = hi >= len(q)
+            if len(idx) >= n or exhausted:
+                return idx
+            window *= 2
+
+    def _scan_background(self, n: int):
+        idx = self.levels_from(self.best - 1 if self.is_bid else self.best + 1, n)
+        self.bg_sum = self.qty[idx].sum().item()
+        self.bg_count = len(idx)
+        if self.bg_count == n:
+            self.bg_edge = int(idx[-1])
+        else:
+            self.bg_edge = -1 if self.is_bid else len(self.qty)
+        self.bg_dirty = False
+
+    def reindex(self, shift: int):
+        """Сдвиг окна: индекс i становится i - shift, уровни за границей отбрасываются."""
+        size = len(self.qty)
+        moved = np.zeros_like(self.qty)
+        if 0 <= shift < size:
+            moved[:size - shift] = self.qty[shift:]
+        elif -size < shift < 0:
+            moved[-shift:] = self.qty[:size + shift]
+        # На месте: массив может быть строкой общей матрицы (BatchWallEvaluator)
+        self.qty[:] = moved
+        self._reset_background()
+
+        nz = np.flatnonzero(moved)
+        self.count = len(nz)
+        if self.count == 0:
+            self.best = -1
+        else:
+            self.best = int(nz[-1]) if self.is_bid else int(nz[0])
+
+class ArrayOrderBook:
+    """
+    Стакан на NumPy-массивах, индексированных целым тиком относительно якоря.
+    Тот же публичный API, что у LocalOrderBook (get_best, get_volume,
+    get_background_volume, apply_update, apply_snapshot), но:
+      - лучшая цена поддерживается инкрементально: get_best — O(1), без max()/min() по ключам;
+      - фон (уровни 2-11) — срез массива без сортировки, кэшируется до апдейта внутри фона;
+      - суммы по диапазону цен — срез массива.
+    Окно capacity тиков центрируется по mid; при выходе цены за окно — перецентровка,
+    уровни дальше capacity/2 тиков от mid отбрасываются (для логики стен они не нужны).
+    """
+    def __init__(self, tick_size: float, capacity: int = DEFAULT_CAPACITY):
+        if tick_size <= 0:
+            raise ValueError("ArrayOrderBook requires positive tick_size")
+        self.tick_size = tick_size
+        self.capacity = capacity
+        self._inv_tick = 1.0 / tick_size
+
+        self.bids = _BookSide(capacity, is_bid=True)
+        self.asks = _BookSide(capacity, is_bid=False)
+        self._anchor: Optional[int] = None  # Тик цены в индексе 0
+        self.last_ts = 0
+
+        self.recenters = 0
+        self.dropped_levels = 0
+
+    # --- ИНДЕКСАЦИЯ ---
+    def _tick(self, price: float) -> int:
+        return int(round(price * self._inv_tick))
+
+    def _price(self, index: int) -> float:
+        return round((self._anchor + index) * self.tick_size, 8)
+
+    def _index(self, price: float) -> int:
+        """Индекс уровня в окне; -1, если цена вне окна даже после перецентровки."""
+        tick = self._tick(price)
+        if self._anchor is None:
+            self._anchor = tick - self.capacity // 2
+        i = tick - self._anchor
+        if 0 <= i < self.capacity:
+            return i
+        return self._recenter(tick)
+
+    def _recenter(self, tick: int) -> int:
+        half = self.capacity // 2
+        if self.bids.count and self.asks.count:
+            center = self._anchor + (self.bids.best + self.asks.best) // 2
+        else:
+            side = self.bids if self.bids.count else self.asks
+            center = self._anchor + side.best if side.count else tick
+
+        if abs(tick - center) >= half:
+            self.dropped_levels += 1
+            return -1
+
+        new_anchor = center - half
+        shift = new_anchor - self._anchor
+        self.bids.reindex(shift)
+        self.asks.reindex(shift)
+        self._anchor = new_anchor
+        self.recenters += 1
+        return tick - new_anchor
+
+    def bind(self, bid_buf: np.ndarray, ask_buf: np.ndarray):
+        """Переносит массивы сторон в переданные буферы (строки общей матрицы стаканов)."""
+        for book, buf in ((self.bids, bid_buf), (self.asks, ask_buf)):
+            buf[:] = book.qty
+            book.qty = buf
+
+    @property
+    def anchor(self) -> int:
+        """Тик цены в индексе 0 (0, пока стакан пуст)."""
+        return self._anchor if self._anchor is not None else 0
+
+    def _side(self, side: str) -> _BookSide:
+        return self.bids if side == "Buy" else self.asks
+
+    def _apply_levels(self, book: _BookSide, levels):
+        unpack, inv_tick, capacity = LocalOrderBook._unpack, self._inv_tick, self.capacity
+        for level in levels:
+            p, q = unpack(level)
+            anchor = self._anchor
+            i = int(round(p * inv_tick)) - anchor if anchor is not None else -1
+            if not 0 <= i < capacity:
+                i = self._index(p)  # Первый уровень или выход за окно: якорь / перецентровка
+                if i < 0: continue
+            book.set(i, q)
+
+    def _clear(self):
+        self.bids.clear()
+        self.asks.clear()
+        self._anchor = None
+
+    # --- ОБНОВЛЕНИЕ ---
+    def apply_update(self, event: Any):
+        """Snapshot или Delta из Python-структур (бэктест, REST, почтовый ящик стратегии)."""
+        if getattr(event, 'is_snapshot', False):
+            self._clear()
+
+        self._apply_levels(self.bids, event.bids)
+        self._apply_levels(self.asks, event.asks)
+
+        self.last_ts = getattr(event, 'timestamp', time.time())
+
+    def apply_snapshot(self, snapshot: Any):
+        """Полный C++ снепшот (OrderBookSnapshot) поверх пустого стакана."""
+        self._clear()
+        try:
+            self._apply_levels(self.bids, snapshot.bids)
+            self._apply_levels(self.asks, snapshot.asks)
+            self.last_ts = getattr(snapshot, 'local_timestamp', time.time())
+        except Exception as e:
+            logger.error(f"LOB Snapshot Error: {e}")
+
+    # --- ЧТЕНИЕ ---
+    def get_volume(self, side: str, price: float) -> float:
+        """Безопасное получение объема по цене"""
+        if self._anchor is None:
+            return 0.0
+        i = self._tick(price) - self._anchor
+        if not 0 <= i < self.capacity:
+            return 0.0
+        return self._side(side).qty.item(i)
+
+    def get_best(self, side: str) -> float:
+        """Возвращает лучшую цену (Top of Book), O(1)"""
+        book = self._side(side)
+        if book.count == 0:
+            return 0.0
+        return self._price(book.best)
+
+    def get_background_volume(self) -> float:
+        """
+        Средняя ликвидность на уровнях 2-11 обеих сторон (как в LocalOrderBook),
+        но без сортировки: следующие непустые уровни берутся срезом от лучшего индекса.
+        """
+        if not self.bids.count or not self.asks.count:
+            return 0.0
+
+        bid_sum, bid_n = self.bids.background()
+        ask_sum, ask_n = self.asks.background()
+        n = bid_n + ask_n
+        if n == 0:
+            return 0.0
+        return (bid_sum + ask_sum) / n
+
+    def top_levels(self, side: str, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(цены, объемы) первых n непустых уровней стороны от лучшего вглубь — срезом массива."""
+        book = self._side(side)
+        if book.count == 0:
+            return _EMPTY, _EMPTY
+        idx = book.levels_from(book.best, n)
+        return np.round((self._anchor + idx) * self.tick_size, 8), book.qty[idx]
+
+    def range_volume(self, side: str, price_from: float, price_to: float) -> float:
+        """Суммарный объем стороны в диапазоне цен [price_from, price_to] (векторно)."""
+        if self._anchor is None:
+            return 0.0
+        lo, hi = sorted((self._tick(price_from) - self._anchor, self._tick(price_to) - self._anchor))
+        lo, hi = max(lo, 0), min(hi, self.capacity - 1)
+        if lo > hi:
+            return 0.0
+        return float(self._side(side).qty[lo:hi + 1].sum())
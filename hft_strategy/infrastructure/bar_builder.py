@@ -0,0 +1,185 @@
+# hft_strategy/infrastructure/bar_builder.py
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger("BARS")
+
+BAR_INTERVALS_SEC = (60, 300)   # 1m / 5m
+NATR_INTERVAL_SEC = 300         # Таймфрейм NATR (как у прежних REST-свечей "5")
+NATR_PERIOD = 20
+NATR_MIN_BARS = 10              # Меньше закрытых баров — NATR еще не считаем
+BAR_HISTORY = 64                # Закрытых баров в кольце на интервал
+
+class Bar(NamedTuple):
+    start_ms: int
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+
+class BarSeries:
+    """
+    Бары одного интервала одного символа: текущий бар + кольцо закрытых фиксированного размера.
+    ATR — скользящая сумма TR за period последних закрытых баров (кольцо TR):
+    закрытие бара — O(1), чтение NATR — O(1). Интервалы без сделок закрываются
+    плоскими барами по последней цене, чтобы ATR не «растягивался» на паузы.
+    """
+    __slots__ = ("interval_ms", "period", "_bars", "_count",
+                 "_trs", "_tr_sum", "_tr_count",
+                 "_start", "_open", "_high", "_low", "_close", "_volume", "_prev_close")
+
+    def __init__(self, interval_sec: int, period: int = NATR_PERIOD, capacity: int = BAR_HISTORY):
+        self.interval_ms = interval_sec * 1000
+        self.period = period
+        self._bars: List[Optional[Bar]] = [None] * capacity
+        self._count = 0
+        self._trs = [0.0] * period
+        self._tr_sum = 0.0
+        self._tr_count = 0
+        self._start = -1
+        self._open = self._high = self._low = self._close = self._volume = 0.0
+        self._prev_close = 0.0
+
+    # --- ОБНОВЛЕНИЕ ---
+    def update(self, price: float, qty: float, ts_ms: int):
+        start = ts_ms - ts_ms % self.interval_ms
+        if start != self._start:
+            if start < self._start:
+                return  # Запоздавший принт закрытого бара
+            if self._start >= 0:
+                self._roll(start)
+            self._start = start
+            self._open = self._high = self._low = price
+            self._volume = 0.0
+        elif price > self._high:
+            self._high = price
+        elif price < self._low:
+            self._low = price
+        self._close = price
+        self._volume += qty
+
+    def _roll(self, new_start: int):
+        self._push(Bar(self._start, self._open, self._high, self._low, self._close, self._volume))
+        gap = min((new_start - self._start) // self.interval_ms - 1, len(self._bars))
+        last = self._close
+        for i in range(gap):
+            self._push(Bar(new_start - (gap - i) * self.interval_ms, last, last, last, last, 0.0))
+
+    def _push(self, bar: Bar):
+        self._bars[self._count % len(self._bars)] = bar
+        self._count += 1
+
+        prev = self._prev_close
+        tr = bar.high - bar.low
+        if prev > 0:
+            tr = max(tr, abs(bar.high - prev), abs(bar.low - prev))
+        slot = self._tr_count % self.period
+        self._tr_sum += tr - self._trs[slot]
+        self._trs[slot] = tr
+        self._tr_count += 1
+        self._prev_close = bar.close
+
+    # --- REST-ДОГРУЗКА ---
+    def seed(self, klines: List[Dict[str, float]]) -> int:
+        """
+        Свечи REST (от новых к старым, ключи t/o/h/l/c/v) до начала живых данных.
+        Вызывается, пока закрытых баров нет. Бар, совпавший с текущим живым, сливается с ним.
+        """
+        if self._count: return 0
+        pushed = 0
+        for k in reversed(klines):  # От старых к новым
+            bar = Bar(int(k["t"]), k["o"], k["h"], k["l"], k["c"], k.get("v", 0.0))
+            if self._start >= 0 and bar.start_ms >= self._start:
+                if bar.start_ms == self._start:
+                    # Та же свеча, что и живой бар: REST знает ее начало (объем живой бар уже считает)
+                    self._open = bar.open
+                    self._high = max(self._high, bar.high)
+                    self._low = min(self._low, bar.low)
+                break
+            if self._start < 0 and k is klines[0]:
+                # Незакрытая свеча, живых сделок еще не было: она и есть текущий бар
+                self._start, self._open, self._high, self._low, self._close, self._volume = bar
+                break
+            self._push(bar)
+            pushed += 1
+        return pushed
+
+    # --- ЧТЕНИЕ ---
+    @property
+    def closed(self) -> int:
+        return self._count
+
+    @property
+    def last_close(self) -> float:
+        return self._close if self._start >= 0 else self._prev_close
+
+    def atr(self, min_bars: int = NATR_MIN_BARS) -> Optional[float]:
+        n = min(self._tr_count, self.period)
+        # Период короче порога: иначе ATR не считался бы никогда
+        if n < min(min_bars, self.period): return None
+        return max(self._tr_sum, 0.0) / n
+
+    def natr(self, min_bars: int = NATR_MIN_BARS) -> Optional[float]:
+        """ATR в процентах от последней цены."""
+        atr = self.atr(min_bars)
+        price = self.last_close
+        if atr is None or price <= 0: return None
+        return atr / price * 100
+
+    def bars(self) -> List[Bar]:
+        """Закрытые бары, от старых к новым."""
+        size = len(self._bars)
+        n = min(self._count, size)
+        return [self._bars[i % size] for i in range(self._count - n, self._count)]
+
+class BarBuilder:
+    """
+    OHLC-бары 1m/5m из потока публичных сделок, по символу и интервалу — BarSeries.
+    Кормится из event loop (стратегия в on_trade), читается синхронно:
+    NATR для динамического TP (MarketAnalytics) и для сканера ротации без REST-свечей.
+    REST нужен только для догрузки истории при первом появлении символа (backfill).
+    """
+    def __init__(self, intervals_sec: Tuple[int, ...] = BAR_INTERVALS_SEC, period: int = NATR_PERIOD,
+                 capacity: int = BAR_HISTORY):
+        self.intervals_sec = intervals_sec
+        self.period = period
+        self.capacity = capacity
+        self._series: Dict[str, Dict[int, BarSeries]] = {}
+
+        # Метрики
+        self.backfills = 0
+
+    def _track(self, symbol: str) -> Dict[int, BarSeries]:
+        series = self._series.get(symbol)
+        if series is None:
+            series = {iv: BarSeries(iv, self.period, self.capacity) for iv in self.intervals_sec}
+            self._series[symbol] = series
+        return series
+
+    def on_trade(self, trade: Any):
+        series = self._series.get(trade.symbol) or self._track(trade.symbol)
+        price, qty, ts = trade.price, trade.qty, int(trade.timestamp)
+        for s in series.values():
+            s.update(price, qty, ts)
+
+    def drop(self, symbol: str):
+        self._series.pop(symbol, None)
+
+    def series(self, symbol: str, interval_sec: int = NATR_INTERVAL_SEC) -> Optional[BarSeries]:
+        return self._series.get(symbol, {}).get(interval_sec)
+
+    def natr(self, symbol: str, interval_sec: int = NATR_INTERVAL_SEC) -> Optional[float]:
+        s = self.series(symbol, interval_sec)
+        return s.natr() if s else None
+
+    async def backfill(self, executor: Any, symbol: str, interval_sec: int = NATR_INTERVAL_SEC) -> bool:
+        """Один REST-запрос свечей на символ, пока у серии нет закрытых баров."""
+        s = self._track(symbol)[interval_sec]
+        if s.closed: return False
+        klines = await executor.fetch_ohlc(symbol, interval=str(interval_sec // 60), limit=self.period + 1)
+        if not klines or "t" not in klines[0]: return False
+        pushed = s.seed(klines)
+        self.backfills += 1
+        logger.info(f"🕯️ {symbol}: {pushed} x {interval_sec // 60}m bars backfilled, NATR={s.natr()}")
+        return pushed > 0
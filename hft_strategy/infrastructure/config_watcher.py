@@ -0,0 +1,129 @@
+# hft_strategy/infrastructure/config_watcher.py
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import os
+import struct
+from typing import Callable, Optional, Tuple
+
+logger = logging.getLogger("CONFIG_WATCH")
+
+# inotify (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT_HDR = struct.Struct("iIII")  # wd, mask, cookie, len
+
+DEBOUNCE_SEC = 0.2   # Редактор / json.dump пишут файл несколькими событиями: применяем последнее
+POLL_SEC = 1.0       # Страховочный опрос stat (всегда): записи, которых inotify не видит
+
+def _load_libc():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    except OSError:
+        return None
+    return libc if hasattr(libc, "inotify_init1") else None
+
+class ConfigWatcher:
+    """
+    Следит за файлом конфига и вызывает on_change() в event loop, когда его переписали.
+    inotify смотрит на каталог, а не на файл: редакторы и атомарная запись идут через rename
+    (IN_MOVED_TO), и watch на сам файл после rename смотрел бы на удаленный inode.
+    Серия событий склеивается за DEBOUNCE_SEC.
+
+    Опрос (inode, mtime, size) раз в POLL_SEC работает всегда, а не только без inotify:
+    файл, примонтированный в контейнер отдельным bind mount и переписанный commander'ом
+    из другого контейнера, событий inotify в каталоге бота не дает.
+    """
+    def __init__(self, path: str, on_change: Callable[[], None], debounce_sec: float = DEBOUNCE_SEC):
+        self.path = os.path.abspath(path)
+        self.on_change = on_change
+        self.debounce_sec = debounce_sec
+        self._dir, self._name = os.path.split(self.path)
+        self._fd = -1
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Optional[asyncio.TimerHandle] = None
+        self._poll_task: Optional[asyncio.Task] = None
+        self._seen = self._stat()  # Состояние файла на момент последнего on_change()
+
+    @property
+    def mode(self) -> str:
+        if self._fd >= 0: return "inotify+poll"
+        return "poll" if self._poll_task else "off"
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._seen = self._stat()
+        libc = _load_libc()
+        if libc is not None and os.path.isdir(self._dir):
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd >= 0 and libc.inotify_add_watch(
+                fd, self._dir.encode(), IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+            ) >= 0:
+                self._fd = fd
+                self._loop.add_reader(fd, self._on_readable)
+            else:
+                if fd >= 0: os.close(fd)
+                logger.warning(f"⚠️ inotify unavailable for {self._dir} (errno {ctypes.get_errno()}), polling only")
+        self._poll_task = asyncio.create_task(self._poll_loop(), name="config-poll")
+        logger.info(f"👀 Watching {self.path} ({self.mode}, poll {POLL_SEC}s)")
+
+    def stop(self):
+        if self._pending:
+            self._pending.cancel()
+            self._pending = None
+        if self._fd >= 0:
+            self._loop.remove_reader(self._fd)
+            os.close(self._fd)
+            self._fd = -1
+        if self._poll_task:
+            self._poll_task.cancel()
+            self._poll_task = None
+
+    # --- INOTIFY ---
+    def _on_readable(self):
+        try:
+            buf = os.read(self._fd, 4096)
+        except BlockingIOError:
+            return
+        touched = False
+        offset = 0
+        while offset + _EVENT_HDR.size <= len(buf):
+            _, _, _, name_len = _EVENT_HDR.unpack_from(buf, offset)
+            name = buf[offset + _EVENT_HDR.size: offset + _EVENT_HDR.size + name_len].rstrip(b"\0")
+            offset += _EVENT_HDR.size + name_len
+            if name.decode(errors="replace") == self._name:
+                touched = True
+        if touched:
+            self._schedule()
+
+    def _schedule(self):
+        if self._pending:
+            self._pending.cancel()
+        self._pending = self._loop.call_later(self.debounce_sec, self._fire)
+
+    def _fire(self):
+        self._pending = None
+        self._seen = self._stat()
+        try:
+            self.on_change()
+        except Exception as e:
+            logger.exception(f"❌ Config change handler failed: {e}")
+
+    # --- POLL ---
+    def _stat(self) -> Tuple[int, int, int]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return (0, 0, 0)
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    async def _poll_loop(self):
+        while True:
+            await asyncio.sleep(POLL_SEC)
+            # Уже отработанное inotify изменение повторно не применяем
+            if self._pending is None and self._stat() != self._seen:
+                self._schedule()
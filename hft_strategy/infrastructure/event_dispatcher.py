@@ -0,0 +1,218 @@
+# hft_strategy/infrastructure/event_dispatcher.py
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional
+
+logger = logging.getLogger("DISPATCHER")
+
+class DepthUpdate:
+    """
+    Схлопнутый апдейт стакана: все дельты, пришедшие пока стратегия была занята,
+    сливаются по уровням (последнее значение уровня побеждает).
+    Snapshot сбрасывает накопленное. Формат уровней (price, qty) понимает LocalOrderBook.apply_update.
+    """
+    __slots__ = ("symbol", "is_snapshot", "_bids", "_asks", "timestamp", "local_timestamp", "merged")
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.is_snapshot = False
+        self._bids: Dict[float, float] = {}
+        self._asks: Dict[float, float] = {}
+        self.timestamp = 0
+        self.local_timestamp = 0
+        self.merged = 0  # Сколько сообщений C++ слито в этот апдейт
+
+    def merge(self, raw):
+        if raw.is_snapshot:
+            self.is_snapshot = True
+            self._bids.clear()
+            self._asks.clear()
+
+        for lvl in raw.bids:
+            self._bids[lvl.price] = lvl.qty
+        for lvl in raw.asks:
+            self._asks[lvl.price] = lvl.qty
+
+        self.timestamp = raw.timestamp
+        self.local_timestamp = raw.local_timestamp
+        self.merged += 1
+
+    @property
+    def bids(self):
+        return list(self._bids.items())
+
+    @property
+    def asks(self):
+        return list(self._asks.items())
+
+class SymbolMailbox:
+    """
+    Почтовый ящик одной стратегии.
+    depth — latest-wins (с coalescing дельт), executions / triggers / trades — строгий FIFO.
+    Пишет поток C++ стримера, читает одна долгоживущая задача в event loop.
+    """
+    def __init__(self, symbol: str, handler, loop: asyncio.AbstractEventLoop):
+        self.symbol = symbol
+        self.handler = handler
+        self.loop = loop
+
+        self._lock = threading.Lock()
+        self._depth: Optional[DepthUpdate] = None
+        self._executions: Deque = deque()
+        self._triggers: Deque = deque()
+        self._trades: Deque = deque()
+        self._wakeup = asyncio.Event()
+        self._wakeup_scheduled = False
+        self._task: Optional[asyncio.Task] = None
+
+        # Метрики
+        self.depth_received = 0
+        self.depth_processed = 0
+        self.executions_processed = 0
+        self.max_queue_depth = 0
+
+    @property
+    def queue_depth(self) -> int:
+        with self._lock:
+            return self._pending_locked()
+
+    def _pending_locked(self) -> int:
+        return len(self._executions) + len(self._triggers) + len(self._trades) + (1 if self._depth else 0)
+
+    # --- PRODUCER (поток C++) ---
+    def post_depth(self, raw):
+        with self._lock:
+            if self._depth is None:
+                self._depth = DepthUpdate(self.symbol)
+            self._depth.merge(raw)
+            self.depth_received += 1
+            self._wake_locked()
+
+    def post_execution(self, event):
+        with self._lock:
+            self._executions.append(event)
+            self._wake_locked()
+
+    def post_trigger(self, event):
+        with self._lock:
+            self._triggers.append(event)
+            self._wake_locked()
+
+    def post_trade(self, trade):
+        with self._lock:
+            self._trades.append(trade)
+            self._wake_locked()
+
+    def _wake_locked(self):
+        self.max_queue_depth = max(self.max_queue_depth, self._pending_locked())
+        # Один call_soon_threadsafe на пачку, а не на каждое сообщение
+        if not self._wakeup_scheduled:
+            self._wakeup_scheduled = True
+            self.loop.call_soon_threadsafe(self._wakeup.set)
+
+    # --- CONSUMER (event loop) ---
+    def start(self):
+        self._task = asyncio.create_task(self._consume(), name=f"mailbox-{self.symbol}")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _drain(self):
+        with self._lock:
+            execs = list(self._executions)
+            triggers = list(self._triggers)
+            trades = list(self._trades)
+            depth = self._depth
+            self._executions.clear()
+            self._triggers.clear()
+            self._trades.clear()
+            self._depth = None
+            self._wakeup_scheduled = False
+        return execs, triggers, trades, depth
+
+    async def _consume(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            execs, triggers, trades, depth = self._drain()
+
+            # Исполнения раньше стакана: стратегия принимает решение уже с актуальным fill
+            for ev in execs:
+                await self._safe_call(self.handler.on_execution, ev)
+                self.executions_processed += 1
+            for ev in triggers:
+                await self._safe_call(self.handler.on_trigger_fired, ev)
+            # Сделки раньше стакана: уменьшение уровня уже объяснено исполнением
+            for ev in trades:
+                await self._safe_call(self.handler.on_trade, ev)
+            if depth is not None:
+                await self._safe_call(self.handler.on_depth, depth)
+                self.depth_processed += 1
+
+    async def _safe_call(self, fn, event):
+        try:
+            await fn(event)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(f"❌ {self.symbol} handler {fn.__name__} failed: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "depth_received": self.depth_received,
+            "depth_processed": self.depth_processed,
+            "executions_processed": self.executions_processed,
+        }
+
+class MailboxDispatcher:
+    """
+    Маршрутизатор C++ колбэков: symbol -> SymbolMailbox.
+    Заменяет run_coroutine_threadsafe на каждое сообщение (корутина + Future на событие).
+    """
+    def __init__(self):
+        self._mailboxes: Dict[str, SymbolMailbox] = {}
+
+    def register(self, symbol: str, handler):
+        if symbol in self._mailboxes: return
+        mailbox = SymbolMailbox(symbol, handler, asyncio.get_running_loop())
+        mailbox.start()
+        self._mailboxes[symbol] = mailbox
+
+    async def unregister(self, symbol: str):
+        mailbox = self._mailboxes.pop(symbol, None)
+        if mailbox:
+            await mailbox.stop()
+
+    async def close(self):
+        for symbol in list(self._mailboxes):
+            await self.unregister(symbol)
+
+    # Вызываются из потока стримера (под GIL): dict.get атомарен
+    def post_depth(self, snapshot):
+        mailbox = self._mailboxes.get(snapshot.symbol)
+        if mailbox: mailbox.post_depth(snapshot)
+
+    def post_execution(self, event):
+        mailbox = self._mailboxes.get(event.symbol)
+        if mailbox: mailbox.post_execution(event)
+
+    def post_trigger(self, event):
+        mailbox = self._mailboxes.get(event.symbol)
+        if mailbox: mailbox.post_trigger(event)
+
+    def post_trade(self, trade):
+        mailbox = self._mailboxes.get(trade.symbol)
+        if mailbox: mailbox.post_trade(trade)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {sym: mb.stats() for sym, mb in self._mailboxes.items()}
@@ -0,0 +1,63 @@
+# hft_strategy/infrastructure/event_loop.py
+import asyncio
+import logging
+import os
+import sys
+from typing import Callable, Coroutine, Optional, Tuple
+
+logger = logging.getLogger("EVENT_LOOP")
+
+# auto (uvloop если установлен) | uvloop | asyncio
+LOOP_ENV_VAR = "HFT_EVENT_LOOP"
+SUPPORTED_LOOPS = ("auto", "uvloop", "asyncio")
+
+def resolve_loop(name: Optional[str] = None) -> Tuple[str, Optional[Callable[[], asyncio.AbstractEventLoop]]]:
+    """
+    Возвращает (фактическое имя цикла, фабрика цикла или None для стандартного asyncio).
+    Если uvloop запрошен, но недоступен — мягкий откат на asyncio с предупреждением.
+    """
+    requested = (name or os.getenv(LOOP_ENV_VAR, "auto")).strip().lower()
+    if requested not in SUPPORTED_LOOPS:
+        logger.warning(f"⚠️ Unknown event loop '{requested}'. Using asyncio.")
+        return "asyncio", None
+
+    if requested == "asyncio":
+        return "asyncio", None
+
+    if sys.platform == "win32":
+        if requested == "uvloop":
+            logger.warning("⚠️ uvloop is not supported on Windows. Falling back to asyncio.")
+        return "asyncio", None
+
+    try:
+        import uvloop
+    except ImportError:
+        if requested == "uvloop":
+            logger.warning("⚠️ uvloop requested but not installed (pip install uvloop). Falling back to asyncio.")
+        return "asyncio", None
+
+    return "uvloop", uvloop.new_event_loop
+
+def run(main: Coroutine, loop: Optional[str] = None):
+    """
+    Замена asyncio.run() для точек входа (live_bot, batch_optimizer, export_data).
+    Выбор цикла: аргумент > переменная окружения HFT_EVENT_LOOP > auto.
+    """
+    loop_name, factory = resolve_loop(loop)
+
+    # Windows Patch for asyncio
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+    logger.info(f"🔁 Event loop: {loop_name}")
+
+    if factory is None:
+        return asyncio.run(main)
+
+    if sys.version_info >= (3, 11):
+        with asyncio.Runner(loop_factory=factory) as runner:
+            return runner.run(main)
+
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return asyncio.run(main)
@@ -65,7 +65,8 @@ class BybitExecutionHandler:
                     return []
                 klines = []
                 for k in resp['result']['list']:
-                    klines.append({"h": float(k[2]), "l": float(k[3]), "c": float(k[4])})
+                    klines.append({"t": int(k[0]), "o": float(k[1]), "h": float(k[2]), "l": float(k[3]),
+                                   "c": float(k[4]), "v": float(k[5])})
                 return klines
             except Exception as e:
                 err_msg = str(e)
@@ -218,6 +219,70 @@ class BybitExecutionHandler:
                 logger.error(f"❌ Cancel Failed: {e}")
                 raise e
 
+    async def fetch_positions(self) -> Dict[str, Dict]:
+        """
+        Снимок всех USDT-позиций одним запросом (для сверки AccountLedger).
+        Возвращает {symbol: {"size": signed_size, "entry_price": avg}} только для ненулевых.
+        """
+        if self.read_only: return {}
+        loop = asyncio.get_running_loop()
+        positions = {}
+        cursor = ""
+        while True:
+            resp = await loop.run_in_executor(None, lambda: self.client.get_positions(
+                category=self.category,
+                settleCoin="USDT",
+                limit=200,
+                cursor=cursor
+            ))
+            for pos in resp['result']['list']:
+                size = float(pos['size'] or 0)
+                if size > 0:
+                    positions[pos['symbol']] = {
+                        "size": size if pos['side'] == 'Buy' else -size,
+                        "entry_price": float(pos.get('avgPrice') or 0)
+                    }
+            cursor = resp['result'].get('nextPageCursor') or ""
+            if not cursor:
+                return positions
+
+    async def fetch_open_orders(self) -> List[Dict]:
+        """Все активные ордера по USDT-перпетуалам (сырые dict'ы Bybit V5)."""
+        if self.read_only: return []
+        loop = asyncio.get_running_loop()
+        orders = []
+        cursor = ""
+        while True:
+            resp = await loop.run_in_executor(None, lambda: self.client.get_open_orders(
+                category=self.category,
+                settleCoin="USDT",
+                limit=50,
+                cursor=cursor
+            ))
+            orders.extend(resp['result']['list'])
+            cursor = resp['result'].get('nextPageCursor') or ""
+            if not cursor:
+                return orders
+
+    async def fetch_closed_pnl(self, since_ms: int) -> Dict[str, float]:
+        """Реализованный PnL закрытых сделок с since_ms: {symbol: сумма closedPnl} (сид дневного лимита)."""
+        if self.read_only: return {}
+        loop = asyncio.get_running_loop()
+        pnl: Dict[str, float] = {}
+        cursor = ""
+        while True:
+            resp = await loop.run_in_executor(None, lambda: self.client.get_closed_pnl(
+                category=self.category,
+                startTime=since_ms,
+                limit=100,
+                cursor=cursor
+            ))
+            for row in resp['result']['list']:
+                pnl[row['symbol']] = pnl.get(row['symbol'], 0.0) + float(row.get('closedPnl') or 0)
+            cursor = resp['result'].get('nextPageCursor') or ""
+            if not cursor:
+                return pnl
+
     async def get_position(self, symbol: str) -> float:
         if self.read_only: return 0.0
         try:
@@ -0,0 +1,188 @@
+# hft_strategy/infrastructure/level_history.py
+import time
+from typing import Any, NamedTuple, Optional
+
+import numpy as np
+
+from hft_strategy.infrastructure.local_order_book import LocalOrderBook
+
+DEFAULT_SLOTS = 4096   # Уровней на сторону; память фиксирована, слот = тик % slots
+QTY_EPS = 1e-12
+
+class WallStats(NamedTuple):
+    """Качество уровня: сколько стоит, как менялся, сколько по нему реально проторговано."""
+    age_sec: float         # С последнего появления уровня
+    qty: float
+    peak_qty: float
+    cancels: int           # Уменьшения, не объясненные сделками
+    refills: int           # Восстановления после уменьшения / повторные появления
+    traded_qty: float      # Объем сделок против уровня
+    cancelled_qty: float
+
+    @property
+    def cancel_ratio(self) -> float:
+        """Доля снятого объема от пика: у спуфа ~1, у настоящей стены ~0."""
+        return self.cancelled_qty / self.peak_qty if self.peak_qty > 0 else 0.0
+
+class _LevelRing:
+    """
+    Кольцо истории уровней одной стороны: массивы фиксированного размера, слот = тик % size.
+    Чужой тик в слоте (алиасинг далекой цены) вытесняет старую историю.
+    """
+    def __init__(self, size: int):
+        self.size = size
+        self.tick = np.full(size, -1, dtype=np.int64)
+        self.alive = np.zeros(size, dtype=np.bool_)
+        self.born_ms = np.zeros(size, dtype=np.int64)
+        self.qty = np.zeros(size)
+        self.peak = np.zeros(size)
+        self.cancels = np.zeros(size, dtype=np.int32)
+        self.refills = np.zeros(size, dtype=np.int32)
+        self.traded = np.zeros(size)
+        self.cancelled = np.zeros(size)
+        self.pending_trade = np.zeros(size)   # Сделки, еще не отраженные в стакане
+        self.last_cancel = np.zeros(size)     # Последнее «снятие»: сделка может прийти позже апдейта
+        self.evictions = 0
+
+    def update(self, tick: int, qty: float, ts_ms: int):
+        s = tick % self.size
+        if self.tick.item(s) != tick:
+            if qty <= 0: return
+            if self.alive.item(s): self.evictions += 1
+            self._reset(s, tick, qty, ts_ms)
+            return
+
+        if not self.alive.item(s):
+            if qty <= 0: return
+            # Уровень снова появился на той же цене: новая жизнь, счетчики копятся (мерцание = спуф)
+            self.alive[s] = True
+            self.born_ms[s] = ts_ms
+            self.qty[s] = qty
+            self.peak[s] = qty
+            self.refills[s] += 1
+            return
+
+        last = self.qty.item(s)
+        if qty < last:
+            reduction = last - qty
+            explained = min(reduction, self.pending_trade.item(s))
+            self.pending_trade[s] -= explained
+            cancel = reduction - explained
+            if cancel > QTY_EPS:
+                self.cancels[s] += 1
+                self.cancelled[s] += cancel
+                self.last_cancel[s] = cancel
+            else:
+                self.last_cancel[s] = 0.0
+        elif qty > last:
+            if last < self.peak.item(s):
+                self.refills[s] += 1
+            if qty > self.peak.item(s):
+                self.peak[s] = qty
+
+        self.qty[s] = qty
+        if qty <= 0:
+            self.alive[s] = False
+
+    def on_trade(self, tick: int, qty: float):
+        s = tick % self.size
+        if self.tick.item(s) != tick: return
+        self.traded[s] += qty
+
+        # Апдейт стакана мог прийти раньше сделки: переклассифицируем «снятие» в исполнение
+        fix = min(qty, self.last_cancel.item(s))
+        if fix > 0:
+            self.cancelled[s] -= fix
+            self.last_cancel[s] -= fix
+            if self.last_cancel.item(s) <= QTY_EPS:
+                self.cancels[s] -= 1
+        # Остаток ждет уменьшения уровня (не больше текущего объема)
+        self.pending_trade[s] = min(self.pending_trade.item(s) + qty - fix, self.qty.item(s))
+
+    def keep_only(self, ticks: np.ndarray):
+        """Snapshot: уровни, которых в нем нет, умерли. Векторно, только на snapshot."""
+        present = np.zeros(self.size, dtype=np.bool_)
+        if len(ticks):
+            slots = ticks % self.size
+            present[slots] = self.tick[slots] == ticks
+        self.alive &= present
+
+    def _reset(self, s: int, tick: int, qty: float, ts_ms: int):
+        self.tick[s] = tick
+        self.alive[s] = True
+        self.born_ms[s] = ts_ms
+        self.qty[s] = qty
+        self.peak[s] = qty
+        self.cancels[s] = 0
+        self.refills[s] = 0
+        self.traded[s] = 0.0
+        self.cancelled[s] = 0.0
+        self.pending_trade[s] = 0.0
+        self.last_cancel[s] = 0.0
+
+    def stats(self, tick: int, now_ms: int) -> Optional[WallStats]:
+        s = tick % self.size
+        if self.tick.item(s) != tick or not self.alive.item(s):
+            return None
+        return WallStats(
+            age_sec=max(now_ms - self.born_ms.item(s), 0) / 1000.0,
+            qty=self.qty.item(s),
+            peak_qty=self.peak.item(s),
+            cancels=self.cancels.item(s),
+            refills=self.refills.item(s),
+            traded_qty=self.traded.item(s),
+            cancelled_qty=self.cancelled.item(s),
+        )
+
+class LevelHistory:
+    """
+    История уровней стакана одного символа (фиксированная память).
+    Обновляется инкрементально на каждый depth / trade за O(затронутых уровней),
+    признаки стены (возраст, пик, снятия / доливки, проторгованный объем) — O(1).
+    Отличает стену, простоявшую 30 секунд, от мерцающего спуфа без скана истории.
+    Время — мс биржи (timestamp апдейтов и сделок).
+    """
+    def __init__(self, tick_size: float, slots: int = DEFAULT_SLOTS):
+        self.tick_size = tick_size
+        self._inv_tick = 1.0 / tick_size
+        self.bids = _LevelRing(slots)
+        self.asks = _LevelRing(slots)
+        self.last_ts_ms = 0
+
+    def _tick(self, price: float) -> int:
+        return int(round(price * self._inv_tick))
+
+    def _side(self, side: str) -> _LevelRing:
+        return self.bids if side == "Buy" else self.asks
+
+    def on_depth(self, update: Any):
+        ts_ms = int(getattr(update, 'timestamp', 0)) or int(time.time() * 1000)
+        self.last_ts_ms = max(self.last_ts_ms, ts_ms)
+        for ring, levels in ((self.bids, update.bids), (self.asks, update.asks)):
+            ticks = []
+            for level in levels:
+                p, q = LocalOrderBook._unpack(level)
+                tick = self._tick(p)
+                ring.update(tick, q, ts_ms)
+                ticks.append(tick)
+            if getattr(update, 'is_snapshot', False):
+                ring.keep_only(np.asarray(ticks, dtype=np.int64))
+
+    def on_trade(self, trade: Any):
+        """trade.side — сторона агрессора: Buy съедает аски, Sell — биды."""
+        self.last_ts_ms = max(self.last_ts_ms, int(trade.timestamp))
+        if trade.side == "Buy":
+            ring = self.asks
+        elif trade.side == "Sell":
+            ring = self.bids
+        else:
+            return  # Сторона неизвестна: не приписываем объем ни одной стороне
+        ring.on_trade(self._tick(trade.price), trade.qty)
+
+    def stats(self, side: str, price: float, now_ms: Optional[int] = None) -> Optional[WallStats]:
+        """Признаки живого уровня; None — уровня нет в стакане."""
+        return self._side(side).stats(self._tick(price), now_ms if now_ms is not None else self.last_ts_ms)
+
+    @property
+    def evictions(self) -> int:
+        return self.bids.evictions + self.asks.evictions
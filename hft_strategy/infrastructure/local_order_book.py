@@ -1,7 +1,10 @@
 # hft_strategy/infrastructure/local_order_book.py
+import heapq
 import time
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
+
+import numpy as np
 
 logger = logging.getLogger("LOB")
 
@@ -35,12 +38,7 @@ class LocalOrderBook:
 
         # Обновляем Bids
         for level in event.bids:
-            # Поддержка разных форматов: объект .price или tuple (price, qty)
-            if hasattr(level, 'price'):
-                p, q = level.price, level.quantity
-            else:
-                p, q = level[0], level[1]
-            
+            p, q = self._unpack(level)
             key = self._to_key(p)
             if q == 0:
                 if key in self.bids: del self.bids[key]
@@ -49,11 +47,7 @@ class LocalOrderBook:
 
         # Обновляем Asks
         for level in event.asks:
-            if hasattr(level, 'price'):
-                p, q = level.price, level.quantity
-            else:
-                p, q = level[0], level[1]
-
+            p, q = self._unpack(level)
             key = self._to_key(p)
             if q == 0:
                 if key in self.asks: del self.asks[key]
@@ -62,6 +56,17 @@ class LocalOrderBook:
         
         self.last_ts = getattr(event, 'timestamp', time.time())
 
+    @staticmethod
+    def _unpack(level):
+        """
+        Поддержка разных форматов: tuple (price, qty), Python-объект (.quantity)
+        или C++ PriceLevel (.qty).
+        """
+        if hasattr(level, 'price'):
+            q = level.qty if hasattr(level, 'qty') else level.quantity
+            return level.price, q
+        return level[0], level[1]
+
     def apply_snapshot(self, snapshot: Any):
         """
         Метод для быстрого наложения C++ снепшота (OrderBookSnapshot).
@@ -100,6 +105,12 @@ class LocalOrderBook:
             return 0.0
         return max(book.keys()) if side == "Buy" else min(book.keys())
 
+    def top_levels(self, side: str, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(цены, объемы) первых n уровней стороны от лучшего вглубь."""
+        book = self.bids if side == "Buy" else self.asks
+        prices = heapq.nlargest(n, book) if side == "Buy" else heapq.nsmallest(n, book)
+        return np.array(prices, dtype=np.float64), np.array([book[p] for p in prices], dtype=np.float64)
+
     def get_background_volume(self) -> float:
         """
         Рассчитывает среднюю ликвидность на уровнях 2-10 (Smart Scanner Logic).
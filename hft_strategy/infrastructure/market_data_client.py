@@ -0,0 +1,223 @@
+# hft_strategy/infrastructure/market_data_client.py
+import logging
+import socket
+import threading
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+from hft_strategy.infrastructure.market_data_shm import SharedMarketData
+from hft_strategy.infrastructure.shm_ring import DepthFrame
+
+logger = logging.getLogger("MD_CLIENT")
+
+POLL_IDLE_SLEEP_SEC = 0.0002
+DAEMON_STALE_SEC = 5.0        # Нет heartbeat дольше -> демон считаем мертвым и переподключаемся
+RECONNECT_INTERVAL_SEC = 2.0
+SOCKET_TIMEOUT_SEC = 5.0
+SCAN_TIMEOUT_SEC = 120.0      # TOP может запустить полный скан на стороне демона
+
+class SharedMarketDataStreamer:
+    """
+    Читатель общего демона market data с интерфейсом ExchangeStreamer
+    (add_symbol / start / stop / set_*_callback), чтобы BotOrchestrator не знал, откуда стакан.
+    Поток опроса следит за seq слотов в shared memory и зовет колбэки, как поток C++ стримера.
+    Книга приходит целиком (топ-N, is_snapshot=True), поэтому пропуск версий безопасен.
+    """
+    def __init__(self, socket_path: str, shm_name: str):
+        self.socket_path = socket_path
+        self.shm_name = shm_name
+
+        self._shm: Optional[SharedMarketData] = None
+        self._sock: Optional[socket.socket] = None
+        self._sock_file = None
+        self._ctl_lock = threading.Lock()
+
+        self._symbols: List[str] = []
+        self._slots: Dict[str, int] = {}
+        self._book_seq: Dict[str, int] = {}
+        self._trade_seq: Dict[str, int] = {}
+
+        self._tick_cb: Optional[Callable] = None
+        self._depth_cb: Optional[Callable] = None
+        self._trigger_engine = None
+
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self.trades_lost = 0
+
+    # --- ExchangeStreamer API ---
+    def set_tick_callback(self, cb: Callable):
+        self._tick_cb = cb
+
+    def set_orderbook_callback(self, cb: Callable):
+        self._depth_cb = cb
+
+    def set_trigger_engine(self, engine):
+        self._trigger_engine = engine
+
+    def add_symbol(self, symbol: str):
+        self.add_symbols([symbol])
+
+    def add_symbols(self, symbols: List[str]):
+        for symbol in symbols:
+            if symbol not in self._symbols:
+                self._symbols.append(symbol)
+        if self._running and self._shm is not None:
+            self._subscribe(symbols)
+
+    def remove_symbol(self, symbol: str):
+        if symbol in self._symbols:
+            self._symbols.remove(symbol)
+        with self._ctl_lock:
+            slot = self._slots.pop(symbol, None)
+            self._book_seq.pop(symbol, None)
+            self._trade_seq.pop(symbol, None)
+            if slot is not None and self._sock_file is not None:
+                try:
+                    self._request(self._sock_file, f"UNSUB {symbol}")
+                except (OSError, RuntimeError) as e:
+                    logger.warning(f"⚠️ Unsubscribe {symbol} failed: {e}")
+        if self._trigger_engine is not None:
+            self._trigger_engine.clear_symbol(symbol)
+
+    def start(self):
+        self._running = True
+        try:
+            self._connect()
+        except (OSError, RuntimeError) as e:
+            # Демон еще стартует: поток опроса будет переподключаться сам
+            logger.warning(f"⚠️ Market data daemon not ready: {e}")
+            self._disconnect()
+        self._thread = threading.Thread(target=self._poll_loop, name="md-client", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=2.0)
+        self._disconnect()
+
+    # --- SCANNER ---
+    def top_scores(self) -> Dict[str, float]:
+        """Скан рынка, общий для всех ботов: symbol -> NATR (блокирующий: звать через asyncio.to_thread)."""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(SCAN_TIMEOUT_SEC)
+            sock.connect(self.socket_path)
+            reply = self._request(sock.makefile("rw"), "SCORES")
+        scores = {}
+        for item in filter(None, reply.split(",")):
+            sym, value = item.rsplit(":", 1)
+            scores[sym] = float(value)
+        return scores
+
+    # --- CONTROL ---
+    @staticmethod
+    def _request(sock_file, line: str) -> str:
+        sock_file.write(line + "\n")
+        sock_file.flush()
+        reply = sock_file.readline().strip()
+        if not reply.startswith("OK"):
+            raise RuntimeError(f"Market data daemon: {line} -> {reply or 'connection closed'}")
+        return reply[3:]
+
+    def _connect(self):
+        with self._ctl_lock:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(SOCKET_TIMEOUT_SEC)
+            self._sock.connect(self.socket_path)
+            self._sock_file = self._sock.makefile("rw")
+            self._shm = SharedMarketData(self.shm_name)
+            self._slots.clear()
+        if self._symbols:
+            self._subscribe(list(self._symbols))
+        logger.info(f"🛰️ Attached to market data daemon (pid {self._shm.writer_pid}), symbols: {self._symbols}")
+
+    def _disconnect(self):
+        with self._ctl_lock:
+            self._slots.clear()
+            for closeable in (self._sock_file, self._sock):
+                try:
+                    if closeable: closeable.close()
+                except OSError:
+                    pass
+            self._sock = self._sock_file = None
+            if self._shm:
+                self._shm.close()
+                self._shm = None
+
+    def _subscribe(self, symbols: List[str]):
+        with self._ctl_lock:
+            # Одна команда на пачку: демон шлет бирже один subscribe
+            slots = self._request(self._sock_file, "SUB " + " ".join(symbols)).split()
+            for symbol, slot in zip(symbols, map(int, slots)):
+                # Новый слот: начинаем с текущих счетчиков, старые сделки не нужны
+                self._book_seq[symbol] = -1
+                self._trade_seq[symbol] = self._shm.trade_count(slot)
+                self._slots[symbol] = slot
+
+    # --- POLLING (отдельный поток) ---
+    def _poll_loop(self):
+        last_health_check = 0.0
+        while self._running:
+            now = time.time()
+            if now - last_health_check > 1.0:
+                last_health_check = now
+                if not self._check_daemon(now):
+                    time.sleep(RECONNECT_INTERVAL_SEC)
+                    continue
+
+            busy = False
+            try:
+                for symbol, slot in list(self._slots.items()):
+                    busy |= self._poll_book(symbol, slot)
+                    busy |= self._poll_trades(symbol, slot)
+            except Exception as e:
+                logger.error(f"❌ Market data poll error: {e}")
+            if not busy:
+                time.sleep(POLL_IDLE_SLEEP_SEC)
+
+    def _check_daemon(self, now: float) -> bool:
+        shm = self._shm
+        if shm is not None and now - shm.heartbeat_ns / 1e9 < DAEMON_STALE_SEC:
+            return True
+        logger.error("💀 Market data daemon is stale. Reconnecting...")
+        self._disconnect()
+        try:
+            self._connect()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Reconnect failed: {e}")
+            return False
+
+    def _poll_book(self, symbol: str, slot: int) -> bool:
+        seq = self._shm.book_seq(slot)
+        if seq == self._book_seq.get(symbol) or seq & 1:
+            return False
+        book = self._shm.read_book(slot)
+        if book is None:
+            return False
+        seq, ts, local_ts, bids, asks = book
+        self._book_seq[symbol] = seq
+        if not bids and not asks:
+            return False
+
+        if self._trigger_engine is not None:
+            self._trigger_engine.on_levels(symbol, True, bids, asks)
+        if self._depth_cb:
+            self._depth_cb(DepthFrame(symbol, True, ts, local_ts, bids, asks))
+        return True
+
+    def _poll_trades(self, symbol: str, slot: int) -> bool:
+        since = self._trade_seq.get(symbol, 0)
+        if self._shm.trade_count(slot) == since:
+            return False
+        count, trades, lost = self._shm.read_trades(slot, since)
+        self._trade_seq[symbol] = count
+        if lost:
+            self.trades_lost += lost
+            logger.warning(f"⚠️ {symbol}: {lost} trades overwritten before read")
+        if self._tick_cb:
+            for price, qty, ts, side in trades:
+                self._tick_cb(SimpleNamespace(symbol=symbol, price=price, qty=qty, timestamp=ts, side=side))
+        return bool(trades)
@@ -0,0 +1,232 @@
+# hft_strategy/infrastructure/market_data_shm.py
+import os
+import time
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from hft_strategy.infrastructure.shm_ring import Level, ShmRing
+
+MAGIC = 0x4846544D44415441  # "HFTMDATA"
+SEQLOCK_RETRIES = 64
+
+# --- Заголовок региона (u64 слова) ---
+_H_MAGIC, _H_MAX_SYMBOLS, _H_MAX_LEVELS, _H_TRADE_RING, _H_SLOT_WORDS, _H_HEARTBEAT, _H_PID = range(7)
+HEADER_WORDS = 16
+
+# --- Слот символа (смещения в словах от начала слота) ---
+# book: seq, ts, local_ts, n_bids, n_asks, затем [bid price, bid qty]*L, [ask price, ask qty]*L
+_B_SEQ, _B_TS, _B_LOCAL_TS, _B_NBIDS, _B_NASKS, _B_LEVELS = range(6)
+# ticker (после book): seq, best_bid, best_ask, last_price, last_qty, ts
+_T_SEQ, _T_BID, _T_ASK, _T_LAST, _T_LAST_QTY, _T_TS = range(6)
+TICKER_WORDS = 8
+# trades (после ticker): write_count, затем кольцо [price, qty, ts, side]; side: 1 Buy, -1 Sell, 0 неизвестна
+TRADE_WORDS = 4
+_TRADE_SIDES = {1: "Buy", -1: "Sell"}
+
+class SharedMarketData:
+    """
+    Регион shared memory с книгами, сделками и тикером по символам (один писатель — демон market data).
+    Книга и тикер защищены seqlock: писатель делает seq нечетным, пишет, делает четным;
+    читатель копирует данные и повторяет чтение, если seq изменился или нечетный.
+    Сделки — кольцо со счетчиком записей: читатель помнит свой счетчик и забирает хвост.
+    На x86 (TSO) порядок store'ов сохраняется, отдельные барьеры не нужны.
+    """
+    def __init__(self, name: str, create: bool = False, max_symbols: int = 64,
+                 max_levels: int = 50, trade_ring: int = 256):
+        if create:
+            slot_words = self._slot_words(max_levels, trade_ring)
+            size = 8 * (HEADER_WORDS + max_symbols * slot_words)
+            try:
+                # Остаток от упавшего демона: пересоздаем с нуля
+                stale = shared_memory.SharedMemory(name=name)
+                stale.close()
+                stale.unlink()
+            except FileNotFoundError:
+                pass
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self._shm = ShmRing._attach(name)
+
+        self.name = name
+        self._u64 = np.ndarray((self._shm.size // 8,), dtype=np.uint64, buffer=self._shm.buf)
+        self._i64 = self._u64.view(np.int64)
+        self._f64 = self._u64.view(np.float64)
+
+        if create:
+            self._u64[:] = 0
+            self._u64[_H_MAX_SYMBOLS] = max_symbols
+            self._u64[_H_MAX_LEVELS] = max_levels
+            self._u64[_H_TRADE_RING] = trade_ring
+            self._u64[_H_SLOT_WORDS] = self._slot_words(max_levels, trade_ring)
+            self._u64[_H_PID] = os.getpid()
+            self._u64[_H_MAGIC] = MAGIC
+        elif int(self._u64[_H_MAGIC]) != MAGIC:
+            self._shm.close()
+            raise RuntimeError(f"Shared memory '{name}' is not a market data region")
+
+        self.max_symbols = int(self._u64[_H_MAX_SYMBOLS])
+        self.max_levels = int(self._u64[_H_MAX_LEVELS])
+        self.trade_ring = int(self._u64[_H_TRADE_RING])
+        self.slot_words = int(self._u64[_H_SLOT_WORDS])
+        self._ticker_off = _B_LEVELS + 4 * self.max_levels
+        self._trades_off = self._ticker_off + TICKER_WORDS
+        self._owner = create
+
+    @staticmethod
+    def _slot_words(max_levels: int, trade_ring: int) -> int:
+        return _B_LEVELS + 4 * max_levels + TICKER_WORDS + 1 + TRADE_WORDS * trade_ring
+
+    def _base(self, slot: int) -> int:
+        return HEADER_WORDS + slot * self.slot_words
+
+    # --- WRITER (демон) ---
+    def publish_book(self, slot: int, timestamp: int, local_timestamp: int, bids, asks):
+        """bids/asks: уровни с .price/.qty, уже отсортированные (лучший первым)."""
+        b = self._base(slot)
+        bids = bids[:self.max_levels]
+        asks = asks[:self.max_levels]
+        lv = b + _B_LEVELS
+        al = lv + 2 * self.max_levels
+
+        self._u64[b + _B_SEQ] += 1  # нечетный: запись идет
+        self._i64[b + _B_TS] = timestamp
+        self._i64[b + _B_LOCAL_TS] = local_timestamp
+        self._u64[b + _B_NBIDS] = len(bids)
+        self._u64[b + _B_NASKS] = len(asks)
+        if bids:
+            self._f64[lv:lv + 2 * len(bids)] = [x for l in bids for x in (l.price, l.qty)]
+        if asks:
+            self._f64[al:al + 2 * len(asks)] = [x for l in asks for x in (l.price, l.qty)]
+        self._u64[b + _B_SEQ] += 1
+
+        t = b + self._ticker_off
+        self._u64[t + _T_SEQ] += 1
+        self._f64[t + _T_BID] = bids[0].price if bids else 0.0
+        self._f64[t + _T_ASK] = asks[0].price if asks else 0.0
+        self._u64[t + _T_SEQ] += 1
+
+    def publish_trade(self, slot: int, price: float, qty: float, timestamp: int, side: str):
+        b = self._base(slot)
+        tr = b + self._trades_off
+        count = int(self._u64[tr])
+        e = tr + 1 + (count % self.trade_ring) * TRADE_WORDS
+        self._f64[e] = price
+        self._f64[e + 1] = qty
+        self._i64[e + 2] = timestamp
+        self._i64[e + 3] = 1 if side == "Buy" else -1 if side == "Sell" else 0
+        self._u64[tr] = count + 1  # публикация после записи
+
+        t = b + self._ticker_off
+        self._u64[t + _T_SEQ] += 1
+        self._f64[t + _T_LAST] = price
+        self._f64[t + _T_LAST_QTY] = qty
+        self._i64[t + _T_TS] = timestamp
+        self._u64[t + _T_SEQ] += 1
+
+    def clear_slot(self, slot: int):
+        """
+        Слот переходит к другому символу: книга и тикер обнуляются под своими seqlock
+        (seq растет — читатель перечитает). Счетчик сделок не сбрасываем: читатели
+        стартуют с текущего значения, а обнуленное кольцо не отдаст цены прошлого символа.
+        """
+        b = self._base(slot)
+        self._u64[b + _B_SEQ] += 1
+        self._u64[b + _B_NBIDS] = 0
+        self._u64[b + _B_NASKS] = 0
+        self._u64[b + _B_SEQ] += 1
+
+        t = b + self._ticker_off
+        self._u64[t + _T_SEQ] += 1
+        self._u64[t + _T_BID:t + TICKER_WORDS] = 0
+        self._u64[t + _T_SEQ] += 1
+
+        tr = b + self._trades_off
+        self._u64[tr + 1:tr + 1 + TRADE_WORDS * self.trade_ring] = 0
+
+    def heartbeat(self):
+        self._u64[_H_HEARTBEAT] = time.time_ns()
+
+    # --- READER (боты) ---
+    @property
+    def heartbeat_ns(self) -> int:
+        return int(self._u64[_H_HEARTBEAT])
+
+    @property
+    def writer_pid(self) -> int:
+        return int(self._u64[_H_PID])
+
+    def book_seq(self, slot: int) -> int:
+        return int(self._u64[self._base(slot) + _B_SEQ])
+
+    def trade_count(self, slot: int) -> int:
+        return int(self._u64[self._base(slot) + self._trades_off])
+
+    def read_book(self, slot: int) -> Optional[Tuple[int, int, int, List[Level], List[Level]]]:
+        """(seq, ts, local_ts, bids, asks) согласованной версии книги или None (писатель не отпустил)."""
+        b = self._base(slot)
+        lv = b + _B_LEVELS
+        al = lv + 2 * self.max_levels
+        for _ in range(SEQLOCK_RETRIES):
+            s1 = int(self._u64[b + _B_SEQ])
+            if s1 & 1:
+                continue
+            ts = int(self._i64[b + _B_TS])
+            local_ts = int(self._i64[b + _B_LOCAL_TS])
+            nb = min(int(self._u64[b + _B_NBIDS]), self.max_levels)
+            na = min(int(self._u64[b + _B_NASKS]), self.max_levels)
+            bid_arr = self._f64[lv:lv + 2 * nb].tolist()
+            ask_arr = self._f64[al:al + 2 * na].tolist()
+            if int(self._u64[b + _B_SEQ]) == s1:
+                bids = [Level(bid_arr[i], bid_arr[i + 1]) for i in range(0, 2 * nb, 2)]
+                asks = [Level(ask_arr[i], ask_arr[i + 1]) for i in range(0, 2 * na, 2)]
+                return s1, ts, local_ts, bids, asks
+        return None
+
+    def read_trades(self, slot: int, since: int) -> Tuple[int, List[Tuple[float, float, int, str]], int]:
+        """
+        Сделки с номера since: (новый счетчик, [(price, qty, ts, side)], пропущено).
+        Если читатель отстал больше чем на кольцо — старые сделки потеряны, отдаем последние.
+        """
+        tr = self._base(slot) + self._trades_off
+        count = int(self._u64[tr])
+        lost = 0
+        if count - since > self.trade_ring:
+            lost = count - since - self.trade_ring
+            since = count - self.trade_ring
+
+        trades = []
+        for n in range(since, count):
+            e = tr + 1 + (n % self.trade_ring) * TRADE_WORDS
+            trades.append((float(self._f64[e]), float(self._f64[e + 1]), int(self._i64[e + 2]),
+                           _TRADE_SIDES.get(int(self._i64[e + 3]), "")))
+
+        # Писатель мог перезаписать начало кольца, пока мы читали
+        overrun = int(self._u64[tr]) - self.trade_ring - since
+        if overrun > 0:
+            trades = trades[overrun:]
+            lost += overrun
+        return count, trades, lost
+
+    def read_ticker(self, slot: int) -> Optional[Tuple[float, float, float, float, int]]:
+        """(best_bid, best_ask, last_price, last_qty, ts)"""
+        t = self._base(slot) + self._ticker_off
+        for _ in range(SEQLOCK_RETRIES):
+            s1 = int(self._u64[t + _T_SEQ])
+            if s1 & 1:
+                continue
+            values = self._f64[t + _T_BID:t + _T_TS].tolist()
+            ts = int(self._i64[t + _T_TS])
+            if int(self._u64[t + _T_SEQ]) == s1:
+                return (*values, ts)
+        return None
+
+    def close(self):
+        self._u64 = self._i64 = self._f64 = None
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,186 @@
+# hft_strategy/infrastructure/shm_ring.py
+import struct
+from collections import namedtuple
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Уровень стакана после декодирования: .price/.qty как у C++ PriceLevel, индексы как у tuple
+Level = namedtuple("Level", ["price", "qty"])
+
+class DepthFrame:
+    """Апдейт стакана, прочитанный из кольца (duck-typing под C++ OrderBookSnapshot)."""
+    __slots__ = ("symbol", "is_snapshot", "timestamp", "local_timestamp", "bids", "asks")
+
+    def __init__(self, symbol, is_snapshot, timestamp, local_timestamp, bids, asks):
+        self.symbol = symbol
+        self.is_snapshot = is_snapshot
+        self.timestamp = timestamp
+        self.local_timestamp = local_timestamp
+        self.bids = bids
+        self.asks = asks
+
+class TradeFrame:
+    """Сделка, прочитанная из кольца (duck-typing под C++ TickData; side — агрессор)."""
+    __slots__ = ("symbol", "price", "qty", "timestamp", "side")
+
+    def __init__(self, symbol, price, qty, timestamp, side):
+        self.symbol = symbol
+        self.price = price
+        self.qty = qty
+        self.timestamp = timestamp
+        self.side = side
+
+class ShmRing:
+    """
+    SPSC-кольцо фиксированных слотов в shared memory (один писатель, один читатель).
+    Заголовок: write_seq и read_seq на разных cache line, чтобы процессы не дрались за линию.
+    Слот: [u64 длина][payload]. Переполнение не блокирует писателя: сообщение отбрасывается
+    и учитывается в dropped (при 8192 слотах на воркер это означает зависший воркер).
+    Потерю дельты стакана писатель закрывает снапшотом (WorkerPool.route_depth).
+    """
+    HEADER_SIZE = 128
+    _W, _SLOTS, _SLOT_SIZE, _DROPPED, _R = 0, 1, 2, 3, 8
+
+    def __init__(self, name: Optional[str] = None, slots: int = 8192, slot_size: int = 2048, create: bool = False):
+        if create:
+            size = self.HEADER_SIZE + slots * slot_size
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self._shm = self._attach(name)
+
+        self.name = self._shm.name
+        self.buf = self._shm.buf
+        self._hdr = np.ndarray((self.HEADER_SIZE // 8,), dtype=np.uint64, buffer=self.buf[:self.HEADER_SIZE])
+
+        if create:
+            self._hdr[:] = 0
+            self._hdr[self._SLOTS] = slots
+            self._hdr[self._SLOT_SIZE] = slot_size
+
+        self.slots = int(self._hdr[self._SLOTS])
+        self.slot_size = int(self._hdr[self._SLOT_SIZE])
+        self._owner = create
+
+    @staticmethod
+    def _attach(name: str) -> shared_memory.SharedMemory:
+        # Читатель не должен владеть сегментом: иначе resource_tracker удалит его при выходе процесса
+        try:
+            return shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:  # Python < 3.13
+            shm = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(shm._name, "shared_memory")
+            return shm
+
+    # --- WRITER ---
+    def try_reserve(self) -> Optional[int]:
+        """Смещение payload свободного слота или None (кольцо полно)."""
+        w = int(self._hdr[self._W])
+        if w - int(self._hdr[self._R]) >= self.slots:
+            self._hdr[self._DROPPED] += 1
+            return None
+        return self.HEADER_SIZE + (w % self.slots) * self.slot_size + 8
+
+    def commit(self, offset: int, nbytes: int):
+        struct.pack_into("<Q", self.buf, offset - 8, nbytes)
+        # Публикация: индекс пишется после данных
+        self._hdr[self._W] += 1
+
+    @property
+    def max_payload(self) -> int:
+        return self.slot_size - 8
+
+    # --- READER ---
+    def peek(self) -> Optional[Tuple[int, int]]:
+        """(смещение payload, длина) следующего сообщения или None."""
+        r = int(self._hdr[self._R])
+        if r >= int(self._hdr[self._W]):
+            return None
+        offset = self.HEADER_SIZE + (r % self.slots) * self.slot_size + 8
+        (nbytes,) = struct.unpack_from("<Q", self.buf, offset - 8)
+        return offset, nbytes
+
+    def advance(self):
+        self._hdr[self._R] += 1
+
+    # --- STATS / LIFECYCLE ---
+    @property
+    def pending(self) -> int:
+        return int(self._hdr[self._W]) - int(self._hdr[self._R])
+
+    @property
+    def dropped(self) -> int:
+        return int(self._hdr[self._DROPPED])
+
+    def close(self):
+        self._hdr = None
+        self.buf = None
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+# --- ТИП КАДРА ---
+# Третий байт любого кадра — его тип: стакан и сделки идут через одно кольцо в порядке прихода
+KIND_DEPTH = 0
+KIND_TRADE = 1
+_KIND_OFFSET = 3
+
+def frame_kind(ring: ShmRing, offset: int) -> int:
+    return ring.buf[offset + _KIND_OFFSET]
+
+def frame_sym_id(ring: ShmRing, offset: int) -> int:
+    """Первые два байта любого кадра — sym_id."""
+    return ring.buf[offset] | (ring.buf[offset + 1] << 8)
+
+# --- КОДЕК СТАКАНА ---
+# sym_id, is_snapshot, kind, timestamp, local_timestamp, n_bids, n_asks, pad -> 32 байта (float64 выровнены)
+_DEPTH_HDR = struct.Struct("<HBBqqHH4x")
+
+def write_depth(ring: ShmRing, sym_id: int, raw) -> bool:
+    """Сериализует OrderBookSnapshot прямо в слот кольца. Лишние уровни отрезаются по размеру слота."""
+    offset = ring.try_reserve()
+    if offset is None:
+        return False
+
+    max_levels = (ring.max_payload - _DEPTH_HDR.size) // 16
+    bids = raw.bids[:max_levels]
+    asks = raw.asks[:max_levels - len(bids)]
+
+    _DEPTH_HDR.pack_into(ring.buf, offset, sym_id, 1 if raw.is_snapshot else 0, KIND_DEPTH,
+                         raw.timestamp, raw.local_timestamp, len(bids), len(asks))
+    flat = [x for lvl in bids for x in (lvl.price, lvl.qty)]
+    flat.extend(x for lvl in asks for x in (lvl.price, lvl.qty))
+    struct.pack_into(f"<{len(flat)}d", ring.buf, offset + _DEPTH_HDR.size, *flat)
+
+    ring.commit(offset, _DEPTH_HDR.size + 8 * len(flat))
+    return True
+
+def read_depth(ring: ShmRing, offset: int, symbol: Optional[str]) -> DepthFrame:
+    _, is_snapshot, _, ts, local_ts, nb, na = _DEPTH_HDR.unpack_from(ring.buf, offset)
+    flat = struct.unpack_from(f"<{2 * (nb + na)}d", ring.buf, offset + _DEPTH_HDR.size)
+    bids = [Level(flat[i], flat[i + 1]) for i in range(0, 2 * nb, 2)]
+    asks = [Level(flat[i], flat[i + 1]) for i in range(2 * nb, 2 * (nb + na), 2)]
+    return DepthFrame(symbol, bool(is_snapshot), ts, local_ts, bids, asks)
+
+# --- КОДЕК СДЕЛОК ---
+# sym_id, side, kind, timestamp, price, qty -> 28 байт; side: 1 Buy, 2 Sell, 0 неизвестна
+_TRADE = struct.Struct("<HBBqdd")
+_SIDE_CODES = {"Buy": 1, "Sell": 2}
+_SIDE_NAMES = ("", "Buy", "Sell")
+
+def write_trade(ring: ShmRing, sym_id: int, tick) -> bool:
+    offset = ring.try_reserve()
+    if offset is None:
+        return False
+    _TRADE.pack_into(ring.buf, offset, sym_id, _SIDE_CODES.get(tick.side, 0), KIND_TRADE,
+                     tick.timestamp, tick.price, tick.qty)
+    ring.commit(offset, _TRADE.size)
+    return True
+
+def read_trade(ring: ShmRing, offset: int, symbol: Optional[str]) -> TradeFrame:
+    _, side, _, ts, price, qty = _TRADE.unpack_from(ring.buf, offset)
+    return TradeFrame(symbol, price, qty, ts, _SIDE_NAMES[side] if side < len(_SIDE_NAMES) else "")
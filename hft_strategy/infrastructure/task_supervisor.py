@@ -0,0 +1,57 @@
+# hft_strategy/infrastructure/task_supervisor.py
+import asyncio
+import logging
+from typing import Coroutine, Dict, Optional, Set
+
+logger = logging.getLogger("TASKS")
+
+TASK_CANCEL_TIMEOUT_SEC = 5.0
+
+class TaskSupervisor:
+    """
+    Реестр фоновых задач по владельцам (обычно symbol стратегии).
+    Все задачи стратегии создаются через spawn, поэтому при purge их можно
+    отменить и дождаться разом, а не оставлять осиротевшие REST-поллеры.
+    """
+    def __init__(self):
+        self._tasks: Dict[str, Set[asyncio.Task]] = {}
+
+    def spawn(self, owner: str, coro: Coroutine, name: Optional[str] = None) -> asyncio.Task:
+        task = asyncio.create_task(coro, name=name)
+        self._tasks.setdefault(owner, set()).add(task)
+        task.add_done_callback(lambda t: self._on_done(owner, t))
+        return task
+
+    def _on_done(self, owner: str, task: asyncio.Task):
+        tasks = self._tasks.get(owner)
+        if tasks is not None:
+            tasks.discard(task)
+            if not tasks:
+                del self._tasks[owner]
+
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"❌ Task {task.get_name()} ({owner}) crashed: {task.exception()!r}")
+
+    async def cancel_owner(self, owner: str, timeout: float = TASK_CANCEL_TIMEOUT_SEC) -> int:
+        """Отменяет задачи владельца и ждет их завершения. Возвращает число отмененных."""
+        tasks = list(self._tasks.pop(owner, ()))
+        if not tasks:
+            return 0
+
+        for task in tasks:
+            task.cancel()
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            logger.warning(f"⚠️ Task {task.get_name()} ({owner}) ignored cancel for {timeout}s")
+        return len(tasks)
+
+    async def close(self):
+        for owner in list(self._tasks):
+            await self.cancel_owner(owner)
+
+    def counts(self) -> Dict[str, int]:
+        return {owner: len(tasks) for owner, tasks in self._tasks.items()}
+
+    @property
+    def total(self) -> int:
+        return sum(len(tasks) for tasks in self._tasks.values())
@@ -0,0 +1,179 @@
+# hft_strategy/infrastructure/timer_wheel.py
+import asyncio
+import logging
+import time
+from typing import Any, Callable, List, Optional, Set
+
+logger = logging.getLogger("TIMERS")
+
+DEFAULT_TICK_SEC = 0.1   # Разрешение таймеров (для таймаутов ордеров в секундах хватает с запасом)
+SLOT_BITS = 6            # 64 слота на уровень
+LEVELS = 4               # Горизонт: 64^4 тиков (~19 дней при 100 мс)
+
+class TimerHandle:
+    """Запланированный таймер. cancel() — O(1), повторный вызов безопасен."""
+    __slots__ = ("expires", "callback", "args", "cancelled", "_slot", "_wheel")
+
+    def __init__(self, wheel: "TimerWheel", expires: int, callback: Callable, args: tuple):
+        self.expires = expires
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+        self._slot: Optional[Set["TimerHandle"]] = None
+        self._wheel = wheel
+
+    def cancel(self):
+        if self.cancelled: return
+        self.cancelled = True
+        if self._slot is not None:
+            self._slot.discard(self)
+            self._slot = None
+            self._wheel._on_cancel()
+
+class TimerWheel:
+    """
+    Иерархическое колесо таймеров (Varghese-Lauck): LEVELS уровней по 2^SLOT_BITS слотов,
+    слот уровня L покрывает 64^L тиков. schedule / cancel — O(1) (вставка и удаление из set слота),
+    на тик — только слот текущего тика; дальние уровни каскадом опускаются вниз, когда
+    младший уровень делает оборот.
+
+    Колесо крутится собственной задачей и просыпается раз в тик, только пока есть таймеры:
+    дедлайны срабатывают независимо от рыночных данных. Колбэк может вернуть корутину —
+    она запускается отдельной задачей, чтобы медленный REST не задерживал остальные таймеры.
+    """
+    def __init__(self, tick_sec: float = DEFAULT_TICK_SEC, clock: Callable[[], float] = time.monotonic):
+        self.tick_sec = tick_sec
+        self._clock = clock
+        self._mask = (1 << SLOT_BITS) - 1
+        self._wheels: List[List[Set[TimerHandle]]] = [
+            [set() for _ in range(1 << SLOT_BITS)] for _ in range(LEVELS)
+        ]
+        self._current = self._now_tick()
+        self._active = 0
+
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: Set[asyncio.Task] = set()
+
+        # Метрики
+        self.fired = 0
+        self.cancelled = 0
+
+    def _now_tick(self) -> int:
+        return int(self._clock() / self.tick_sec)
+
+    # --- API ---
+    def schedule(self, delay_sec: float, callback: Callable[..., Any], *args) -> TimerHandle:
+        """Вызвать callback(*args) через delay_sec (с точностью до тика). Вызывается из event loop."""
+        if self._active == 0:
+            self._current = self._now_tick()  # Пустое колесо не тикало: догоняем часы
+        ticks = max(1, int(delay_sec / self.tick_sec + 0.999999))
+        handle = TimerHandle(self, self._current + ticks, callback, args)
+        self._insert(handle)
+        self._active += 1
+        self._ensure_running()
+        return handle
+
+    @property
+    def pending(self) -> int:
+        return self._active
+
+    def _on_cancel(self):
+        self._active -= 1
+        self.cancelled += 1
+
+    # --- КОЛЕСО ---
+    def _insert(self, handle: TimerHandle):
+        delta = handle.expires - self._current
+        level = 0
+        while level < LEVELS - 1 and delta >= 1 << (SLOT_BITS * (level + 1)):
+            level += 1
+        expires = handle.expires
+        if level == LEVELS - 1:
+            # За горизонтом: ставим на самый дальний слот, каскад переложит ближе
+            expires = min(expires, self._current + (1 << (SLOT_BITS * LEVELS)) - 1)
+        slot = self._wheels[level][(expires >> (SLOT_BITS * level)) & self._mask]
+        slot.add(handle)
+        handle._slot = slot
+
+    def _cascade(self, level: int):
+        """Раскладывает слот уровня level по младшим уровням (таймеры стали ближе)."""
+        idx = (self._current >> (SLOT_BITS * level)) & self._mask
+        slot = self._wheels[level][idx]
+        if not slot: return
+        handles = list(slot)
+        slot.clear()
+        for h in handles:
+            self._insert(h)
+
+    def advance(self, now_tick: Optional[int] = None) -> int:
+        """Прокручивает колесо до now_tick, вызывает истекшие колбэки. Возвращает число сработавших."""
+        target = self._now_tick() if now_tick is None else now_tick
+        fired = 0
+        while self._current < target:
+            if self._active == 0:
+                self._current = target
+                break
+            self._current += 1
+            t = self._current
+            # Оборот младшего уровня: спускаем следующий слот старшего (и выше, если тоже оборот)
+            level = 1
+            while level < LEVELS and (t & ((1 << (SLOT_BITS * level)) - 1)) == 0:
+                self._cascade(level)
+                level += 1
+
+            slot = self._wheels[0][t & self._mask]
+            if not slot: continue
+            due = [h for h in slot if h.expires <= t]
+            for h in due:
+                slot.discard(h)
+                h._slot = None
+                self._active -= 1
+                self._fire(h)
+                fired += 1
+        return fired
+
+    def _fire(self, handle: TimerHandle):
+        self.fired += 1
+        try:
+            result = handle.callback(*handle.args)
+        except Exception as e:
+            logger.exception(f"❌ Timer callback {getattr(handle.callback, '__name__', handle.callback)} failed: {e}")
+            return
+        if asyncio.iscoroutine(result):
+            task = asyncio.get_running_loop().create_task(result)
+            self._inflight.add(task)
+            task.add_done_callback(self._on_task_done)
+
+    def _on_task_done(self, task: asyncio.Task):
+        self._inflight.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"❌ Timer task {task.get_name()} crashed: {task.exception()!r}")
+
+    # --- ЗАДАЧА ---
+    def _ensure_running(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name="timer-wheel")
+        elif self._active == 1:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            if self._active == 0:
+                # Пустое колесо не тикает: спим до следующего schedule
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            await asyncio.sleep(self.tick_sec)
+            self.advance()
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in list(self._inflight):
+            task.cancel()
@@ -0,0 +1,131 @@
+# hft_strategy/infrastructure/trade_flow.py
+import math
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+BUCKET_MS = 100                    # Разрешение окон
+FLOW_WINDOWS_SEC = (1, 5, 30)      # Окна агрессивного потока
+DEPLETION_WINDOW_SEC = 5           # По какому окну считаем скорость «поедания» стены
+
+class FlowFeatures(NamedTuple):
+    """Срез потока на момент апдейта стакана (объемы агрессоров по окнам FLOW_WINDOWS_SEC)."""
+    buy_volume: Tuple[float, ...]
+    sell_volume: Tuple[float, ...]
+    wall_volume: Tuple[float, ...]  # Проторговано по наблюдаемой цене стены
+
+    def imbalance(self, window_idx: int) -> float:
+        b, s = self.buy_volume[window_idx], self.sell_volume[window_idx]
+        return (b - s) / (b + s) if b + s > 0 else 0.0
+
+class TradeFlow:
+    """
+    Агрессивный поток сделок (publicTrade) одного символа.
+    Кольцо фиксированного размера из корзин по BUCKET_MS на горизонт самого длинного окна;
+    суммы окон поддерживаются инкрементально: принт — O(1), сдвиг времени — O(окон)
+    на корзину. Сканов истории нет, поэтому обновлять можно на каждый принт горячих монет.
+    Время — мс биржи.
+    """
+    SERIES = 3  # buy, sell, wall
+    _BUY, _SELL, _WALL = 0, 1, 2
+
+    def __init__(self, tick_size: float, windows_sec: Tuple[int, ...] = FLOW_WINDOWS_SEC, bucket_ms: int = BUCKET_MS):
+        self.tick_size = tick_size
+        self.bucket_ms = bucket_ms
+        self.windows_sec = windows_sec
+        self._window_idx: Dict[int, int] = {w: i for i, w in enumerate(windows_sec)}
+        self._win_buckets = [max(1, w * 1000 // bucket_ms) for w in windows_sec]
+        self.size = max(self._win_buckets)
+
+        self._ring = [[0.0] * self.size for _ in range(self.SERIES)]
+        self._sums = [[0.0] * len(windows_sec) for _ in range(self.SERIES)]
+        self._head = -1   # Абсолютный номер последней корзины
+
+        # Наблюдаемая стена: сделки по этой цене против этой стороны копятся в серии wall
+        self._watch_side: Optional[str] = None
+        self._watch_tick = 0
+
+    # --- ВРЕМЯ ---
+    def _advance(self, bucket: int):
+        if bucket <= self._head:
+            return
+        if self._head < 0 or bucket - self._head >= self.size:
+            # Первый принт или долгая тишина: все окна пусты
+            for series in self._ring:
+                series[:] = [0.0] * self.size
+            for sums in self._sums:
+                sums[:] = [0.0] * len(sums)
+            self._head = bucket
+            return
+
+        for b in range(self._head + 1, bucket + 1):
+            for k, span in enumerate(self._win_buckets):
+                expired = (b - span) % self.size
+                for series, sums in zip(self._ring, self._sums):
+                    sums[k] -= series[expired]
+            slot = b % self.size
+            for series in self._ring:
+                series[slot] = 0.0
+        self._head = bucket
+
+    def _add(self, series_id: int, qty: float):
+        self._ring[series_id][self._head % self.size] += qty
+        sums = self._sums[series_id]
+        for k in range(len(sums)):
+            sums[k] += qty
+
+    # --- СОБЫТИЯ ---
+    def on_trade(self, trade: Any):
+        """trade.side — сторона агрессора (Buy съедает аски); пустая — принт без стороны, не учитываем."""
+        if trade.side == "Buy":
+            series_id = self._BUY
+        elif trade.side == "Sell":
+            series_id = self._SELL
+        else:
+            return
+        self._advance(int(trade.timestamp) // self.bucket_ms)
+        self._add(series_id, trade.qty)
+
+        # Сделка по цене стены против ее стороны: Sell-агрессор бьет бид-стену, Buy — аск-стену
+        if self._watch_side is not None and trade.side != self._watch_side:
+            if int(round(trade.price / self.tick_size)) == self._watch_tick:
+                self._add(self._WALL, trade.qty)
+
+    def watch(self, side: str, price: float):
+        """Следить за стеной (side — сторона стены). Смена стены обнуляет серию wall."""
+        tick = int(round(price / self.tick_size))
+        if side == self._watch_side and tick == self._watch_tick:
+            return
+        self._watch_side, self._watch_tick = side, tick
+        self._ring[self._WALL][:] = [0.0] * self.size
+        self._sums[self._WALL][:] = [0.0] * len(self.windows_sec)
+
+    def unwatch(self):
+        if self._watch_side is not None:
+            self.watch(None, 0.0)
+
+    # --- ЧТЕНИЕ (O(окон)) ---
+    def features(self, now_ms: int) -> FlowFeatures:
+        self._advance(int(now_ms) // self.bucket_ms)
+        buy, sell, wall = self._sums
+        # max(0): накопленная погрешность float при вычитании
+        return FlowFeatures(
+            buy_volume=tuple(max(v, 0.0) for v in buy),
+            sell_volume=tuple(max(v, 0.0) for v in sell),
+            wall_volume=tuple(max(v, 0.0) for v in wall),
+        )
+
+    def window_index(self, window_sec: int) -> int:
+        return self._window_idx[window_sec]
+
+    def depletion_sec(self, features: FlowFeatures, side: str, wall_qty: float,
+                      window_sec: int = DEPLETION_WINDOW_SEC, at_wall: bool = False) -> float:
+        """
+        Оценка, за сколько секунд поток съест wall_qty стороны side.
+        at_wall=True — по сделкам точно по цене наблюдаемой стены, иначе по всем агрессорам против стороны.
+        """
+        k = self._window_idx[window_sec]
+        if at_wall:
+            eaten = features.wall_volume[k]
+        else:
+            eaten = features.sell_volume[k] if side == "Buy" else features.buy_volume[k]
+        rate = eaten / window_sec
+        return wall_qty / rate if rate > 0 else math.inf
@@ -6,6 +6,8 @@ import signal
 import sys
 import os
 import copy
+import dataclasses
+import time
 from typing import List, Dict, Set, Optional
 
 # --- PATH HACK ---
@@ -18,15 +20,38 @@ except ImportError:
     print("❌ Critical: hft_core not found. Did you run 'pip install .' ?")
     sys.exit(1)
 
-from hft_strategy.config import load_config, Config
+from hft_strategy.config import (
+    load_config, Config, RiskConfig, RotationConfig, StrategyParameters, INSTRUMENTS_CACHE_FILE, INSTRUMENTS_TTL_SEC,
+    TRADING_CONFIG, MARKET_DATA_SOCKET, MARKET_DATA_SHM_NAME, SETTINGS_FILE, OPTIMIZED_PARAMS_FILE, HOT_RELOAD_PARAMS,
+    SNAPSHOT_DIR, SNAPSHOT_INTERVAL_SEC, SNAPSHOT_MAX_AGE_SEC, read_settings_file, diff_strategy_params
+)
 from hft_strategy.infrastructure.execution import BybitExecutionHandler
 from hft_strategy.services.smart_scanner import SmartMarketSelector
+from hft_strategy.services.rotation_policy import RotationPolicy
+from hft_strategy.services.param_store import OptimizedParamsStore
+from hft_strategy.services.state_snapshot import StateSnapshotStore
+from hft_strategy.services.batch_evaluator import BatchWallEvaluator, batch_enabled
+from hft_strategy.infrastructure.timer_wheel import TimerWheel
+from hft_strategy.infrastructure.config_watcher import ConfigWatcher
+from hft_strategy.infrastructure.bar_builder import BarBuilder
 from hft_strategy.strategies.adaptive_live_strategy import AdaptiveWallStrategy
 from hft_strategy.services.notification import TelegramNotifier
+from hft_strategy.services.instrument_catalog import InstrumentCatalog
+from hft_strategy.services.account_ledger import AccountLedger
+from hft_strategy.infrastructure.event_dispatcher import MailboxDispatcher
+from hft_strategy.infrastructure.task_supervisor import TaskSupervisor
+from hft_strategy.infrastructure.market_data_client import SharedMarketDataStreamer
+from hft_strategy.infrastructure.event_loop import run as run_event_loop, LOOP_ENV_VAR
+from hft_strategy.workers import protocol
+from hft_strategy.workers.worker_pool import WorkerPool
 
 # --- CONSTANTS ---
 RESCAN_INTERVAL_SEC = 300  # 5 минут между переоценкой рынка
 MAX_COINS_TO_TRADE = 3     # Сколько монет торгуем одновременно
+SHADOW_COINS = 2           # Следующие по рейтингу монеты греются в shadow mode (стакан + EMA, без торговли)
+MAILBOX_STATS_INTERVAL_SEC = 60
+ACTIVATION_CONCURRENCY = 4 # Параллельных REST-запросов спецификаций при активации пачки монет
+WORKERS_ENV_VAR = "HFT_WORKERS"  # >0: стратегии в отдельных процессах (свой GIL на группу монет)
 
 def setup_logging(config: Config):
     # 1. Папка для логов
@@ -82,6 +107,27 @@ class BotOrchestrator:
         
         # Словарь для хранения стратегий: Symbol -> StrategyInstance
         self.strategies: Dict[str, AdaptiveWallStrategy] = {}
+        # Кандидаты на ротацию: получают стакан и аналитику, но не торгуют
+        self.shadow_strategies: Dict[str, AdaptiveWallStrategy] = {}
+        # Почтовые ящики стратегий: один consumer на символ вместо корутины на каждое сообщение
+        self.dispatcher = MailboxDispatcher()
+        # HFT_BATCH_EVAL=1: стены всех обновленных символов считаются одним вызовом ядра
+        self.batch: Optional[BatchWallEvaluator] = BatchWallEvaluator() if batch_enabled() else None
+        # Таймауты ордеров всех стратегий: одно колесо таймеров вместо проверок на каждом апдейте
+        self.timers = TimerWheel()
+        # Бары 1m/5m из потока сделок: NATR для TP и сканера без REST-свечей
+        self.bars = BarBuilder(period=self.config.strategy.natr_period)
+        # Фоновые задачи стратегий (symbol -> задачи): отменяются при purge
+        self.tasks = TaskSupervisor()
+        # Hot-reload strategy_params.json: правки commander применяются без рестарта
+        self.config_watcher = ConfigWatcher(SETTINGS_FILE, self._on_config_changed)
+        # Параметры batch_optimizer по монетам: поверх общих, при активации и hot-reload
+        self.param_store = OptimizedParamsStore(OPTIMIZED_PARAMS_FILE)
+        self.param_store.load()
+        self.param_store_watcher = ConfigWatcher(OPTIMIZED_PARAMS_FILE, self._on_optimized_params_changed)
+        # Теплый рестарт: EMA, TP и открытые сделки стратегий периодически на диск
+        self.snapshots = StateSnapshotStore(SNAPSHOT_DIR, SNAPSHOT_INTERVAL_SEC, SNAPSHOT_MAX_AGE_SEC)
+        self._spec_fetch_limit = asyncio.Semaphore(ACTIVATION_CONCURRENCY)
         
         # 2. Инициализация C++ Order Gateway
         self.logger.info("🔌 Initializing C++ Order Gateway...")
@@ -97,9 +143,30 @@ class BotOrchestrator:
             self.logger.critical(f"❌ Failed to init Gateway: {e}")
             sys.exit(1)
 
+        # 2.1 Нативные стопы: C++ проверяет их на каждом апдейте стакана и шлет выход сам
+        self.trigger_engine = hft_core.TriggerEngine(self.gateway)
+        self.trigger_engine.set_trigger_callback(self._dispatch_trigger)
+
+        # 2.2 Риск-гейт: стакан TriggerEngine как референс для price band
+        self.gateway.set_reference_book(self.trigger_engine)
+        self.apply_risk_limits(self.config.risk)
+
         # 3. Инициализация Market Data (C++)
-        self.logger.info("📡 Initializing Exchange Streamer...")
-        self.streamer = hft_core.ExchangeStreamer(hft_core.BybitParser())
+        if MARKET_DATA_SOCKET:
+            # Общий демон: стакан и сделки из shared memory, свой WebSocket не открываем
+            self.logger.info(f"🛰️ Using shared market data daemon ({MARKET_DATA_SOCKET})...")
+            self.streamer = SharedMarketDataStreamer(MARKET_DATA_SOCKET, MARKET_DATA_SHM_NAME)
+        else:
+            self.logger.info("📡 Initializing Exchange Streamer...")
+            self.streamer = hft_core.ExchangeStreamer(hft_core.BybitParser())
+
+        # 3.1 Приватный стрим (order / execution / position) -> AccountLedger
+        self.private_streamer = None
+        if self.config.api_key and self.config.api_secret:
+            private_url = ("wss://stream-testnet.bybit.com/v5/private" if self.config.testnet
+                           else TRADING_CONFIG.private_ws_url)
+            self.private_streamer = hft_core.ExchangeStreamer(hft_core.BybitParser(), private_url)
+            self.private_streamer.set_credentials(self.config.api_key, self.config.api_secret)
         
         # 4. Execution Handler (HTTP REST)
         self.execution_handler = BybitExecutionHandler(
@@ -108,44 +175,170 @@ class BotOrchestrator:
             sandbox=self.config.testnet
         )
 
+        # 4.1 Ledger ордеров и позиций (REST только для сверки)
+        self.ledger = AccountLedger(
+            self.execution_handler,
+            position_listener=self.gateway.update_position,
+            order_listener=self.gateway.update_reservation
+        )
+
         # 5. Smart Scanner
-        self.smart_scanner = SmartMarketSelector(self.execution_handler)
+        self.smart_scanner = SmartMarketSelector(self.execution_handler, natr_source=self._streamed_natr)
+
+        # 5.1 Политика ротации: гистерезис, минимальный стаж, цена смены
+        self.rotation = RotationPolicy(MAX_COINS_TO_TRADE, self.config.rotation)
+
+        # 6. Каталог спецификаций (Tick/Lot/MinQty всех монет одним запросом)
+        self.instrument_catalog = InstrumentCatalog(
+            cache_file=INSTRUMENTS_CACHE_FILE,
+            ttl_sec=INSTRUMENTS_TTL_SEC,
+            testnet=self.config.testnet
+        )
+
+    def apply_risk_limits(self, risk: RiskConfig):
+        """Лимиты можно менять на лету: C++ применяет их к следующему же ордеру."""
+        limits = hft_core.RiskLimits()
+        for name, value in vars(risk).items():
+            setattr(limits, name, value)
+        self.gateway.set_risk_limits(limits)
+        self.logger.info(
+            f"🛡️ Risk limits: order≤${risk.max_order_notional}, symbol≤${risk.max_symbol_notional}, "
+            f"total≤${risk.max_total_notional}, positions≤{risk.max_open_positions}, "
+            f"band={risk.price_band_pct}%, rate={risk.max_orders_per_sec}/s, daily loss≤${risk.max_daily_loss}"
+        )
 
-    async def _find_best_assets(self, limit: int) -> List[str]:
-        """Фаза разведки: ищем ТОП-N монет."""
+    async def _seed_daily_pnl(self):
+        """Дневной лимит убытка считается с 00:00 UTC, а не с момента запуска."""
+        pnl = await self.ledger.realized_pnl_today()
+        if pnl is None: return
+        self.gateway.set_daily_pnl(pnl)
+        self.logger.info(f"📅 Daily PnL seeded: {pnl:.2f} USDT")
+
+    # --- HOT RELOAD ---
+    def _on_config_changed(self):
+        """
+        strategy_params.json переписан (ConfigWatcher, event loop). Файл валидируется целиком:
+        при ошибке не меняется ничего. Иначе горячие поля подменяются у всех живых стратегий
+        одним синхронным проходом — между событиями стакана.
+        """
+        started = time.perf_counter()
         try:
-            candidates = await self.smart_scanner.scan_and_select(top_n=limit)
-            if not candidates:
+            json_settings = read_settings_file()
+            changes = diff_strategy_params(self.config.strategy, json_settings)
+            risk = RiskConfig.from_dict(json_settings.get("risk", {}))
+            rotation = RotationConfig.from_dict(json_settings.get("rotation", {}))
+        except (OSError, ValueError, TypeError) as e:
+            self.logger.error(f"❌ Config reload rejected, keeping current params: {e}")
+            return
+
+        summary = [f"{name} {getattr(self.config.strategy, name)} -> {value}" for name, value in changes.items()]
+        risk = risk if risk != self.config.risk else None
+        if changes:
+            # Шаблон для будущих активаций
+            self.config.strategy = dataclasses.replace(self.config.strategy, **changes)
+        if changes or risk:
+            self._reapply_params(risk)
+        if risk:
+            self.config.risk = risk
+            summary.append("risk limits")
+        if rotation != self.config.rotation:
+            self.config.rotation = rotation
+            self.rotation.cfg = rotation
+            summary.append("rotation")
+
+        if not summary:
+            self.logger.info(f"📂 {SETTINGS_FILE} rewritten, nothing changed")
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.logger.info(f"🔁 Hot-reload applied in {elapsed_ms:.2f} ms "
+                         f"({len(self.strategies) + len(self.shadow_strategies)} strategies): {', '.join(summary)}")
+
+    def _on_optimized_params_changed(self):
+        """batch_optimizer переписал optimized_params.json."""
+        started = time.perf_counter()
+        self.param_store.load()
+        updated = self._reapply_params()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.logger.info(f"🧬 Optimized params re-applied in {elapsed_ms:.2f} ms: {sorted(updated) or 'no changes'}")
+
+    def _effective_params(self, cfg: StrategyParameters) -> StrategyParameters:
+        """Общие горячие поля + параметры монеты из param_store; спецификация инструмента — из cfg."""
+        base = dataclasses.replace(cfg, **{name: getattr(self.config.strategy, name) for name in HOT_RELOAD_PARAMS})
+        return self.param_store.apply(base)
+
+    def _reapply_params(self, risk: Optional[RiskConfig] = None) -> Dict[str, Dict]:
+        """Пересчитывает параметры каждой живой стратегии и отправляет только отличия (symbol -> поля)."""
+        changes: Dict[str, Dict] = {}
+        for symbol, cfg in self._live_params():
+            target = self._effective_params(cfg)
+            diff = {name: getattr(target, name) for name in HOT_RELOAD_PARAMS if getattr(target, name) != getattr(cfg, name)}
+            if diff:
+                changes[symbol] = diff
+        if changes or risk:
+            self._push_params(changes, risk)
+        return changes
+
+    def _live_params(self):
+        for symbol, strategy in (*self.strategies.items(), *self.shadow_strategies.items()):
+            yield symbol, strategy.cfg
+
+    def _push_params(self, changes: Dict[str, Dict], risk: Optional[RiskConfig]):
+        for symbol, diff in changes.items():
+            strategy = self.strategies.get(symbol) or self.shadow_strategies.get(symbol)
+            if strategy: strategy.update_params(diff)
+        if risk:
+            self.apply_risk_limits(risk)
+
+    async def _scan_scores(self) -> Dict[str, float]:
+        """Фаза разведки: NATR всех монет, прошедших фильтры сканера (symbol -> оценка)."""
+        if MARKET_DATA_SOCKET:
+            try:
+                # Скан общий для всех ботов: демон кэширует результат
+                return await asyncio.to_thread(self.streamer.top_scores)
+            except Exception as e:
+                self.logger.error(f"Shared scan failed, scanning locally: {e}")
+        try:
+            scores = await self.smart_scanner.scan_scores()
+            if not scores:
                 self.logger.warning("⚠️ Scanner found nothing. Keep calm.")
-                return []
-            return candidates
+            return scores
         except Exception as e:
             self.logger.error(f"Scan failed: {e}")
-            return []
+            return {}
 
     # --- ROUTING DISPATCHERS (Маршрутизаторы) ---
     def _dispatch_tick(self, tick):
-        if tick.symbol in self.strategies:
-            self.strategies[tick.symbol].on_tick(tick)
+        self.dispatcher.post_trade(tick)
 
     def _dispatch_depth(self, snapshot):
-        if snapshot.symbol in self.strategies and self.loop:
-            asyncio.run_coroutine_threadsafe(
-                self.strategies[snapshot.symbol].on_depth(snapshot),
-                self.loop
-            )
+        self.dispatcher.post_depth(snapshot)
 
     def _dispatch_execution(self, exec_data):
-        if exec_data.symbol in self.strategies and self.loop:
-            asyncio.run_coroutine_threadsafe(
-                self.strategies[exec_data.symbol].on_execution(exec_data),
-                self.loop
-            )
+        if not self.loop: return
+        # Ledger обновляется первым: TradeManager в on_execution уже видит актуальный fill
+        self.loop.call_soon_threadsafe(self.ledger.on_execution, exec_data)
+        self.dispatcher.post_execution(exec_data)
+
+    def _dispatch_trigger(self, event):
+        self.dispatcher.post_trigger(event)
+
+    def _dispatch_order(self, order_update):
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.ledger.on_order, order_update)
+
+    def _dispatch_position(self, position):
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.ledger.on_position, position)
 
     def _setup_streamer_routing(self):
         self.streamer.set_tick_callback(self._dispatch_tick)
         self.streamer.set_orderbook_callback(self._dispatch_depth)
-        self.streamer.set_execution_callback(self._dispatch_execution)
+        self.streamer.set_trigger_engine(self.trigger_engine)
+
+        if self.private_streamer:
+            self.private_streamer.set_execution_callback(self._dispatch_execution)
+            self.private_streamer.set_order_callback(self._dispatch_order)
+            self.private_streamer.set_position_callback(self._dispatch_position)
 
     def _on_gateway_message(self, msg: str):
         if "error" in msg.lower() and "retCode" not in msg:
@@ -153,48 +346,153 @@ class BotOrchestrator:
 
     # --- LIFECYCLE MANAGEMENT ---
     
-    async def _activate_strategy(self, symbol: str):
-        """Создает и запускает стратегию для новой монеты"""
-        if symbol in self.strategies:
-            return 
+    async def _activate_strategy(self, symbol: str, shadow: bool = False):
+        """Создает и запускает стратегию для новой монеты (shadow=True — только прогрев)"""
+        await self._activate_strategies({symbol: shadow})
+
+    async def _activate_strategies(self, batch: Dict[str, bool]):
+        """
+        Пакетная активация (symbol -> shadow): спецификации грузятся параллельно,
+        подписка на стрим — одним сообщением на всю пачку.
+        Время активации = самая медленная монета, а не сумма.
+        """
+        new: Dict[str, bool] = {}
+        for symbol, shadow in batch.items():
+            if symbol in self.strategies:
+                if not shadow:
+                    self._resume_strategy(symbol)
+                continue
+            if symbol in self.shadow_strategies:
+                if not shadow:
+                    self._promote_strategy(symbol)
+                    self.rotation.on_activated(symbol)
+                continue
+            new[symbol] = shadow
+        if not new:
+            return
 
-        self.logger.info(f"✨ Spawning strategy for {symbol}...")
-        
-        # 1. Клонируем конфиг
+        # Несколько монет вне каталога: одна полная перезагрузка вместо запроса на каждую
+        if sum(1 for s in new if s not in self.instrument_catalog) > 1:
+            await self.instrument_catalog.refresh()
+
+        # 1. Конфиги со спецификацией монет (параллельно)
+        configs = await asyncio.gather(*(self._build_strategy_config(s) for s in new))
+
+        # 2. Создаем и регистрируем стратегии
+        subscribed = []
+        for (symbol, shadow), strat_cfg in zip(new.items(), configs):
+            if strat_cfg is None:
+                continue
+            self.logger.info(f"✨ Spawning {'shadow ' if shadow else ''}strategy for {symbol}...")
+            registry = self.shadow_strategies if shadow else self.strategies
+            registry[symbol] = self._create_strategy(strat_cfg, shadow=shadow)
+            if not shadow:
+                self.rotation.on_activated(symbol)
+            subscribed.append(symbol)
+
+        # 3. Подписываем на стрим
+        if subscribed:
+            self.streamer.add_symbols(subscribed)
+
+    def _promote_strategy(self, symbol: str):
+        """Прогретый кандидат начинает торговать мгновенно: стакан и EMA уже откалиброваны."""
+        strategy = self.shadow_strategies.pop(symbol)
+        strategy.promote()
+        self.strategies[symbol] = strategy
+        self.logger.info(f"🎓 {symbol} promoted from shadow mode")
+
+    def _resume_strategy(self, symbol: str):
+        """Монета снова в топе, пока дренируется: отменяем drain, иначе GC снесет ее из целевого набора."""
+        strategy = self.strategies[symbol]
+        if not getattr(strategy, "is_shutting_down", False):
+            return
+        strategy.cancel_graceful_stop()
+        self.rotation.on_activated(symbol)
+        self.logger.info(f"♻️ {symbol} re-selected while draining. Drain cancelled")
+
+    async def _drop_stale_shadows(self, keep: Set[str]):
+        """Снимает shadow-стратегии, выпавшие из списка кандидатов."""
+        for sym in list(self.shadow_strategies):
+            if sym not in keep:
+                self.logger.info(f"🌫️ {sym} left the shadow list")
+                await self._purge_strategy(sym)
+                self.streamer.remove_symbol(sym)
+
+    async def _build_strategy_config(self, symbol: str) -> Optional[StrategyParameters]:
+        # Клонируем конфиг
         strat_cfg = copy.copy(self.config.strategy)
         strat_cfg.symbol = symbol
         
-        # Получаем спецификацию с биржи
-        try:
-            tick_size, step_size, min_qty = await self.execution_handler.fetch_instrument_info(symbol)
-            strat_cfg.tick_size = tick_size
-            strat_cfg.lot_size = step_size
-            strat_cfg.min_qty = min_qty
-            self.logger.info(f"📏 {symbol} Specs: Tick={tick_size}, Lot={step_size}")
-        except Exception as e:
-            self.logger.error(f"❌ Failed to fetch specs for {symbol}: {e}")
-            return 
-        
-        # 2. Создаем стратегию
+        # Спецификация: сначала из каталога (память), REST только если монеты там нет
+        spec = self.instrument_catalog.get(symbol)
+        if spec:
+            tick_size, step_size, min_qty = spec.tick_size, spec.lot_size, spec.min_qty
+        else:
+            try:
+                async with self._spec_fetch_limit:
+                    tick_size, step_size, min_qty = await self.execution_handler.fetch_instrument_info(symbol)
+            except Exception as e:
+                self.logger.error(f"❌ Failed to fetch specs for {symbol}: {e}")
+                return None
+
+        strat_cfg.tick_size = tick_size
+        strat_cfg.lot_size = step_size
+        strat_cfg.min_qty = min_qty
+        self.logger.info(f"📏 {symbol} Specs: Tick={tick_size}, Lot={step_size}")
+
+        optimized = self.param_store.get(symbol)
+        if optimized:
+            strat_cfg = self.param_store.apply(strat_cfg)
+            self.logger.info(f"🧬 {symbol} optimized params (score {optimized.score:.3f}, {optimized.updated_at}): "
+                             f"{optimized.params}")
+        return strat_cfg
+
+    def _create_strategy(self, strat_cfg: StrategyParameters, shadow: bool = False):
         # [FIX] Передаем notifier внутрь стратегии
         strategy = AdaptiveWallStrategy(
             executor=self.execution_handler,
             cfg=strat_cfg,
             gateway=self.gateway,
-            notifier=self.notifier 
+            notifier=self.notifier,
+            ledger=self.ledger,
+            triggers=self.trigger_engine,
+            tasks=self.tasks,
+            shadow=shadow,
+            batch=self.batch,
+            timers=self.timers,
+            bars=self.bars
         )
-        
-        # 3. Регистрируем
-        self.strategies[symbol] = strategy
-        
-        # 4. Подписываем на стрим
-        self.streamer.add_symbol(symbol)
+        self.snapshots.restore(strategy)
+        self.dispatcher.register(strat_cfg.symbol, strategy)
+        return strategy
+
+    def _streamed_natr(self, symbol: str) -> Optional[float]:
+        return self.bars.natr(symbol)
+
+    def _local_strategies(self) -> Dict[str, AdaptiveWallStrategy]:
+        """Стратегии этого процесса (для снапшотов)."""
+        return {**self.shadow_strategies, **self.strategies}
+
+    async def _resume_snapshot_trades(self):
+        """Сделки из снапшотов по монетам, которые ротация не выбрала: поднимаем и сразу дренируем."""
+        orphans = [s for s in self.snapshots.open_trade_symbols() if s not in self.strategies]
+        if not orphans: return
+        self.logger.warning(f"♨️ Snapshot trades outside rotation, resuming to close them: {orphans}")
+        await self._activate_strategies(dict.fromkeys(orphans, False))
+        for symbol in orphans:
+            await self._deactivate_strategy(symbol)
+
+    async def _purge_strategy(self, symbol: str):
+        await self.dispatcher.unregister(symbol)
+        strategy = self.strategies.pop(symbol, None) or self.shadow_strategies.pop(symbol)
+        await strategy.close()
 
     async def _deactivate_strategy(self, symbol: str):
         if symbol not in self.strategies:
             return
 
         strategy = self.strategies[symbol]
+        self.rotation.on_removed(symbol)
         
         if not getattr(strategy, "is_shutting_down", False):
             self.logger.info(f"🛑 Signal STOP for {symbol}. Waiting for active orders to clear...")
@@ -203,6 +501,35 @@ class BotOrchestrator:
             else:
                 strategy.is_shutting_down = True
 
+    async def _rebalance(self, scores: Dict[str, float]):
+        """Одна итерация ротации: решение RotationPolicy -> drain / активация / shadow."""
+        self.rotation.update_scores(scores)
+
+        current_coins = {s for s, st in self.strategies.items() if not getattr(st, "is_shutting_down", False)}
+        target = self.rotation.select(current_coins, set(scores))
+
+        to_add = target - current_coins
+        to_remove = current_coins - target
+        to_keep = current_coins & target
+
+        if not to_add and not to_remove:
+            self.logger.info("💤 No changes in market leadership. Maintaining positions.")
+        else:
+            self.logger.info(f"⚖️ Rebalancing: +{to_add} | -{to_remove} | Keeping: {to_keep}")
+
+            for coin in to_remove:
+                await self._deactivate_strategy(coin)
+
+        # Shadow mode: следующие по рейтингу кандидаты (повышаемые из shadow не сносим)
+        shadows = [s for s, _ in self.rotation.ranking(exclude=target)
+                   if s in scores and s not in self.strategies][:SHADOW_COINS]
+        await self._drop_stale_shadows(keep=set(shadows) | to_add)
+
+        # Новые монеты и shadow-кандидаты — одной пачкой: одна подписка на ребаланс
+        batch = dict.fromkeys(shadows, True)
+        batch.update(dict.fromkeys(to_add, False))
+        await self._activate_strategies(batch)
+
     async def _rotation_loop(self):
         self.logger.info(f"🔄 Rotation Watchdog started (Interval: {RESCAN_INTERVAL_SEC}s)")
         
@@ -211,28 +538,10 @@ class BotOrchestrator:
                 await asyncio.sleep(RESCAN_INTERVAL_SEC)
                 self.logger.info("🕵️ Periodic Market Rescan triggered...")
                 
-                new_top_coins = await self._find_best_assets(limit=MAX_COINS_TO_TRADE)
-                if not new_top_coins:
+                scores = await self._scan_scores()
+                if not scores:
                     continue 
-
-                current_coins = set(self.strategies.keys())
-                new_set = set(new_top_coins)
-
-                to_add = new_set - current_coins
-                to_remove = current_coins - new_set
-                to_keep = current_coins & new_set
-
-                if not to_add and not to_remove:
-                    self.logger.info("💤 No changes in market leadership. Maintaining positions.")
-                    pass
-                else:
-                    self.logger.info(f"⚖️ Rebalancing: +{to_add} | -{to_remove} | Keeping: {to_keep}")
-
-                    for coin in to_remove:
-                        await self._deactivate_strategy(coin)
-
-                    for coin in to_add:
-                        await self._activate_strategy(coin)
+                await self._rebalance(scores)
 
                 # Garbage Collector
                 keys_to_purge = []
@@ -242,7 +551,9 @@ class BotOrchestrator:
                 
                 for sym in keys_to_purge:
                     self.logger.info(f"🗑️ {sym} is clean. Removing from memory.")
-                    del self.strategies[sym]
+                    await self._purge_strategy(sym)
+                    # Отписка: иначе выбывшие монеты стримятся и парсятся до рестарта
+                    self.streamer.remove_symbol(sym)
 
             except asyncio.CancelledError:
                 break
@@ -250,6 +561,28 @@ class BotOrchestrator:
                 self.logger.exception(f"Rotation loop error: {e}")
                 await asyncio.sleep(60)
 
+    async def _mailbox_stats_loop(self):
+        while self.running:
+            try:
+                await asyncio.sleep(MAILBOX_STATS_INTERVAL_SEC)
+                for sym, st in self.dispatcher.stats().items():
+                    coalesced = st["depth_received"] - st["depth_processed"]
+                    self.logger.info(
+                        f"📬 {sym}: queue={st['queue_depth']} (max {st['max_queue_depth']}) | "
+                        f"depth {st['depth_processed']}/{st['depth_received']} (coalesced {coalesced}) | "
+                        f"execs {st['executions_processed']}"
+                    )
+                if self.batch:
+                    bs = self.batch.stats()
+                    self.logger.info(f"🧮 Batch eval: {bs['symbols']} symbols | avg batch {bs['avg_batch']:.1f} "
+                                     f"(max {bs['max_batch']}) | {bs['batches']} calls")
+                counts = self.tasks.counts()
+                self.logger.info(f"🧵 Background tasks: {self.tasks.total} {counts}")
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.logger.error(f"Mailbox stats error: {e}")
+
     async def run(self):
         # 1. Читаем настройки из переменных окружения
         tg_token = os.getenv("TG_NOTIFIER_TOKEN")
@@ -270,39 +603,55 @@ class BotOrchestrator:
         self.loop = asyncio.get_running_loop()
         for sig in (signal.SIGINT, signal.SIGTERM):
             self.loop.add_signal_handler(sig, lambda: asyncio.create_task(self.shutdown()))
+        self.config_watcher.start()
+        self.param_store_watcher.start()
 
         try:
+            self.logger.info("📚 Loading instrument catalog...")
+            await self.instrument_catalog.start()
+
             self._setup_streamer_routing()
             
             self.logger.info("🔗 Connecting Order Gateway...")
             self.gateway.connect()
+            if self.private_streamer:
+                self.logger.info("🔐 Connecting Private Stream...")
+                self.private_streamer.start()
             await asyncio.sleep(1.0)
+
+            self.logger.info("📒 Syncing account ledger...")
+            await self.ledger.start()
+            await self._seed_daily_pnl()
             
             self.logger.info("🌊 Starting Data Stream...")
             self.streamer.start()
 
             self.logger.info("🚀 Doing Initial Market Scan...")
-            top_coins = await self._find_best_assets(limit=MAX_COINS_TO_TRADE)
+            scores = await self._scan_scores()
             
-            if not top_coins:
-                top_coins = [self.config.symbol]
-                self.logger.warning(f"⚠️ Using fallback coin: {top_coins}")
-
-            for coin in top_coins:
-                await self._activate_strategy(coin)
+            if scores:
+                await self._rebalance(scores)
+            else:
+                self.logger.warning(f"⚠️ Using fallback coin: {[self.config.symbol]}")
+                await self._activate_strategy(self.config.symbol)
+            await self._resume_snapshot_trades()
+            self.snapshots.start(self._local_strategies)
             
-            self.logger.info(f"✅ Bot is running on: {list(self.strategies.keys())}")
+            self.logger.info(f"✅ Bot is running on: {list(self.strategies.keys())} "
+                             f"(shadow: {list(self.shadow_strategies.keys())})")
 
             rotation_task = asyncio.create_task(self._rotation_loop())
+            stats_task = asyncio.create_task(self._mailbox_stats_loop())
 
             while self.running:
                 await asyncio.sleep(1)
             
-            rotation_task.cancel()
-            try:
-                await rotation_task
-            except asyncio.CancelledError:
-                pass
+            for task in (rotation_task, stats_task):
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
 
         except asyncio.CancelledError:
             self.logger.info("Bot execution cancelled.")
@@ -320,9 +669,98 @@ class BotOrchestrator:
         
         if hasattr(self, 'streamer'): self.streamer.stop()
         if hasattr(self, 'gateway'): self.gateway.stop()
+        if self.private_streamer: self.private_streamer.stop()
+        self.config_watcher.stop()
+        self.param_store_watcher.stop()
+        await self.snapshots.stop(self._local_strategies())
+        await self.dispatcher.close()
+        if self.batch: await self.batch.stop()
+        await self.timers.stop()
+        await self.tasks.close()
+        await self.ledger.stop()
+        await self.instrument_catalog.stop()
         
         await asyncio.sleep(0.5)
 
+class MultiProcessOrchestrator(BotOrchestrator):
+    """
+    Стримеры, TriggerEngine и ротация остаются в родителе, стратегии живут в процессах WorkerPool.
+    Стакан и сделки уходят в воркеры через shared memory, приватные события рассылаются всем воркерам.
+    Каждый воркер торгует через собственный OrderGateway и держит свой TriggerEngine для стопов;
+    стакан TriggerEngine родителя — источник снапшотов ресинхронизации.
+    """
+    def __init__(self, config_path_dummy: str, num_workers: int):
+        super().__init__(config_path_dummy)
+        self.pool = WorkerPool(
+            num_workers,
+            self.trigger_engine,
+            settings={"log_level": self.config.log_level, "event_loop": os.getenv(LOOP_ENV_VAR),
+                      "batch_eval": batch_enabled(), "num_workers": num_workers}
+        )
+
+    # --- ROUTING: поток C++ -> воркеры ---
+    def _dispatch_depth(self, snapshot):
+        self.pool.route_depth(snapshot)
+
+    def _dispatch_tick(self, tick):
+        self.pool.route_trade(tick)
+
+    def _dispatch_execution(self, exec_data):
+        super()._dispatch_execution(exec_data)
+        self.pool.broadcast(protocol.CMD_EXECUTION, protocol.pack_event(exec_data, protocol.EXECUTION_FIELDS))
+
+    def _dispatch_order(self, order_update):
+        super()._dispatch_order(order_update)
+        self.pool.broadcast(protocol.CMD_ORDER, protocol.pack_event(order_update, protocol.ORDER_FIELDS))
+
+    def _dispatch_position(self, position):
+        super()._dispatch_position(position)
+        self.pool.broadcast(protocol.CMD_POSITION, protocol.pack_event(position, protocol.POSITION_FIELDS))
+
+    def _local_strategies(self) -> Dict[str, AdaptiveWallStrategy]:
+        # Снапшоты пишут сами воркеры
+        return {}
+
+    def _streamed_natr(self, symbol: str) -> Optional[float]:
+        # Бары строят воркеры, NATR приходит в heartbeat
+        status = self.pool.symbol_status(symbol)
+        return status.get("natr") if status else None
+
+    def _live_params(self):
+        for symbol in (*self.strategies, *self.shadow_strategies):
+            cfg = self.pool.strategy_config(symbol)
+            if cfg is not None:
+                yield symbol, StrategyParameters(**cfg)
+
+    def _push_params(self, changes: Dict[str, Dict], risk: Optional[RiskConfig]):
+        # Стратегии и их OrderGateway живут в воркерах
+        if risk:
+            self.apply_risk_limits(risk)
+        self.pool.update_params(changes, dataclasses.asdict(risk) if risk else None)
+
+    # --- LIFECYCLE ---
+    def _create_strategy(self, strat_cfg: StrategyParameters, shadow: bool = False):
+        return self.pool.assign(strat_cfg.symbol, dataclasses.asdict(strat_cfg), shadow=shadow)
+
+    async def _purge_strategy(self, symbol: str):
+        self.pool.remove(symbol)
+        self.strategies.pop(symbol, None) or self.shadow_strategies.pop(symbol)
+
+    async def run(self):
+        self.pool.start()
+        await super().run()
+
+    async def shutdown(self):
+        was_running = self.running
+        await super().shutdown()
+        if was_running:
+            await self.pool.stop()
+
 if __name__ == "__main__":
-    bot = BotOrchestrator("dummy")
-    asyncio.run(bot.run())
\ No newline at end of file
+    num_workers = int(os.getenv(WORKERS_ENV_VAR, "0"))
+    if num_workers > 0:
+        bot = MultiProcessOrchestrator("dummy", num_workers)
+    else:
+        bot = BotOrchestrator("dummy")
+    # HFT_EVENT_LOOP=auto|uvloop|asyncio (по умолчанию uvloop, если установлен)
+    run_event_loop(bot.run())
@@ -0,0 +1,205 @@
+# hft_strategy/market_data_daemon.py
+"""
+Демон market data: один ExchangeStreamer и один сканер на все контейнеры ботов.
+Книги, сделки и тикер публикуются в shared memory (seqlock), управление — через Unix-сокет:
+    SUB <symbol>.. -> OK <slot>..  (пачка символов -> одна подписка на бирже)
+    UNSUB <symbol> -> OK
+    TOP <n>        -> OK SYM1,SYM2,...
+    SCORES         -> OK SYM1:natr,SYM2:natr,...
+    PING           -> OK <pid>
+"""
+import asyncio
+import logging
+import os
+import signal
+import sys
+import time
+from typing import Dict, List, Optional, Set
+
+sys.path.append(os.getcwd())
+
+try:
+    import hft_core
+except ImportError:
+    print("❌ Critical: hft_core not found. Did you run 'pip install .' ?")
+    sys.exit(1)
+
+from hft_strategy.config import load_config, MARKET_DATA_SOCKET, MARKET_DATA_SHM_NAME
+from hft_strategy.infrastructure.execution import BybitExecutionHandler
+from hft_strategy.infrastructure.event_loop import run as run_event_loop
+from hft_strategy.infrastructure.market_data_shm import SharedMarketData
+from hft_strategy.services.smart_scanner import SmartMarketSelector
+
+DEFAULT_SOCKET_PATH = os.path.join("run", "market_data.sock")
+MAX_SYMBOLS = 64
+BOOK_LEVELS = 50
+HEARTBEAT_INTERVAL_SEC = 1.0
+SCAN_CACHE_TTL_SEC = 240   # Ротация ботов раз в 300с: каждый rescan получает свежий скан
+
+logger = logging.getLogger("MARKET_DATA")
+
+class MarketDataDaemon:
+    def __init__(self, socket_path: str, shm_name: str):
+        self.config = load_config()
+        self.socket_path = socket_path
+        self.running = False
+
+        self.shm = SharedMarketData(shm_name, create=True, max_symbols=MAX_SYMBOLS, max_levels=BOOK_LEVELS)
+
+        # Книги держит C++ (std::map, без триггеров и gateway): в shm уходит готовый отсортированный топ
+        self.books = hft_core.TriggerEngine(None)
+        self.streamer = hft_core.ExchangeStreamer(hft_core.BybitParser())
+
+        self.execution_handler = BybitExecutionHandler(
+            api_key=self.config.api_key,
+            api_secret=self.config.api_secret,
+            sandbox=self.config.testnet
+        )
+        self.scanner = SmartMarketSelector(self.execution_handler)
+        self._scan_lock = asyncio.Lock()
+        self._scan_cache: Dict[str, float] = {}
+        self._scan_ts = 0.0
+
+        # symbol -> slot (читается потоком стримера), symbol -> id подписчиков
+        self._slots: Dict[str, int] = {}
+        self._subscribers: Dict[str, Set[int]] = {}
+        self._free_slots = list(range(MAX_SYMBOLS - 1, -1, -1))
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    # --- STREAMER CALLBACKS (поток C++) ---
+    def _on_depth(self, raw):
+        slot = self._slots.get(raw.symbol)
+        if slot is None: return
+        snap = self.books.snapshot(raw.symbol, BOOK_LEVELS)
+        self.shm.publish_book(slot, raw.timestamp, raw.local_timestamp, snap.bids, snap.asks)
+
+    def _on_trade(self, tick):
+        slot = self._slots.get(tick.symbol)
+        if slot is None: return
+        self.shm.publish_trade(slot, tick.price, tick.qty, tick.timestamp, tick.side)
+
+    # --- SUBSCRIPTIONS ---
+    def _subscribe(self, client_id: int, symbols: List[str]) -> List[int]:
+        new = [s for s in dict.fromkeys(symbols) if s not in self._slots]
+        if len(new) > len(self._free_slots):
+            raise RuntimeError("NO_FREE_SLOTS")
+        for symbol in new:
+            slot = self._free_slots.pop()
+            self.shm.clear_slot(slot)
+            self._slots[symbol] = slot
+            logger.info(f"📡 {symbol} -> slot {slot}")
+        if new:
+            self.streamer.add_symbols(new)
+
+        for symbol in symbols:
+            self._subscribers.setdefault(symbol, set()).add(client_id)
+        return [self._slots[s] for s in symbols]
+
+    def _unsubscribe(self, client_id: int, symbol: str):
+        subs = self._subscribers.get(symbol)
+        if not subs: return
+        subs.discard(client_id)
+        if not subs:
+            # Последний читатель ушел: отписка от биржи и освобождение слота
+            del self._subscribers[symbol]
+            slot = self._slots.pop(symbol)
+            self.streamer.remove_symbol(symbol)
+            self.shm.clear_slot(slot)
+            self._free_slots.append(slot)
+            logger.info(f"💤 {symbol} has no readers, slot {slot} released")
+
+    async def _scores(self) -> Dict[str, float]:
+        async with self._scan_lock:
+            if time.time() - self._scan_ts > SCAN_CACHE_TTL_SEC or not self._scan_cache:
+                result = await self.scanner.scan_scores()
+                if result:
+                    self._scan_cache, self._scan_ts = result, time.time()
+            return self._scan_cache
+
+    # --- CONTROL SOCKET ---
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        client_id = id(writer)
+        subscribed: Set[str] = set()
+        try:
+            while self.running:
+                line = await reader.readline()
+                if not line: break
+                parts = line.decode().split()
+                if not parts: continue
+                cmd, args = parts[0].upper(), parts[1:]
+
+                try:
+                    if cmd == "SUB" and args:
+                        reply = "OK " + " ".join(map(str, self._subscribe(client_id, args)))
+                        subscribed.update(args)
+                    elif cmd == "UNSUB" and args:
+                        self._unsubscribe(client_id, args[0])
+                        subscribed.discard(args[0])
+                        reply = "OK"
+                    elif cmd == "TOP":
+                        limit = int(args[0]) if args else 3
+                        reply = "OK " + ",".join(list(await self._scores())[:limit])
+                    elif cmd == "SCORES":
+                        reply = "OK " + ",".join(f"{sym}:{v:.6f}" for sym, v in (await self._scores()).items())
+                    elif cmd == "PING":
+                        reply = f"OK {os.getpid()}"
+                    else:
+                        reply = "ERR UNKNOWN_COMMAND"
+                except Exception as e:
+                    reply = f"ERR {e}"
+
+                writer.write((reply + "\n").encode())
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            # Упавший бот не держит подписки
+            for symbol in subscribed:
+                self._unsubscribe(client_id, symbol)
+            writer.close()
+
+    async def _heartbeat_loop(self):
+        while self.running:
+            self.shm.heartbeat()
+            await asyncio.sleep(HEARTBEAT_INTERVAL_SEC)
+
+    async def run(self):
+        self.running = True
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stop)
+
+        self.streamer.set_trigger_engine(self.books)
+        self.streamer.set_orderbook_callback(self._on_depth)
+        self.streamer.set_tick_callback(self._on_trade)
+        self.streamer.start()
+
+        os.makedirs(os.path.dirname(self.socket_path) or ".", exist_ok=True)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._server = await asyncio.start_unix_server(self._handle_client, path=self.socket_path)
+        os.chmod(self.socket_path, 0o666)
+        logger.info(f"🛰️ Market data daemon ready: socket={self.socket_path}, shm={self.shm.name}")
+
+        try:
+            await self._heartbeat_loop()
+        finally:
+            self._server.close()
+            await self._server.wait_closed()
+            self.streamer.stop()
+            self.shm.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            logger.info("🛑 Market data daemon stopped")
+
+    def stop(self):
+        self.running = False
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s.%(msecs)03d | %(levelname)-8s | %(name)s | %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    daemon = MarketDataDaemon(MARKET_DATA_SOCKET or DEFAULT_SOCKET_PATH, MARKET_DATA_SHM_NAME)
+    run_event_loop(daemon.run())
@@ -12,6 +12,7 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from hft_strategy.config import DB_CONFIG
+from hft_strategy.infrastructure.event_loop import run as run_event_loop
 from hft_strategy.domain.events import (
     DEPTH_EVENT, TRADE_EVENT, DEPTH_CLEAR_EVENT, DEPTH_SNAPSHOT_EVENT,
     BUY_EVENT, SELL_EVENT, EXCH_EVENT, LOCAL_EVENT
@@ -180,12 +181,10 @@ if __name__ == "__main__":
     parser.add_argument("--symbol", type=str, required=True)
     parser.add_argument("--output", type=str, default=None)
     parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--loop", type=str, default=None, choices=["auto", "uvloop", "asyncio"])
     args = parser.parse_args()
     
     if args.output is None:
         args.output = f"data/{args.symbol}_v2.npz"
         
-    if sys.platform == 'win32':
-        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-        
-    asyncio.run(export_data(args.symbol, args.output, args.days))
\ No newline at end of file
+    run_event_loop(export_data(args.symbol, args.output, args.days), loop=args.loop)
\ No newline at end of file
@@ -0,0 +1,341 @@
+# hft_strategy/services/account_ledger.py
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Optional
+
+from hft_strategy.domain.account import OrderRecord, PositionRecord
+from hft_strategy.domain.interfaces import IExecutionHandler
+
+logger = logging.getLogger("LEDGER")
+
+class AccountLedger:
+    """
+    In-memory учет ордеров и позиций по приватным потокам (order / execution / position).
+    Все методы синхронные и вызываются только из потока event loop'а,
+    поэтому TradeManager может опрашивать их прямо в торговой логике, без REST.
+    REST используется только для редкой сверки (по таймеру или при обнаружении расхождения).
+    """
+    def __init__(self, executor: IExecutionHandler,
+                 reconcile_interval_sec: float = 120.0,
+                 min_reconcile_gap_sec: float = 5.0,
+                 order_retention_sec: float = 600.0,
+                 position_listener: Optional[Callable[[str, float, float], None]] = None,
+                 order_listener: Optional[Callable[[str, float], None]] = None):
+        self.exec = executor
+        # (symbol, signed_size, entry_price) на каждое изменение позиции (риск-гейт OrderGateway)
+        self.position_listener = position_listener
+        # (order_link_id, leaves_qty) на каждое изменение ордера: резерв входа в риск-гейте
+        self.order_listener = order_listener
+        self.reconcile_interval_sec = reconcile_interval_sec
+        self.min_reconcile_gap_sec = min_reconcile_gap_sec
+        self.order_retention_sec = order_retention_sec
+
+        # Ключ — orderId биржи (или orderLinkId, пока биржа не прислала orderId)
+        self._orders: Dict[str, OrderRecord] = {}
+        self._link_index: Dict[str, str] = {}  # orderLinkId -> ключ в _orders
+        self._positions: Dict[str, PositionRecord] = {}
+        # Биржевое время (ms) последнего position push: более старые execution уже учтены в нем
+        self._position_exch_ts: Dict[str, int] = {}
+        # Биржевое время последнего примененного execution: более старый push уже устарел
+        self._last_exec_ts: Dict[str, int] = {}
+        # execId -> локальное время: повторно доставленный fill не учитываем второй раз
+        self._seen_execs: Dict[str, float] = {}
+
+        self.drift_count = 0
+        self.last_reconcile_ts = 0.0
+        self._drift_event = asyncio.Event()
+        self._running = False
+        self._task: Optional[asyncio.Task] = None
+
+    # --- LIFECYCLE ---
+    async def start(self):
+        self._running = True
+        await self.reconcile(reason="startup")
+        self._task = asyncio.create_task(self._reconcile_loop())
+        logger.info(f"📒 AccountLedger started (reconcile every {self.reconcile_interval_sec:.0f}s)")
+
+    async def stop(self):
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # --- QUERIES (синхронные) ---
+    def get_order(self, ref: str) -> Optional[OrderRecord]:
+        """ref — orderId или orderLinkId."""
+        if not ref: return None
+        rec = self._orders.get(ref)
+        if rec is None:
+            key = self._link_index.get(ref)
+            if key: rec = self._orders.get(key)
+        return rec
+
+    def is_same_order(self, order_id: str, ref: str) -> bool:
+        """Execution приходит с orderId, а TradeManager может знать только orderLinkId."""
+        if order_id == ref: return True
+        rec = self.get_order(ref)
+        return rec is not None and rec.order_id == order_id
+
+    def filled_qty(self, ref: str) -> float:
+        rec = self.get_order(ref)
+        return rec.cum_exec_qty if rec else 0.0
+
+    def open_orders(self, symbol: Optional[str] = None) -> List[OrderRecord]:
+        return [o for o in self._orders.values()
+                if not o.is_final and (symbol is None or o.symbol == symbol)]
+
+    def position(self, symbol: str) -> PositionRecord:
+        return self._positions.get(symbol) or PositionRecord(symbol)
+
+    def position_size(self, symbol: str) -> float:
+        pos = self._positions.get(symbol)
+        return pos.size if pos else 0.0
+
+    # --- REGISTRATION ---
+    def track_order(self, symbol: str, side: str, qty: float, price: float,
+                    order_link_id: str, reduce_only: bool = False):
+        """
+        Регистрируем ордер в момент отправки, чтобы execution, пришедший раньше
+        order push, сразу сопоставился с нашим orderLinkId.
+        """
+        if not order_link_id or order_link_id in self._link_index: return
+        self._orders[order_link_id] = OrderRecord(
+            symbol=symbol, side=side, order_link_id=order_link_id,
+            qty=qty, price=price, reduce_only=reduce_only, updated_ts=time.time()
+        )
+        self._link_index[order_link_id] = order_link_id
+
+    def request_reconcile(self, reason: str):
+        """Сигнал о подозрении на рассинхрон (например, гонка при отмене)."""
+        logger.warning(f"🔎 Reconcile requested: {reason}")
+        self._drift_event.set()
+
+    # --- PUSH HANDLERS (вызываются в event loop через call_soon_threadsafe) ---
+    def on_order(self, upd):
+        rec = self.get_order(upd.order_id) or self.get_order(upd.order_link_id)
+        if rec is None:
+            rec = OrderRecord(symbol=upd.symbol, side=upd.side)
+
+        self._rekey(rec, upd.order_id, upd.order_link_id)
+        rec.status = upd.order_status or rec.status
+        rec.qty = upd.qty or rec.qty
+        rec.price = upd.price or rec.price
+        rec.avg_price = upd.avg_price or rec.avg_price
+        rec.reduce_only = upd.reduce_only
+        # cumExecQty кумулятивный; push старее уже пришедшего не откатывает его назад
+        rec.pushed_cum_qty = max(rec.pushed_cum_qty, upd.cum_exec_qty)
+        self._sync_filled(rec)
+        rec.updated_ts = time.time()
+        self._notify_order(rec)
+
+    def on_execution(self, ev):
+        exec_id = getattr(ev, "exec_id", "")
+        if exec_id:
+            if exec_id in self._seen_execs: return
+            self._seen_execs[exec_id] = time.time()
+
+        rec = self.get_order(ev.order_id) or self.get_order(ev.order_link_id)
+        if rec is not None:
+            self._rekey(rec, ev.order_id, ev.order_link_id)
+            rec.exec_sum_qty += ev.exec_qty
+            self._sync_filled(rec)
+            rec.updated_ts = time.time()
+            self._notify_order(rec)
+
+        # Fill уже учтен в более свежем position push -> не считаем дважды
+        if ev.timestamp and ev.timestamp <= self._position_exch_ts.get(ev.symbol, 0):
+            return
+
+        signed_qty = ev.exec_qty if ev.side == "Buy" else -ev.exec_qty
+        self._apply_fill(ev.symbol, signed_qty, ev.exec_price)
+        self._last_exec_ts[ev.symbol] = max(ev.timestamp, self._last_exec_ts.get(ev.symbol, 0))
+
+    def on_position(self, pos):
+        # Push старше уже примененного fill'а: следующий push (он придет после fill'а) будет точнее
+        if pos.timestamp and pos.timestamp < self._last_exec_ts.get(pos.symbol, 0):
+            return
+
+        size = pos.size if pos.side == "Buy" else -pos.size
+        self._positions[pos.symbol] = PositionRecord(
+            symbol=pos.symbol,
+            size=size,
+            avg_entry_price=pos.entry_price if abs(size) > 1e-9 else 0.0,
+            updated_ts=time.time()
+        )
+        self._position_exch_ts[pos.symbol] = max(pos.timestamp, self._position_exch_ts.get(pos.symbol, 0))
+        self._notify_position(self._positions[pos.symbol])
+
+    @staticmethod
+    def _sync_filled(rec: OrderRecord):
+        """
+        Fill ордера из двух источников без двойного счета: push уже включает fill'ы, которые
+        пришли execution'ами раньше него, поэтому берем максимум, а не сумму.
+        Финальный push — окончательный ответ биржи.
+        """
+        if rec.is_final and rec.status != "Gone":
+            cum = rec.pushed_cum_qty
+        else:
+            cum = max(rec.pushed_cum_qty, rec.exec_sum_qty)
+        rec.cum_exec_qty = min(cum, rec.qty) if rec.qty > 0 else cum
+
+    def _rekey(self, rec: OrderRecord, order_id: str, order_link_id: str):
+        """Перекладываем запись под orderId, как только он стал известен."""
+        old_key = rec.order_id or rec.order_link_id
+        rec.order_id = order_id or rec.order_id
+        rec.order_link_id = order_link_id or rec.order_link_id
+        new_key = rec.order_id or rec.order_link_id
+        if old_key and old_key != new_key:
+            self._orders.pop(old_key, None)
+        self._orders[new_key] = rec
+        if rec.order_link_id:
+            self._link_index[rec.order_link_id] = new_key
+
+    def _apply_fill(self, symbol: str, signed_qty: float, price: float):
+        pos = self._positions.get(symbol)
+        if pos is None:
+            pos = self._positions[symbol] = PositionRecord(symbol)
+
+        if pos.is_flat or (pos.size > 0) == (signed_qty > 0):
+            # Открытие / добавление: средневзвешенная цена входа
+            total = abs(pos.size) + abs(signed_qty)
+            pos.avg_entry_price = (abs(pos.size) * pos.avg_entry_price + abs(signed_qty) * price) / total
+        elif abs(signed_qty) > abs(pos.size):
+            # Переворот: остаток открыт по цене этого fill'а
+            pos.avg_entry_price = price
+        # Частичное закрытие: средняя цена входа не меняется
+
+        pos.size += signed_qty
+        if pos.is_flat:
+            pos.size = 0.0
+            pos.avg_entry_price = 0.0
+        pos.updated_ts = time.time()
+        self._notify_position(pos)
+
+    def _notify_order(self, rec: OrderRecord):
+        if not self.order_listener or not rec.order_link_id: return
+        try:
+            self.order_listener(rec.order_link_id, rec.leaves_qty)
+        except Exception as e:
+            logger.error(f"Order listener error: {e}")
+
+    def _notify_position(self, pos: PositionRecord):
+        if not self.position_listener: return
+        try:
+            self.position_listener(pos.symbol, pos.size, pos.avg_entry_price)
+        except Exception as e:
+            logger.error(f"Position listener error: {e}")
+
+    async def realized_pnl_today(self) -> Optional[float]:
+        """Реализованный PnL с 00:00 UTC по REST: сид дневного лимита убытка после рестарта (None -> не удалось)."""
+        now_ms = int(time.time() * 1000)
+        try:
+            pnl = await self.exec.fetch_closed_pnl(now_ms - now_ms % 86_400_000)
+        except Exception as e:
+            logger.error(f"❌ Daily PnL fetch failed: {e}")
+            return None
+        return sum(pnl.values())
+
+    # --- RECONCILIATION (REST, редко) ---
+    async def reconcile(self, reason: str = "periodic") -> bool:
+        started_ts = time.time()
+        try:
+            rest_positions = await self.exec.fetch_positions()
+            rest_orders = await self.exec.fetch_open_orders()
+        except Exception as e:
+            logger.error(f"❌ Ledger reconcile failed ({reason}): {e}")
+            return False
+
+        # 1. Позиции. Символы, обновленные push'ем во время запроса, не трогаем (REST старее)
+        for sym in set(self._positions) | set(rest_positions):
+            cur = self._positions.get(sym)
+            if cur and cur.updated_ts > started_ts:
+                continue
+            rest = rest_positions.get(sym)
+            size = rest["size"] if rest else 0.0
+            if cur and abs(cur.size - size) > 1e-9:
+                self.drift_count += 1
+                logger.warning(f"⚖️ Reconcile fixed {sym}: ledger={cur.size} exchange={size}")
+            self._positions[sym] = PositionRecord(
+                symbol=sym, size=size,
+                avg_entry_price=rest["entry_price"] if rest else 0.0,
+                updated_ts=started_ts
+            )
+            self._position_exch_ts[sym] = int(started_ts * 1000)
+            self._notify_position(self._positions[sym])
+
+        # 2. Открытые ордера
+        open_keys = set()
+        for o in rest_orders:
+            rec = self.get_order(o.get("orderId", "")) or self.get_order(o.get("orderLinkId", ""))
+            if rec is not None and rec.updated_ts > started_ts:
+                open_keys.add(rec.order_id or rec.order_link_id)
+                continue
+            upd = _RestOrder(o)
+            self.on_order(upd)
+            open_keys.add(upd.order_id or upd.order_link_id)
+
+        # 3. Ордера, которых биржа больше не считает открытыми
+        for key, rec in self._orders.items():
+            if not rec.is_final and key not in open_keys and rec.updated_ts < started_ts:
+                rec.status = "Gone"
+                rec.updated_ts = started_ts
+                self._notify_order(rec)
+
+        self._prune(started_ts)
+        self.last_reconcile_ts = time.time()
+        logger.debug(f"📒 Reconciled ({reason}): {len(rest_positions)} positions, {len(rest_orders)} open orders")
+        return True
+
+    def _prune(self, now: float):
+        """Финальные ордера храним ограниченное время, чтобы память не росла."""
+        stale = [k for k, r in self._orders.items()
+                 if r.is_final and now - r.updated_ts > self.order_retention_sec]
+        for k in stale:
+            rec = self._orders.pop(k)
+            if rec.order_link_id and self._link_index.get(rec.order_link_id) == k:
+                del self._link_index[rec.order_link_id]
+        # Повторная доставка бывает в пределах секунд (реконнект), не часов
+        self._seen_execs = {e: ts for e, ts in self._seen_execs.items() if now - ts <= self.order_retention_sec}
+
+    async def _reconcile_loop(self):
+        while self._running:
+            try:
+                try:
+                    await asyncio.wait_for(self._drift_event.wait(), timeout=self.reconcile_interval_sec)
+                    reason = "drift"
+                except asyncio.TimeoutError:
+                    reason = "periodic"
+                self._drift_event.clear()
+
+                gap = time.time() - self.last_reconcile_ts
+                if gap < self.min_reconcile_gap_sec:
+                    await asyncio.sleep(self.min_reconcile_gap_sec - gap)
+
+                await self.reconcile(reason=reason)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Ledger loop error: {e}")
+                await asyncio.sleep(5)
+
+class _RestOrder:
+    """Адаптер REST-ордера к интерфейсу OrderUpdateData (чтобы переиспользовать on_order)."""
+    __slots__ = ("symbol", "order_id", "order_link_id", "side", "order_status",
+                 "price", "qty", "cum_exec_qty", "avg_price", "reduce_only")
+
+    def __init__(self, o: dict):
+        self.symbol = o.get("symbol", "")
+        self.order_id = o.get("orderId", "")
+        self.order_link_id = o.get("orderLinkId", "")
+        self.side = o.get("side", "")
+        self.order_status = o.get("orderStatus", "New")
+        self.price = float(o.get("price") or 0)
+        self.qty = float(o.get("qty") or 0)
+        self.cum_exec_qty = float(o.get("cumExecQty") or 0)
+        self.avg_price = float(o.get("avgPrice") or 0)
+        self.reduce_only = bool(o.get("reduceOnly", False))
@@ -4,40 +4,36 @@ import logging
 from typing import Optional, List, Dict
 from hft_strategy.domain.strategy_config import StrategyParameters
 from hft_strategy.domain.interfaces import IExecutionHandler
+from hft_strategy.infrastructure.bar_builder import BarBuilder
 
 logger = logging.getLogger("ANALYTICS")
 
+BARS_REFRESH_SEC = 10.0
+
 class MarketAnalytics:
     """
-    Сервис мониторинга волатильности и фоновых объемов.
+    Сервис мониторинга волатильности (NATR -> динамический TP).
+    EMA фонового объема считает общее ядро стен (wall_kernel) в WallDetector.
     """
-    def __init__(self, executor: IExecutionHandler, cfg: StrategyParameters):
+    def __init__(self, executor: IExecutionHandler, cfg: StrategyParameters, bars: Optional[BarBuilder] = None):
         self.exec = executor
         self.cfg = cfg
+        # Потоковые бары: REST только для догрузки истории на старте
+        self.bars = bars
         
         self.current_tp_pct = cfg.min_tp_percent
-        self.avg_background_vol = 0.0
-        self.is_initialized = False
         
         self._running = False
 
     async def start(self):
+        """Долгоживущая корутина: запускать как задачу владельца (TaskSupervisor.spawn)."""
         self._running = True
-        asyncio.create_task(self._volatility_loop())
         logger.info(f"🌊 MarketAnalytics started for {self.cfg.symbol}")
+        await self._volatility_loop()
 
     def stop(self):
         self._running = False
-
-    def update_background_volume(self, current_bg_vol: float):
-        if current_bg_vol <= 0: return
-        
-        if not self.is_initialized:
-            self.avg_background_vol = current_bg_vol
-            self.is_initialized = True
-        else:
-            alpha = self.cfg.vol_ema_alpha
-            self.avg_background_vol = alpha * current_bg_vol + (1 - alpha) * self.avg_background_vol
+        logger.info(f"🌙 MarketAnalytics stopped for {self.cfg.symbol}")
 
     def calculate_exits(self, side: str, entry_price: float, wall_price: float) -> tuple[float, float]:
         """
@@ -82,40 +78,49 @@ class MarketAnalytics:
         return tp_price, sl_price
 
     async def _volatility_loop(self):
-        """Фоновый цикл расчета ATR"""
+        """Фоновый цикл NATR -> TP: из потоковых баров (BarBuilder), без него — REST-свечи."""
+        if self.bars is not None:
+            try:
+                await self.bars.backfill(self.exec, self.cfg.symbol)
+            except Exception as e:
+                logger.error(f"❌ Bars backfill failed for {self.cfg.symbol}: {e}")
+
         while self._running:
             try:
-                klines = await self.exec.fetch_ohlc(
-                    self.cfg.symbol, 
-                    interval="5", 
-                    limit=self.cfg.natr_period + 1
-                )
-                
-                if len(klines) < 2:
-                    await asyncio.sleep(60)
-                    continue
-                
-                trs = []
-                for i in range(len(klines) - 1):
-                    curr, prev = klines[i], klines[i+1]
-                    tr = max(
-                        curr['h'] - curr['l'], 
-                        abs(curr['h'] - prev['c']), 
-                        abs(curr['l'] - prev['c'])
+                natr = self.bars.natr(self.cfg.symbol) if self.bars is not None else await self._rest_natr()
+                if natr is not None:
+                    self.current_tp_pct = max(
+                        natr * self.cfg.tp_natr_multiplier, 
+                        self.cfg.min_tp_percent
                     )
-                    trs.append(tr)
-                
-                atr = sum(trs) / len(trs)
-                current_close = klines[0]['c']
-                
-                natr = (atr / current_close) * 100 if current_close > 0 else 0
-                
-                self.current_tp_pct = max(
-                    natr * self.cfg.tp_natr_multiplier, 
-                    self.cfg.min_tp_percent
-                )
-                
             except Exception as e:
                 logger.error(f"❌ Volatility calculation error: {e}")
             
-            await asyncio.sleep(60)
\ No newline at end of file
+            # Бары в памяти: перечитать дешево, NATR меняется на закрытии бара
+            await asyncio.sleep(BARS_REFRESH_SEC if self.bars is not None else 60)
+
+    async def _rest_natr(self) -> Optional[float]:
+        """NATR по REST-свечам (бэктест-скрипты и запуск без потока сделок)."""
+        klines = await self.exec.fetch_ohlc(
+            self.cfg.symbol, 
+            interval="5", 
+            limit=self.cfg.natr_period + 1
+        )
+        
+        if len(klines) < 2:
+            return None
+        
+        trs = []
+        for i in range(len(klines) - 1):
+            curr, prev = klines[i], klines[i+1]
+            tr = max(
+                curr['h'] - curr['l'], 
+                abs(curr['h'] - prev['c']), 
+                abs(curr['l'] - prev['c'])
+            )
+            trs.append(tr)
+        
+        atr = sum(trs) / len(trs)
+        current_close = klines[0]['c']
+        
+        return (atr / current_close) * 100 if current_close > 0 else 0
@@ -0,0 +1,191 @@
+# hft_strategy/services/batch_evaluator.py
+import asyncio
+import logging
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from hft_strategy.infrastructure.array_order_book import ArrayOrderBook, DEFAULT_CAPACITY
+from hft_strategy.services.wall_detector import StepInput
+from hft_strategy.strategies import wall_kernel as wk
+
+logger = logging.getLogger("BATCH")
+
+INITIAL_ROWS = 64
+_EMPTY = np.empty(0)
+BATCH_ENV_VAR = "HFT_BATCH_EVAL"  # 1: шаг ядра стен одним вызовом на пачку символов
+
+def batch_enabled() -> bool:
+    return os.getenv(BATCH_ENV_VAR, "0").lower() in ("1", "true", "yes")
+
+class BatchWallEvaluator:
+    """
+    Пакетный режим детектора стен: один njit-вызов по всем символам, чей стакан
+    обновился за проход event loop, вместо шага ядра в корутине каждого символа.
+
+    Все данные, по которым считает ядро, живут строками общих матриц: состояния и параметры
+    WallDetector (detector.bind) и массивы тиков ArrayOrderBook (lob.bind), символы x уровни.
+    Стратегия в on_depth только применяет дельту и отмечает себя (mark); задача вычислителя
+    просыпается в следующей итерации цикла, когда почтовые ящики уже разобрали свою пачку,
+    и вызывает wall_step_batch: уровни, фон, зона стены и шаг FSM считаются прямо по строкам.
+    Python на символ — только несколько скаляров контекста сделки; разбор результата
+    (фильтры спуфа / потока, сигнал) — только у символов, которым есть что делать.
+    """
+    def __init__(self, rows: int = INITIAL_ROWS, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.states = np.zeros((rows, wk.STATE_SIZE))
+        self.params = np.zeros((rows, wk.PARAMS_SIZE))
+        self.bid_books = np.zeros((rows, capacity))
+        self.ask_books = np.zeros((rows, capacity))
+        self._rows: Dict[str, int] = {}
+        self._strategies: Dict[str, object] = {}
+        self._free: List[int] = list(range(rows - 1, -1, -1))
+        self._pending: Dict[str, object] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Метрики
+        self.batches = 0
+        self.evaluated = 0
+        self.max_batch = 0
+
+    # --- РЕГИСТРАЦИЯ ---
+    def attach(self, strategy) -> bool:
+        """False — стакан не на массиве тиков нужной ширины, стратегия считает сама."""
+        lob = strategy.lob
+        if not isinstance(lob, ArrayOrderBook) or lob.capacity != self.capacity:
+            return False
+        symbol = strategy.cfg.symbol
+        if symbol in self._rows: return True
+        if not self._free:
+            self._grow()
+        row = self._free.pop()
+        self._rows[symbol] = row
+        self._strategies[symbol] = strategy
+        self._bind(strategy, row)
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name="batch-evaluator")
+        return True
+
+    def detach(self, symbol: str):
+        row = self._rows.pop(symbol, None)
+        strategy = self._strategies.pop(symbol, None)
+        self._pending.pop(symbol, None)
+        if row is None: return
+        # Стратегия уходит со своими копиями: строка будет переиспользована
+        strategy.detector.bind(self.states[row].copy(), self.params[row].copy())
+        strategy.lob.bind(self.bid_books[row].copy(), self.ask_books[row].copy())
+        self._free.append(row)
+
+    def _bind(self, strategy, row: int):
+        strategy.detector.bind(self.states[row], self.params[row])
+        strategy.lob.bind(self.bid_books[row], self.ask_books[row])
+
+    def _grow(self):
+        old = len(self.states)
+        for name in ("states", "params", "bid_books", "ask_books"):
+            matrix = getattr(self, name)
+            grown = np.zeros((old * 2, matrix.shape[1]))
+            grown[:old] = matrix
+            setattr(self, name, grown)
+        for symbol, row in self._rows.items():
+            self._bind(self._strategies[symbol], row)
+        self._free.extend(range(old * 2 - 1, old - 1, -1))
+
+    # --- ПАЧКА ---
+    def mark(self, strategy):
+        """Стакан символа обновлен (вызывается из event loop)."""
+        self._pending[strategy.cfg.symbol] = strategy
+        self._wakeup.set()
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            batch, self._pending = self._pending, {}
+            try:
+                signals = self.evaluate(list(batch.values()))
+            except Exception as e:
+                logger.exception(f"❌ Batch evaluation failed: {e}")
+                continue
+            for strategy, state, action, payload in signals:
+                try:
+                    await strategy.on_signal(state, action, payload)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.exception(f"❌ {strategy.cfg.symbol} signal handling failed: {e}")
+
+    def evaluate(self, strategies: List) -> List[tuple]:
+        """
+        Один вызов ядра на пачку. Синхронно: между сбором контекста и разбором
+        результата стаканы не меняются. Возвращает [(strategy, state, action, payload)]
+        только для символов, которым есть что делать.
+        """
+        n = len(strategies)
+        if n == 0:
+            return []
+
+        ints = np.empty((7, n), dtype=np.int64)   # rows, best_bid_i, best_ask_i, anchor, fsm, side, staged
+        floats = np.empty((3, n))                 # wall_price, entry_price, elapsed
+        states = []
+        for i, strategy in enumerate(strategies):
+            state = strategy.decision_state
+            fsm, side, wall_price, entry_price, elapsed = strategy.detector.context(state, strategy.trade_manager.ctx)
+            lob = strategy.lob
+            ints[:, i] = (self._rows[strategy.cfg.symbol], lob.bids.best, lob.asks.best, lob.anchor, fsm, side,
+                          strategy.trade_manager.has_staged)
+            floats[:, i] = (wall_price, entry_price, elapsed)
+            states.append(state)
+
+        out = np.zeros((n, 3), dtype=np.int64)
+        out_f = np.zeros((n, 3))
+        wk.wall_step_batch(
+            self.states, self.params, ints[0], self.bid_books, self.ask_books,
+            ints[1], ints[2], ints[3], ints[4], ints[5],
+            floats[0], floats[1], floats[2], out, out_f
+        )
+
+        self.batches += 1
+        self.evaluated += n
+        self.max_batch = max(self.max_batch, n)
+
+        # Разбор только там, где есть действие, стоит ордер (фильтр потока) или надо сбросить заготовку;
+        # shadow (FSM_SHADOW) не торгует
+        fsm_codes = ints[4]
+        todo = (fsm_codes != wk.FSM_SHADOW) & (
+            (out[:, 0] != wk.ACT_NONE) | (fsm_codes == wk.FSM_ORDER_PLACED) |
+            ((fsm_codes == wk.FSM_IDLE) & (ints[6] != 0))
+        )
+        signals = []
+        for i in np.flatnonzero(todo):
+            state, strategy = states[i], strategies[i]
+            action, sig_side, reason = (int(v) for v in out[i])
+            fsm = int(fsm_codes[i])
+            ctx = strategy.trade_manager.ctx
+            inp = StepInput(fsm, round(out_f[i, 0], 8), round(out_f[i, 1], 8), _EMPTY, _EMPTY, _EMPTY, _EMPTY,
+                            0.0, int(ints[5, i]), floats[0, i], floats[1, i], out_f[i, 2], floats[2, i],
+                            ctx.side if ctx is not None else "")
+            action, payload = strategy.detector.finish(inp, action, sig_side, reason, strategy.last_depth_ms)
+            if action != wk.ACT_NONE or fsm == wk.FSM_IDLE:
+                signals.append((strategy, state, action, payload))
+        return signals
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "symbols": len(self._rows),
+            "batches": self.batches,
+            "avg_batch": self.evaluated / self.batches if self.batches else 0.0,
+            "max_batch": self.max_batch,
+        }
@@ -0,0 +1,179 @@
+# hft_strategy/services/instrument_catalog.py
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+import aiohttp
+
+from hft_strategy.domain.instrument_spec import InstrumentSpec
+
+logger = logging.getLogger("CATALOG")
+
+class InstrumentCatalog:
+    """
+    Кэш спецификаций (tick / lot / min_qty) всех linear-инструментов.
+    Один пагинированный запрос на старте -> память + файл на диске.
+    Поиск синхронный (O(1) по словарю), REST на горячем пути не нужен.
+    """
+    BASE_URL = "https://api.bybit.com/v5/market/instruments-info"
+    TESTNET_URL = "https://api-testnet.bybit.com/v5/market/instruments-info"
+    PAGE_LIMIT = 1000
+
+    def __init__(self, cache_file: str, ttl_sec: float = 6 * 3600, testnet: bool = False):
+        self.cache_file = cache_file
+        self.ttl_sec = ttl_sec
+        self.url = self.TESTNET_URL if testnet else self.BASE_URL
+
+        self._specs: Dict[str, InstrumentSpec] = {}
+        self._updated_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    # --- LOOKUPS (синхронные) ---
+    def get(self, symbol: str) -> Optional[InstrumentSpec]:
+        return self._specs.get(symbol)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._specs
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    @property
+    def is_stale(self) -> bool:
+        return (time.time() - self._updated_at) > self.ttl_sec
+
+    # --- LIFECYCLE ---
+    async def start(self):
+        """
+        1. Поднимаем кэш с диска (холодный старт без REST).
+        2. Если кэша нет — ждем первую загрузку. Если он просто старый — обновим в фоне.
+        """
+        await asyncio.to_thread(self._load_from_disk)
+
+        if not self._specs:
+            await self.refresh()
+
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    async def refresh(self) -> bool:
+        """Полная перезагрузка каталога. Словарь подменяется целиком (атомарно для читателей)."""
+        try:
+            specs = await self._fetch_all()
+        except Exception as e:
+            logger.error(f"❌ Instrument catalog refresh failed: {e}")
+            return False
+
+        if not specs:
+            logger.warning("⚠️ Instrument catalog refresh returned nothing. Keeping old data.")
+            return False
+
+        self._specs = specs
+        self._updated_at = time.time()
+        logger.info(f"📚 Instrument catalog refreshed: {len(specs)} instruments")
+
+        await asyncio.to_thread(self._save_to_disk, specs, self._updated_at)
+        return True
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                delay = max(self.ttl_sec - (time.time() - self._updated_at), 0.0)
+                await asyncio.sleep(delay)
+                if not await self.refresh():
+                    await asyncio.sleep(60)  # Ретрай через минуту, старые данные остаются
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Catalog refresh loop error: {e}")
+                await asyncio.sleep(60)
+
+    # --- REST (пагинация по cursor) ---
+    async def _fetch_all(self) -> Dict[str, InstrumentSpec]:
+        specs: Dict[str, InstrumentSpec] = {}
+        cursor = ""
+        timeout = aiohttp.ClientTimeout(total=10)
+
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            while True:
+                params = {"category": "linear", "limit": self.PAGE_LIMIT}
+                if cursor:
+                    params["cursor"] = cursor
+
+                async with session.get(self.url, params=params) as resp:
+                    if resp.status != 200:
+                        raise RuntimeError(f"HTTP {resp.status}")
+                    data = await resp.json()
+
+                if data.get("retCode") != 0:
+                    raise RuntimeError(f"Bybit Logic Error: {data.get('retMsg')}")
+
+                result = data["result"]
+                for item in result["list"]:
+                    spec = self._parse_item(item)
+                    if spec:
+                        specs[spec.symbol] = spec
+
+                cursor = result.get("nextPageCursor") or ""
+                if not cursor:
+                    break
+
+        return specs
+
+    @staticmethod
+    def _parse_item(item: dict) -> Optional[InstrumentSpec]:
+        try:
+            return InstrumentSpec(
+                symbol=item["symbol"],
+                tick_size=float(item["priceFilter"]["tickSize"]),
+                lot_size=float(item["lotSizeFilter"]["qtyStep"]),
+                min_qty=float(item["lotSizeFilter"]["minOrderQty"]),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    # --- DISK PERSISTENCE ---
+    def _load_from_disk(self):
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r') as f:
+                data = json.load(f)
+            self._specs = {
+                sym: InstrumentSpec(sym, *vals) for sym, vals in data["instruments"].items()
+            }
+            self._updated_at = float(data.get("updated_at", 0.0))
+            age_min = (time.time() - self._updated_at) / 60
+            logger.info(f"📂 Instrument catalog loaded from disk: {len(self._specs)} items (age {age_min:.0f} min)")
+        except Exception as e:
+            logger.error(f"❌ Error reading {self.cache_file}: {e}. Will fetch from API.")
+            self._specs = {}
+            self._updated_at = 0.0
+
+    def _save_to_disk(self, specs: Dict[str, InstrumentSpec], updated_at: float):
+        """Атомарная запись: tmp-файл + os.replace, чтобы не оставить битый кэш при падении."""
+        try:
+            os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+            payload = {
+                "updated_at": updated_at,
+                "instruments": {
+                    s.symbol: [s.tick_size, s.lot_size, s.min_qty] for s in specs.values()
+                }
+            }
+            tmp_path = self.cache_file + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, self.cache_file)
+        except Exception as e:
+            logger.error(f"❌ Failed to persist instrument catalog: {e}")
@@ -0,0 +1,76 @@
+# hft_strategy/services/param_store.py
+import dataclasses
+import json
+import logging
+import os
+from typing import Any, Dict, NamedTuple, Optional
+
+from hft_strategy.config import HOT_RELOAD_PARAMS, coerce_setting, validate_strategy_params
+from hft_strategy.domain.strategy_config import StrategyParameters
+
+logger = logging.getLogger("PARAM_STORE")
+
+class OptimizedParams(NamedTuple):
+    """Лучшие параметры монеты из batch_optimizer."""
+    params: Dict[str, Any]
+    updated_at: str
+    score: float
+
+class OptimizedParamsStore:
+    """
+    Параметры, подобранные batch_optimizer для каждой монеты (optimized_params.json).
+    Файл читается один раз (и при hot-reload), дальше поиск — словарь в памяти.
+    Применяются только горячие поля (HOT_RELOAD_PARAMS) поверх общих настроек;
+    монеты без записи торгуются на общих. Невалидная запись пропускается целиком.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: Dict[str, OptimizedParams] = {}
+
+    def load(self) -> int:
+        """Перечитывает файл. Битый файл не затирает уже загруженные значения. Возвращает число монет."""
+        if not os.path.exists(self.path):
+            self._entries = {}
+            return 0
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"❌ Error reading {self.path}: {e}. Keeping {len(self._entries)} loaded entries.")
+            return len(self._entries)
+
+        entries: Dict[str, OptimizedParams] = {}
+        for symbol, entry in data.items():
+            try:
+                defaults = StrategyParameters(symbol)
+                params = {
+                    name: coerce_setting(getattr(defaults, name), value)
+                    for name, value in entry.get("params", {}).items() if name in HOT_RELOAD_PARAMS
+                }
+                errors = validate_strategy_params(dataclasses.replace(defaults, **params))
+                if errors:
+                    raise ValueError("; ".join(errors))
+                entries[symbol.upper()] = OptimizedParams(
+                    params=params,
+                    updated_at=entry.get("updated_at", ""),
+                    score=float(entry.get("score", 0.0)),
+                )
+            except (AttributeError, TypeError, ValueError) as e:
+                logger.warning(f"⚠️ {symbol}: optimized params skipped ({e})")
+
+        self._entries = entries
+        logger.info(f"🧬 Optimized params loaded for {len(entries)} symbols from {self.path}")
+        return len(entries)
+
+    def get(self, symbol: str) -> Optional[OptimizedParams]:
+        return self._entries.get(symbol)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._entries
+
+    def apply(self, cfg: StrategyParameters) -> StrategyParameters:
+        """cfg с подставленными параметрами монеты (новый объект) или cfg как есть."""
+        entry = self._entries.get(cfg.symbol)
+        if entry is None:
+            return cfg
+        return dataclasses.replace(cfg, **entry.params)
@@ -0,0 +1,89 @@
+# hft_strategy/services/rotation_policy.py
+import logging
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from hft_strategy.config import RotationConfig
+
+logger = logging.getLogger("ROTATION")
+
+class RotationPolicy:
+    """
+    Решает, какие монеты торговать, по сглаженным оценкам сканера (NATR).
+    - Оценки сглаживаются EMA между сканами: разовый всплеск не вызывает ротацию.
+    - Гистерезис: действующая монета получает бонус hysteresis_pct к своей оценке.
+    - Смена стоит switch_penalty (в единицах оценки): претендент должен перекрыть ее.
+    - Монета младше min_tenure_sec не снимается (кроме выпавших из скана совсем).
+    """
+    def __init__(self, slots: int, cfg: RotationConfig):
+        self.slots = slots
+        self.cfg = cfg
+        self.scores: Dict[str, float] = {}
+        self._since: Dict[str, float] = {}  # symbol -> время активации
+
+    # --- СОСТОЯНИЕ ---
+    def on_activated(self, symbol: str, now: Optional[float] = None):
+        self._since.setdefault(symbol, now if now is not None else time.time())
+
+    def on_removed(self, symbol: str):
+        self._since.pop(symbol, None)
+
+    def tenure(self, symbol: str, now: Optional[float] = None) -> float:
+        since = self._since.get(symbol)
+        if since is None: return 0.0
+        return (now if now is not None else time.time()) - since
+
+    def update_scores(self, raw: Dict[str, float]):
+        """Инкрементально: новые монеты входят с сырой оценкой, пропавшие из скана затухают к нулю."""
+        alpha = self.cfg.score_ema_alpha
+        for sym in set(self.scores) | set(raw):
+            value = raw.get(sym, 0.0)
+            prev = self.scores.get(sym)
+            self.scores[sym] = value if prev is None else alpha * value + (1 - alpha) * prev
+        # Мусор: давно выпавшие и не торгуемые
+        for sym in [s for s, v in self.scores.items() if v < 1e-6 and s not in self._since]:
+            del self.scores[sym]
+
+    # --- РЕШЕНИЕ ---
+    def _held_score(self, symbol: str) -> float:
+        return self.scores.get(symbol, 0.0) * (1 + self.cfg.hysteresis_pct / 100)
+
+    def _challenger_score(self, symbol: str) -> float:
+        return self.scores.get(symbol, 0.0) - self.cfg.switch_penalty
+
+    def select(self, current: Set[str], available: Set[str], now: Optional[float] = None) -> Set[str]:
+        """
+        current — торгуемые сейчас монеты, available — прошедшие фильтры последнего скана.
+        Возвращает целевой набор; разница с current — это и есть ротация.
+        """
+        now = now if now is not None else time.time()
+        target = set(current)
+
+        # Выпавшие из скана (неликвид / не copy-trading) снимаются без учета стажа
+        target -= {s for s in target if s not in available}
+
+        challengers = sorted((s for s in available if s not in target),
+                             key=lambda s: self.scores.get(s, 0.0), reverse=True)
+
+        # Свободные слоты: без штрафа, смены нет
+        while len(target) < self.slots and challengers:
+            target.add(challengers.pop(0))
+
+        # Замены: лучший претендент против слабейшего снимаемого держателя
+        while challengers:
+            removable = [s for s in target if self.tenure(s, now) >= self.cfg.min_tenure_sec]
+            if not removable: break
+            weakest = min(removable, key=self._held_score)
+            best = challengers[0]
+            if self._challenger_score(best) <= self._held_score(weakest):
+                break
+            logger.info(f"🔁 {best} ({self.scores.get(best, 0):.2f}) replaces {weakest} "
+                        f"({self.scores.get(weakest, 0):.2f}, held {self.tenure(weakest, now) / 60:.0f} min)")
+            target.discard(weakest)
+            target.add(challengers.pop(0))
+        return target
+
+    def ranking(self, exclude: Set[str] = frozenset()) -> List[Tuple[str, float]]:
+        """Монеты вне exclude по сглаженной оценке (кандидаты для shadow mode)."""
+        return sorted(((s, v) for s, v in self.scores.items() if s not in exclude),
+                      key=lambda x: x[1], reverse=True)
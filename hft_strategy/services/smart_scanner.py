@@ -1,16 +1,20 @@
 # hft_strategy/services/smart_scanner.py
 import asyncio
 import logging
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
 from hft_strategy.services.instrument_provider import BybitInstrumentProvider
 from hft_strategy.infrastructure.execution import BybitExecutionHandler
 
 logger = logging.getLogger("SMART_SCANNER")
 
 class SmartMarketSelector:
-    def __init__(self, executor: BybitExecutionHandler):
+    def __init__(self, executor: BybitExecutionHandler, natr_source: Optional[Callable[[str], Optional[float]]] = None):
         self.provider = BybitInstrumentProvider()
         self.executor = executor
+        # NATR из потоковых баров (монеты, на которые уже подписан стрим); None -> REST-свечи
+        self.natr_source = natr_source
+        self.rest_analyses = 0
+        self.streamed_analyses = 0
 
     async def _fetch_tickers_snapshot(self) -> List[Dict]:
         """
@@ -33,6 +37,24 @@ class SmartMarketSelector:
         Основной метод воронки (Funnel):
         Все монеты -> Фильтр CopyTrading -> Топ по обороту -> Топ по NATR
         """
+        scored_candidates = await self._scan_candidates()
+        final_list = [x['symbol'] for x in scored_candidates[:top_n]]
+        
+        logger.info(f"🏆 Selected Top {top_n} Targets:")
+        for i, item in enumerate(scored_candidates[:top_n], 1):
+            logger.info(f"   {i}. {item['symbol']} | NATR: {item['natr']:.2f}% | Vol: ${item['turnover']/1e6:.1f}M")
+            
+        return final_list
+
+    async def scan_scores(self) -> Dict[str, float]:
+        """
+        Та же воронка, но отдает NATR всех прошедших монет (по убыванию):
+        RotationPolicy сглаживает их и решает сама, кого менять.
+        """
+        scored_candidates = await self._scan_candidates()
+        return {x['symbol']: x['natr'] for x in scored_candidates}
+
+    async def _scan_candidates(self) -> List[Dict]:
         logger.info("🔍 Starting Smart Scan Cycle...")
         
         # 1. Получаем список пар, разрешенных для CopyTrading (без BTC/ETH)
@@ -85,21 +107,21 @@ class SmartMarketSelector:
 
         # 5. Финальный отбор: сортируем по NATR (волатильности)
         scored_candidates.sort(key=lambda x: x['natr'], reverse=True)
-        
-        final_list = [x['symbol'] for x in scored_candidates[:top_n]]
-        
-        logger.info(f"🏆 Selected Top {top_n} Targets:")
-        for i, item in enumerate(scored_candidates[:top_n], 1):
-            logger.info(f"   {i}. {item['symbol']} | NATR: {item['natr']:.2f}% | Vol: ${item['turnover']/1e6:.1f}M")
-            
-        return final_list
+        return scored_candidates
 
     async def _analyze_volatility(self, candidate: Dict) -> Optional[Dict]:
         """
         Запрашивает свечи и считает NATR (Normalized ATR).
         NATR показывает волатильность в процентах, что позволяет сравнивать разные монеты.
         """
+        natr = self.natr_source(candidate['symbol']) if self.natr_source else None
+        if natr is not None:
+            self.streamed_analyses += 1
+            candidate['natr'] = natr
+            return candidate
+
         try:
+            self.rest_analyses += 1
             # Запрашиваем 20 свечей таймфрейма 5 минут
             # fetch_ohlc возвращает [ {h, l, c}, ... ] (от новых к старым, или наоборот - зависит от реализации,
             # но для ATR нам важна разница, порядок не так критичен, главное консистентность)
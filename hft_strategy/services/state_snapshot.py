@@ -0,0 +1,134 @@
+# hft_strategy/services/state_snapshot.py
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger("SNAPSHOT")
+
+class StateSnapshotStore:
+    """
+    Снапшоты состояния стратегий для теплого рестарта: EMA фона и дебаунс детектора,
+    TP по NATR, контекст открытой сделки (id ордеров). Файл на символ — так процессы-воркеры
+    пишут свои монеты без координации, а после рестарта монета может попасть в любой воркер.
+
+    Снятие — синхронно в event loop (несколько чисел на символ), запись — в потоке
+    (tmp + os.replace) и только для символов, чье состояние изменилось.
+    Восстановление — при активации стратегии; сделку стратегия сверяет с ledger,
+    который к этому моменту уже синхронизирован с биржей через REST.
+    """
+    def __init__(self, directory: str, interval_sec: float = 5.0, max_age_sec: float = 900.0):
+        self.directory = directory
+        self.interval_sec = interval_sec
+        self.max_age_sec = max_age_sec
+        self._written: Dict[str, Dict[str, Any]] = {}  # symbol -> последний записанный снапшот
+        self._task: Optional[asyncio.Task] = None
+
+        # Метрики
+        self.writes = 0
+        self.restored = 0
+
+    # --- ЧТЕНИЕ ---
+    def _path(self, symbol: str) -> str:
+        return os.path.join(self.directory, f"{symbol}.json")
+
+    def load(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Снапшот символа или None (нет, битый, старше max_age_sec). В data["age_sec"] — возраст."""
+        try:
+            with open(self._path(symbol), 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"⚠️ {symbol}: unreadable snapshot ignored ({e})")
+            return None
+        age = time.time() - float(data.get("ts", 0.0))
+        if age > self.max_age_sec:
+            return None
+        data["age_sec"] = age
+        return data
+
+    def restore(self, strategy) -> bool:
+        symbol = strategy.cfg.symbol
+        data = self.load(symbol)
+        if data is None:
+            return False
+        try:
+            strategy.restore(data["state"], data["age_sec"])
+        except Exception as e:
+            logger.exception(f"❌ {symbol}: snapshot restore failed, starting cold: {e}")
+            return False
+        self._written[symbol] = data["state"]
+        self.restored += 1
+        logger.info(f"♨️ {symbol} warm-restored from snapshot ({data['age_sec']:.0f}s old)")
+        return True
+
+    def open_trade_symbols(self) -> List[str]:
+        """Символы, у которых в свежем снапшоте открыта сделка (их надо поднять даже вне ротации)."""
+        if not os.path.isdir(self.directory):
+            return []
+        symbols = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"): continue
+            data = self.load(name[:-len(".json")])
+            if data and data["state"].get("trade"):
+                symbols.append(name[:-len(".json")])
+        return symbols
+
+    # --- ЗАПИСЬ ---
+    def capture(self, strategies: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """Снапшоты изменившихся стратегий (вызывается из event loop)."""
+        changed = {}
+        for symbol, strategy in strategies.items():
+            state = strategy.snapshot()
+            if self._written.get(symbol) != state:
+                changed[symbol] = state
+        return changed
+
+    def _write(self, changed: Dict[str, Dict[str, Any]], ts: float):
+        os.makedirs(self.directory, exist_ok=True)
+        for symbol, state in changed.items():
+            path = self._path(symbol)
+            tmp_path = path + ".tmp"
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump({"symbol": symbol, "ts": ts, "state": state}, f)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.error(f"❌ {symbol}: snapshot write failed: {e}")
+
+    async def flush(self, strategies: Dict[str, Any]):
+        changed = self.capture(strategies)
+        if not changed: return
+        await asyncio.to_thread(self._write, changed, time.time())
+        self._written.update(changed)
+        self.writes += len(changed)
+
+    def start(self, strategies: Callable[[], Dict[str, Any]]):
+        """strategies() — текущие локальные стратегии (symbol -> стратегия)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(strategies), name="state-snapshots")
+
+    async def _run(self, strategies: Callable[[], Dict[str, Any]]):
+        while True:
+            await asyncio.sleep(self.interval_sec)
+            try:
+                await self.flush(strategies())
+            except Exception as e:
+                logger.error(f"❌ Snapshot flush failed: {e}")
+
+    async def stop(self, strategies: Dict[str, Any]):
+        """Последний снапшот при штатной остановке: рестарт подхватит состояние на момент выхода."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush(strategies)
+        except Exception as e:
+            logger.error(f"❌ Final snapshot failed: {e}")
@@ -1,32 +1,54 @@
 # hft_strategy/services/trade_manager.py
 import asyncio
+import dataclasses
 import logging
 import time
 import uuid
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 
 # [FIX] Добавлен импорт TradeSignal, иначе упадет
 from hft_strategy.domain.events import TradeSignal 
-from hft_strategy.domain.trade_context import TradeContext, StrategyState
+from hft_strategy.domain.trade_context import TradeContext, StrategyState, StagedOrder
 from hft_strategy.domain.strategy_config import StrategyParameters
 from hft_strategy.domain.interfaces import IExecutionHandler
+from hft_strategy.infrastructure.timer_wheel import TimerWheel
 
 try:
-    from hft_core import OrderGateway
+    from hft_core import OrderGateway, TriggerCondition
 except ImportError:
     OrderGateway = object
+    TriggerCondition = None
 
 logger = logging.getLogger("TRADE_MGR")
 
+# Отказы gateway, не связанные с риском. C++ проверяет риск до соединения, поэтому после
+# NOT_AUTHENTICATED вход можно продублировать через REST; UNKNOWN_HANDLE уходит в обычный send_order
+GATEWAY_SOFT_ERRORS = {"NOT_AUTHENTICATED", "UNKNOWN_HANDLE"}
+
+# Сколько ждем подтверждения выхода, отправленного из C++, прежде чем дублировать через REST
+NATIVE_EXIT_CONFIRM_SEC = 2.0
+
 class TradeManager:
-    def __init__(self, executor: IExecutionHandler, cfg: StrategyParameters, gateway: Optional[OrderGateway] = None, notifier=None):
+    def __init__(self, executor: IExecutionHandler, cfg: StrategyParameters, gateway: Optional[OrderGateway] = None, notifier=None, ledger=None, triggers=None, timers: Optional[TimerWheel] = None, decision_lock: Optional[asyncio.Lock] = None):
         self.exec = executor
         self.gateway = gateway
         self.cfg = cfg
         self.notifier = notifier
+        # AccountLedger: синхронный источник правды по ордерам/позиции (без REST)
+        self.ledger = ledger
+        # C++ TriggerEngine: стоп проверяется на потоке стримера, выход уходит без asyncio
+        self.triggers = triggers
+        # Дедлайны ордеров: срабатывают по времени, а не на апдейте стакана
+        self.timers = timers
+        # Лок решений стратегии (on_depth / on_signal): колбэки таймеров берут его же,
+        # чтобы не пересечься с panic_exit / reset посреди отмены
+        self.decision_lock = decision_lock
+        self._cancel_in_flight = False
         self._stop_requested = False 
         self.state = StrategyState.IDLE
         self.ctx: Optional[TradeContext] = None
+        # Предсобранный в C++ вход (см. stage_entry)
+        self._staged: Optional[StagedOrder] = None
         self._tp_lock = asyncio.Lock()
         self._state_lock = asyncio.Lock()
 
@@ -36,10 +58,99 @@ class TradeManager:
     @property
     def can_be_deleted(self) -> bool:
         return self._stop_requested and self.state == StrategyState.IDLE
+
+    @property
+    def stop_requested(self) -> bool:
+        return self._stop_requested
     
+    @property
+    def position_qty(self) -> float:
+        """Фактическая позиция (abs). Ledger точнее контекста: он видит и TP/SL исполнения."""
+        if self.ledger:
+            return abs(self.ledger.position_size(self.cfg.symbol))
+        return self.ctx.filled_qty if self.ctx else 0.0
+
+    def _is_entry_order(self, order_id: str) -> bool:
+        if not self.ctx: return False
+        if order_id == self.ctx.order_id or order_id.startswith("sim_"): return True
+        return bool(self.ledger) and self.ledger.is_same_order(order_id, self.ctx.order_id)
+
     def request_stop(self):
         self._stop_requested = True
+        self.discard_staged()
         logger.info(f"⚠️ {self.cfg.symbol} switching to DRAIN MODE. No new entries allowed.")
+
+    def cancel_stop(self):
+        if not self._stop_requested: return
+        self._stop_requested = False
+        logger.info(f"▶️ {self.cfg.symbol} leaves DRAIN MODE. Entries allowed again.")
+
+    # --- СПЕКУЛЯТИВНЫЙ ВХОД ---
+    def stage_entry(self, side: str, wall_price: float, entry_price: float, qty: float, stop_loss: float, take_profit: float):
+        """
+        Вызывается на предпоследнем подтверждении стены: UUID и JSON ордера
+        собираются заранее, open_position на сигнале сделает только fire_staged.
+        """
+        if not self.gateway or self._stop_requested or self.state != StrategyState.IDLE: return
+        if self._staged and self._staged.matches(side, entry_price, qty, stop_loss, take_profit): return
+
+        self.discard_staged()
+        client_oid = str(uuid.uuid4())
+        try:
+            handle = self.gateway.stage_order(
+                symbol=self.cfg.symbol,
+                side=side,
+                qty=float(qty),
+                price=float(entry_price),
+                order_link_id=client_oid,
+                order_type="Limit",
+                time_in_force="PostOnly",
+                reduce_only=False,
+                stop_loss=float(stop_loss),
+                take_profit=float(take_profit)
+            )
+        except Exception as e:
+            logger.error(f"❌ Gateway Stage Error: {e}")
+            return
+
+        if handle:
+            self._staged = StagedOrder(handle, client_oid, side, entry_price, qty, stop_loss, take_profit, time.time())
+            logger.debug(f"📦 Staged {side} {qty} @ {entry_price} for {self.cfg.symbol} (handle {handle})")
+
+    @property
+    def has_staged(self) -> bool:
+        return self._staged is not None
+
+    def discard_staged(self):
+        if self._staged:
+            try:
+                self.gateway.discard_staged(self._staged.handle)
+            except Exception:
+                pass
+            self._staged = None
+
+    def _fire_staged(self, side: str, entry_price: float, qty: float, stop_loss: float, take_profit: float) -> Tuple[Optional[str], str]:
+        """(orderLinkId отправленного предсобранного ордера или None, причина отказа риск-гейта)."""
+        staged, self._staged = self._staged, None
+        if not staged: return None, ""
+        if not staged.matches(side, entry_price, qty, stop_loss, take_profit):
+            self.gateway.discard_staged(staged.handle)
+            return None, ""
+        try:
+            reason = self.gateway.fire_staged(staged.handle)
+        except Exception as e:
+            logger.error(f"❌ Gateway Fire Error: {e}")
+            return None, ""
+        if not reason:
+            return staged.order_link_id, ""
+        if reason == "NOT_AUTHENTICATED":
+            # Риск пройден, сокет не готов: тот же orderLinkId уйдет REST-фолбеком
+            return staged.order_link_id, ""
+        return None, ("" if reason in GATEWAY_SOFT_ERRORS else reason)
+
+    def _on_risk_reject(self, side: str, qty: float, price: float, reason: str):
+        """Риск-гейт C++ отклонил вход (или не смог проверить): REST-фолбек тоже не шлем, остаемся в IDLE."""
+        logger.warning(f"⛔ [RISK] {self.cfg.symbol} {side} {qty} @ {price} rejected: {reason}")
  
 
     # --- АТОМАРНЫЙ ВХОД ---
@@ -53,8 +164,44 @@ class TradeManager:
                 
             if self.state != StrategyState.IDLE: return
 
-            client_oid = str(uuid.uuid4())
-            logger.info(f"📡 [SIGNAL] Submitting Limit {side} {qty} @ {entry_price} | TP: {take_profit} | SL: {stop_loss}")
+            # 0. Предсобранный ордер: только запись в сокет, все остальное — после
+            client_oid, risk_reason = self._fire_staged(side, entry_price, qty, stop_loss, take_profit)
+            if risk_reason:
+                self._on_risk_reject(side, qty, entry_price, risk_reason)
+                return
+            fired_staged = client_oid is not None
+            if not fired_staged:
+                client_oid = str(uuid.uuid4())
+
+            # 1. C++ Gateway (Быстро). Риск-гейт отвечает синхронно
+            if self.gateway and not fired_staged:
+                try:
+                    risk_reason = self.gateway.send_order(
+                        symbol=self.cfg.symbol,
+                        side=side,
+                        qty=float(qty),
+                        price=float(entry_price),
+                        order_link_id=client_oid,
+                        order_type="Limit",
+                        time_in_force="PostOnly",
+                        reduce_only=False,
+                        stop_loss=float(stop_loss),   # <--- Атомарный SL
+                        take_profit=float(take_profit) # <--- Атомарный TP
+                    )
+                except Exception as e:
+                    # Риск-гейт не отработал: без проверки через REST вход не шлем
+                    logger.error(f"❌ Gateway Entry Error, entry skipped: {e}")
+                    return
+
+                if risk_reason and risk_reason not in GATEWAY_SOFT_ERRORS:
+                    self._on_risk_reject(side, qty, entry_price, risk_reason)
+                    return
+
+            logger.info(f"📡 [SIGNAL] Submitting Limit {side} {qty} @ {entry_price} | TP: {take_profit} | SL: {stop_loss}"
+                        f"{' (staged)' if fired_staged else ''}")
+
+            if self.ledger:
+                self.ledger.track_order(self.cfg.symbol, side, qty, entry_price, client_oid)
             
             # [FIX] Исправлена логика нотификации (IndentationError + NameErrors)
             if self.notifier:
@@ -71,24 +218,6 @@ class TradeManager:
                 except Exception as e:
                     self.logger.error(f"Failed to send notification: {e}")
 
-            # 1. C++ Gateway (Быстро)
-            if self.gateway:
-                try:
-                    self.gateway.send_order(
-                        symbol=self.cfg.symbol,
-                        side=side,
-                        qty=float(qty),
-                        price=float(entry_price),
-                        order_link_id=client_oid,
-                        order_type="Limit",
-                        time_in_force="PostOnly",
-                        reduce_only=False,
-                        stop_loss=float(stop_loss),   # <--- Атомарный SL
-                        take_profit=float(take_profit) # <--- Атомарный TP
-                    )
-                except Exception as e:
-                    logger.error(f"❌ Gateway Entry Error: {e}")
-
             # 2. REST Fallback (Медленно, но надежно)
             oid = await self.exec.place_limit_maker(
                 self.cfg.symbol, side, entry_price, qty, 
@@ -106,19 +235,23 @@ class TradeManager:
                     quantity=qty,
                     order_id=oid or client_oid,
                     filled_qty=0.0,
-                    placed_ts=time.time()
+                    placed_ts=time.time(),
+                    order_link_id=client_oid
                 )
+                self._arm_entry_timeout()
 
     # --- ОБРАБОТКА ИСПОЛНЕНИЙ ---
     async def handle_execution(self, event):
         async with self._state_lock:
             # --- ВХОД (Entry) ---
-            if self.ctx and (event.order_id == self.ctx.order_id or event.order_id.startswith("sim_")):
+            if self.ctx and self._is_entry_order(event.order_id):
                 self.ctx.filled_qty += event.exec_qty
                 logger.info(f"🔵 [ENTRY] {self.cfg.symbol} | +{event.exec_qty} шт. по {event.exec_price}")
                 
                 if self.state == StrategyState.ORDER_PLACED:
                     self.state = StrategyState.IN_POSITION
+                    self._disarm_entry_timeout()
+                self._arm_native_stop()
                     
                 # Уведомление о частичном или полном входе (опционально, чтобы не спамить)
                 # Если нужно - раскомментируйте:
@@ -137,6 +270,13 @@ class TradeManager:
                     realized_pnl = price_diff * event.exec_qty
                     
                     self.ctx.filled_qty -= event.exec_qty
+
+                    # Дневной лимит убытка считает риск-гейт C++
+                    if self.gateway:
+                        try:
+                            self.gateway.record_realized_pnl(realized_pnl)
+                        except Exception:
+                            pass
                     
                     # Логгирование
                     log_emoji = "✅" if realized_pnl > 0 else "❌"
@@ -162,11 +302,118 @@ class TradeManager:
                     if self.ctx.filled_qty <= 1e-9:
                         logger.info(f"🏁 Сделка закрыта полностью. Жду новый сигнал.")
                         self.reset()
+                    else:
+                        # Частичный TP: стоп должен закрывать только остаток
+                        self._arm_native_stop()
+
+    async def on_trigger_fired(self, event):
+        """C++ уже отправил reduce-only выход. Здесь только фиксируем факт, fill придет через execution."""
+        if event.reject_reason:
+            await self._under_decision_lock(self._on_native_exit_rejected, event)
+            return
+        async with self._state_lock:
+            if not self.ctx or event.trigger_id != self.ctx.trigger_id: return
+            self.ctx.trigger_id = None
+            self.ctx.exit_sent_ts = time.time()
+            logger.warning(
+                f"🎯 [NATIVE STOP] {self.cfg.symbol} | {event.exit_side} {event.qty} sent from C++ | "
+                f"Book: {event.book_price} | Trigger: {event.trigger_price}"
+            )
+
+    async def _on_native_exit_rejected(self, event):
+        """Gateway отклонил выход из C++ (риск, лимит частоты, нет соединения): fill не придет, выходим через REST."""
+        if not self.ctx or event.trigger_id != self.ctx.trigger_id: return
+        self.ctx.trigger_id = None  # В C++ триггер уже снят
+        logger.error(f"⛔ [NATIVE STOP] {self.cfg.symbol} | {event.exit_side} {event.qty} rejected by gateway: "
+                     f"{event.reject_reason}. Exiting via REST")
+        await self.panic_exit(reason=f"Native stop rejected ({event.reject_reason})")
+
+    # --- НАТИВНЫЙ СТОП ---
+    def _arm_native_stop(self):
+        """
+        Регистрируем (или обновляем объем) стопа в TriggerEngine.
+        Порог тот же, что и в _process_in_position: пробой стены ИЛИ stop_loss_ticks от входа.
+        Сравнение в C++ строгое, поэтому к stop-цене добавляем полтика.
+        """
+        if not self.triggers or not self.ctx or self.ctx.exit_sent_ts: return
+        if self.ctx.filled_qty <= 1e-9: return
+
+        tick = self.cfg.tick_size if self.cfg.tick_size > 0 else 0.0001
+        stop_offset = self.cfg.stop_loss_ticks * tick
+
+        if self.ctx.side == "Buy":
+            price = max(self.ctx.wall_price, self.ctx.entry_price - stop_offset + 0.5 * tick)
+            condition, exit_side = TriggerCondition.BidBelow, "Sell"
+        else:
+            price = min(self.ctx.wall_price, self.ctx.entry_price + stop_offset - 0.5 * tick)
+            condition, exit_side = TriggerCondition.AskAbove, "Buy"
+
+        if not self.ctx.trigger_id:
+            self.ctx.trigger_id = f"sl_{uuid.uuid4().hex[:16]}"
+
+        try:
+            self.triggers.add_trigger(
+                self.ctx.trigger_id, self.cfg.symbol, condition,
+                float(price), exit_side, float(self.ctx.filled_qty)
+            )
+        except Exception as e:
+            logger.error(f"❌ Failed to arm native stop for {self.cfg.symbol}: {e}")
+            self.ctx.trigger_id = None
+
+    def _disarm_native_stop(self) -> bool:
+        """True -> стоп снят (или не был взведен). False -> C++ уже отправил выход."""
+        if not self.triggers or not self.ctx or not self.ctx.trigger_id: return True
+        removed = self.triggers.remove_trigger(self.ctx.trigger_id)
+        self.ctx.trigger_id = None
+        if not removed and not self.ctx.exit_sent_ts:
+            # Уведомление о срабатывании еще в пути
+            self.ctx.exit_sent_ts = time.time()
+        return removed
+
+    # --- ТАЙМАУТ ВХОДА ---
+    def _arm_entry_timeout(self, delay_sec: Optional[float] = None):
+        if self.timers is None or self.cfg.entry_timeout_sec <= 0: return
+        self.ctx.timeout_timer = self.timers.schedule(
+            self.cfg.entry_timeout_sec if delay_sec is None else delay_sec, self._on_entry_timeout, self.ctx.order_id
+        )
+
+    def _disarm_entry_timeout(self):
+        if self.ctx and self.ctx.timeout_timer is not None:
+            self.ctx.timeout_timer.cancel()
+            self.ctx.timeout_timer = None
+
+    async def _under_decision_lock(self, fn, *args):
+        """События вне потока решений (таймеры, отказ нативного стопа) — под локом стратегии."""
+        if self.decision_lock is None:
+            return await fn(*args)
+        async with self.decision_lock:
+            return await fn(*args)
+
+    async def _on_entry_timeout(self, order_id: str):
+        """Колбэк TimerWheel (отдельная задача): под локом стратегии, как и решения по стакану."""
+        await self._under_decision_lock(self._entry_timeout, order_id)
+
+    async def _entry_timeout(self, order_id: str):
+        # Пока ждали лок, ордер мог исполниться, смениться или сделку сбросили — сверяем уже под ним
+        if self.state != StrategyState.ORDER_PLACED or not self.ctx or self.ctx.order_id != order_id: return
+        self.ctx.timeout_timer = None
+        await self.cancel_entry(reason=f"Timeout {self.cfg.entry_timeout_sec:.0f}s")
 
     # --- ОТМЕНА И ВЫХОД ---
     async def cancel_entry(self, reason: str = "Unknown"):
         """Добавлен аргумент reason"""
         if self.state != StrategyState.ORDER_PLACED or not self.ctx: return
+        # Таймер и стакан могут попросить отмену одновременно: второй запрос не нужен
+        if self._cancel_in_flight: return
+        self._cancel_in_flight = True
+        try:
+            await self._cancel_entry(reason)
+        finally:
+            self._cancel_in_flight = False
+
+    async def _cancel_entry(self, reason: str):
+        self._disarm_entry_timeout()
+        ctx = self.ctx
 
         if self.notifier:
              # [FIX] Использование правильного self.cfg.symbol
@@ -179,27 +426,70 @@ class TradeManager:
         logger.info(f"🚫 [CANCEL] {self.cfg.symbol} | Reason: {reason} | ID: {self.ctx.order_id}")
         
         try:
-            await self.exec.cancel_order(self.cfg.symbol, self.ctx.order_id)
+            await self.exec.cancel_order(self.cfg.symbol, ctx.order_id)
+            # Пока ждали REST, сделку могли закрыть (исполнение выхода -> reset): чужой контекст не трогаем
+            if self.ctx is not ctx: return
+            if self.ledger:
+                self.ctx.filled_qty = max(self.ctx.filled_qty, self.ledger.filled_qty(self.ctx.order_id))
             if self.ctx.filled_qty <= 1e-9:
                 self.reset()
             else:
                 self.state = StrategyState.IN_POSITION
+                self._arm_native_stop()
         except Exception as e:
+            if self.ctx is not ctx: return
             err_str = str(e)
             if "110001" in err_str or "Order not exists" in err_str:
-                logger.warning(f"🏎️ RACE CONDITION! Speculative fill for {self.cfg.symbol}")
-                self.state = StrategyState.IN_POSITION
-                if self.ctx.filled_qty <= 1e-9:
-                    self.ctx.filled_qty = self.ctx.quantity
+                if self.ledger:
+                    self._resolve_cancel_race()
+                else:
+                    logger.warning(f"🏎️ RACE CONDITION! Speculative fill for {self.cfg.symbol}")
+                    self.state = StrategyState.IN_POSITION
+                    if self.ctx.filled_qty <= 1e-9:
+                        self.ctx.filled_qty = self.ctx.quantity
+                    self._arm_native_stop()
             else:
                 logger.error(f"❌ Cancel Failed: {e}")
 
+    def _resolve_cancel_race(self):
+        """
+        Ордер уже не существует на бирже: вместо догадок смотрим в Ledger,
+        сколько реально исполнилось и какая позиция открыта.
+        """
+        filled = max(self.ledger.filled_qty(self.ctx.order_id), self.ctx.filled_qty)
+        position = self.position_qty
+
+        if filled > 1e-9 or position > 1e-9:
+            self.ctx.filled_qty = max(filled, position)
+            self.state = StrategyState.IN_POSITION
+            logger.warning(f"🏎️ Cancel race on {self.cfg.symbol}: order filled ({self.ctx.filled_qty}) before cancel")
+            self._arm_native_stop()
+        else:
+            rec = self.ledger.get_order(self.ctx.order_id)
+            if rec is None or not rec.is_final:
+                # Ledger ничего не знает об ордере -> просим REST-сверку
+                self.ledger.request_reconcile(f"cancel race {self.cfg.symbol} {self.ctx.order_id}")
+            logger.info(f"🧹 {self.cfg.symbol}: entry order already gone without fills. Reset.")
+            self.reset()
+
     async def panic_exit(self, reason: str = "Panic"):
         """Добавлен аргумент reason"""
         if not self.ctx or self.ctx.filled_qty <= 1e-9:
             self.reset()
             return
 
+        # Стоп в C++ мог сработать раньше нас: не дублируем выход, пока ждем его fill
+        self._disarm_native_stop()
+        if self.ctx.exit_sent_ts and time.time() - self.ctx.exit_sent_ts < NATIVE_EXIT_CONFIRM_SEC:
+            return
+
+        if self.ledger:
+            # Позиция могла частично закрыться по TP — сбрасываем ровно остаток
+            self.ctx.filled_qty = self.position_qty
+            if self.ctx.filled_qty <= 1e-9:
+                self.reset()
+                return
+
         exit_side = "Sell" if self.ctx.side == "Buy" else "Buy"
         p_id = f"panic_{int(time.time())}"
         
@@ -219,6 +509,57 @@ class TradeManager:
         await self.exec.place_market_order(self.cfg.symbol, exit_side, self.ctx.filled_qty, reduce_only=True)
         self.reset()
 
+    # --- ТЕПЛЫЙ РЕСТАРТ ---
+    # Рантайм-хэндлы (таймер, нативный стоп) не сохраняем: при восстановлении взводятся заново
+    _SNAPSHOT_SKIP = ("timeout_timer", "trigger_id")
+
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        if self.state == StrategyState.IDLE or not self.ctx:
+            return None
+        ctx = {k: v for k, v in dataclasses.asdict(self.ctx).items() if k not in self._SNAPSHOT_SKIP}
+        return {"state": self.state.name, "ctx": ctx}
+
+    def restore(self, data: Optional[Dict[str, Any]]):
+        """
+        Сделка из снапшота, сверенная с ledger (он уже синхронизирован с биржей):
+        открытый вход продолжаем ждать с остатком таймаута, набранную позицию — сопровождаем,
+        а то, что закрылось, пока бот лежал, отбрасываем.
+        """
+        if not data or self.ctx or not self.ledger: return
+        ctx = TradeContext(**data["ctx"])
+        order = self.ledger.get_order(ctx.order_id)
+        held = self.ledger.position_size(self.cfg.symbol) * (1 if ctx.side == "Buy" else -1)
+
+        if data["state"] == StrategyState.ORDER_PLACED.name and order is not None and not order.is_final:
+            ctx.filled_qty = max(ctx.filled_qty, order.cum_exec_qty)
+            self.ctx, self.state = ctx, StrategyState.ORDER_PLACED
+            remaining = self.cfg.entry_timeout_sec - (time.time() - ctx.placed_ts)
+            self._arm_entry_timeout(delay_sec=max(remaining, 0.0))
+            self._arm_native_stop()
+            logger.info(f"♨️ {self.cfg.symbol}: entry {ctx.side} @ {ctx.entry_price} still open "
+                        f"(filled {ctx.filled_qty}), resuming | ID: {ctx.order_id}")
+        elif held > 1e-9:
+            # Вход исполнился (или остался частичный объем): выход еще не подтвержден
+            ctx.filled_qty = held
+            ctx.exit_sent_ts = 0.0
+            self.ctx, self.state = ctx, StrategyState.IN_POSITION
+            self._arm_native_stop()
+            logger.info(f"♨️ {self.cfg.symbol}: position {ctx.side} {held} restored "
+                        f"(entry {ctx.entry_price}, wall {ctx.wall_price})")
+        else:
+            logger.info(f"♨️ {self.cfg.symbol}: snapshot trade {ctx.order_id} closed while offline, starting IDLE")
+
     def reset(self):
+        self._disarm_entry_timeout()
+        self._disarm_native_stop()
+        self._release_reservation()
         self.state = StrategyState.IDLE
-        self.ctx = None
\ No newline at end of file
+        self.ctx = None
+
+    def _release_reservation(self):
+        """Сделка закрыта или брошена: резерв входа в риск-гейте больше не нужен (обычно ledger уже снял его)."""
+        if not self.gateway or not self.ctx or not self.ctx.order_link_id: return
+        try:
+            self.gateway.release_reservation(self.ctx.order_link_id)
+        except Exception:
+            pass
@@ -1,63 +1,273 @@
 # hft_strategy/services/wall_detector.py
 import logging
-from typing import Optional, Dict, Tuple
+import time
+from typing import Optional, Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
 from hft_strategy.domain.strategy_config import StrategyParameters
+from hft_strategy.domain.trade_context import StrategyState, TradeContext
 from hft_strategy.infrastructure.local_order_book import LocalOrderBook
+from hft_strategy.infrastructure.level_history import LevelHistory
+from hft_strategy.infrastructure.trade_flow import TradeFlow
+from hft_strategy.strategies import wall_kernel as wk
 
 logger = logging.getLogger("DETECTOR")
 
+# Дебаунс стены из снапшота переносим только через короткий рестарт
+WALL_STATE_MAX_AGE_SEC = 10.0
+
+FSM_CODES = {
+    StrategyState.IDLE: wk.FSM_IDLE,
+    StrategyState.ORDER_PLACED: wk.FSM_ORDER_PLACED,
+    StrategyState.IN_POSITION: wk.FSM_IN_POSITION,
+}
+
+class WallCandidate(NamedTuple):
+    """Стена в глубине стакана."""
+    price: float
+    qty: float
+    ratio: float           # Объем / фон
+    depth: int             # Номер уровня от лучшего (0 — на касании)
+    distance_ticks: int    # Расстояние от касания в тиках
+
+class StepInput(NamedTuple):
+    """Вход одного шага ядра (признаки стакана + контекст сделки)."""
+    fsm: int
+    best_bid: float
+    best_ask: float
+    bid_px: np.ndarray
+    bid_qty: np.ndarray
+    ask_px: np.ndarray
+    ask_qty: np.ndarray
+    bg_vol: float
+    side: int
+    wall_price: float
+    entry_price: float
+    zone_qty: float
+    elapsed_sec: float
+    ctx_side: str
+
 class WallDetector:
     """
-    Отвечает за обнаружение ликвидных стен в стакане.
+    Live-адаптер общего ядра стен (wall_kernel): снимает признаки со стакана,
+    вызывает тот же njit-шаг, что и бэктест, и переводит коды действий в сигналы.
+    Сигналы дополнительно фильтруются по истории уровня (LevelHistory): молодая
+    или постоянно снимаемая «стена» считается спуфом; и по потоку сделок (TradeFlow):
+    стена, которую агрессоры съедят быстрее min_wall_depletion_sec, не держит цену.
     Не совершает сделок, только генерирует сигналы.
     """
-    def __init__(self, cfg: StrategyParameters):
+    def __init__(self, cfg: StrategyParameters, levels: Optional[LevelHistory] = None,
+                 flow: Optional[TradeFlow] = None):
         self.cfg = cfg
-        
-        # Логика подтверждения (Debounce)
-        self._wall_confirms = 0
-        self._required_confirms = 3 # Можно вынести в конфиг
+        self.levels = levels
+        self.flow = flow
+        self.spoofs_filtered = 0
+        self.eaten_filtered = 0
+        self._params = self._make_params(cfg)
+        self._scan_levels = int(self._params[wk.P_SCAN_LEVELS])
+        self._state = wk.make_state()
 
-    def detect_signal(self, lob: LocalOrderBook, avg_vol: float) -> Optional[Dict]:
+    @staticmethod
+    def _make_params(cfg: StrategyParameters) -> np.ndarray:
+        return wk.make_params(
+            cfg.wall_ratio_threshold, cfg.min_wall_value_usdt, cfg.vol_ema_alpha,
+            cfg.tick_size, cfg.stop_loss_ticks, entry_timeout_sec=cfg.entry_timeout_sec,
+            scan_levels=cfg.wall_scan_levels
+        )
+
+    def reconfigure(self, cfg: StrategyParameters):
+        """Горячая смена параметров. Пишем на месте: строка может быть view матрицы пакетного вычислителя."""
+        self.cfg = cfg
+        self._params[:] = self._make_params(cfg)
+        self._scan_levels = int(self._params[wk.P_SCAN_LEVELS])
+
+    @property
+    def scan_levels(self) -> int:
+        return self._scan_levels
+
+    @property
+    def avg_background_vol(self) -> float:
+        return float(self._state[wk.S_AVG_BG])
+
+    # --- ТЕПЛЫЙ РЕСТАРТ ---
+    def snapshot(self) -> Dict[str, object]:
+        return {"state": [float(v) for v in self._state]}
+
+    def restore(self, data: Dict[str, object], age_sec: float):
         """
-        Анализирует стакан и возвращает параметры входа, если сигнал найден.
+        EMA фона восстанавливается всегда; подтверждения стены и выбранная стена — только
+        из свежего снапшота: за долгий простой стакан стал другим. На месте (строка может быть view).
+        """
+        state = data.get("state") or []
+        # Снапшот без S_ENTRY_TOUCH (до его появления): касание 0 -> убегание от цены входа
+        if len(state) not in (wk.S_ENTRY_TOUCH, wk.STATE_SIZE): return
+        self._state[wk.S_AVG_BG] = state[wk.S_AVG_BG]
+        self._state[wk.S_BG_READY] = state[wk.S_BG_READY]
+        if age_sec <= WALL_STATE_MAX_AGE_SEC:
+            for i in (wk.S_CONFIRMS, wk.S_WALL_PRICE, wk.S_WALL_QTY, wk.S_WALL_DEPTH, wk.S_ENTRY_TOUCH):
+                if i < len(state):
+                    self._state[i] = state[i]
+
+    def bind(self, state_row: np.ndarray, params_row: np.ndarray):
+        """Переносит состояние и параметры в строки матриц пакетного вычислителя (views)."""
+        state_row[:] = self._state
+        params_row[:] = self._params
+        self._state, self._params = state_row, params_row
+
+    def step(self, lob: LocalOrderBook, state: Optional[StrategyState],
+             ctx: Optional[TradeContext] = None, now_ms: int = 0) -> Tuple[int, Optional[object]]:
         """
+        state=None -> прогрев (shadow): обновляется только фон.
+        now_ms — время апдейта стакана (мс биржи), им сдвигаются окна TradeFlow.
+        Возвращает (action, payload): для ACT_STAGE / ACT_ENTER payload — сигнал (dict),
+        для ACT_CANCEL_ENTRY / ACT_EXIT — причина (str).
+        """
+        inp = self.prepare(lob, state, ctx)
+        if inp is None:
+            return wk.ACT_NONE, None
+        action, sig_side, reason = wk.wall_step(
+            self._state, self._params, inp.fsm, inp.best_bid, inp.best_ask,
+            inp.bid_px, inp.bid_qty, inp.ask_px, inp.ask_qty, inp.bg_vol,
+            inp.side, inp.wall_price, inp.entry_price, inp.zone_qty, inp.elapsed_sec
+        )
+        return self.finish(inp, action, sig_side, reason, now_ms)
+
+    def context(self, state: Optional[StrategyState],
+                ctx: Optional[TradeContext]) -> Tuple[int, int, float, float, float]:
+        """(fsm, side, wall_price, entry_price, elapsed_sec) активной сделки для шага ядра."""
+        fsm = FSM_CODES.get(state, wk.FSM_SHADOW)
+        # Сделка без контекста (или позиция без fill) — решать нечего, только фон
+        if fsm != wk.FSM_IDLE and (ctx is None or (fsm == wk.FSM_IN_POSITION and ctx.filled_qty <= 1e-9)):
+            fsm = wk.FSM_SHADOW
+
+        side, wall_price, entry_price, elapsed = 0, 0.0, 0.0, 0.0
+        if ctx is not None and fsm != wk.FSM_IDLE:
+            side = 1 if ctx.side == "Buy" else -1
+            wall_price, entry_price = ctx.wall_price, ctx.entry_price
+            # Таймаут входа ведет таймер TradeManager; без него — проверка ядра на апдейтах
+            if ctx.timeout_timer is None:
+                elapsed = time.time() - ctx.placed_ts
+        if self.flow is not None:
+            # Сделки по цене стены считаем, только пока стоит наш ордер перед ней
+            if fsm == wk.FSM_ORDER_PLACED:
+                self.flow.watch(ctx.side, ctx.wall_price)
+            else:
+                self.flow.unwatch()
+        return fsm, side, wall_price, entry_price, elapsed
+
+    def prepare(self, lob: LocalOrderBook, state: Optional[StrategyState],
+                ctx: Optional[TradeContext] = None) -> Optional[StepInput]:
+        """Признаки стакана и контекст сделки для шага ядра; None — стакан пуст."""
         best_bid_p = lob.get_best("Buy")
         best_ask_p = lob.get_best("Sell")
-        
         if best_bid_p == 0 or best_ask_p == 0:
             return None
 
-        best_bid_v = lob.get_volume("Buy", best_bid_p)
-        best_ask_v = lob.get_volume("Sell", best_ask_p)
-
-        # 1. Расчет динамического порога на основе EMA объема из MarketAnalytics
-        threshold = avg_vol * self.cfg.wall_ratio_threshold
-        
-        # 2. Проверка условий «Стены»
-        is_bid_wall = best_bid_v > threshold and (best_bid_v * best_bid_p > self.cfg.min_wall_value_usdt)
-        is_ask_wall = best_ask_v > threshold and (best_ask_v * best_ask_p > self.cfg.min_wall_value_usdt)
-
-        # 3. Логика подтверждения (чтобы не прыгать на мерцающие заявки)
-        if is_bid_wall or is_ask_wall:
-            self._wall_confirms += 1
-        else:
-            self._wall_confirms = 0 
-
-        if self._wall_confirms >= self._required_confirms:
-            self._wall_confirms = 0 # Сброс после срабатывания
-            
-            if is_bid_wall:
-                return {
-                    "side": "Buy",
-                    "wall_price": best_bid_p,
-                    "entry_price": best_bid_p + self.cfg.tick_size
-                }
-            elif is_ask_wall:
-                return {
-                    "side": "Sell",
-                    "wall_price": best_ask_p,
-                    "entry_price": best_ask_p - self.cfg.tick_size
-                }
-        
-        return None
\ No newline at end of file
+        fsm, side, wall_price, entry_price, elapsed = self.context(state, ctx)
+        zone_qty = self._zone_volume(lob, ctx.side, ctx.wall_price) if fsm == wk.FSM_ORDER_PLACED else 0.0
+
+        # Первые scan_levels уровней каждой стороны (ArrayOrderBook — срезом массива)
+        bid_px, bid_qty = lob.top_levels("Buy", self._scan_levels)
+        ask_px, ask_qty = lob.top_levels("Sell", self._scan_levels)
+        return StepInput(fsm, best_bid_p, best_ask_p, bid_px, bid_qty, ask_px, ask_qty,
+                         lob.get_background_volume(), side, wall_price, entry_price, zone_qty, elapsed,
+                         ctx.side if ctx is not None else "")
+
+    def finish(self, inp: StepInput, action: int, sig_side: int, reason: int,
+               now_ms: int = 0) -> Tuple[int, Optional[object]]:
+        """Результат ядра -> (action, payload) с фильтрами спуфа и потока."""
+        if action in (wk.ACT_STAGE, wk.ACT_ENTER):
+            signal = self._build_signal(sig_side > 0)
+            if self._is_spoof(signal["side"], signal["wall_price"]):
+                return wk.ACT_NONE, None
+            if self._depletion_sec(signal["side"], signal["wall_qty"], now_ms, at_wall=False) is not None:
+                return wk.ACT_NONE, None
+            return action, signal
+        if action == wk.ACT_CANCEL_ENTRY:
+            return action, self._describe(reason, zone_qty=inp.zone_qty)
+        if inp.fsm == wk.FSM_ORDER_PLACED:
+            # Стена еще стоит, но поток по ее цене съест остаток раньше, чем нас исполнят
+            eta = self._depletion_sec(inp.ctx_side, inp.zone_qty, now_ms, at_wall=True)
+            if eta is not None:
+                return wk.ACT_CANCEL_ENTRY, f"Wall Eaten (depletes in {eta:.1f}s)"
+        if action == wk.ACT_EXIT:
+            exit_price = inp.best_bid if inp.side > 0 else inp.best_ask
+            pnl_ticks = (exit_price - inp.entry_price) * inp.side / self.cfg.tick_size
+            return action, self._describe(reason, exit_price=exit_price, pnl_ticks=pnl_ticks)
+        return action, None
+
+    def candidates(self, lob: LocalOrderBook, side: str, levels: Optional[int] = None) -> List[WallCandidate]:
+        """Стены стороны в первых levels уровнях по текущему фону, сильнейшая первой."""
+        prices, qtys = lob.top_levels(side, levels or self._scan_levels)
+        avg_bg = self.avg_background_vol
+        if len(prices) == 0 or avg_bg <= 0:
+            return []
+        out = np.empty(len(prices), dtype=np.int64)
+        n = wk.scan_walls(prices, qtys, avg_bg * self.cfg.wall_ratio_threshold, self.cfg.min_wall_value_usdt, out)
+        touch, tick = prices[0], self.cfg.tick_size
+        return [
+            WallCandidate(
+                price=float(prices[i]), qty=float(qtys[i]), ratio=float(qtys[i] / avg_bg), depth=int(i),
+                distance_ticks=int(round(abs(prices[i] - touch) / tick)) if tick > 0 else int(i),
+            )
+            for i in out[:n]
+        ]
+
+    def _is_spoof(self, side: str, wall_price: float) -> bool:
+        if self.levels is None or (self.cfg.min_wall_age_sec <= 0 and self.cfg.max_wall_cancel_ratio <= 0):
+            return False
+        stats = self.levels.stats(side, wall_price)
+        if stats is None:
+            return False
+        too_young = stats.age_sec < self.cfg.min_wall_age_sec
+        flashing = 0 < self.cfg.max_wall_cancel_ratio < stats.cancel_ratio
+        if too_young or flashing:
+            self.spoofs_filtered += 1
+            logger.debug(f"👻 {self.cfg.symbol} {side} wall @ {wall_price} filtered: age {stats.age_sec:.1f}s, "
+                         f"cancels {stats.cancels} ({stats.cancel_ratio:.0%}), traded {stats.traded_qty:.1f}")
+            return True
+        return False
+
+    def _depletion_sec(self, side: str, wall_qty: float, now_ms: int, at_wall: bool) -> Optional[float]:
+        """Время «съедания» стены, если оно короче min_wall_depletion_sec, иначе None."""
+        if self.flow is None or self.cfg.min_wall_depletion_sec <= 0 or now_ms <= 0:
+            return None
+        eta = self.flow.depletion_sec(self.flow.features(now_ms), side, wall_qty, at_wall=at_wall)
+        if eta >= self.cfg.min_wall_depletion_sec:
+            return None
+        if not at_wall:
+            self.eaten_filtered += 1
+            logger.debug(f"🍽️ {self.cfg.symbol} {side} wall ({wall_qty:.1f}) filtered: depletes in {eta:.1f}s")
+        return eta
+
+    def _zone_volume(self, lob: LocalOrderBook, side: str, wall_price: float) -> float:
+        """Максимальный объем в ±WALL_ZONE_TICKS от цены стены (стена может сдвинуться на тик)."""
+        zone = 0.0
+        for t in range(-wk.WALL_ZONE_TICKS, wk.WALL_ZONE_TICKS + 1):
+            zone = max(zone, lob.get_volume(side, wall_price + t * self.cfg.tick_size))
+        return zone
+
+    def _describe(self, reason: int, zone_qty: float = 0.0, exit_price: float = 0.0, pnl_ticks: float = 0.0) -> str:
+        if reason == wk.R_WALL_COLLAPSED:
+            return f"Wall Collapsed (Vol: {zone_qty:.1f})"
+        if reason == wk.R_TIMEOUT:
+            return f"Timeout {self._params[wk.P_ENTRY_TIMEOUT_SEC]:.0f}s"
+        if reason == wk.R_WALL_BROKEN:
+            return f"Wall Broken (Price: {exit_price})"
+        if reason == wk.R_STOP_HIT:
+            return f"Hard Stop Hit ({pnl_ticks:.1f} ticks)"
+        return wk.REASON_NAMES.get(reason, "Unknown")
+
+    def _build_signal(self, is_bid_wall: bool) -> Dict:
+        # Стена, выбранная ядром (может стоять в глубине): встаем на тик впереди нее
+        st = self._state
+        wall_price = round(float(st[wk.S_WALL_PRICE]), 8)
+        step = self.cfg.tick_size if is_bid_wall else -self.cfg.tick_size
+        return {
+            "side": "Buy" if is_bid_wall else "Sell",
+            "wall_price": wall_price,
+            "entry_price": round(wall_price + step, 8),
+            "wall_qty": float(st[wk.S_WALL_QTY]),
+            "wall_depth": int(st[wk.S_WALL_DEPTH]),
+        }
@@ -2,14 +2,49 @@ import numpy as np
 from numba import njit
 from hftbacktest import GTX, GTC, LIMIT
 
-STATE_IDLE = 0
-STATE_ORDER_PLACED = 1
-STATE_IN_POSITION = 2
+from hft_strategy.strategies.wall_kernel import (
+    FSM_IDLE, FSM_ORDER_PLACED, FSM_IN_POSITION,
+    ACT_ENTER, ACT_CANCEL_ENTRY, ACT_EXIT,
+    BACKGROUND_LEVELS, WALL_ZONE_TICKS, DEFAULT_SCAN_LEVELS, S_WALL_PRICE,
+    make_params, make_state, background_from_levels, wall_step
+)
+
+# Коды FSM общие с live (wall_kernel)
+STATE_IDLE = FSM_IDLE
+STATE_ORDER_PLACED = FSM_ORDER_PLACED
+STATE_IN_POSITION = FSM_IN_POSITION
+
+MAX_SCAN_TICKS = 500  # Глубина поиска непустых уровней в HashMap-стакане
+
+@njit
+def _side_levels(depth, best_tick, direction, tick_size, out_px, out_qty):
+    """Число непустых уровней от лучшего вглубь (direction -1 — биды, +1 — аски); цены и объемы в out_*."""
+    n = 0
+    t = best_tick
+    for _ in range(MAX_SCAN_TICKS):
+        if n >= len(out_qty): break
+        q = depth.bid_qty_at_tick(t) if direction < 0 else depth.ask_qty_at_tick(t)
+        if q > 0:
+            out_px[n] = t * tick_size
+            out_qty[n] = q
+            n += 1
+        t += direction
+    return n
+
+@njit
+def _zone_qty(depth, side, wall_price, tick_size):
+    """Максимальный объем в ±WALL_ZONE_TICKS от стены (как WallDetector в live)."""
+    wall_tick = int(round(wall_price / tick_size))
+    zone = 0.0
+    for t in range(wall_tick - WALL_ZONE_TICKS, wall_tick + WALL_ZONE_TICKS + 1):
+        q = depth.bid_qty_at_tick(t) if side > 0 else depth.ask_qty_at_tick(t)
+        if q > zone: zone = q
+    return zone
 
 @njit
 def adaptive_strategy_backtest(
-    hbt, 
-    recorder, 
+    hbt,
+    recorder,
     # Оптимизируемые параметры
     wall_ratio_threshold=3.0,
     min_wall_value_usdt=10000.0,
@@ -17,130 +52,122 @@ def adaptive_strategy_backtest(
     # Конфигурация
     min_tp_percent=0.2,
     stop_loss_ticks=30,
-    order_amount_usdt=100.0  # [FIX] Теперь торгуем на сумму в $, а не кол-во штук
+    order_amount_usdt=100.0,  # [FIX] Теперь торгуем на сумму в $, а не кол-во штук
+    wall_scan_levels=DEFAULT_SCAN_LEVELS
 ):
     asset_no = 0
-    tick_size = 0.0 
+    tick_size = 0.0
     lot_size = 0.0 # [FIX] Размер лота
-    
+
     state = STATE_IDLE
-    
+
     active_order_id = -1
     active_tp_id = -1
     entry_price = 0.0
     wall_price = 0.0
-    side = 0 
+    side = 0
     order_counter = 1
-    
-    avg_qty = 0.0
-    initialized = False
+    order_qty = 0.0
+    placed_ts = 0
+
+    # Ядро стен: то же, что у live-стратегии (фон 2-11, debounce, коллапс ±2 тика)
+    kernel_state = make_state()
+    kernel_params = make_params(0.0, 0.0, 0.0, 0.0, 0.0)
+    # Уровни 1-11 для фона и первые wall_scan_levels для поиска стены
+    buf_levels = max(BACKGROUND_LEVELS + 1, wall_scan_levels)
+    bid_px = np.zeros(buf_levels)
+    bid_buf = np.zeros(buf_levels)
+    ask_px = np.zeros(buf_levels)
+    ask_buf = np.zeros(buf_levels)
     data_ready = False
 
-    while hbt.elapse(100_000_000) == 0: 
+    while hbt.elapse(100_000_000) == 0:
         hbt.clear_inactive_orders(asset_no)
         depth = hbt.depth(asset_no)
-        
+
         best_bid = depth.best_bid
         best_ask = depth.best_ask
         if best_bid <= 1e-9: continue
-            
+
         if not data_ready:
             tick_size = depth.tick_size
             lot_size = depth.lot_size # Получаем шаг лота
             if tick_size <= 0: tick_size = 0.01
             if lot_size <= 0: lot_size = 1.0 # Fallback
+            kernel_params = make_params(wall_ratio_threshold, min_wall_value_usdt, vol_ema_alpha,
+                                        tick_size, stop_loss_ticks, scan_levels=wall_scan_levels)
             data_ready = True
-            
+
         position = hbt.position(asset_no)
+        now = hbt.current_timestamp
+
+        # Признаки стакана -> шаг ядра
+        nb = _side_levels(depth, depth.best_bid_tick, -1, tick_size, bid_px, bid_buf)
+        na = _side_levels(depth, depth.best_ask_tick, 1, tick_size, ask_px, ask_buf)
+        if nb == 0 or na == 0: continue
+        bg_vol = background_from_levels(bid_buf[:nb], ask_buf[:na])
+        zone_qty = _zone_qty(depth, side, wall_price, tick_size) if state == STATE_ORDER_PLACED else 0.0
+        elapsed_sec = (now - placed_ts) / 1e9 if state != STATE_IDLE else 0.0
+
+        action, signal_side, reason = wall_step(
+            kernel_state, kernel_params, state,
+            best_bid, best_ask, bid_px[:nb], bid_buf[:nb], ask_px[:na], ask_buf[:na], bg_vol,
+            side, wall_price, entry_price, zone_qty, elapsed_sec
+        )
 
-        bb_qty = depth.best_bid_qty
-        ba_qty = depth.best_ask_qty
-        current_mid_vol = (bb_qty + ba_qty) / 2.0
-        
-        if not initialized:
-            avg_qty = current_mid_vol
-            initialized = True
-        else:
-            avg_qty = vol_ema_alpha * current_mid_vol + (1.0 - vol_ema_alpha) * avg_qty
-
-        dynamic_qty_threshold = avg_qty * wall_ratio_threshold
-        
         # FSM
         if state == STATE_IDLE:
-            # [FIX] РАСЧЕТ ОБЪЕМА ОРДЕРА
-            # Qty = $$$ / Price
-            raw_qty = order_amount_usdt / best_bid
-            # Округляем до lot_size (например, до целых или до 0.1)
-            order_qty = round(raw_qty / lot_size) * lot_size
-            
-            if order_qty < lot_size: continue # Слишком мало денег для входа
-
-            bid_val_usdt = best_bid * bb_qty
-            is_bid_wall = (bb_qty > dynamic_qty_threshold) and (bid_val_usdt > min_wall_value_usdt)
-            
-            ask_val_usdt = best_ask * ba_qty
-            is_ask_wall = (ba_qty > dynamic_qty_threshold) and (ask_val_usdt > min_wall_value_usdt)
-            
-            if is_bid_wall:
-                price = best_bid + tick_size
-                hbt.submit_buy_order(asset_no, order_counter, price, order_qty, GTX, LIMIT, False)
-                active_order_id = order_counter
-                order_counter += 1
-                side = 1
-                wall_price = best_bid
-                entry_price = price
-                state = STATE_ORDER_PLACED
-                
-            elif is_ask_wall:
-                price = best_ask - tick_size
-                hbt.submit_sell_order(asset_no, order_counter, price, order_qty, GTX, LIMIT, False)
-                active_order_id = order_counter
-                order_counter += 1
-                side = -1
-                wall_price = best_ask
-                entry_price = price
-                state = STATE_ORDER_PLACED
+            if action == ACT_ENTER:
+                # [FIX] РАСЧЕТ ОБЪЕМА ОРДЕРА
+                # Qty = $$$ / Price
+                raw_qty = order_amount_usdt / best_bid
+                # Округляем до lot_size (например, до целых или до 0.1)
+                order_qty = round(raw_qty / lot_size) * lot_size
+
+                if order_qty >= lot_size: # Иначе слишком мало денег для входа
+                    # Стена может стоять в глубине: встаем на тик впереди нее (как WallDetector в live)
+                    wall_price = kernel_state[S_WALL_PRICE]
+                    if signal_side > 0:
+                        price = wall_price + tick_size
+                        hbt.submit_buy_order(asset_no, order_counter, price, order_qty, GTX, LIMIT, False)
+                    else:
+                        price = wall_price - tick_size
+                        hbt.submit_sell_order(asset_no, order_counter, price, order_qty, GTX, LIMIT, False)
+                    active_order_id = order_counter
+                    order_counter += 1
+                    side = signal_side
+                    entry_price = price
+                    placed_ts = now
+                    state = STATE_ORDER_PLACED
 
         elif state == STATE_ORDER_PLACED:
-            # Check Fill (теперь сравниваем с реальным order_qty)
+            # Check Fill (сравниваем с order_qty, рассчитанным при входе)
             is_filled = False
-            # order_qty сохранен в замыкании FSM (Numba handle this correctly only if defined locally)
-            # В данном простом FSM order_qty пересчитывается в IDLE, но здесь мы должны знать его.
-            # Для простоты считаем: если позиция изменилась значительно.
             if side == 1 and position >= order_qty * 0.99: is_filled = True
             if side == -1 and position <= -order_qty * 0.99: is_filled = True
-            
+
             if is_filled:
                 state = STATE_IN_POSITION
-                
+
                 # Dynamic TP
                 tp_dist = entry_price * (min_tp_percent / 100.0)
                 tp_dist = round(tp_dist / tick_size) * tick_size
                 if tp_dist < 5 * tick_size: tp_dist = 5 * tick_size
-                
+
                 if side == 1:
                     tp_price = entry_price + tp_dist
                     hbt.submit_sell_order(asset_no, order_counter, tp_price, order_qty, GTX, LIMIT, False)
                 else:
                     tp_price = entry_price - tp_dist
                     hbt.submit_buy_order(asset_no, order_counter, tp_price, order_qty, GTX, LIMIT, False)
-                
+
                 active_tp_id = order_counter
                 order_counter += 1
-                
-            else:
-                # Wall Gone Check
-                wall_gone = False
-                if side == 1:
-                    if best_bid < wall_price: wall_gone = True
-                    elif best_bid == wall_price and bb_qty < (dynamic_qty_threshold * 0.5): wall_gone = True
-                else:
-                    if best_ask > wall_price: wall_gone = True
-                    elif best_ask == wall_price and ba_qty < (dynamic_qty_threshold * 0.5): wall_gone = True
-                
-                if wall_gone:
-                    hbt.cancel(asset_no, active_order_id, False)
-                    state = STATE_IDLE
+
+            elif action == ACT_CANCEL_ENTRY:
+                # Стена рухнула / цена убежала / таймаут — те же правила, что в live
+                hbt.cancel(asset_no, active_order_id, False)
+                state = STATE_IDLE
 
         elif state == STATE_IN_POSITION:
             if abs(position) < lot_size: # Позиция закрыта
@@ -148,26 +175,18 @@ def adaptive_strategy_backtest(
                 active_tp_id = -1
                 continue
 
-            panic = False
-            if side == 1:
-                if best_bid < wall_price: panic = True
-                if best_bid <= entry_price - (stop_loss_ticks * tick_size): panic = True
-            else:
-                if best_ask > wall_price: panic = True
-                if best_ask >= entry_price + (stop_loss_ticks * tick_size): panic = True
-            
-            if panic:
+            if action == ACT_EXIT:
                 if active_tp_id != -1:
                     hbt.cancel(asset_no, active_tp_id, False)
-                
+
                 if side == 1:
                     hbt.submit_sell_order(asset_no, order_counter, best_bid * 0.9, position, GTC, LIMIT, False)
                 else:
                     hbt.submit_buy_order(asset_no, order_counter, best_ask * 1.1, abs(position), GTC, LIMIT, False)
-                
+
                 order_counter += 1
                 state = STATE_IDLE
 
         recorder.record(hbt)
-        
-    return True
\ No newline at end of file
+
+    return True
@@ -1,16 +1,24 @@
 # hft_strategy/strategies/adaptive_live_strategy.py
 import logging
 import asyncio
-import time
-from typing import Optional
+import dataclasses
+from typing import Any, Dict, Optional
 
 from hft_strategy.infrastructure.local_order_book import LocalOrderBook
+from hft_strategy.infrastructure.array_order_book import ArrayOrderBook
+from hft_strategy.infrastructure.level_history import LevelHistory
+from hft_strategy.infrastructure.trade_flow import TradeFlow
 from hft_strategy.domain.trade_context import StrategyState
 from hft_strategy.domain.strategy_config import StrategyParameters
 from hft_strategy.domain.interfaces import IExecutionHandler
+from hft_strategy.infrastructure.task_supervisor import TaskSupervisor
+from hft_strategy.infrastructure.timer_wheel import TimerWheel
+from hft_strategy.infrastructure.bar_builder import BarBuilder
 
 from hft_strategy.services.analytics import MarketAnalytics
 from hft_strategy.services.wall_detector import WallDetector
+from hft_strategy.services.batch_evaluator import BatchWallEvaluator
+from hft_strategy.strategies import wall_kernel as wk
 from hft_strategy.services.trade_manager import TradeManager
 
 logger = logging.getLogger("ORCHESTRATOR")
@@ -20,134 +28,202 @@ class AdaptiveWallStrategy:
                  executor: IExecutionHandler, 
                  cfg: StrategyParameters,
                  gateway: Optional[object] = None,
-                 notifier: Optional[object] = None): # [FIX] Added notifier
+                 notifier: Optional[object] = None, # [FIX] Added notifier
+                 ledger: Optional[object] = None,
+                 triggers: Optional[object] = None,
+                 tasks: Optional[TaskSupervisor] = None,
+                 shadow: bool = False,
+                 batch: Optional[BatchWallEvaluator] = None,
+                 timers: Optional[TimerWheel] = None,
+                 bars: Optional[BarBuilder] = None):
         
         self.cfg = cfg
-        self.lob = LocalOrderBook()
+        # Shadow mode: стакан и EMA фона обновляются, ордера не выставляются (прогрев кандидата)
+        self.shadow = shadow
+        # Tick известен из спецификации -> стакан на массивах (O(1) best, фон без сортировки)
+        self.lob = ArrayOrderBook(cfg.tick_size) if cfg.tick_size > 0 else LocalOrderBook()
+        # История уровней (возраст, снятия, проторгованный объем) для фильтра спуфа
+        self.levels = LevelHistory(cfg.tick_size) if cfg.tick_size > 0 else None
+        # Агрессивный поток (окна 1/5/30с) и скорость «поедания» стены
+        self.flow = TradeFlow(cfg.tick_size) if cfg.tick_size > 0 else None
         self._lock = asyncio.Lock()
         
-        self.analytics = MarketAnalytics(executor, cfg)
-        self.detector = WallDetector(cfg)
+        # OHLC-бары из потока сделок (NATR для TP и сканера)
+        self.bars = bars
+        self.analytics = MarketAnalytics(executor, cfg, bars)
+        self.detector = WallDetector(cfg, levels=self.levels, flow=self.flow)
+        self.last_depth_ms = 0
         # [FIX] Pass notifier to TradeManager
-        self.trade_manager = TradeManager(executor, cfg, gateway, notifier)
+        self.trade_manager = TradeManager(executor, cfg, gateway, notifier, ledger, triggers, timers,
+                                          decision_lock=self._lock)
         
-        asyncio.create_task(self.analytics.start())
+        # Все фоновые задачи стратегии — через супервизор: close() отменит их при purge
+        self.tasks = tasks or TaskSupervisor()
+        self.tasks.spawn(cfg.symbol, self.analytics.start(), name=f"analytics-{cfg.symbol}")
+
+        # Пакетный режим: шаг ядра делает общий вычислитель по всем обновленным символам
+        self.batch = batch if batch is not None and batch.attach(self) else None
+
+    def promote(self):
+        """Кандидат стал торгуемой монетой: стакан и аналитика уже прогреты."""
+        self.shadow = False
+        logger.info(f"🎓 {self.cfg.symbol} leaves shadow mode (bg vol {self.detector.avg_background_vol:.1f}, "
+                    f"TP {self.analytics.current_tp_pct:.2f}%)")
+
+    def update_params(self, changes: Dict[str, Any]):
+        """
+        Hot-reload: новый объект параметров целиком подменяется у всех компонентов.
+        Вызов синхронный из event loop, поэтому попадает между событиями: шаг детектора
+        видит либо старый набор, либо новый. Символ и спецификация инструмента не меняются.
+        """
+        cfg = dataclasses.replace(self.cfg, **changes)
+        self.detector.reconfigure(cfg)
+        self.trade_manager.cfg = cfg
+        self.analytics.cfg = cfg
+        self.cfg = cfg
+
+    # --- ТЕПЛЫЙ РЕСТАРТ (StateSnapshotStore) ---
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "detector": self.detector.snapshot(),
+            "tp_pct": self.analytics.current_tp_pct,
+            "trade": self.trade_manager.snapshot(),
+        }
+
+    def restore(self, data: Dict[str, Any], age_sec: float):
+        self.detector.restore(data.get("detector") or {}, age_sec)
+        self.analytics.current_tp_pct = float(data.get("tp_pct", self.analytics.current_tp_pct))
+        self.trade_manager.restore(data.get("trade"))
+
+    async def close(self):
+        """Вызывается оркестратором при удалении стратегии."""
+        self.analytics.stop()
+        if self.batch is not None:
+            self.batch.detach(self.cfg.symbol)
+        if self.bars is not None:
+            self.bars.drop(self.cfg.symbol)
+        cancelled = await self.tasks.cancel_owner(self.cfg.symbol)
+        logger.info(f"🧹 {self.cfg.symbol}: {cancelled} background task(s) cancelled")
 
     async def on_execution(self, event):
         await self.trade_manager.handle_execution(event)
 
-    def on_tick(self, tick):
-        pass
+    async def on_trigger_fired(self, event):
+        await self.trade_manager.on_trigger_fired(event)
+
+    async def on_trade(self, trade):
+        if self.levels:
+            self.levels.on_trade(trade)
+        if self.flow:
+            self.flow.on_trade(trade)
+        if self.bars:
+            self.bars.on_trade(trade)
 
     async def on_depth(self, snapshot):
-        if self._lock.locked(): return
-        
+        # Live: вызывается единственным consumer'ом почтового ящика (дельты уже схлопнуты),
+        # поэтому апдейты больше не теряются. Snapshot/Delta различаем по is_snapshot.
         async with self._lock:
-            if hasattr(snapshot, 'bids') and not isinstance(snapshot.bids, dict):
-                self.lob.apply_snapshot(snapshot)
-            else:
-                self.lob.apply_update(snapshot)
+            self.lob.apply_update(snapshot)
+            if self.levels:
+                self.levels.on_depth(snapshot)
             
             if not self.lob.bids or not self.lob.asks: return
+            self.last_depth_ms = int(getattr(snapshot, 'timestamp', 0))
 
-            bg_vol = self.lob.get_background_volume()
-            self.analytics.update_background_volume(bg_vol)
+            if self.batch is not None:
+                self.batch.mark(self)
+                return
 
-            state = self.trade_manager.state
+            # Общее с бэктестом ядро (wall_kernel): фон, сигнал и решения FSM за один шаг
+            state = self.decision_state
+            action, payload = self.detector.step(self.lob, state, self.trade_manager.ctx, now_ms=self.last_depth_ms)
+            if state is not None:
+                await self._route(state, action, payload)
 
-            if state == StrategyState.IDLE:
-                await self._process_idle()
+    @property
+    def decision_state(self) -> Optional[StrategyState]:
+        """Состояние для шага ядра; None — shadow (только прогрев фона)."""
+        return None if self.shadow else self.trade_manager.state
 
-            elif state == StrategyState.ORDER_PLACED:
-                await self._process_order_placed()
+    async def on_signal(self, state: StrategyState, action: int, payload):
+        """Результат пакетного шага (BatchWallEvaluator)."""
+        async with self._lock:
+            # Пока пачка разбиралась, могло прийти исполнение: решение уже неактуально
+            if self.shadow or self.trade_manager.state != state: return
+            await self._route(state, action, payload)
+
+    async def _route(self, state: StrategyState, action: int, payload):
+        if state == StrategyState.IDLE:
+            await self._process_idle(action, payload)
+
+        elif action == wk.ACT_CANCEL_ENTRY:
+            logger.info(f"🧱 {payload}. Cancelling entry...")
+            await self.trade_manager.cancel_entry(reason=payload)
+
+        elif action == wk.ACT_EXIT:
+            logger.warning(f"🚨 {payload}. Panic Exiting!")
+            await self.trade_manager.panic_exit(reason=payload)
+
+    async def _process_idle(self, action: int, signal: Optional[dict]):
+        if action == wk.ACT_ENTER:
+            entry = self._build_entry(signal)
+            if entry:
+                await self.trade_manager.open_position(**entry)
+                if logger.isEnabledFor(logging.DEBUG):
+                    self._log_candidates(signal["side"])
+            else:
+                self.trade_manager.discard_staged()
 
-            elif state == StrategyState.IN_POSITION:
-                await self._process_in_position()
+        elif action == wk.ACT_STAGE:
+            # Предпоследнее подтверждение: собираем ордер заранее, на сигнале останется только отправка
+            entry = self._build_entry(signal)
+            if entry:
+                self.trade_manager.stage_entry(**entry)
 
-    async def _process_idle(self):
-        signal = self.detector.detect_signal(
-            self.lob, 
-            self.analytics.avg_background_vol
+        else:
+            self.trade_manager.discard_staged()
+
+    def _log_candidates(self, side: str):
+        """Какие еще стены видел детектор на стороне входа (после отправки ордера, не на горячем пути)."""
+        ranked = self.detector.candidates(self.lob, side)
+        logger.debug(f"🧮 {self.cfg.symbol} {side} wall candidates: " + ", ".join(
+            f"{c.price}x{c.qty:.1f} (x{c.ratio:.1f}, {c.distance_ticks}t)" for c in ranked))
+
+    def _build_entry(self, signal: dict) -> Optional[dict]:
+        step_size = self.cfg.lot_size if self.cfg.lot_size > 0 else 1.0
+        raw_qty = self.cfg.order_amount_usdt / signal["entry_price"]
+        qty_final = round(int(raw_qty / step_size) * step_size, 8)
+
+        if qty_final < self.cfg.min_qty: return None
+
+        tp_price, sl_price = self.analytics.calculate_exits(
+            side=signal["side"],
+            entry_price=signal["entry_price"],
+            wall_price=signal["wall_price"]
         )
-        
-        if signal:
-            step_size = self.cfg.lot_size if self.cfg.lot_size > 0 else 1.0
-            raw_qty = self.cfg.order_amount_usdt / signal["entry_price"]
-            qty_final = round(int(raw_qty / step_size) * step_size, 8)
-
-            if qty_final < self.cfg.min_qty: return
-
-            tp_price, sl_price = self.analytics.calculate_exits(
-                side=signal["side"],
-                entry_price=signal["entry_price"],
-                wall_price=signal["wall_price"]
-            )
-
-            await self.trade_manager.open_position(
-                side=signal["side"],
-                wall_price=signal["wall_price"],
-                entry_price=signal["entry_price"],
-                qty=qty_final,
-                stop_loss=sl_price,
-                take_profit=tp_price
-            )
+
+        return {
+            "side": signal["side"],
+            "wall_price": signal["wall_price"],
+            "entry_price": signal["entry_price"],
+            "qty": qty_final,
+            "stop_loss": sl_price,
+            "take_profit": tp_price
+        }
             
     def set_graceful_stop(self):
         """Вызывается оркестратором, когда монета вылетает из топа."""
         self.trade_manager.request_stop()
+
+    def cancel_graceful_stop(self):
+        """Монету снова выбрали, пока она дренировалась."""
+        self.trade_manager.cancel_stop()
     
+    @property
+    def is_shutting_down(self) -> bool:
+        return self.trade_manager.stop_requested
+
     @property
     def can_be_deleted(self) -> bool:
         """Спрашиваем у менеджера, все ли дела завершены."""
         return self.trade_manager.can_be_deleted
-
-    # [FIX] Correct indentation for these methods:
-    
-    async def _process_order_placed(self):
-        ctx = self.trade_manager.ctx
-        if not ctx: return
-
-        best_bid_p = self.lob.get_best("Buy")
-        best_ask_p = self.lob.get_best("Sell")
-        
-        current_wall_v = 0.0
-        for t in range(-2, 3):
-            check_p = ctx.wall_price + (t * self.cfg.tick_size)
-            current_wall_v = max(current_wall_v, self.lob.get_volume(ctx.side, check_p))
-
-        threshold = self.analytics.avg_background_vol * self.cfg.wall_ratio_threshold * 0.4 
-        
-        wall_collapsed = current_wall_v < threshold
-        
-        price_ran_away = False
-        if ctx.side == "Buy":
-            price_ran_away = best_bid_p > (ctx.entry_price + 5 * self.cfg.tick_size)
-        else:
-            price_ran_away = best_ask_p < (ctx.entry_price - 5 * self.cfg.tick_size)
-
-        timed_out = (time.time() - ctx.placed_ts) > 30.0 
-
-        if wall_collapsed or price_ran_away or timed_out:
-            reason = "Wall Collapsed" if wall_collapsed else ("Price Runaway" if price_ran_away else "Timeout 30s")
-            logger.info(f"🧱 {reason} (Vol: {current_wall_v:.1f}). Cancelling entry...")
-            await self.trade_manager.cancel_entry(reason=reason)
-
-    async def _process_in_position(self):
-        ctx = self.trade_manager.ctx
-        if not ctx or ctx.filled_qty <= 1e-9: return
-
-        best_bid = self.lob.get_best("Buy")
-        best_ask = self.lob.get_best("Sell")
-
-        exit_price = best_bid if ctx.side == "Buy" else best_ask
-        
-        wall_broken = (exit_price < ctx.wall_price) if ctx.side == "Buy" else (exit_price > ctx.wall_price)
-        
-        delta = (exit_price - ctx.entry_price) if ctx.side == "Buy" else (ctx.entry_price - exit_price)
-        pnl_ticks = delta / self.cfg.tick_size
-        stop_hit = pnl_ticks <= -self.cfg.stop_loss_ticks
-
-        if wall_broken or stop_hit:
-            reason = f"Wall Broken (Price: {exit_price})" if wall_broken else f"Hard Stop Hit ({pnl_ticks:.1f} ticks)"
-            logger.warning(f"🚨 {reason} ({pnl_ticks:.1f} ticks). Panic Exiting!")
-            await self.trade_manager.panic_exit(reason=reason)
\ No newline at end of file
@@ -0,0 +1,283 @@
+# hft_strategy/strategies/wall_kernel.py
+"""
+Общее ядро стратегии стен (numba njit): признаки стакана -> сигнал -> переходы FSM.
+Одна реализация для бэктеста (adaptive_strategy_backtest зовет wall_step прямо из njit-цикла)
+и для live (WallDetector передает признаки ArrayOrderBook). Правила больше не расходятся:
+  - фон: средний объем уровней 2-11 обеих сторон, EMA с vol_ema_alpha;
+  - стена: уровень из первых scan_levels с объемом > фон * wall_ratio_threshold и дороже
+    min_wall_value_usdt; из кандидатов обеих сторон берется сильнейший (scan_walls);
+  - вход: после `confirms` подтверждений подряд (на предпоследнем — ACT_STAGE);
+  - отмена входа: стена (max объема в ±2 тика) < порог * collapse_ratio, убегание цены
+    (от касания на момент ACT_ENTER: стена может стоять в глубине), таймаут;
+  - выход из позиции: пробой стены или стоп stop_loss_ticks от входа.
+
+Состояние детектора и параметры — float64 массивы (индексы S_* / P_*), чтобы ядро
+одинаково вызывалось из Python и из njit-кода.
+"""
+import numpy as np
+from numba import njit
+
+# --- FSM (коды совпадают со STATE_* бэктеста) ---
+FSM_SHADOW = -1      # Прогрев: только фон, без сигналов
+FSM_IDLE = 0
+FSM_ORDER_PLACED = 1
+FSM_IN_POSITION = 2
+
+# --- ДЕЙСТВИЯ ---
+ACT_NONE = 0
+ACT_STAGE = 1        # Предпоследнее подтверждение: ордер можно собрать заранее
+ACT_ENTER = 2
+ACT_CANCEL_ENTRY = 3
+ACT_EXIT = 4
+
+# --- ПРИЧИНЫ ---
+R_NONE = 0
+R_WALL_COLLAPSED = 1
+R_PRICE_RUNAWAY = 2
+R_TIMEOUT = 3
+R_WALL_BROKEN = 4
+R_STOP_HIT = 5
+
+REASON_NAMES = {
+    R_NONE: "",
+    R_WALL_COLLAPSED: "Wall Collapsed",
+    R_PRICE_RUNAWAY: "Price Runaway",
+    R_TIMEOUT: "Timeout",
+    R_WALL_BROKEN: "Wall Broken",
+    R_STOP_HIT: "Hard Stop Hit",
+}
+
+# --- СОСТОЯНИЕ ДЕТЕКТОРА ---
+S_AVG_BG = 0         # EMA фонового объема
+S_BG_READY = 1       # 1.0 после первого ненулевого фона
+S_CONFIRMS = 2       # Подтверждения стены подряд
+S_WALL_PRICE = 3     # Стена последнего ACT_STAGE / ACT_ENTER
+S_WALL_QTY = 4
+S_WALL_DEPTH = 5     # Номер уровня от лучшего (0 — на касании)
+S_ENTRY_TOUCH = 6    # Касание своей стороны на ACT_ENTER: от него меряется убегание цены
+STATE_SIZE = 7
+
+# --- ПАРАМЕТРЫ ---
+P_WALL_RATIO = 0
+P_MIN_WALL_USDT = 1
+P_VOL_ALPHA = 2
+P_TICK = 3
+P_STOP_LOSS_TICKS = 4
+P_CONFIRMS = 5
+P_COLLAPSE_RATIO = 6
+P_RUNAWAY_TICKS = 7
+P_ENTRY_TIMEOUT_SEC = 8
+P_SCAN_LEVELS = 9
+PARAMS_SIZE = 10
+
+BACKGROUND_LEVELS = 10   # Уровни 2-11
+WALL_ZONE_TICKS = 2      # Стена ищется в ±2 тика от цены входа-стены
+
+DEFAULT_CONFIRMS = 3
+DEFAULT_COLLAPSE_RATIO = 0.4
+DEFAULT_RUNAWAY_TICKS = 5
+DEFAULT_ENTRY_TIMEOUT_SEC = 30.0
+DEFAULT_SCAN_LEVELS = 5
+
+@njit(cache=True)
+def make_params(wall_ratio, min_wall_usdt, vol_alpha, tick, stop_loss_ticks,
+                confirms=DEFAULT_CONFIRMS, collapse_ratio=DEFAULT_COLLAPSE_RATIO,
+                runaway_ticks=DEFAULT_RUNAWAY_TICKS, entry_timeout_sec=DEFAULT_ENTRY_TIMEOUT_SEC,
+                scan_levels=DEFAULT_SCAN_LEVELS):
+    pr = np.zeros(PARAMS_SIZE)
+    pr[P_WALL_RATIO] = wall_ratio
+    pr[P_MIN_WALL_USDT] = min_wall_usdt
+    pr[P_VOL_ALPHA] = vol_alpha
+    pr[P_TICK] = tick
+    pr[P_STOP_LOSS_TICKS] = stop_loss_ticks
+    pr[P_CONFIRMS] = confirms
+    pr[P_COLLAPSE_RATIO] = collapse_ratio
+    pr[P_RUNAWAY_TICKS] = runaway_ticks
+    pr[P_ENTRY_TIMEOUT_SEC] = entry_timeout_sec
+    pr[P_SCAN_LEVELS] = max(scan_levels, 1)
+    return pr
+
+@njit(cache=True)
+def make_state():
+    return np.zeros(STATE_SIZE)
+
+@njit(cache=True)
+def background_from_levels(bid_levels, ask_levels):
+    """Средний объем уровней 2-11 обеих сторон; levels — объемы непустых уровней от лучшего вглубь."""
+    total = 0.0
+    n = 0
+    for levels in (bid_levels, ask_levels):
+        end = min(len(levels), BACKGROUND_LEVELS + 1)
+        for k in range(1, end):
+            total += levels[k]
+            n += 1
+    return total / n if n > 0 else 0.0
+
+@njit(cache=True)
+def update_background(st, pr, bg_vol):
+    if bg_vol <= 0.0:
+        return
+    if st[S_BG_READY] == 0.0:
+        st[S_AVG_BG] = bg_vol
+        st[S_BG_READY] = 1.0
+    else:
+        alpha = pr[P_VOL_ALPHA]
+        st[S_AVG_BG] = alpha * bg_vol + (1.0 - alpha) * st[S_AVG_BG]
+
+@njit(cache=True)
+def scan_walls(prices, qtys, threshold, min_wall_usdt, out_idx):
+    """
+    Кандидаты в стены среди уровней одной стороны (prices / qtys — от лучшего вглубь).
+    Пишет в out_idx номера уровней по убыванию объема (= отношения к фону), возвращает их число.
+    Номер уровня — расстояние от касания в уровнях.
+    """
+    mask = (qtys > threshold) & (prices * qtys > min_wall_usdt)
+    idx = np.flatnonzero(mask)
+    n = min(len(idx), len(out_idx))
+    if n == 0:
+        return 0
+    # Стабильная сортировка: при равных объемах ближний к касанию уровень первым
+    order = np.argsort(-qtys[idx], kind="mergesort")
+    for k in range(n):
+        out_idx[k] = idx[order[k]]
+    return n
+
+@njit(cache=True)
+def wall_step(st, pr, fsm, best_bid, best_ask, bid_px, bid_qty, ask_px, ask_qty, bg_vol,
+              side, wall_price, entry_price, zone_qty, elapsed_sec):
+    """
+    Один шаг ядра на апдейт стакана.
+    bid_px / bid_qty / ask_px / ask_qty — первые уровни сторон от лучшего вглубь
+    (используются первые P_SCAN_LEVELS).
+    side / wall_price / entry_price / zone_qty / elapsed_sec — контекст активной сделки
+    (для FSM_IDLE игнорируются). side: +1 Buy, -1 Sell.
+    Возвращает (action, side, reason); для ACT_STAGE / ACT_ENTER side — сторона стены,
+    сама стена — в st[S_WALL_PRICE / S_WALL_QTY / S_WALL_DEPTH].
+    """
+    update_background(st, pr, bg_vol)
+    if fsm == FSM_SHADOW:
+        return ACT_NONE, 0, R_NONE
+
+    tick = pr[P_TICK]
+    threshold = st[S_AVG_BG] * pr[P_WALL_RATIO]
+
+    if fsm == FSM_IDLE:
+        n = int(pr[P_SCAN_LEVELS])
+        top = np.empty(1, dtype=np.int64)
+        has_bid = scan_walls(bid_px[:n], bid_qty[:n], threshold, pr[P_MIN_WALL_USDT], top) > 0
+        bid_i = top[0]
+        has_ask = scan_walls(ask_px[:n], ask_qty[:n], threshold, pr[P_MIN_WALL_USDT], top) > 0
+        ask_i = top[0]
+
+        # Debounce: мерцающие заявки не дают сигнала
+        if has_bid or has_ask:
+            st[S_CONFIRMS] += 1.0
+        else:
+            st[S_CONFIRMS] = 0.0
+            return ACT_NONE, 0, R_NONE
+
+        # Обе стороны со стеной: берем более сильную (при равенстве — бид, как раньше)
+        wall_side = 1 if has_bid and (not has_ask or bid_qty[bid_i] >= ask_qty[ask_i]) else -1
+        if wall_side > 0:
+            st[S_WALL_PRICE], st[S_WALL_QTY], st[S_WALL_DEPTH] = bid_px[bid_i], bid_qty[bid_i], bid_i
+        else:
+            st[S_WALL_PRICE], st[S_WALL_QTY], st[S_WALL_DEPTH] = ask_px[ask_i], ask_qty[ask_i], ask_i
+        if st[S_CONFIRMS] >= pr[P_CONFIRMS]:
+            st[S_CONFIRMS] = 0.0
+            st[S_ENTRY_TOUCH] = best_bid if wall_side > 0 else best_ask
+            return ACT_ENTER, wall_side, R_NONE
+        if st[S_CONFIRMS] == pr[P_CONFIRMS] - 1.0:
+            return ACT_STAGE, wall_side, R_NONE
+        return ACT_NONE, 0, R_NONE
+
+    if fsm == FSM_ORDER_PLACED:
+        if zone_qty < threshold * pr[P_COLLAPSE_RATIO]:
+            return ACT_CANCEL_ENTRY, side, R_WALL_COLLAPSED
+        # Вход в глубине стоит на тик впереди стены, ниже касания: меряем от касания при входе.
+        # Без него (восстановленная сделка) — от цены входа, как для входа на касании
+        ref = st[S_ENTRY_TOUCH] if st[S_ENTRY_TOUCH] > 0.0 else entry_price
+        runaway = pr[P_RUNAWAY_TICKS] * tick
+        if (side > 0 and best_bid > ref + runaway) or (side < 0 and best_ask < ref - runaway):
+            return ACT_CANCEL_ENTRY, side, R_PRICE_RUNAWAY
+        if elapsed_sec > pr[P_ENTRY_TIMEOUT_SEC]:
+            return ACT_CANCEL_ENTRY, side, R_TIMEOUT
+        return ACT_NONE, side, R_NONE
+
+    if fsm == FSM_IN_POSITION:
+        exit_price = best_bid if side > 0 else best_ask
+        if (side > 0 and exit_price < wall_price) or (side < 0 and exit_price > wall_price):
+            return ACT_EXIT, side, R_WALL_BROKEN
+        pnl_ticks = (exit_price - entry_price) * side / tick
+        if pnl_ticks <= -pr[P_STOP_LOSS_TICKS]:
+            return ACT_EXIT, side, R_STOP_HIT
+        return ACT_NONE, side, R_NONE
+
+    return ACT_NONE, 0, R_NONE
+
+@njit(cache=True)
+def book_levels(book, best, direction, anchor, tick, out_px, out_qty):
+    """
+    Непустые уровни строки стакана на массиве тиков (ArrayOrderBook) от лучшего индекса вглубь
+    (direction -1 — биды, +1 — аски). Возвращает число уровней в out_px / out_qty.
+    """
+    n = 0
+    i = best
+    while 0 <= i < len(book) and n < len(out_qty):
+        q = book[i]
+        if q > 0.0:
+            out_px[n] = (anchor + i) * tick
+            out_qty[n] = q
+            n += 1
+        i += direction
+    return n
+
+@njit(cache=True)
+def zone_from_book(book, anchor, tick, wall_price):
+    """Максимальный объем в ±WALL_ZONE_TICKS от стены (как WallDetector._zone_volume)."""
+    c = int(round(wall_price / tick)) - anchor
+    zone = 0.0
+    for i in range(max(c - WALL_ZONE_TICKS, 0), min(c + WALL_ZONE_TICKS + 1, len(book))):
+        if book[i] > zone:
+            zone = book[i]
+    return zone
+
+@njit(cache=True)
+def wall_step_batch(states, params, rows, bid_books, ask_books, best_bid_i, best_ask_i, anchor,
+                    fsm, side, wall_price, entry_price, elapsed_sec, out, out_f):
+    """
+    wall_step по пачке символов за один вызов прямо по стаканам-строкам.
+    states / params / bid_books / ask_books — матрицы (строка = символ), rows — строки пачки.
+    Уровни, фон (2-11) и зона стены снимаются со строк стакана здесь же.
+    out[i] = (action, side, reason); out_f[i] = (best_bid, best_ask, zone_qty).
+    Строки с пустой стороной стакана пропускаются (ACT_NONE).
+    """
+    width = BACKGROUND_LEVELS + 1
+    for i in range(len(rows)):
+        if best_bid_i[i] < 0 or best_ask_i[i] < 0:
+            continue
+        r = rows[i]
+        tick = params[r, P_TICK]
+        n_levels = max(width, int(params[r, P_SCAN_LEVELS]))
+        bid_px = np.empty(n_levels)
+        bid_qty = np.empty(n_levels)
+        ask_px = np.empty(n_levels)
+        ask_qty = np.empty(n_levels)
+        nb = book_levels(bid_books[r], best_bid_i[i], -1, anchor[i], tick, bid_px, bid_qty)
+        na = book_levels(ask_books[r], best_ask_i[i], 1, anchor[i], tick, ask_px, ask_qty)
+        bg_vol = background_from_levels(bid_qty[:min(nb, width)], ask_qty[:min(na, width)])
+
+        zone = 0.0
+        if fsm[i] == FSM_ORDER_PLACED:
+            zone = zone_from_book(bid_books[r] if side[i] > 0 else ask_books[r], anchor[i], tick, wall_price[i])
+
+        action, sig_side, reason = wall_step(
+            states[r], params[r], fsm[i], bid_px[0], ask_px[0],
+            bid_px[:nb], bid_qty[:nb], ask_px[:na], ask_qty[:na],
+            bg_vol, side[i], wall_price[i], entry_price[i], zone, elapsed_sec[i]
+        )
+        out[i, 0] = action
+        out[i, 1] = sig_side
+        out[i, 2] = reason
+        out_f[i, 0] = bid_px[0]
+        out_f[i, 1] = ask_px[0]
+        out_f[i, 2] = zone
@@ -0,0 +1,34 @@
+# hft_strategy/workers/protocol.py
+"""
+Протокол родитель <-> воркер (multiprocessing.Queue, pickle).
+C++ объекты pybind не сериализуются, поэтому приватные события передаются словарями полей.
+"""
+from types import SimpleNamespace
+from typing import Iterable
+
+# Родитель -> воркер
+CMD_ACTIVATE = "activate"    # symbol, sym_id, cfg, shadow
+CMD_PROMOTE = "promote"      # symbol (shadow -> торговля)
+CMD_DRAIN = "drain"          # symbol (graceful stop)
+CMD_UNDRAIN = "undrain"      # symbol (отмена graceful stop)
+CMD_REMOVE = "remove"        # symbol
+CMD_EXECUTION = "execution"  # data
+CMD_ORDER = "order"          # data
+CMD_POSITION = "position"    # data
+CMD_PARAMS = "params"        # changes {symbol: поля}, risk (hot-reload параметров)
+CMD_STOP = "stop"
+
+# Воркер -> родитель
+MSG_HEARTBEAT = "heartbeat"
+
+EXECUTION_FIELDS = ("symbol", "side", "order_id", "order_link_id", "exec_id", "exec_type",
+                    "exec_price", "exec_qty", "is_maker", "timestamp")
+ORDER_FIELDS = ("symbol", "order_id", "order_link_id", "side", "order_status", "order_type",
+                "price", "qty", "cum_exec_qty", "avg_price", "reduce_only", "timestamp")
+POSITION_FIELDS = ("symbol", "side", "size", "entry_price", "mark_price", "unrealised_pnl", "timestamp")
+
+def pack_event(obj, fields: Iterable[str]) -> dict:
+    return {f: getattr(obj, f) for f in fields}
+
+def unpack_event(data: dict) -> SimpleNamespace:
+    return SimpleNamespace(**data)
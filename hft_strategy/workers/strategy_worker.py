@@ -0,0 +1,385 @@
+# hft_strategy/workers/strategy_worker.py
+import asyncio
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Set
+
+from hft_strategy.workers import protocol
+
+HEARTBEAT_INTERVAL_SEC = 1.0
+RING_IDLE_SLEEP_SEC = 0.0002  # Пустое кольцо: короткий сон вместо busy-loop на 100% CPU
+EARLY_TRADES_MAX = 1024       # Сделок на символ, придержанных до CMD_ACTIVATE
+
+def worker_main(worker_id: int, ring_name: str, cmd_queue, status_queue, settings: Dict):
+    """Точка входа процесса-воркера (multiprocessing spawn)."""
+    sys.path.append(os.getcwd())
+    from hft_strategy.infrastructure.event_loop import run as run_event_loop
+
+    _setup_worker_logging(worker_id, settings.get("log_level", "INFO"))
+    worker = StrategyWorker(worker_id, ring_name, cmd_queue, status_queue, batch_eval=settings.get("batch_eval", False),
+                            num_workers=settings.get("num_workers", 1))
+    run_event_loop(worker.run(), loop=settings.get("event_loop"))
+
+def _setup_worker_logging(worker_id: int, level: str):
+    os.makedirs("logs", exist_ok=True)
+    formatter = logging.Formatter(
+        f'%(asctime)s.%(msecs)03d | %(levelname)-8s | W{worker_id} | %(name)s | %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    handlers = [
+        logging.FileHandler(os.path.join("logs", f"hft_worker_{worker_id}.log"), encoding="utf-8"),
+        logging.StreamHandler(sys.stdout),
+    ]
+    for h in handlers:
+        h.setFormatter(formatter)
+    logging.basicConfig(level=level, handlers=handlers, force=True)
+
+class _EarlyFrames:
+    """
+    Кадры символа, пришедшие по кольцу раньше CMD_ACTIVATE (кольцо быстрее cmd_queue,
+    а после рестарта воркер активирует символы только после коннекта gateway и сверки ledger).
+    Стакан копится так же, как в mailbox (снапшот ресинхронизации + дельты), сделки — ограниченный FIFO.
+    """
+    __slots__ = ("depth", "trades")
+
+    def __init__(self):
+        from hft_strategy.infrastructure.event_dispatcher import DepthUpdate
+        self.depth = DepthUpdate(None)
+        self.trades = deque(maxlen=EARLY_TRADES_MAX)
+
+    def post(self, symbol: str, on_depth, on_trade):
+        for trade in self.trades:
+            trade.symbol = symbol
+            on_trade(trade)
+        if self.depth.merged:
+            from hft_strategy.infrastructure.shm_ring import DepthFrame, Level
+            d = self.depth
+            on_depth(DepthFrame(symbol, d.is_snapshot, d.timestamp, d.local_timestamp,
+                                [Level(*lvl) for lvl in d.bids], [Level(*lvl) for lvl in d.asks]))
+
+class StrategyWorker:
+    """
+    Процесс с группой стратегий и своим GIL.
+    Стакан читается из shared-memory кольца (пишет стример родителя),
+    команды и приватные события приходят через cmd_queue.
+    Ордера уходят через собственный OrderGateway воркера; нативные стопы — через свой
+    TriggerEngine, который кормится стаканом из кольца и служит референсом price band.
+    Риск-гейты воркеров не видят ордера друг друга, поэтому лимиты аккаунта (частота, суммарный
+    notional, открытые позиции, дневной убыток) делятся между воркерами: каждый гейт считает
+    только позиции своих символов против своей доли. Сумма долей не превышает лимит аккаунта.
+    """
+    def __init__(self, worker_id: int, ring_name: str, cmd_queue, status_queue, batch_eval: bool = False,
+                 num_workers: int = 1):
+        import hft_core
+        from hft_strategy.config import load_config, SNAPSHOT_DIR, SNAPSHOT_INTERVAL_SEC, SNAPSHOT_MAX_AGE_SEC
+        from hft_strategy.infrastructure.execution import BybitExecutionHandler
+        from hft_strategy.infrastructure.event_dispatcher import MailboxDispatcher
+        from hft_strategy.infrastructure.shm_ring import ShmRing
+        from hft_strategy.infrastructure.task_supervisor import TaskSupervisor
+        from hft_strategy.services.account_ledger import AccountLedger
+        from hft_strategy.services.batch_evaluator import BatchWallEvaluator
+        from hft_strategy.infrastructure.timer_wheel import TimerWheel
+        from hft_strategy.infrastructure.bar_builder import BarBuilder
+        from hft_strategy.services.state_snapshot import StateSnapshotStore
+
+        self.worker_id = worker_id
+        self.logger = logging.getLogger(f"Worker-{worker_id}")
+        self.cmd_queue = cmd_queue
+        self.status_queue = status_queue
+        self.num_workers = max(1, num_workers)
+
+        self.config = load_config()
+        self.ring = ShmRing(ring_name)
+
+        self.gateway = hft_core.OrderGateway(self.config.api_key, self.config.api_secret, self.config.testnet)
+        self.trigger_engine = hft_core.TriggerEngine(self.gateway)
+        self.gateway.set_reference_book(self.trigger_engine)
+        self.execution_handler = BybitExecutionHandler(
+            api_key=self.config.api_key,
+            api_secret=self.config.api_secret,
+            sandbox=self.config.testnet
+        )
+        # Резервы входов есть только у ордеров этого воркера: чужие orderLinkId гейт игнорирует
+        self.ledger = AccountLedger(self.execution_handler, position_listener=self._on_position,
+                                    order_listener=self.gateway.update_reservation)
+        self.dispatcher = MailboxDispatcher()
+        self.trigger_engine.set_trigger_callback(self.dispatcher.post_trigger)
+        self.batch = BatchWallEvaluator() if batch_eval else None
+        self.timers = TimerWheel()
+        self.bars = BarBuilder(period=self.config.strategy.natr_period)
+        self.snapshots = StateSnapshotStore(SNAPSHOT_DIR, SNAPSHOT_INTERVAL_SEC, SNAPSHOT_MAX_AGE_SEC)
+        self.tasks = TaskSupervisor()
+        self.notifier = None
+
+        self.strategies: Dict[str, object] = {}
+        # sym_id -> symbol: читает поток кольца, пишет event loop. Лок нужен только на медленном пути
+        # (кадр неизвестного sym_id), чтобы кадр не потерялся между проверкой и активацией
+        self._symbols_by_id: Dict[int, str] = {}
+        self._symbols_lock = threading.Lock()
+        self._early: Dict[int, _EarlyFrames] = {}
+        self._retired: Set[int] = set()
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop = threading.Event()
+        self._done: Optional[asyncio.Event] = None
+
+    async def run(self):
+        from hft_strategy.services.notification import TelegramNotifier
+
+        self.loop = asyncio.get_running_loop()
+        self._done = asyncio.Event()
+
+        tg_token, chat_id = os.getenv("TG_NOTIFIER_TOKEN"), os.getenv("TG_CHAT_ID")
+        if tg_token and chat_id:
+            self.notifier = TelegramNotifier(token=tg_token, chat_id=chat_id)
+            await self.notifier.start()
+
+        self._apply_risk_limits()
+        self.gateway.connect()
+        await asyncio.sleep(1.0)
+        await self.ledger.start()
+        await self._seed_daily_pnl()
+
+        threads = [
+            threading.Thread(target=self._ring_reader, name=f"ring-{self.worker_id}", daemon=True),
+            threading.Thread(target=self._cmd_reader, name=f"cmd-{self.worker_id}", daemon=True),
+        ]
+        for t in threads:
+            t.start()
+
+        heartbeat = asyncio.create_task(self._heartbeat_loop())
+        self.snapshots.start(lambda: self.strategies)
+        self.logger.info(f"👷 Worker {self.worker_id} ready (pid {os.getpid()})")
+
+        try:
+            await self._done.wait()
+        finally:
+            self._stop.set()
+            heartbeat.cancel()
+            await self.snapshots.stop(self.strategies)
+            await self.dispatcher.close()
+            if self.batch: await self.batch.stop()
+            await self.timers.stop()
+            await self.tasks.close()
+            await self.ledger.stop()
+            self.gateway.stop()
+            if self.notifier:
+                await self.notifier.stop()
+            self.ring.close()
+            self.logger.info(f"👋 Worker {self.worker_id} stopped")
+
+    def _apply_risk_limits(self):
+        import hft_core
+        risk, n = self.config.risk, self.num_workers
+        limits = hft_core.RiskLimits()
+        for name, value in vars(risk).items():
+            setattr(limits, name, value)
+        # Лимиты аккаунта — доля воркера. Лимиты на символ не делим: символ живет в одном воркере
+        limits.max_orders_per_sec = risk.max_orders_per_sec / n
+        limits.max_total_notional = risk.max_total_notional / n
+        limits.max_daily_loss = risk.max_daily_loss / n
+        if risk.max_open_positions > 0:
+            # Остаток слотов — первым воркерам; доля 0 (слотов меньше, чем воркеров) -> -1: новых позиций нет
+            share = risk.max_open_positions // n + (1 if self.worker_id < risk.max_open_positions % n else 0)
+            limits.max_open_positions = share or -1
+        self.gateway.set_risk_limits(limits)
+
+    async def _seed_daily_pnl(self):
+        """Убыток за день переживает рестарт; лимит воркера — доля аккаунта, поэтому и сид — доля."""
+        pnl = await self.ledger.realized_pnl_today()
+        if pnl is None: return
+        self.gateway.set_daily_pnl(pnl / self.num_workers)
+        self.logger.info(f"📅 Daily PnL seeded: {pnl:.2f} USDT (worker share {pnl / self.num_workers:.2f})")
+
+    def _on_position(self, symbol: str, size: float, entry_price: float):
+        """Ledger — копия всего аккаунта; в гейт воркера идут только позиции его символов."""
+        if symbol in self.strategies:
+            self.gateway.update_position(symbol, size, entry_price)
+
+    # --- ПОТОКИ ВВОДА ---
+    def _ring_reader(self):
+        from hft_strategy.infrastructure.shm_ring import frame_sym_id
+
+        while not self._stop.is_set():
+            slot = self.ring.peek()
+            if slot is None:
+                time.sleep(RING_IDLE_SLEEP_SEC)
+                continue
+            offset = slot[0]
+            sym_id = frame_sym_id(self.ring, offset)
+            symbol = self._symbols_by_id.get(sym_id)
+            if symbol is not None:
+                self._post_frame(offset, symbol)
+            else:
+                self._hold_early(offset, sym_id)
+            self.ring.advance()
+
+    def _post_frame(self, offset: int, symbol: str):
+        from hft_strategy.infrastructure.shm_ring import KIND_TRADE, frame_kind, read_depth, read_trade
+
+        if frame_kind(self.ring, offset) == KIND_TRADE:
+            self.dispatcher.post_trade(read_trade(self.ring, offset, symbol))
+        else:
+            self._on_depth(read_depth(self.ring, offset, symbol))
+
+    def _on_depth(self, frame):
+        # Сначала стопы (C++ без GIL), потом стратегия — как у стримера в родителе
+        self.trigger_engine.on_levels(frame.symbol, frame.is_snapshot, frame.bids, frame.asks)
+        self.dispatcher.post_depth(frame)
+
+    def _hold_early(self, offset: int, sym_id: int):
+        """Кадр символа, который еще не активирован: придерживаем до CMD_ACTIVATE (снапшот ресинка в их числе)."""
+        from hft_strategy.infrastructure.shm_ring import KIND_TRADE, frame_kind, read_depth, read_trade
+
+        with self._symbols_lock:
+            symbol = self._symbols_by_id.get(sym_id)
+            if symbol is not None:
+                # Активация успела между проверкой и локом: ее буфер уже отдан, этот кадр — следом
+                self._post_frame(offset, symbol)
+                return
+            if sym_id in self._retired: return  # Хвост удаленного символа
+            early = self._early.get(sym_id)
+            if early is None:
+                early = self._early[sym_id] = _EarlyFrames()
+            if frame_kind(self.ring, offset) == KIND_TRADE:
+                early.trades.append(read_trade(self.ring, offset, None))
+            else:
+                early.depth.merge(read_depth(self.ring, offset, None))
+
+    def _cmd_reader(self):
+        while not self._stop.is_set():
+            try:
+                msg = self.cmd_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break  # Родитель умер
+            self.loop.call_soon_threadsafe(self._handle_cmd, msg)
+
+    # --- КОМАНДЫ (event loop) ---
+    def _handle_cmd(self, msg: Dict):
+        cmd = msg.get("cmd")
+        try:
+            if cmd == protocol.CMD_EXECUTION:
+                event = protocol.unpack_event(msg["data"])
+                self.ledger.on_execution(event)
+                self.dispatcher.post_execution(event)
+            elif cmd == protocol.CMD_ORDER:
+                self.ledger.on_order(protocol.unpack_event(msg["data"]))
+            elif cmd == protocol.CMD_POSITION:
+                self.ledger.on_position(protocol.unpack_event(msg["data"]))
+            elif cmd == protocol.CMD_ACTIVATE:
+                self._activate(msg["symbol"], msg["sym_id"], msg["cfg"], msg.get("shadow", False))
+            elif cmd == protocol.CMD_PROMOTE:
+                strategy = self.strategies.get(msg["symbol"])
+                if strategy: strategy.promote()
+            elif cmd == protocol.CMD_DRAIN:
+                strategy = self.strategies.get(msg["symbol"])
+                if strategy: strategy.set_graceful_stop()
+            elif cmd == protocol.CMD_UNDRAIN:
+                strategy = self.strategies.get(msg["symbol"])
+                if strategy: strategy.cancel_graceful_stop()
+            elif cmd == protocol.CMD_PARAMS:
+                self._update_params(msg["changes"], msg.get("risk"))
+            elif cmd == protocol.CMD_REMOVE:
+                self.tasks.spawn("worker", self._remove(msg["symbol"]), name=f"remove-{msg['symbol']}")
+            elif cmd == protocol.CMD_STOP:
+                self._done.set()
+        except Exception as e:
+            self.logger.exception(f"❌ Command {cmd} failed: {e}")
+
+    def _activate(self, symbol: str, sym_id: int, cfg: Dict, shadow: bool = False):
+        from hft_strategy.domain.strategy_config import StrategyParameters
+        from hft_strategy.strategies.adaptive_live_strategy import AdaptiveWallStrategy
+
+        if symbol in self.strategies: return
+        strategy = AdaptiveWallStrategy(
+            executor=self.execution_handler,
+            cfg=StrategyParameters(**cfg),
+            gateway=self.gateway,
+            notifier=self.notifier,
+            ledger=self.ledger,
+            triggers=self.trigger_engine,
+            tasks=self.tasks,
+            shadow=shadow,
+            batch=self.batch,
+            timers=self.timers,
+            bars=self.bars
+        )
+        self.snapshots.restore(strategy)
+        self.strategies[symbol] = strategy
+        self.dispatcher.register(symbol, strategy)
+        # Позиция, открытая до активации (рестарт воркера), сразу занимает долю лимитов
+        pos = self.ledger.position(symbol)
+        self.gateway.update_position(symbol, pos.size, pos.avg_entry_price)
+        # Маппинг последним: кадры символа начинают читаться, когда mailbox уже есть.
+        # Придержанные кадры отдаются под тем же локом, что и публикация маппинга — раньше новых
+        with self._symbols_lock:
+            early = self._early.pop(sym_id, None)
+            if early:
+                early.post(symbol, self._on_depth, self.dispatcher.post_trade)
+            self._symbols_by_id[sym_id] = symbol
+        self.logger.info(f"✨ {symbol} activated in worker {self.worker_id}")
+
+    def _update_params(self, changes: Dict, risk: Optional[Dict]):
+        from hft_strategy.config import RiskConfig
+
+        updated = 0
+        for symbol, diff in changes.items():
+            strategy = self.strategies.get(symbol)
+            if strategy:
+                strategy.update_params(diff)
+                updated += 1
+        if risk:
+            self.config.risk = RiskConfig.from_dict(risk)
+            self._apply_risk_limits()
+        self.logger.info(f"🔁 Worker {self.worker_id}: params reloaded for {updated} strategies")
+
+    async def _remove(self, symbol: str):
+        with self._symbols_lock:
+            for sym_id, sym in list(self._symbols_by_id.items()):
+                if sym == symbol:
+                    del self._symbols_by_id[sym_id]
+                    # sym_id не переиспользуются: хвост кадров из кольца больше не придерживаем
+                    self._retired.add(sym_id)
+        await self.dispatcher.unregister(symbol)
+        strategy = self.strategies.pop(symbol, None)
+        if strategy:
+            await strategy.close()
+        self.trigger_engine.clear_symbol(symbol)
+        # Доля лимитов освобождается: символ может уйти в другой воркер
+        self.gateway.update_position(symbol, 0.0, 0.0)
+        self.logger.info(f"🗑️ {symbol} removed from worker {self.worker_id}")
+
+    async def _heartbeat_loop(self):
+        while True:
+            try:
+                self.status_queue.put_nowait({
+                    "type": protocol.MSG_HEARTBEAT,
+                    "worker_id": self.worker_id,
+                    "pid": os.getpid(),
+                    "ts": time.time(),
+                    "symbols": {
+                        sym: {
+                            "can_be_deleted": s.can_be_deleted,
+                            "state": s.trade_manager.state.name,
+                            "shadow": s.shadow,
+                            "natr": self.bars.natr(sym),
+                        } for sym, s in self.strategies.items()
+                    },
+                    "ring_pending": self.ring.pending,
+                    "ring_dropped": self.ring.dropped,
+                    "mailboxes": self.dispatcher.stats(),
+                    "tasks": self.tasks.counts(),
+                })
+                await asyncio.sleep(HEARTBEAT_INTERVAL_SEC)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.logger.error(f"Heartbeat error: {e}")
+                await asyncio.sleep(HEARTBEAT_INTERVAL_SEC)
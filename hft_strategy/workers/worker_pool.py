@@ -0,0 +1,313 @@
+# hft_strategy/workers/worker_pool.py
+import asyncio
+import logging
+import multiprocessing as mp
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Set
+
+from hft_strategy.infrastructure.shm_ring import ShmRing, write_depth, write_trade
+from hft_strategy.workers import protocol
+from hft_strategy.workers.strategy_worker import worker_main
+
+WORKER_HEARTBEAT_TIMEOUT_SEC = 10.0
+WORKER_MONITOR_INTERVAL_SEC = 1.0
+WORKER_STARTUP_GRACE_SEC = 30.0  # Импорт, коннект gateway и сверка ledger до первого heartbeat
+RESYNC_SNAPSHOT_LEVELS = 50
+
+@dataclass
+class WorkerHandle:
+    worker_id: int
+    process: mp.Process
+    ring: ShmRing
+    cmd_queue: object
+    ring_lock: threading.Lock = field(default_factory=threading.Lock)
+    resync: Set[str] = field(default_factory=set)  # Символы с потерянной дельтой стакана (под ring_lock)
+    resyncs: int = 0
+    last_heartbeat: float = 0.0
+    status: Dict = field(default_factory=dict)
+    restarts: int = 0
+    closed: bool = False
+
+class RemoteStrategy:
+    """
+    Прокси стратегии в процессе-воркере: интерфейс, который использует ротация
+    BotOrchestrator (set_graceful_stop / can_be_deleted). Состояние берется из heartbeat.
+    """
+    def __init__(self, pool: "WorkerPool", symbol: str):
+        self.pool = pool
+        self.symbol = symbol
+        self.is_shutting_down = False
+
+    def promote(self):
+        self.pool.promote(self.symbol)
+
+    def set_graceful_stop(self):
+        self.is_shutting_down = True
+        self.pool.drain(self.symbol)
+
+    def cancel_graceful_stop(self):
+        self.is_shutting_down = False
+        self.pool.undrain(self.symbol)
+
+    @property
+    def can_be_deleted(self) -> bool:
+        # Heartbeat отстает от отмены drain: без своего флага GC снес бы возвращенную монету
+        if not self.is_shutting_down: return False
+        status = self.pool.symbol_status(self.symbol)
+        return bool(status and status.get("can_be_deleted"))
+
+class WorkerPool:
+    """
+    Пул процессов-стратегий. Родитель держит стримеры и раскладывает стакан
+    по SPSC-кольцам воркеров (shared memory), команды и приватные события — через очереди.
+    Мертвый или молчащий воркер перезапускается с новым кольцом, его символы
+    переактивируются и получают snapshot стакана из TriggerEngine.
+    Дельта, не влезшая в полное кольцо, не теряется молча: следующий апдейт символа
+    уходит снапшотом того же стакана TriggerEngine.
+    """
+    def __init__(self, num_workers: int, trigger_engine, settings: Optional[Dict] = None):
+        self.logger = logging.getLogger("WorkerPool")
+        self.num_workers = num_workers
+        self.trigger_engine = trigger_engine
+        self.settings = settings or {}
+
+        self._ctx = mp.get_context("spawn")
+        self._status_queue = self._ctx.Queue()
+        self._workers: Dict[int, WorkerHandle] = {}
+
+        # symbol -> (worker_id, sym_id, cfg, shadow); route читается потоком стримера (dict.get атомарен)
+        self._assignments: Dict[str, tuple] = {}
+        self._route: Dict[str, tuple] = {}
+        self._next_sym_id = 1
+
+        self._monitor_task: Optional[asyncio.Task] = None
+        self._running = False
+
+    # --- LIFECYCLE ---
+    def start(self):
+        self._running = True
+        for worker_id in range(self.num_workers):
+            self._workers[worker_id] = self._spawn(worker_id)
+        self._monitor_task = asyncio.create_task(self._monitor_loop())
+        self.logger.info(f"👷 Started {self.num_workers} strategy workers")
+
+    def _spawn(self, worker_id: int, restarts: int = 0) -> WorkerHandle:
+        ring = ShmRing(create=True)
+        cmd_queue = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=worker_main,
+            args=(worker_id, ring.name, cmd_queue, self._status_queue, self.settings),
+            name=f"hft-worker-{worker_id}",
+            daemon=True
+        )
+        process.start()
+        return WorkerHandle(worker_id, process, ring, cmd_queue,
+                            last_heartbeat=time.time() + WORKER_STARTUP_GRACE_SEC, restarts=restarts)
+
+    async def stop(self):
+        self._running = False
+        if self._monitor_task:
+            self._monitor_task.cancel()
+            try:
+                await self._monitor_task
+            except asyncio.CancelledError:
+                pass
+
+        for handle in self._workers.values():
+            self._send(handle, {"cmd": protocol.CMD_STOP})
+        deadline = time.time() + 5.0
+        for handle in self._workers.values():
+            await asyncio.to_thread(handle.process.join, max(0.0, deadline - time.time()))
+            if handle.process.is_alive():
+                handle.process.terminate()
+            with handle.ring_lock:
+                self._close_ring(handle)
+        self._workers.clear()
+        self._route.clear()
+
+    # --- SYMBOLS ---
+    def assign(self, symbol: str, cfg: Dict, shadow: bool = False) -> RemoteStrategy:
+        """Назначает символ наименее загруженному воркеру."""
+        load = {wid: 0 for wid in self._workers}
+        for wid, *_ in self._assignments.values():
+            load[wid] += 1
+        worker_id = min(load, key=load.get)
+
+        sym_id = self._next_sym_id
+        self._next_sym_id += 1
+        self._assignments[symbol] = (worker_id, sym_id, cfg, shadow)
+        self._activate_on(self._workers[worker_id], symbol, sym_id, cfg, shadow)
+
+        self.logger.info(f"📦 {symbol} -> worker {worker_id}")
+        return RemoteStrategy(self, symbol)
+
+    def _activate_on(self, handle: WorkerHandle, symbol: str, sym_id: int, cfg: Dict, shadow: bool):
+        self._send(handle, {"cmd": protocol.CMD_ACTIVATE, "symbol": symbol, "sym_id": sym_id,
+                            "cfg": cfg, "shadow": shadow})
+        self._route[symbol] = (handle, sym_id)
+        self._resync(handle, symbol, sym_id)
+
+    def _resync(self, handle: WorkerHandle, symbol: str, sym_id: int):
+        # Символ уже в стриме (рестарт воркера): отдаем текущий стакан, дальше пойдут дельты.
+        # Кадр может обогнать CMD_ACTIVATE — воркер придерживает его до активации
+        with handle.ring_lock:
+            if not handle.closed:
+                self._write_snapshot(handle, symbol, sym_id)
+
+    def _write_snapshot(self, handle: WorkerHandle, symbol: str, sym_id: int):
+        """Под ring_lock. Не влез — символ остается в resync и снапшот повторится на следующем апдейте."""
+        snap = self.trigger_engine.snapshot(symbol, RESYNC_SNAPSHOT_LEVELS)
+        if not (snap.bids or snap.asks) or write_depth(handle.ring, sym_id, snap):
+            handle.resync.discard(symbol)
+        else:
+            handle.resync.add(symbol)
+
+    def promote(self, symbol: str):
+        entry = self._assignments.get(symbol)
+        if entry:
+            # Рестарт воркера поднимет символ уже торгующим
+            self._assignments[symbol] = entry[:3] + (False,)
+            self._send(self._workers[entry[0]], {"cmd": protocol.CMD_PROMOTE, "symbol": symbol})
+
+    def drain(self, symbol: str):
+        entry = self._assignments.get(symbol)
+        if entry:
+            self._send(self._workers[entry[0]], {"cmd": protocol.CMD_DRAIN, "symbol": symbol})
+
+    def undrain(self, symbol: str):
+        entry = self._assignments.get(symbol)
+        if entry:
+            self._send(self._workers[entry[0]], {"cmd": protocol.CMD_UNDRAIN, "symbol": symbol})
+
+    def remove(self, symbol: str):
+        entry = self._assignments.pop(symbol, None)
+        self._route.pop(symbol, None)
+        if entry and entry[0] in self._workers:
+            self._send(self._workers[entry[0]], {"cmd": protocol.CMD_REMOVE, "symbol": symbol})
+
+    def symbol_status(self, symbol: str) -> Optional[Dict]:
+        entry = self._assignments.get(symbol)
+        if not entry: return None
+        handle = self._workers.get(entry[0])
+        if not handle: return None
+        return handle.status.get("symbols", {}).get(symbol)
+
+    # --- ROUTING (поток C++ стримера) ---
+    def route_depth(self, raw):
+        target = self._route.get(raw.symbol)
+        if target is None: return
+        handle, sym_id = target
+        with handle.ring_lock:
+            if handle.closed: return
+            if raw.symbol in handle.resync:
+                # Стакан TriggerEngine уже включает этот апдейт (on_depth до колбэка): отдаем его целиком
+                self._write_snapshot(handle, raw.symbol, sym_id)
+                if raw.symbol not in handle.resync:
+                    handle.resyncs += 1
+            elif not write_depth(handle.ring, sym_id, raw):
+                handle.resync.add(raw.symbol)
+
+    def route_trade(self, tick):
+        target = self._route.get(tick.symbol)
+        if target is None: return
+        handle, sym_id = target
+        with handle.ring_lock:
+            if not handle.closed:
+                write_trade(handle.ring, sym_id, tick)
+
+    def broadcast(self, cmd: str, data: Dict):
+        # Приватные события нужны всем: ledger в каждом воркере — полная копия аккаунта
+        msg = {"cmd": cmd, "data": data}
+        for handle in list(self._workers.values()):
+            self._send(handle, msg)
+
+    def strategy_config(self, symbol: str) -> Optional[Dict]:
+        entry = self._assignments.get(symbol)
+        return entry[2] if entry else None
+
+    def update_params(self, changes: Dict[str, Dict], risk: Optional[Dict] = None):
+        """Hot-reload (symbol -> поля): воркеры подменяют параметры стратегий; перезапущенный воркер получит уже новые."""
+        for symbol, diff in changes.items():
+            entry = self._assignments.get(symbol)
+            if entry: entry[2].update(diff)
+        msg = {"cmd": protocol.CMD_PARAMS, "changes": changes, "risk": risk}
+        for handle in list(self._workers.values()):
+            self._send(handle, msg)
+
+    def _send(self, handle: WorkerHandle, msg: Dict):
+        try:
+            handle.cmd_queue.put_nowait(msg)
+        except Exception as e:
+            self.logger.error(f"❌ Worker {handle.worker_id} cmd failed: {e}")
+
+    # --- HEALTH ---
+    async def _monitor_loop(self):
+        while self._running:
+            try:
+                await asyncio.sleep(WORKER_MONITOR_INTERVAL_SEC)
+                self._drain_status()
+
+                now = time.time()
+                for worker_id, handle in list(self._workers.items()):
+                    silent = now - handle.last_heartbeat > WORKER_HEARTBEAT_TIMEOUT_SEC
+                    if not handle.process.is_alive() or silent:
+                        reason = "silent" if handle.process.is_alive() else f"exit code {handle.process.exitcode}"
+                        self.logger.error(f"💀 Worker {worker_id} is down ({reason}). Restarting...")
+                        self._restart(handle)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.logger.exception(f"Worker monitor error: {e}")
+
+    def _drain_status(self):
+        while True:
+            try:
+                msg = self._status_queue.get_nowait()
+            except queue.Empty:
+                return
+            if msg.get("type") != protocol.MSG_HEARTBEAT: continue
+            handle = self._workers.get(msg["worker_id"])
+            if handle and msg["pid"] == handle.process.pid:
+                handle.last_heartbeat = msg["ts"]
+                handle.status = msg
+                if msg.get("ring_dropped"):
+                    self.logger.warning(f"⚠️ Worker {handle.worker_id} ring dropped {msg['ring_dropped']} frames")
+
+    def _restart(self, old: WorkerHandle):
+        if old.process.is_alive():
+            old.process.kill()
+        old.process.join(timeout=1.0)
+
+        # Новый handle публикуется в route до закрытия старого кольца
+        handle = self._spawn(old.worker_id, restarts=old.restarts + 1)
+        self._workers[old.worker_id] = handle
+        for symbol, (wid, sym_id, cfg, shadow) in self._assignments.items():
+            if wid == old.worker_id:
+                self._activate_on(handle, symbol, sym_id, cfg, shadow)
+
+        with old.ring_lock:
+            self._close_ring(old)
+
+    @staticmethod
+    def _close_ring(handle: WorkerHandle):
+        handle.closed = True
+        try:
+            handle.ring.close()
+        except Exception:
+            pass
+
+    def stats(self) -> Dict[int, Dict]:
+        return {
+            wid: {
+                "alive": h.process.is_alive(),
+                "restarts": h.restarts,
+                "symbols": len(h.status.get("symbols", {})),
+                "ring_pending": h.status.get("ring_pending", 0),
+                "ring_dropped": h.status.get("ring_dropped", 0),
+                "resyncs": h.resyncs,
+                "tasks": sum(h.status.get("tasks", {}).values()),
+            } for wid, h in self._workers.items()
+        }
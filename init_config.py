@@ -11,7 +11,24 @@ DEFAULT_SETTINGS = {
     "investment_usdt": 20.0,
     "wall_ratio_threshold": 25.0,
     "min_wall_value_usdt": 50000.0,
-    "vol_ema_alpha": 0.018955904607758676
+    "vol_ema_alpha": 0.018955904607758676,
+    "risk": {
+        "enabled": True,
+        "max_order_notional": 100.0,
+        "max_symbol_notional": 150.0,
+        "max_total_notional": 400.0,
+        "max_open_positions": 3,
+        "price_band_pct": 1.0,
+        "max_orders_per_sec": 10.0,
+        "max_symbol_orders_per_sec": 3.0,
+        "max_daily_loss": 50.0
+    },
+    "rotation": {
+        "hysteresis_pct": 20.0,
+        "switch_penalty": 0.1,
+        "min_tenure_sec": 1800.0,
+        "score_ema_alpha": 0.5
+    }
 }
 
 def init():
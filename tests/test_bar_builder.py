@@ -0,0 +1,93 @@
+"""
+Потоковые бары BarBuilder против свечей, собранных из тех же принтов (как их отдает REST).
+NATR из баров заменяет REST-свечи для TP и сканера ротации, поэтому OHLCV и ATR должны совпадать.
+hft_core не требуется:
+    python -m pytest tests/test_bar_builder.py
+"""
+import os
+import random
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hft_strategy.infrastructure.bar_builder import BarBuilder, NATR_INTERVAL_SEC, NATR_PERIOD
+
+SYMBOL = "TESTUSDT"
+INTERVAL_MS = NATR_INTERVAL_SEC * 1000
+BARS = NATR_PERIOD + 6
+
+def _prints(rng):
+    """Пачки принтов (как одно сообщение publicTrade), в каждом интервале есть сделки."""
+    price, ts = 100.0, 1_700_000_000_000 - 1_700_000_000_000 % INTERVAL_MS
+    out = []
+    end = ts + BARS * INTERVAL_MS
+    while ts < end:
+        for _ in range(rng.randint(1, 6)):
+            price = max(1.0, price + rng.gauss(0.0, 0.15))
+            out.append(SimpleNamespace(symbol=SYMBOL, price=round(price, 2), qty=rng.uniform(0.01, 2.0),
+                                       timestamp=ts, side=rng.choice(("Buy", "Sell"))))
+        ts += rng.randint(200, 8_000)
+    # Принт следующего интервала закрывает последний полный бар
+    out.append(SimpleNamespace(symbol=SYMBOL, price=price, qty=0.1, timestamp=end, side="Buy"))
+    return out
+
+def _klines(prints):
+    """Свечи REST: от новых к старым, ключи t/o/h/l/c/v; последняя (незакрытая) отброшена."""
+    candles = {}
+    for p in prints:
+        start = p.timestamp - p.timestamp % INTERVAL_MS
+        k = candles.get(start)
+        if k is None:
+            candles[start] = {"t": start, "o": p.price, "h": p.price, "l": p.price, "c": p.price, "v": p.qty}
+        else:
+            k["h"], k["l"], k["c"] = max(k["h"], p.price), min(k["l"], p.price), p.price
+            k["v"] += p.qty
+    closed = sorted(candles.values(), key=lambda k: k["t"])[:-1]
+    return closed[::-1]
+
+def _rest_atr(klines, period):
+    """Формула MarketAnalytics._rest_natr по period последним закрытым свечам."""
+    trs = []
+    for curr, prev in zip(klines[:period], klines[1:period + 1]):
+        trs.append(max(curr["h"] - curr["l"], abs(curr["h"] - prev["c"]), abs(curr["l"] - prev["c"])))
+    return sum(trs) / len(trs)
+
+def test_streamed_bars_match_klines():
+    rng = random.Random(11)
+    prints = _prints(rng)
+    bars = BarBuilder()
+    for p in prints:
+        bars.on_trade(p)
+
+    klines = _klines(prints)
+    series = bars.series(SYMBOL)
+    streamed = series.bars()[::-1]
+    assert len(streamed) == len(klines) == BARS
+
+    for bar, k in zip(streamed, klines):
+        assert bar.start_ms == k["t"]
+        assert (bar.open, bar.high, bar.low, bar.close) == (k["o"], k["h"], k["l"], k["c"])
+        assert abs(bar.volume - k["v"]) < 1e-9
+
+    expected = _rest_atr(klines, NATR_PERIOD)
+    assert abs(series.atr() - expected) < 1e-9
+    assert abs(series.natr() - expected / series.last_close * 100) < 1e-9
+
+def test_dropping_prints_biases_natr_low():
+    """Только первый принт каждой пачки (старый парсер): бары теряют экстремумы и NATR занижен."""
+    rng = random.Random(11)
+    prints = _prints(rng)
+    full, first_only = BarBuilder(), BarBuilder()
+    seen_ts = set()
+    for p in prints:
+        full.on_trade(p)
+        if p.timestamp not in seen_ts:
+            seen_ts.add(p.timestamp)
+            first_only.on_trade(p)
+    assert first_only.natr(SYMBOL) < full.natr(SYMBOL)
+
+if __name__ == "__main__":
+    test_streamed_bars_match_klines()
+    test_dropping_prints_biases_natr_low()
+    print("✅ streamed bars == klines")
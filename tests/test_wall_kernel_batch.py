@@ -0,0 +1,124 @@
+"""
+Пакетный шаг ядра стен (wall_step_batch) против пошагового wall_step по каждому символу.
+Нужны только numpy и numba (hft_core не требуется):
+    python -m pytest tests/test_wall_kernel_batch.py
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hft_strategy.strategies import wall_kernel as wk
+
+SYMBOLS = 32
+BOOK_TICKS = 400
+STEPS = 300
+TICK = 0.01
+
+def _levels(book, best, direction, anchor, n):
+    """Непустые уровни от лучшего вглубь — независимо от wk.book_levels."""
+    idx = np.arange(best, -1, -1) if direction < 0 else np.arange(best, len(book))
+    idx = idx[book[idx] > 0][:n]
+    return (anchor + idx) * TICK, book[idx].copy()
+
+def _zone(book, anchor, wall_price):
+    c = int(round(wall_price / TICK)) - anchor
+    lo, hi = max(c - wk.WALL_ZONE_TICKS, 0), min(c + wk.WALL_ZONE_TICKS + 1, len(book))
+    return float(book[lo:hi].max()) if hi > lo else 0.0
+
+def _random_books(rng, mid):
+    """Биды ниже mid, аски от mid + 1; редкие крупные уровни дают стены."""
+    bids = np.zeros(BOOK_TICKS)
+    asks = np.zeros(BOOK_TICKS)
+    depth = rng.integers(5, 40)
+    bids[mid - depth:mid + 1] = rng.exponential(1.0, depth + 1) * (rng.random(depth + 1) > 0.3)
+    asks[mid + 1:mid + 2 + depth] = rng.exponential(1.0, depth + 1) * (rng.random(depth + 1) > 0.3)
+    for book, lo, hi in ((bids, mid - 5, mid + 1), (asks, mid + 1, mid + 7)):
+        if rng.random() < 0.4:
+            book[rng.integers(lo, hi)] = rng.uniform(20.0, 80.0)
+    bids[mid] = max(bids[mid], 0.5)
+    asks[mid + 1] = max(asks[mid + 1], 0.5)
+    return bids, asks
+
+def test_batch_matches_per_symbol_step():
+    rng = np.random.default_rng(7)
+    width = wk.BACKGROUND_LEVELS + 1
+
+    params = np.stack([
+        wk.make_params(rng.uniform(3.0, 8.0), 0.0, rng.uniform(0.05, 0.5), TICK, rng.integers(1, 10),
+                       scan_levels=int(rng.integers(1, 8)))
+        for _ in range(SYMBOLS)
+    ])
+    batch_states = np.zeros((SYMBOLS, wk.STATE_SIZE))
+    ref_states = np.zeros((SYMBOLS, wk.STATE_SIZE))
+    bid_books = np.zeros((SYMBOLS, BOOK_TICKS))
+    ask_books = np.zeros((SYMBOLS, BOOK_TICKS))
+    anchor = rng.integers(10_000, 20_000, SYMBOLS)
+
+    fsm = np.full(SYMBOLS, wk.FSM_IDLE, dtype=np.int64)
+    side = np.zeros(SYMBOLS, dtype=np.int64)
+    wall_price = np.zeros(SYMBOLS)
+    entry_price = np.zeros(SYMBOLS)
+    elapsed = np.zeros(SYMBOLS)
+    mids = rng.integers(BOOK_TICKS // 3, 2 * BOOK_TICKS // 3, SYMBOLS)
+
+    compared = {a: 0 for a in range(wk.ACT_EXIT + 1)}
+    for _ in range(STEPS):
+        # Обновилась случайная часть символов, порядок строк в пачке — произвольный
+        rows = rng.permutation(SYMBOLS)[:rng.integers(1, SYMBOLS + 1)].astype(np.int64)
+        best_bid_i = np.empty(len(rows), dtype=np.int64)
+        best_ask_i = np.empty(len(rows), dtype=np.int64)
+        for i, r in enumerate(rows):
+            mids[r] = np.clip(mids[r] + rng.integers(-2, 3), 50, BOOK_TICKS - 50)
+            bid_books[r], ask_books[r] = _random_books(rng, mids[r])
+            best_bid_i[i], best_ask_i[i] = mids[r], mids[r] + 1
+
+        out = np.zeros((len(rows), 3), dtype=np.int64)
+        out_f = np.zeros((len(rows), 3))
+        wk.wall_step_batch(batch_states, params, rows, bid_books, ask_books, best_bid_i, best_ask_i,
+                           anchor[rows], fsm[rows], side[rows], wall_price[rows], entry_price[rows],
+                           elapsed[rows], out, out_f)
+
+        for i, r in enumerate(rows):
+            n = max(width, int(params[r, wk.P_SCAN_LEVELS]))
+            bid_px, bid_qty = _levels(bid_books[r], best_bid_i[i], -1, anchor[r], n)
+            ask_px, ask_qty = _levels(ask_books[r], best_ask_i[i], 1, anchor[r], n)
+            bg = wk.background_from_levels(bid_qty[:width], ask_qty[:width])
+            zone = 0.0
+            if fsm[r] == wk.FSM_ORDER_PLACED:
+                zone = _zone(bid_books[r] if side[r] > 0 else ask_books[r], anchor[r], wall_price[r])
+            expected = wk.wall_step(ref_states[r], params[r], fsm[r], bid_px[0], ask_px[0],
+                                    bid_px, bid_qty, ask_px, ask_qty, bg,
+                                    side[r], wall_price[r], entry_price[r], zone, elapsed[r])
+
+            assert tuple(out[i]) == tuple(expected), f"row {r}: batch {tuple(out[i])} != step {expected}"
+            assert np.array_equal(batch_states[r], ref_states[r]), f"row {r}: state diverged"
+            assert np.allclose(out_f[i], (bid_px[0], ask_px[0], zone))
+            compared[expected[0]] += 1
+
+            # Простая FSM сделки, чтобы пройти и ветки ордера / позиции
+            action, sig_side = expected[0], expected[1]
+            if action == wk.ACT_ENTER:
+                fsm[r], side[r] = wk.FSM_ORDER_PLACED, sig_side
+                wall_price[r] = batch_states[r, wk.S_WALL_PRICE]
+                entry_price[r] = wall_price[r] + sig_side * TICK
+                elapsed[r] = 0.0
+            elif fsm[r] == wk.FSM_ORDER_PLACED:
+                if action == wk.ACT_CANCEL_ENTRY:
+                    fsm[r] = wk.FSM_IDLE
+                elif rng.random() < 0.3:
+                    fsm[r] = wk.FSM_IN_POSITION
+                else:
+                    elapsed[r] += rng.uniform(0.0, 10.0)
+            elif action == wk.ACT_EXIT:
+                fsm[r] = wk.FSM_IDLE
+
+    # Прогон должен покрыть вход, отмену и выход, иначе сравнивать нечего
+    for action in (wk.ACT_STAGE, wk.ACT_ENTER, wk.ACT_CANCEL_ENTRY, wk.ACT_EXIT):
+        assert compared[action] > 0, f"action {action} never produced"
+
+if __name__ == "__main__":
+    test_batch_matches_per_symbol_step()
+    print("✅ wall_step_batch == wall_step")